@@ -0,0 +1,3 @@
+"""
+Shared App Store Connect API helpers used by the scripts in this directory
+"""
@@ -0,0 +1,321 @@
+"""
+Optional background agent serving CLI commands over a Unix socket
+
+Every `asc` process starts from nothing: interpreter, imports, key parsing,
+a TLS handshake and ID resolution. With ASC_AGENT=1 the CLI hands one-shot
+commands to a long-lived `asc agent` process instead. The agent keeps the
+token cache, the pooled connections, the ID cache and the build states
+`asc status` reads in memory, and runs each command on its own thread with
+stdout and stderr captured for that request. The thin client starts the
+agent on first use and runs the command itself whenever the agent cannot be
+reached.
+
+One JSON line per connection, answered with one JSON line:
+
+    {"op": "run", "argv": [...], "identity": {...}}  -> {"status", "stdout", "stderr"}
+    {"op": "stats"}                                   -> pid, uptime, requests, API stats
+    {"op": "stop"}
+
+The agent only runs commands for clients whose ASC_* environment matches
+its own; anyone else runs directly. Streaming commands (watch, batch,
+--webhook, dashboard --watch, testflight --wait/--run), timeline and
+artifacts (they write files relative to the caller's directory), flags that report
+on the process (--stats, --profile, --trace, --metrics-file) and
+--offline always run directly. A request that reached the agent is never
+repeated directly, so a trigger is not sent twice. The agent exits after
+ASC_AGENT_IDLE_TIMEOUT seconds without requests; one flock(2)-held lock
+file keeps it to one agent per cache directory.
+"""
+import contextlib
+import contextvars
+import fcntl
+import io
+import json
+import os
+import socket
+import socketserver
+import sys
+import threading
+import time
+import traceback
+from pathlib import Path
+
+from . import config
+
+RUN = 'run'
+STATS = 'stats'
+STOP = 'stop'
+
+DIRECT_COMMANDS = frozenset({'agent', 'watch', 'batch', 'timeline', 'artifacts'})
+DIRECT_FLAGS = frozenset({'-h', '--help', '--watch', '--webhook', '--wait', '--run', '--stats', '--profile',
+                          '--trace', '--metrics-file', '--offline'})
+
+
+class AgentError(Exception):
+    """The agent took a request but gave no answer; the command may or may not have run"""
+
+
+def socket_path():
+    return Path(config.AGENT_SOCKET) if config.AGENT_SOCKET else config.CACHE_DIR / 'agent.sock'
+
+
+def identity(environ=None):
+    """The ASC_* settings a command runs under; agent and client must agree on them"""
+    environ = os.environ if environ is None else environ
+    return {name: value for name, value in sorted(environ.items())
+            if name.startswith('ASC_') and not name.startswith('ASC_AGENT')}
+
+
+def eligible(argv, environ=None):
+    """Whether `asc argv` may run in the agent"""
+    environ = os.environ if environ is None else environ
+    command = next((arg for arg in argv if not arg.startswith('-')), None)
+    if command is None or command in DIRECT_COMMANDS:
+        return False
+    if any(arg.split('=', 1)[0] in DIRECT_FLAGS for arg in argv):
+        return False
+    return not (environ.get('ASC_TRACE_FILE') or environ.get('ASC_METRICS_FILE'))
+
+
+# -- agent --------------------------------------------------------------------
+
+# (stdout, stderr) buffers of the request the current thread is serving
+_output = contextvars.ContextVar('asc_agent_output', default=None)
+
+
+class _Routed:
+    """sys.stdout/sys.stderr stand-in that writes to the current request's buffer"""
+
+    def __init__(self, stream, index):
+        self.stream = stream
+        self.index = index
+
+    def _target(self):
+        buffers = _output.get()
+        return buffers[self.index] if buffers else self.stream
+
+    def write(self, text):
+        return self._target().write(text)
+
+    def flush(self):
+        self._target().flush()
+
+    def isatty(self):
+        return _output.get() is None and self.stream.isatty()
+
+    def __getattr__(self, name):
+        return getattr(self.stream, name)
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    def handle(self):
+        agent = self.server.agent
+        with agent.busy():
+            try:
+                request = json.loads(self.rfile.readline())
+            except ValueError:
+                response = {'error': 'malformed request'}
+            else:
+                response = agent.handle(request)
+            self.wfile.write(json.dumps(response, ensure_ascii=False).encode() + b'\n')
+
+
+class _Server(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+class Agent:
+    """Runs CLI commands sent over the socket, inside one long-lived process"""
+
+    def __init__(self, path=None, run=None, idle_timeout=None, environ=None):
+        self.path = Path(path or socket_path())
+        self.run_command = run
+        self.idle_timeout = config.AGENT_IDLE_TIMEOUT if idle_timeout is None else idle_timeout
+        self.identity = identity(environ)
+        self.started = time.time()
+        self.served = 0
+        self.last_request = time.monotonic()
+        self.active = 0
+        self._lock = threading.Lock()
+        self._stopping = threading.Event()
+
+    @contextlib.contextmanager
+    def busy(self):
+        with self._lock:
+            self.active += 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                self.active -= 1
+                self.last_request = time.monotonic()
+
+    def handle(self, request):
+        op = request.get('op')
+        if op == STATS:
+            return self.stats()
+        if op == STOP:
+            self._stopping.set()
+            return {'stopping': True}
+        if op != RUN:
+            return {'error': f'unknown op {op!r}'}
+        if request.get('identity') != self.identity:
+            return {'error': 'identity'}
+
+        with self._lock:
+            self.served += 1
+        stdout, stderr = io.StringIO(), io.StringIO()
+        token = _output.set((stdout, stderr))
+        try:
+            status = self._run(request['argv'])
+        finally:
+            _output.reset(token)
+        return {'status': status, 'stdout': stdout.getvalue(), 'stderr': stderr.getvalue()}
+
+    def _run(self, argv):
+        run = self.run_command
+        if run is None:
+            from .cli import run
+        try:
+            return run(argv) or 0
+        except SystemExit as e:
+            # argparse errors and --help
+            return e.code if isinstance(e.code, int) else (0 if e.code is None else 1)
+        except Exception:
+            traceback.print_exc()
+            return 1
+
+    def stats(self):
+        from .client import get_client
+
+        api = get_client().stats()
+        return {
+            'pid': os.getpid(),
+            'uptime': round(time.time() - self.started, 1),
+            'served': self.served,
+            'active': self.active,
+            'idle_timeout': self.idle_timeout,
+            'requests': api['requests'],
+            'bytes_received': api['bytes_received'],
+            'tokens': api['tokens'],
+        }
+
+    def _idle(self):
+        with self._lock:
+            return self.active == 0 and time.monotonic() - self.last_request >= self.idle_timeout
+
+    def serve(self, ready=None):
+        """Serve until stopped or idle; returns False at once if another agent owns this socket"""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        lock = open(self.path.with_name(self.path.name + '.lock'), 'w')
+        try:
+            fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            lock.close()
+            return False
+
+        # Holding the lock, any socket file left behind is a dead agent's
+        with contextlib.suppress(FileNotFoundError):
+            self.path.unlink()
+        # The socket runs commands with the user's key: owner only, from the start
+        umask = os.umask(0o077)
+        try:
+            server = _Server(str(self.path), _Handler)
+        finally:
+            os.umask(umask)
+        server.agent = self
+        server.timeout = 0.5
+        stdout, stderr = sys.stdout, sys.stderr
+        sys.stdout, sys.stderr = _Routed(stdout, 0), _Routed(stderr, 1)
+        try:
+            if ready is not None:
+                ready.set()
+            while not self._stopping.is_set() and not self._idle():
+                server.handle_request()
+        finally:
+            sys.stdout, sys.stderr = stdout, stderr
+            server.server_close()
+            with contextlib.suppress(FileNotFoundError):
+                self.path.unlink()
+            lock.close()
+        return True
+
+    def stop(self):
+        self._stopping.set()
+
+
+# -- thin client --------------------------------------------------------------
+
+def _connect(path, timeout):
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.settimeout(timeout)
+    try:
+        sock.connect(str(path))
+    except OSError:
+        sock.close()
+        raise
+    return sock
+
+
+def _exchange(sock, message):
+    try:
+        sock.sendall(json.dumps(message).encode() + b'\n')
+        data = b''.join(iter(lambda: sock.recv(65536), b''))
+    except OSError as e:
+        raise AgentError(f"no answer from the agent: {e}") from e
+    if not data:
+        raise AgentError("the agent closed the connection without answering")
+    return json.loads(data)
+
+
+def request(message, path=None, timeout=5.0):
+    """Send one message to a running agent; OSError if none is listening"""
+    with _connect(path or socket_path(), timeout) as sock:
+        return _exchange(sock, message)
+
+
+def spawn(path=None):
+    """Start `asc agent` in the background and wait until it accepts connections"""
+    import subprocess
+
+    path = Path(path or socket_path())
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path.with_name(path.name + '.log'), 'a') as log:
+        subprocess.Popen(
+            [sys.executable, '-m', 'asc', 'agent'], cwd=Path(__file__).resolve().parent.parent,
+            env={**os.environ, 'ASC_AGENT_SOCKET': str(path)},
+            stdin=subprocess.DEVNULL, stdout=log, stderr=log, start_new_session=True,
+        )
+    deadline = time.monotonic() + config.AGENT_SPAWN_TIMEOUT
+    while time.monotonic() < deadline:
+        try:
+            _connect(path, 1.0).close()
+            return True
+        except OSError:
+            time.sleep(0.02)
+    return False
+
+
+def call(argv, path=None, autostart=True):
+    """Run `asc argv` in the agent: (status, stdout, stderr), or None to run it directly
+
+    Raises AgentError if the request was sent but not answered; it must not
+    simply be run again.
+    """
+    path = Path(path or socket_path())
+    message = {'op': RUN, 'argv': list(argv), 'identity': identity()}
+    try:
+        sock = _connect(path, config.AGENT_TIMEOUT)
+    except OSError:
+        if not autostart or not spawn(path):
+            return None
+        try:
+            sock = _connect(path, config.AGENT_TIMEOUT)
+        except OSError:
+            return None
+    with sock:
+        response = _exchange(sock, message)
+    if 'error' in response:
+        # Nothing ran: a different environment, or an agent that does not understand us
+        return None
+    return response['status'], response['stdout'], response['stderr']
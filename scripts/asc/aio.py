@@ -0,0 +1,76 @@
+"""
+asyncio front end for the pooled App Store Connect client
+
+Independent requests (one `scmRepositories/{id}` per workflow, one
+`workflows` per product, ...) are issued concurrently under a semaphore
+instead of one after another. Requests still go through the shared
+`Client`, so they reuse its token cache and connection pool; each one runs
+in a worker thread so the event loop never blocks on a socket.
+"""
+import asyncio
+
+from .client import Client, get_client
+
+DEFAULT_CONCURRENCY = 8
+
+
+class AsyncClient:
+    """Bounded-concurrency wrapper around a `Client`"""
+
+    def __init__(self, client=None, concurrency=DEFAULT_CONCURRENCY):
+        if client is None:
+            client = get_client()
+        # More in-flight requests than pooled connections would just open
+        # throwaway connections, so size the pool to the fan-out. close() folds
+        # the wider client's counts back into the one it was made from
+        self._parent = None
+        if client.pool_size < concurrency:
+            self._parent = client
+            client = Client(base_url=client.base_url, token_provider=client.tokens,
+                            rate_limiter=client.limiter, priority=client.priority, retry=client.retry,
+                            cassette=client.cassette, response_cache=client.response_cache or False,
+                            pool_size=concurrency)
+            client.cache_volatile = self._parent.cache_volatile
+        self.client = client
+        self.concurrency = concurrency
+        self._semaphore = None
+        self._loop = None
+
+    @property
+    def semaphore(self):
+        # Created lazily, and again per asyncio.run(), so it binds to the loop that is actually running
+        loop = asyncio.get_running_loop()
+        if self._semaphore is None or self._loop is not loop:
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+            self._loop = loop
+        return self._semaphore
+
+    async def request(self, method, endpoint, **kwargs):
+        return await self.call(self.client.request, method, endpoint, **kwargs)
+
+    async def call(self, func, *args, **kwargs):
+        """Run a blocking helper that talks through self.client (e.g. a ConditionalFetcher) under the same bound"""
+        async with self.semaphore:
+            await self.client.tokens.async_token()
+            return await asyncio.to_thread(func, *args, **kwargs)
+
+    async def get(self, endpoint, params=None, **kwargs):
+        return await self.request('GET', endpoint, params=params, **kwargs)
+
+    async def get_many(self, endpoints, params=None):
+        """GET every endpoint concurrently; responses come back in input order"""
+        return await asyncio.gather(*(self.get(endpoint, params) for endpoint in endpoints))
+
+    def close(self):
+        """Close the connections of a client made for a wider fan-out, adding its counts to `--stats`"""
+        if self._parent is not None:
+            self._parent.add_stats(self.client)
+            # The response cache, token provider and limiter belong to the parent
+            self.client.session.close()
+            self._parent = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        self.close()
@@ -0,0 +1,280 @@
+"""
+Listing and downloading Xcode Cloud build artifacts
+
+Logs, xcresult bundles and archives (`ciArtifacts`) hang off each build
+action, and each artifact carries a short-lived `downloadUrl` on Apple's
+storage host. `list_artifacts()` reads the actions of every requested run
+and then the artifacts of every action, each stage concurrently through an
+AsyncClient. `Downloader` fetches them on a thread pool of its own
+sessions: the URLs are presigned, so no App Store Connect token, rate-limit
+budget or JSON handling applies to them.
+
+Every file streams in CHUNK_SIZE pieces to `<name>.part` next to its final
+path while its MD5 and SHA-256 are updated, so memory stays flat whatever
+the file size. A dropped connection, or a later run, resumes with
+`Range: bytes=<part size>-` (and `If-Range` on the ETag the part came
+from). A server that answers 200 instead of 206 restarts the file. A
+finished file must match the artifact's fileSize, and the ETag when it is a
+plain MD5, as S3 gives single-part objects. Only then is the part renamed
+into place and recorded in a manifest in the destination directory. Files
+the manifest records with the same size are skipped.
+"""
+import asyncio
+import hashlib
+import json
+import os
+import re
+import threading
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+
+from . import config
+from .aio import DEFAULT_CONCURRENCY, AsyncClient
+from .client import APIError
+from .jsonapi import Document
+from .pager import MAX_PAGE_SIZE, Pager
+from .query import select
+
+ACTION_FIELDS = {'ciBuildActions': ['name', 'actionType']}
+ARTIFACT_FIELDS = {'ciArtifacts': ['fileType', 'fileName', 'fileSize', 'downloadUrl']}
+
+# Small enough that a dropped connection loses little of what had arrived when the read was cut short
+CHUNK_SIZE = 1 << 16
+DEFAULT_WORKERS = 4
+# Attempts per file; each one resumes where the previous one stopped
+ATTEMPTS = 3
+MANIFEST = '.asc-artifacts.json'
+
+DOWNLOADED = 'downloaded'
+RESUMED = 'resumed'
+SKIPPED = 'skipped'
+FAILED = 'failed'
+
+Artifact = namedtuple('Artifact', 'id run_number action file_type file_name file_size url')
+# `bytes` is what this attempt transferred, not the file size
+Result = namedtuple('Result', 'artifact status path bytes detail', defaults=(None,))
+
+
+class Cancelled(Exception):
+    """The Downloader was stopped; the part so far stays for the next run"""
+
+
+_MD5_ETAG = re.compile(r'^"?([0-9a-f]{32})"?$')
+
+
+def _every_page(client, endpoint, params):
+    """Every resource of a collection, following `links.next`; [] if the API refuses it"""
+    try:
+        return list(Pager(endpoint, params, client=client, prefetch=False))
+    except APIError:
+        return []
+
+
+def list_artifacts(runs, client=None, concurrency=DEFAULT_CONCURRENCY, file_types=None):
+    """[Artifact] of every action of `runs` (rows or dicts with `id` and `number`), run by run"""
+    async def gather():
+        async with AsyncClient(client, concurrency=concurrency) as api:
+            return await listing(api)
+
+    async def listing(api):
+        responses = await api.get_many([f"ciBuildRuns/{run['id']}/actions" for run in runs],
+                                       select(ACTION_FIELDS, limit=MAX_PAGE_SIZE))
+        actions = [(run, action) for run, response in zip(runs, responses) if response.status_code == 200
+                   for action in Document.from_response(response)]
+        listings = await asyncio.gather(*(
+            api.call(_every_page, api.client, f'ciBuildActions/{action.id}/artifacts', select(ARTIFACT_FIELDS))
+            for _, action in actions))
+        return [
+            Artifact(artifact.id, run['number'], action.get('name') or action.get('actionType'),
+                     artifact.get('fileType'), artifact.get('fileName'), artifact.get('fileSize'),
+                     artifact.get('downloadUrl'))
+            for (run, action), listing in zip(actions, listings)
+            for artifact in listing
+            if not file_types or artifact.get('fileType') in file_types
+        ]
+
+    return asyncio.run(gather())
+
+
+def _safe(name):
+    """A path component from an API-supplied name"""
+    return re.sub(r'[/\\\x00]', '_', name or '').lstrip('.') or '_'
+
+
+def file_digests(path, chunk_size=CHUNK_SIZE):
+    """(md5, sha256) hash objects fed with the file's current contents"""
+    md5, sha256 = hashlib.md5(), hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            md5.update(chunk)
+            sha256.update(chunk)
+    return md5, sha256
+
+
+class Manifest:
+    """{relative path: {size, sha256, etag}} of finished files, rewritten atomically"""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        try:
+            with open(path) as f:
+                self.entries = json.load(f)
+        except (FileNotFoundError, ValueError):
+            self.entries = {}
+
+    def get(self, name):
+        with self._lock:
+            return self.entries.get(name)
+
+    def record(self, name, **entry):
+        with self._lock:
+            self.entries[name] = entry
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.path.with_name(f'{self.path.name}.{os.getpid()}.tmp')
+            tmp.write_text(json.dumps(self.entries, indent=1, sort_keys=True))
+            os.replace(tmp, self.path)
+
+
+class Downloader:
+    """Fetches artifacts concurrently into `dest`/<run>/<action>/<file>, resuming partial files"""
+
+    def __init__(self, dest, workers=DEFAULT_WORKERS, chunk_size=CHUNK_SIZE, session=None, attempts=ATTEMPTS):
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        self.dest = Path(dest)
+        self.workers = workers
+        self.chunk_size = chunk_size
+        self.attempts = attempts
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=workers, pool_maxsize=workers)
+            session.mount('https://', adapter)
+            session.mount('http://', adapter)
+            # Byte offsets must be those of the stored file, not of a decoded stream
+            session.headers['Accept-Encoding'] = 'identity'
+        self.session = session
+        self.timeout = (config.CONNECT_TIMEOUT, config.READ_TIMEOUT)
+        self.manifest = Manifest(self.dest / MANIFEST)
+        self._stopped = threading.Event()
+
+    def path_for(self, artifact):
+        return self.dest / str(artifact.run_number) / _safe(artifact.action) / _safe(artifact.file_name)
+
+    def _name(self, path):
+        return path.relative_to(self.dest).as_posix()
+
+    def download(self, artifact):
+        """Fetch one artifact, unless it is already in place: a Result"""
+        from requests import HTTPError
+
+        path = self.path_for(artifact)
+        entry = self.manifest.get(self._name(path))
+        if entry and path.exists() and path.stat().st_size == entry['size'] == artifact.file_size:
+            return Result(artifact, SKIPPED, path, 0)
+        if not artifact.url:
+            return Result(artifact, FAILED, path, 0, "no downloadUrl")
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        part = path.with_name(path.name + '.part')
+        progress = [0]
+        resumed = part.exists() and part.stat().st_size > 0
+        error = digests = None
+        for _ in range(self.attempts):
+            try:
+                digests = self._fetch(artifact, part, progress)
+                error = None
+                break
+            except HTTPError as e:
+                # An expired or revoked URL does not get better by asking again
+                return Result(artifact, FAILED, path, progress[0], str(e))
+            except OSError as e:
+                # requests' connection and chunked-encoding errors are IOErrors too
+                error = e
+                resumed = resumed or (part.exists() and part.stat().st_size > 0)
+        if error is not None:
+            return Result(artifact, FAILED, path, progress[0], f"{type(error).__name__}: {error}")
+        return self._finish(artifact, part, path, digests, progress[0], resumed)
+
+    def _fetch(self, artifact, part, progress):
+        """Bring `part` up to the whole file, adding bytes written to progress[0]; (md5, sha256) of it"""
+        offset = part.stat().st_size if part.exists() else 0
+        etag_file = part.with_name(part.name + '.etag')
+        headers = {}
+        if offset:
+            if artifact.file_size is not None and offset >= artifact.file_size:
+                return file_digests(part, self.chunk_size)
+            headers['Range'] = f'bytes={offset}-'
+            if etag_file.exists():
+                headers['If-Range'] = etag_file.read_text()
+
+        with self.session.get(artifact.url, headers=headers, stream=True, timeout=self.timeout) as response:
+            if response.status_code == 416:
+                return file_digests(part, self.chunk_size)
+            response.raise_for_status()
+            if response.status_code != 206 or not response.headers.get('Content-Range', '').startswith(
+                    f'bytes {offset}-'):
+                # The whole file again (changed, or no range support): start over
+                offset = 0
+            if response.headers.get('ETag'):
+                etag_file.write_text(response.headers['ETag'])
+            # A resumed file's hashes start from the part already on disk, read once
+            md5, sha256 = file_digests(part, self.chunk_size) if offset else (hashlib.md5(), hashlib.sha256())
+            with open(part, 'r+b' if offset else 'wb') as f:
+                f.seek(offset)
+                f.truncate()
+                for chunk in response.iter_content(self.chunk_size):
+                    if self._stopped.is_set():
+                        raise Cancelled(artifact.file_name)
+                    f.write(chunk)
+                    md5.update(chunk)
+                    sha256.update(chunk)
+                    progress[0] += len(chunk)
+        return md5, sha256
+
+    def _finish(self, artifact, part, path, digests, transferred, resumed):
+        etag_file = part.with_name(part.name + '.etag')
+        etag = etag_file.read_text() if etag_file.exists() else None
+        size = part.stat().st_size
+        if artifact.file_size is not None and size != artifact.file_size:
+            # The transfer itself completed: the host has other content than listed, resuming won't fix it
+            part.unlink()
+            etag_file.unlink(missing_ok=True)
+            return Result(artifact, FAILED, path, transferred, f"size {size} != {artifact.file_size}")
+        md5, sha256 = digests
+        expected = _MD5_ETAG.match(etag or '')
+        if expected and expected.group(1) != md5.hexdigest():
+            part.unlink()
+            etag_file.unlink(missing_ok=True)
+            return Result(artifact, FAILED, path, transferred, f"MD5 {md5.hexdigest()} != ETag {etag}")
+        os.replace(part, path)
+        etag_file.unlink(missing_ok=True)
+        self.manifest.record(self._name(path), size=size, sha256=sha256.hexdigest(), etag=etag,
+                             artifact_id=artifact.id)
+        return Result(artifact, RESUMED if resumed else DOWNLOADED, path, transferred)
+
+    def download_all(self, artifacts):
+        """Yield a Result per artifact as each finishes, `workers` at a time
+
+        Interrupting the caller (Ctrl+C, or closing the generator) drops the
+        queued downloads and stops those in flight at their next chunk.
+        """
+        pool = ThreadPoolExecutor(max_workers=self.workers)
+        futures = [pool.submit(self.download, artifact) for artifact in artifacts]
+        try:
+            for future in as_completed(futures):
+                yield future.result()
+        except (KeyboardInterrupt, GeneratorExit):
+            self.stop()
+            raise
+        finally:
+            pool.shutdown(cancel_futures=True)
+
+    def stop(self):
+        """Have downloads in flight stop at their next chunk"""
+        self._stopped.set()
+
+    def close(self):
+        self.session.close()
@@ -0,0 +1,149 @@
+"""
+Cached JWT token provider for the App Store Connect API
+
+The private key is read and parsed once per process and the signed token is
+reused until it is close to its `exp`, so a watch loop signs roughly once
+every 20 minutes instead of once per HTTP call.
+"""
+import threading
+import time
+
+from . import config, trace
+
+# Re-sign this many seconds before the token actually expires, so a request
+# that is in flight when we hand out the token does not arrive with a dead one
+REFRESH_MARGIN = 60
+
+
+class TokenProvider:
+    """Thread-safe cache around a single signed ES256 token"""
+
+    def __init__(self, key_file=None, key_id=None, issuer_id=None,
+                 lifetime=config.TOKEN_LIFETIME, refresh_margin=REFRESH_MARGIN,
+                 clock=time.time):
+        self.key_file = key_file or config.KEY_FILE
+        self.key_id = key_id or config.KEY_ID
+        self.issuer_id = issuer_id or config.ISSUER_ID
+        self.lifetime = lifetime
+        self.refresh_margin = refresh_margin
+        self.clock = clock
+
+        self._lock = threading.Lock()
+        self._key = None
+        self._token = None
+        self._expires_at = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.resigns = 0
+        self.key_loads = 0
+
+    def _load_key(self):
+        """Read and parse the .p8 key, once"""
+        if self._key is None:
+            # Imported here: cryptography costs ~50 ms, and cached answers never sign
+            from cryptography.hazmat.primitives import serialization
+
+            with trace.span('key_load'), open(self.key_file, 'rb') as f:
+                self._key = serialization.load_pem_private_key(f.read(), password=None)
+            self.key_loads += 1
+        return self._key
+
+    def _sign(self, now):
+        expires_at = int(now) + self.lifetime
+        key = self._load_key()
+        import jwt
+
+        with trace.span('jwt_sign'):
+            token = jwt.encode(
+                {'iss': self.issuer_id, 'exp': expires_at, 'aud': config.AUDIENCE},
+                key, algorithm='ES256',
+                headers={'kid': self.key_id, 'typ': 'JWT'}
+            )
+        if self._token is not None:
+            self.resigns += 1
+        self._token = token
+        self._expires_at = expires_at
+
+    def _is_fresh(self, now):
+        return self._token is not None and now < self._expires_at - self.refresh_margin
+
+    def token(self):
+        """Return a valid token, signing a new one only when needed"""
+        # Reading two attributes without the lock is safe: a stale read only
+        # sends us down the locked slow path
+        if self._is_fresh(self.clock()):
+            self.hits += 1
+            return self._token
+
+        with self._lock:
+            now = self.clock()
+            if self._is_fresh(now):
+                self.hits += 1
+            else:
+                self.misses += 1
+                self._sign(now)
+            return self._token
+
+    async def async_token(self):
+        """Same as token(), but signs off the event loop when a signature is needed"""
+        if self._is_fresh(self.clock()):
+            self.hits += 1
+            return self._token
+        import asyncio
+
+        return await asyncio.to_thread(self.token)
+
+    def invalidate(self):
+        """Drop the cached token; Client.request() does this when the API answers 401"""
+        with self._lock:
+            self._token = None
+            self._expires_at = 0
+
+    def stats(self):
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'resigns': self.resigns,
+            'key_loads': self.key_loads,
+            'expires_in': max(0, int(self._expires_at - self.clock())),
+        }
+
+
+_default_provider = None
+_default_lock = threading.Lock()
+
+
+class StaticTokenProvider:
+    """Fixed token for traffic that is never sent to Apple (cassette replay)"""
+
+    def __init__(self, token='replay', key_id=None):
+        self._token = token
+        self.key_id = key_id or config.KEY_ID
+
+    def token(self):
+        return self._token
+
+    async def async_token(self):
+        return self._token
+
+    def invalidate(self):
+        pass
+
+    def stats(self):
+        return {'hits': 0, 'misses': 0, 'resigns': 0, 'key_loads': 0, 'expires_in': 0}
+
+
+def get_provider():
+    """Process-wide provider shared by every script and client"""
+    global _default_provider
+    if _default_provider is None:
+        with _default_lock:
+            if _default_provider is None:
+                _default_provider = TokenProvider()
+    return _default_provider
+
+
+def generate_token():
+    """Generate JWT token for App Store Connect API"""
+    return get_provider().token()
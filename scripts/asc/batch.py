@@ -0,0 +1,232 @@
+"""
+Batch triggers: a matrix of workflows × branches/tags started in one go
+
+Before a release every (workflow, branch) pair used to be a separate
+`trigger_build.py` process, each resolving products and workflows again.
+`BatchTrigger` resolves the workflow list, each workflow's repository and
+each repository's git references once, reads the unfinished runs of every
+workflow concurrently, then submits all ciBuildRuns POSTs concurrently
+through an AsyncClient. Its semaphore bounds the requests in flight, and
+each request still takes a token from the shared hourly rate-limit bucket.
+Results stream as one JSON line per item as soon as each finishes.
+
+Items are deduplicated like the trigger queue (asc.scheduler): a pair that
+already has a PENDING/RUNNING run is reported `coalesced` rather than
+started again. With a journal file, every result is also appended there,
+and items the journal records as triggered or coalesced are skipped, so
+re-running the same batch only retries what failed. The trigger queue's
+lock is held for the whole batch, so a concurrent `asc trigger` waits and
+then sees the new runs. The per-workflow cap of `asc trigger` applies too:
+unfinished runs and triggers already queued for a workflow take its
+`max_concurrent` slots first, and items past them are added to the queue
+and reported `deferred`, for `asc trigger --drain`. An item whose branch
+is already queued is coalesced with it. The batch's minute estimate must
+fit the budget like any other trigger; items past it are refused.
+
+Matrix file (JSON): either the cross product
+
+    {"workflows": ["Default", "Release"], "branches": ["main", "release/2.0"]}
+
+("*" meaning every workflow, "tags" accepted like "branches"), or the pairs
+themselves:
+
+    [{"workflow": "Default", "branch": "main"}, {"workflow": "Release", "tag": "v2.0"}]
+"""
+import asyncio
+import json
+import time
+
+from .aio import DEFAULT_CONCURRENCY, AsyncClient
+from .client import APIError
+from .resolve import ResolutionError
+from .retry import AmbiguousRequestError
+from .scheduler import (COALESCED, DEFERRED, FAILED, OVER_BUDGET, TRIGGERED, UNKNOWN, TriggerScheduler, enqueue,
+                        matches)
+
+SKIPPED = 'skipped'
+# Results a re-run must not repeat
+DONE = frozenset({TRIGGERED, COALESCED, SKIPPED})
+ALL_WORKFLOWS = '*'
+
+
+class MatrixError(ValueError):
+    """A matrix that does not describe (workflow, branch/tag) pairs"""
+
+
+def expand(workflows, refs):
+    """(workflow, ref) pairs of the cross product, in order and without repeats"""
+    return list(dict.fromkeys((workflow, ref) for workflow in workflows for ref in refs))
+
+
+def parse_matrix(data):
+    """(workflow, ref) pairs from a parsed matrix file"""
+    if isinstance(data, dict):
+        workflows = data.get('workflows') or []
+        refs = list(data.get('branches') or []) + list(data.get('tags') or [])
+        if isinstance(workflows, str):
+            workflows = [workflows]
+        if not workflows or not refs:
+            raise MatrixError("a matrix needs `workflows` and `branches` or `tags`")
+        return expand(workflows, refs)
+    if isinstance(data, list):
+        pairs = []
+        for item in data:
+            ref = item.get('branch') or item.get('tag') if isinstance(item, dict) else None
+            if not ref or not item.get('workflow'):
+                raise MatrixError(f"not a workflow/branch pair: {item!r}")
+            pairs.append((item['workflow'], ref))
+        return list(dict.fromkeys(pairs))
+    raise MatrixError("a matrix is an object or a list of pairs")
+
+
+def load_matrix(path):
+    with open(path) as f:
+        return parse_matrix(json.load(f))
+
+
+def read_journal(path):
+    """{item key: last result} from a journal of earlier runs; a missing journal is empty"""
+    results = {}
+    try:
+        with open(path) as f:
+            for line in f:
+                try:
+                    result = json.loads(line)
+                except ValueError:
+                    # A line cut short by an interrupted run
+                    continue
+                results[result['key']] = result
+    except FileNotFoundError:
+        pass
+    return results
+
+
+class BatchTrigger:
+    """Resolves, deduplicates, budgets and submits a matrix of triggers"""
+
+    def __init__(self, scheduler=None, concurrency=DEFAULT_CONCURRENCY, journal=None, emit=None):
+        self.scheduler = scheduler or TriggerScheduler()
+        self.concurrency = concurrency
+        self.journal = journal
+        self._emit = emit or (lambda result: print(json.dumps(result, ensure_ascii=False), flush=True))
+        self.results = []
+        self.seconds = None
+
+    @property
+    def resolver(self):
+        return self.scheduler.resolver
+
+    def emit(self, item, status, run=None, detail=None):
+        result = {**item, 'status': status}
+        if run is not None:
+            result.update(run_id=run['id'], number=run.get('number'))
+        if detail:
+            result['detail'] = detail
+        self.results.append(result)
+        if self.journal is not None:
+            with open(self.journal, 'a') as f:
+                f.write(json.dumps(result, ensure_ascii=False) + '\n')
+        self._emit(result)
+        return result
+
+    def resolve(self, pairs):
+        """Items for the pairs that resolve, once per workflow and ref; the rest are emitted as failed"""
+        workflows = self.resolver.workflows()
+        by_name = {(w['name'] or '').lower(): w for w in workflows}
+        entries = []
+        for name, ref in pairs:
+            if name == ALL_WORKFLOWS:
+                targets = workflows
+            elif name.lower() in by_name:
+                targets = [by_name[name.lower()]]
+            else:
+                self.emit({'key': f'{name}@{ref}', 'workflow': name, 'ref': ref}, FAILED,
+                          detail=f"No workflow named {name!r}")
+                continue
+            for workflow in targets:
+                item = {'key': f"{workflow['id']}@{ref}", 'workflow': workflow['name'],
+                        'workflow_id': workflow['id'], 'ref': ref}
+                try:
+                    self.resolver.git_reference_id(workflow['id'], ref)
+                except (ResolutionError, APIError) as e:
+                    self.emit(item, FAILED, detail=str(e))
+                    continue
+                entries.append(item)
+        return list({item['key']: item for item in entries}.values())
+
+    async def _submit(self, api, item):
+        entry = {'workflow_id': item['workflow_id'], 'branch': item['ref'], 'commit': None}
+        try:
+            run = await api.call(self.scheduler.submit, entry)
+        except AmbiguousRequestError as e:
+            return item, UNKNOWN, None, str(e)
+        except (APIError, ResolutionError) as e:
+            return item, FAILED, None, str(e)
+        return item, TRIGGERED, {'id': run['id'], **run.get('attributes', {})}, None
+
+    async def _run(self, items, queued, committed):
+        async with AsyncClient(self.scheduler.client, concurrency=self.concurrency) as api:
+            await self._trigger(api, items, queued, committed)
+
+    async def _trigger(self, api, items, queued, committed):
+        workflow_ids = list(dict.fromkeys(item['workflow_id'] for item in items))
+        active = dict(zip(workflow_ids, await asyncio.gather(
+            *(api.call(self.scheduler.active_runs, workflow_id) for workflow_id in workflow_ids))))
+        limit = self.scheduler.max_concurrent
+        # Triggers already waiting in the queue are ahead of this batch
+        slots = {workflow_id: limit - len(runs) - sum(entry['workflow_id'] == workflow_id for entry in queued)
+                 for workflow_id, runs in active.items()}
+
+        pending = []
+        for item in items:
+            workflow_id = item['workflow_id']
+            entry = {'branch': item['ref'], 'commit': None}
+            duplicate = next((run for run in active[workflow_id] if matches(run, entry)), None)
+            if duplicate is not None:
+                self.emit(item, COALESCED, {'id': duplicate.id, **duplicate.attributes},
+                          detail=f"#{duplicate.get('number')} is {duplicate.get('executionProgress')}")
+            elif any(e['workflow_id'] == workflow_id and e['branch'] == item['ref'] and not e['commit']
+                     for e in queued):
+                enqueue(queued, workflow_id, item['ref'], now=self.scheduler.clock())
+                self.emit(item, COALESCED, detail="already queued")
+            elif slots[workflow_id] <= 0:
+                enqueue(queued, workflow_id, item['ref'], now=self.scheduler.clock())
+                self.emit(item, DEFERRED, detail=f"{len(active[workflow_id])} runs unfinished, "
+                                                 f"{limit} allowed; queued for `asc trigger --drain`")
+            else:
+                slots[workflow_id] -= 1
+                pending.append(item)
+
+        if pending:
+            accepted = []
+            for item in pending:
+                estimate = self.scheduler.estimate_minutes(item['workflow_id'])
+                if committed + estimate > self.scheduler.budget:
+                    self.emit(item, OVER_BUDGET,
+                              detail=f"{committed:.0f} + ~{estimate:.0f} min > budget {self.scheduler.budget:.0f}")
+                else:
+                    committed += estimate
+                    accepted.append(item)
+            for result in asyncio.as_completed([self._submit(api, item) for item in accepted]):
+                self.emit(*await result)
+
+    def run(self, pairs):
+        """Trigger every (workflow, ref) pair; the emitted results, in completion order"""
+        done = read_journal(self.journal) if self.journal is not None else {}
+        start = time.perf_counter()
+        self.scheduler.sync_history()
+        # Held throughout, so `asc trigger` in another process sees this batch's runs
+        with self.scheduler.queue.locked() as queued:
+            items = []
+            for item in self.resolve(pairs):
+                previous = done.get(item['key'])
+                if previous is not None and previous['status'] in DONE:
+                    self.emit(item, SKIPPED, {'id': previous.get('run_id'), 'number': previous.get('number')},
+                              detail=f"{previous['status']} in an earlier run")
+                else:
+                    items.append(item)
+            if items:
+                committed = self.scheduler.committed_minutes()
+                asyncio.run(self._run(items, queued, committed))
+        self.seconds = time.perf_counter() - start
+        return self.results
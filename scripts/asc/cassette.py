@@ -0,0 +1,146 @@
+"""
+Record/replay of App Store Connect traffic
+
+A cassette is a JSON file of request → response interactions. In
+`record` mode the client's transport adapter passes requests through and
+appends each interaction; in `replay` mode it answers from the file and
+never opens a socket, so scripts and benchmarks run without credentials
+or network:
+
+    ASC_CASSETTE=run.json ASC_CASSETTE_MODE=record python3 scripts/watch_build.py
+    ASC_CASSETTE=run.json python3 scripts/watch_build.py
+
+Requests match on method, path, sorted query and a hash of the body, not
+on host, so a cassette recorded against the real API replays against any
+base URL. Identical requests replay their recordings in order, the last
+one repeating. Authorization headers are never written.
+`asc.stub.routes_from_cassette()` serves a cassette's GETs over HTTP.
+"""
+import hashlib
+import json
+import os
+import threading
+from collections import defaultdict
+from pathlib import Path
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+
+RECORD = 'record'
+REPLAY = 'replay'
+# Response headers worth keeping: validators, rate limits and retry hints
+KEPT_HEADERS = ('Content-Type', 'ETag', 'Last-Modified', 'X-Rate-Limit', 'Retry-After', 'Location')
+
+
+class CassetteMiss(LookupError):
+    """Replay found no recording for a request"""
+
+
+def request_key(method, url, body=None):
+    parts = urlsplit(url)
+    key = f'{method} {parts.path}?{urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))}'
+    if body:
+        key += ' ' + hashlib.sha1(body if isinstance(body, bytes) else body.encode()).hexdigest()[:12]
+    return key
+
+
+class Cassette:
+    """Interactions loaded from / saved to one JSON file"""
+
+    def __init__(self, path, mode=REPLAY):
+        if mode not in (RECORD, REPLAY):
+            raise ValueError(f"cassette mode must be {RECORD!r} or {REPLAY!r}, not {mode!r}")
+        self.path = Path(path)
+        self.mode = mode
+        self._lock = threading.Lock()
+        self._played = defaultdict(int)
+        self.interactions = []
+        if self.path.exists():
+            with open(self.path) as f:
+                self.interactions = json.load(f)['interactions']
+        elif mode == REPLAY:
+            raise FileNotFoundError(self.path)
+        self._by_key = defaultdict(list)
+        for interaction in self.interactions:
+            self._by_key[interaction['key']].append(interaction)
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def replaying(self):
+        return self.mode == REPLAY
+
+    def play(self, method, url, body=None):
+        """Recorded response dict for a request, raising CassetteMiss if there is none"""
+        key = request_key(method, url, body)
+        with self._lock:
+            recordings = self._by_key.get(key)
+            if not recordings:
+                self.misses += 1
+                raise CassetteMiss(f"no recording for {key} in {self.path}")
+            index = min(self._played[key], len(recordings) - 1)
+            self._played[key] += 1
+            self.hits += 1
+            return recordings[index]['response']
+
+    def record(self, method, url, body, status, headers, content):
+        try:
+            payload = json.loads(content) if content else None
+        except ValueError:
+            payload = content.decode(errors='replace')
+        parts = urlsplit(url)
+        interaction = {
+            'key': request_key(method, url, body),
+            'request': {'method': method, 'path': parts.path,
+                        'query': sorted(parse_qsl(parts.query, keep_blank_values=True)),
+                        'body': json.loads(body) if body else None},
+            'response': {'status': status,
+                         'headers': {name: headers[name] for name in KEPT_HEADERS if name in headers},
+                         'body': payload},
+        }
+        with self._lock:
+            self.interactions.append(interaction)
+            self._by_key[interaction['key']].append(interaction)
+            self._save()
+
+    def _save(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_name(f'{self.path.name}.{os.getpid()}.tmp')
+        with open(tmp, 'w') as f:
+            json.dump({'version': 1, 'interactions': self.interactions}, f, indent=1, ensure_ascii=False)
+        os.replace(tmp, self.path)
+
+
+class CassetteAdapter(HTTPAdapter):
+    """Transport adapter that records through to the network or replays from a cassette"""
+
+    def __init__(self, cassette, **kwargs):
+        super().__init__(**kwargs)
+        self.cassette = cassette
+
+    def send(self, request, stream=False, **kwargs):
+        if self.cassette.replaying:
+            return self._replayed(request, self.cassette.play(request.method, request.url, request.body))
+        response = super().send(request, stream=stream, **kwargs)
+        # Streamed bodies (downloads) are left alone rather than read into memory
+        if not stream:
+            self.cassette.record(request.method, request.url, request.body,
+                                 response.status_code, response.headers, response.content)
+        return response
+
+    @staticmethod
+    def _replayed(request, recorded):
+        body = recorded['body']
+        content = b'' if body is None else body.encode() if isinstance(body, str) else json.dumps(body).encode()
+        response = requests.Response()
+        response.status_code = recorded['status']
+        response.headers = CaseInsensitiveDict(recorded['headers'])
+        response.headers['Content-Length'] = str(len(content))
+        response._content = content
+        response.encoding = 'utf-8'
+        response.url = request.url
+        response.request = request
+        response.reason = 'Replayed'
+        return response
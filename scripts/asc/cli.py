@@ -0,0 +1,103 @@
+"""
+`asc`: one entry point for the App Store Connect tools
+
+    python3 -m asc <command> [options]      # from scripts/, or with scripts/ on PYTHONPATH
+
+Only the module of the command being run is imported, and the client
+imports `requests`, `jwt` and `cryptography` on first use, so `--help`
+and answers from local state (`usage --no-sync`) start without them.
+benchmarks/bench_startup.py measures this with `python -X importtime`.
+With ASC_AGENT=1, one-shot commands run in a background agent that keeps
+those imports, the token and the connections warm (see asc.agent).
+"""
+import argparse
+import importlib
+import sys
+
+from . import config
+
+# name -> one-line help; the module is asc.commands.<name>
+COMMANDS = {
+    'apps': "apps, Xcode Cloud products, repositories and workflows",
+    'workflows': "workflow configuration and connected repositories",
+    'builds': "latest build runs of a workflow",
+    'trigger': "list recent builds and start a new one",
+    'batch': "trigger a matrix of workflows × branches/tags at once",
+    'watch': "follow build runs, printing only changes",
+    'usage': "compute-minute usage and month-end forecast",
+    'timeline': "where each build's minutes go: phases, critical path, regressions",
+    'artifacts': "download build logs, xcresult bundles and archives, resumably",
+    'testflight': "TestFlight builds and their processing state",
+    'repo': "point the workflow at a connected repository",
+    'dashboard': "latest build of every workflow of every product",
+    'status': "one line per workflow with its latest build",
+    'agent': "background process that answers commands over a Unix socket",
+}
+
+
+def common_options():
+    """Options every command accepts"""
+    parser = argparse.ArgumentParser(add_help=False)
+    parser.add_argument('--refresh', action='store_true', help="re-resolve product and workflow IDs")
+    parser.add_argument('--offline', action='store_true',
+                        help="send nothing; answer from the response cache however old (env ASC_OFFLINE)")
+    parser.add_argument('--stats', action='store_true', help="print API usage at exit")
+    parser.add_argument('--profile', action='store_true', help="print where the time went at exit")
+    parser.add_argument('--trace', metavar='FILE', help="append request spans as JSON lines (env ASC_TRACE_FILE)")
+    parser.add_argument('--metrics-file', metavar='FILE',
+                        help="write Prometheus metrics for node_exporter at exit (env ASC_METRICS_FILE)")
+    return parser
+
+
+def build_parser(command=None):
+    """Parser for every command; only `command`'s module is imported to add its own options"""
+    parser = argparse.ArgumentParser(prog='asc', description="App Store Connect and Xcode Cloud from the terminal")
+    subparsers = parser.add_subparsers(dest='command', metavar='command', required=True)
+    common = common_options()
+    for name, summary in COMMANDS.items():
+        sub = subparsers.add_parser(name, help=summary, description=summary, parents=[common])
+        if name == command:
+            module = importlib.import_module(f'.commands.{name}', __package__)
+            if hasattr(module, 'add_arguments'):
+                module.add_arguments(sub)
+            sub.set_defaults(run=module.run)
+    return parser
+
+
+def main(argv=None):
+    """Run a command, in the background agent when ASC_AGENT is set and the command allows it"""
+    argv = sys.argv[1:] if argv is None else list(argv)
+    if config.AGENT:
+        from . import agent
+
+        if agent.eligible(argv):
+            try:
+                result = agent.call(argv)
+            except agent.AgentError as e:
+                print(f"⚠️  agent: {e}", file=sys.stderr)
+                return 1
+            if result is not None:
+                status, stdout, stderr = result
+                sys.stdout.write(stdout)
+                sys.stderr.write(stderr)
+                return status
+    return run(argv)
+
+
+def run(argv):
+    """Run a command in this process"""
+    # The first positional argument is the command: no top-level option takes a value
+    command = next((arg for arg in argv if not arg.startswith('-')), None)
+    args = build_parser(command if command in COMMANDS else None).parse_args(argv)
+
+    if args.offline:
+        config.OFFLINE = True
+    if args.profile or args.trace or args.metrics_file:
+        from . import trace
+
+        trace.configure_from_args(argv, command=f'asc {args.command}')
+    if args.stats:
+        from . import client
+
+        client.print_stats_at_exit()
+    return args.run(args) or 0
@@ -0,0 +1,319 @@
+"""
+Pooled HTTP client for the App Store Connect API
+
+One `requests.Session` per process keeps TCP+TLS connections to
+api.appstoreconnect.apple.com alive between calls instead of paying a full
+handshake for every request.
+
+`requests` (and the cassette adapter built on it) is imported when the
+first Client is created, not with this module, so commands that answer
+from local state never pay for it.
+"""
+import atexit
+import json
+import sys
+import threading
+import time
+from urllib.parse import urlsplit
+
+from . import config, httpcache, trace
+from .auth import StaticTokenProvider, get_provider
+from .ratelimit import BACKGROUND, INTERACTIVE, RateLimiter, Unlimited
+from .retry import RetryPolicy
+
+
+def endpoint_key(url):
+    """Stats bucket for a URL: '.../v1/ciWorkflows/abc/buildRuns?limit=5' -> 'ciWorkflows/{id}/buildRuns'"""
+    parts = urlsplit(url).path.split('/v1/', 1)[-1].strip('/').split('/')
+    return '/'.join('{id}' if i % 2 else part for i, part in enumerate(parts))
+
+
+def parse_json(response):
+    """response.json(), with the parse time charged to the response's endpoint"""
+    start = time.perf_counter()
+    with trace.span('parse'):
+        payload = response.json()
+    entry = getattr(response, 'asc_stats', None)
+    if entry is not None:
+        entry['parse_seconds'] += time.perf_counter() - start
+    return payload
+
+
+class APIError(Exception):
+    """Non-2xx answer from App Store Connect"""
+
+    def __init__(self, response):
+        self.response = response
+        self.status_code = response.status_code
+        super().__init__(f"{response.request.method} {response.url}: {response.status_code} {response.text[:200]}")
+
+
+def check(response):
+    """Return the response, or raise APIError if it is not a success"""
+    if not response.ok:
+        raise APIError(response)
+    return response
+
+
+class Client:
+    """Authenticated App Store Connect client on top of a persistent session"""
+
+    def __init__(self, base_url=None, token_provider=None, pool_size=None,
+                 connect_timeout=config.CONNECT_TIMEOUT, read_timeout=config.READ_TIMEOUT,
+                 rate_limiter=None, priority=INTERACTIVE, retry=None, cassette=None, response_cache=None):
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        self.base_url = (base_url or config.BASE_URL).rstrip('/')
+        if cassette is None and config.CASSETTE:
+            from .cassette import Cassette
+
+            cassette = Cassette(config.CASSETTE, config.CASSETTE_MODE)
+        self.cassette = cassette
+        # Replayed traffic needs neither a signing key nor the real hourly budget
+        replaying = cassette is not None and cassette.replaying
+        self.tokens = token_provider or (StaticTokenProvider() if replaying else get_provider())
+        self.timeout = (connect_timeout, read_timeout)
+        self.limiter = rate_limiter or (Unlimited() if replaying else RateLimiter())
+        # Pollers switch to BACKGROUND through run_as_poller()
+        self.priority = priority
+        self.retry = retry or RetryPolicy()
+        # Recording must see every request and replays are already local, so no cache under a cassette;
+        # False turns it off
+        if response_cache is None and config.RESPONSE_CACHE and cassette is None:
+            from .httpcache import ResponseCache
+
+            response_cache = ResponseCache()
+        self.response_cache = response_cache or None
+        # Store answers that are only kept for `--offline`; run_as_poller() turns this off
+        self.cache_volatile = True
+
+        self.pool_size = pool_size or config.POOL_SIZE
+        self.session = requests.Session()
+        if cassette is not None:
+            from .cassette import CassetteAdapter
+
+            adapter = CassetteAdapter(cassette, pool_connections=self.pool_size, pool_maxsize=self.pool_size)
+        else:
+            adapter = HTTPAdapter(pool_connections=self.pool_size, pool_maxsize=self.pool_size)
+        if trace.enabled():
+            adapter.poolmanager.pool_classes_by_scheme = trace.pool_classes()
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self.session.headers.update({
+            'Accept': 'application/json',
+            'Accept-Encoding': 'gzip, deflate',
+            'Connection': 'keep-alive',
+            'Content-Type': 'application/json',
+        })
+
+        self._stats_lock = threading.Lock()
+        self.requests_sent = 0
+        self.bytes_received = 0
+        self.wire_bytes = 0
+        self.endpoints = {}
+        # Ages in seconds of the responses `--offline` answered from the cache
+        self.offline_served = []
+
+    def run_as_poller(self):
+        """Set up for a command that polls until stopped, such as `watch` or `dashboard --watch`"""
+        # A poller that runs forever yields the shared budget to one-off commands,
+        # and skips caching answers that change between polls, so each poll isn't a disk write
+        self.priority = BACKGROUND
+        self.cache_volatile = False
+
+    def url(self, endpoint):
+        """Absolute URL for an endpoint; `links.next` URLs are passed through"""
+        if endpoint.startswith(('http://', 'https://')):
+            return endpoint
+        return f'{self.base_url}/{endpoint.lstrip("/")}'
+
+    def request(self, method, endpoint, params=None, json=None, timeout=None, deadline=None, headers=None):
+        """Send an authenticated request, retrying transient failures, and return the `requests.Response`
+
+        `timeout` is the (connect, read) pair for each attempt and `deadline`
+        the total seconds allowed across attempts (see retry.RetryPolicy).
+        `headers` are sent in addition to the session's, e.g. If-None-Match.
+        """
+        url = self.url(endpoint)
+        key = endpoint_key(url)
+        extra_headers = headers or {}
+        if config.OFFLINE:
+            return self._offline(method, url, params)
+        cache = self.response_cache if method == 'GET' else None
+        if cache is not None and not extra_headers:
+            with trace.span('cache', endpoint=key) as lookup:
+                entry = cache.get(method, url, params)
+                lookup.set(hit=entry is not None)
+            if entry is not None:
+                return httpcache.response(method, url, params, 200, {**entry.headers, 'X-ASC-Cache': 'hit'},
+                                          entry.content, 'Cached')
+
+        def send(attempt_timeout):
+            with trace.span('rate_limit'):
+                self.limiter.acquire(self.priority)
+            with trace.span('attempt') as attempt:
+                headers = {**extra_headers, 'Authorization': f'Bearer {self.tokens.token()}'}
+                start = time.perf_counter()
+                response = self.session.request(
+                    method, url, params=params, json=json, headers=headers, timeout=attempt_timeout,
+                )
+                attempt.set(status=response.status_code)
+                tracer = trace.tracer()
+                if tracer is not None:
+                    # elapsed runs from sending the request to parsing the response headers
+                    elapsed = response.elapsed.total_seconds()
+                    tracer.record('server', max(0.0, elapsed - attempt.child_seconds['connect']))
+                    tracer.record('download', max(0.0, time.perf_counter() - start - elapsed))
+            self.limiter.update(response)
+            return response
+
+        with trace.span('request', method=method, endpoint=key) as call:
+            response = self.retry.run(method, url, send, timeout or self.timeout, deadline)
+            if response.status_code == 401:
+                # A cached token the API no longer accepts (clock skew, a revoked key): sign a new one, once
+                self.tokens.invalidate()
+                response = self.retry.run(method, url, send, timeout or self.timeout, deadline)
+            call.set(status=response.status_code, bytes=len(response.content))
+        body = len(response.content)
+        # Content-Length is the size on the wire, i.e. after gzip
+        wire = int(response.headers.get('Content-Length', body))
+        with self._stats_lock:
+            self.requests_sent += 1
+            self.bytes_received += body
+            self.wire_bytes += wire
+            entry = self.endpoints.setdefault(f'{method} {key}', {
+                'requests': 0, 'bytes': 0, 'wire_bytes': 0, 'parse_seconds': 0.0,
+            })
+            entry['requests'] += 1
+            entry['bytes'] += body
+            entry['wire_bytes'] += wire
+        response.asc_stats = entry
+        if self.response_cache is not None:
+            self._cache_response(method, url, params, key, response)
+        return response
+
+    def _cache_response(self, method, url, params, key, response):
+        if method == 'GET':
+            rule = httpcache.policy(key, response.content) if response.status_code == 200 else None
+            if rule is not None and (rule[1] or self.cache_volatile):
+                self.response_cache.put(method, url, params, response.headers, response.content, *rule)
+        elif response.ok:
+            # The collection written to, e.g. 'ciWorkflows' for a PATCH of ciWorkflows/{id}
+            self.response_cache.invalidate(key.split('/', 1)[0])
+
+    def _offline(self, method, url, params):
+        """`--offline`: the cached response however old, marked stale, or a 504 without sending anything"""
+        entry = None
+        if method == 'GET' and self.response_cache is not None:
+            entry = self.response_cache.get(method, url, params, stale_ok=True)
+        if entry is None:
+            body = {'errors': [{'status': '504', 'code': 'OFFLINE',
+                                'title': 'Not in the response cache',
+                                'detail': f'--offline: {method} {url} was not sent'}]}
+            return httpcache.response(method, url, params, 504, {'Content-Type': 'application/json'},
+                                      json.dumps(body).encode(), 'Offline')
+        marker = 'hit' if entry.fresh else 'stale'
+        with self._stats_lock:
+            self.offline_served.append(entry.age)
+        return httpcache.response(method, url, params, 200,
+                                  {**entry.headers, 'X-ASC-Cache': marker, 'Age': str(int(entry.age))},
+                                  entry.content, 'Offline')
+
+    def get(self, endpoint, params=None, **kwargs):
+        return self.request('GET', endpoint, params=params, **kwargs)
+
+    def post(self, endpoint, data, **kwargs):
+        return self.request('POST', endpoint, json=data, **kwargs)
+
+    def patch(self, endpoint, data, **kwargs):
+        return self.request('PATCH', endpoint, json=data, **kwargs)
+
+    def stats(self):
+        return {
+            'requests': self.requests_sent,
+            'bytes_received': self.bytes_received,
+            'wire_bytes': self.wire_bytes,
+            'endpoints': self.endpoints,
+            'tokens': self.tokens.stats(),
+            'rate_limit': self.limiter.stats(),
+            'retry': self.retry.stats(),
+            'cache': self.response_cache.stats() if self.response_cache is not None else None,
+        }
+
+    def add_stats(self, other):
+        """Count the requests another client sent for this one (see aio.AsyncClient)"""
+        with self._stats_lock:
+            self.requests_sent += other.requests_sent
+            self.bytes_received += other.bytes_received
+            self.wire_bytes += other.wire_bytes
+            for name, counts in other.endpoints.items():
+                entry = self.endpoints.setdefault(name, dict.fromkeys(counts, 0))
+                for field, value in counts.items():
+                    entry[field] += value
+            self.offline_served += other.offline_served
+
+    def close(self):
+        self.session.close()
+        if self.response_cache is not None:
+            self.response_cache.close()
+
+
+_default_client = None
+_default_lock = threading.Lock()
+_stats_at_exit = '--stats' in sys.argv
+
+
+def get_client():
+    """Process-wide client, so every call in a script shares one connection pool"""
+    global _default_client
+    if _default_client is None:
+        with _default_lock:
+            if _default_client is None:
+                trace.configure_from_args()
+                _default_client = Client()
+                if _stats_at_exit:
+                    atexit.register(print_stats)
+                if config.OFFLINE:
+                    atexit.register(print_offline_notice)
+    return _default_client
+
+
+def print_stats_at_exit():
+    """`--stats`: print_stats() at exit, once the process has created its client"""
+    global _stats_at_exit
+    _stats_at_exit = True
+
+
+def print_stats():
+    """`--stats`: what this process spent, including the shared hourly budget"""
+    stats = get_client().stats()
+    tokens, budget = stats['tokens'], stats['rate_limit']
+    server_remaining = budget['server_remaining'] if budget['server_remaining'] is not None else '?'
+    print(f"\n📈 API stats:")
+    print(f"   Requests: {stats['requests']} ({stats['bytes_received']} bytes, {stats['wire_bytes']} on the wire)")
+    for name, entry in sorted(stats['endpoints'].items()):
+        print(f"     {name}: {entry['requests']}× {entry['bytes']} B "
+              f"({entry['wire_bytes']} B wire), parse {entry['parse_seconds'] * 1000:.2f} ms")
+    cache = stats['cache']
+    if cache is not None:
+        print(f"   Response cache: {cache['hits']} hits, {cache['stale']} stale, {cache['misses']} misses "
+              f"({cache['hit_ratio']:.0%}), {cache['bytes_saved']} bytes saved, {cache['stores']} stored, "
+              f"{cache['evictions']} evicted")
+    print(f"   JWT: {tokens['hits']} cached, {tokens['misses']} signed")
+    print(f"   Retries: {stats['retry']['retries']} (gave up {stats['retry']['gave_up']})")
+    print(f"   Hourly budget: {server_remaining} / {budget['limit']} remaining "
+          f"(shared bucket {budget['tokens']}, waited {budget['waited_seconds']}s, {budget['throttled']}× 429)")
+
+
+def print_offline_notice():
+    """`--offline`: say how old the data just shown may be"""
+    ages = get_client().offline_served
+    if ages:
+        print(f"\n⚠️  offline: {len(ages)} responses from the local cache, the oldest "
+              f"{max(ages) / 60:.0f} min old", file=sys.stderr)
+
+
+def make_request(endpoint, method='GET', data=None):
+    """Make authenticated request to App Store Connect API"""
+    return get_client().request(method, endpoint, json=data)
@@ -0,0 +1,7 @@
+"""
+Subcommands of the `asc` CLI
+
+Each module defines add_arguments(parser) and run(args), which returns the
+exit status. Modules are imported by asc.cli only when their command runs,
+and importing one never touches the network or the disk.
+"""
@@ -0,0 +1,31 @@
+"""
+asc agent: run, inspect or stop the background agent (see asc.agent)
+"""
+import json
+
+from .. import agent
+
+
+def add_arguments(parser):
+    parser.add_argument('--status', action='store_true', help="show the running agent's statistics")
+    parser.add_argument('--stop', action='store_true', help="ask the running agent to exit")
+
+
+def run(args):
+    if args.status or args.stop:
+        try:
+            response = agent.request({'op': agent.STOP if args.stop else agent.STATS})
+        except OSError:
+            print(f"💤 No agent on {agent.socket_path()}")
+            return 1
+        if args.stop:
+            print("🛑 Agent stopping")
+        else:
+            print(json.dumps(response, indent=2, ensure_ascii=False))
+        return 0
+
+    server = agent.Agent()
+    print(f"🤖 asc agent on {server.path} (idle timeout {server.idle_timeout:.0f}s)", flush=True)
+    if not server.serve():
+        print("💤 Another agent already serves this socket")
+    return 0
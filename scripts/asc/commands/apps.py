@@ -0,0 +1,134 @@
+"""
+asc apps: apps, Xcode Cloud products, connected repositories and workflows
+"""
+import asyncio
+
+from ..aio import AsyncClient
+from ..client import get_client, parse_json
+from ..query import select
+
+APP_FIELDS = {'apps': ['name', 'bundleId', 'sku']}
+PRODUCT_FIELDS = {'ciProducts': ['name', 'productType']}
+WORKFLOW_FIELDS = {'ciWorkflows': ['name', 'description', 'isEnabled']}
+REPOSITORY_FIELDS = {'scmRepositories': ['ownerName', 'httpCloneUrl']}
+
+
+def list_apps(response=None):
+    """List all apps in App Store Connect"""
+    if response is None:
+        response = get_client().get('apps', params=select(APP_FIELDS))
+    if response.status_code == 200:
+        data = parse_json(response)
+        print(f"\n✅ API Connection Successful!")
+        print(f"\nFound {len(data['data'])} app(s):\n")
+        for app in data['data']:
+            attrs = app['attributes']
+            print(f"  - Name: {attrs['name']}")
+            print(f"    Bundle ID: {attrs['bundleId']}")
+            print(f"    SKU: {attrs['sku']}")
+            print(f"    App ID: {app['id']}")
+            print()
+        return data['data']
+    else:
+        print(f"❌ Error: {response.status_code}")
+        print(response.text)
+        return None
+
+
+def get_ci_products(response=None):
+    """Get Xcode Cloud products"""
+    if response is None:
+        response = get_client().get('ciProducts', params=select(PRODUCT_FIELDS))
+    if response.status_code == 200:
+        data = parse_json(response)
+        print(f"\n📦 Xcode Cloud Products: {len(data['data'])}")
+        for product in data['data']:
+            attrs = product['attributes']
+            print(f"  - Name: {attrs.get('name', 'N/A')}")
+            print(f"    Product Type: {attrs.get('productType', 'N/A')}")
+            print(f"    Product ID: {product['id']}")
+            print()
+        return data['data']
+    else:
+        print(f"❌ Error getting CI products: {response.status_code}")
+        return None
+
+
+def get_workflows(product_id, response=None):
+    """Get all workflows for a CI product"""
+    if response is None:
+        response = get_client().get(f'ciProducts/{product_id}/workflows', params=select(WORKFLOW_FIELDS))
+    if response.status_code == 200:
+        data = parse_json(response)
+        print(f"\n⚙️  Workflows: {len(data['data'])}")
+        for workflow in data['data']:
+            attrs = workflow['attributes']
+            print(f"  - Name: {attrs.get('name', 'N/A')}")
+            print(f"    Description: {attrs.get('description', 'N/A')}")
+            print(f"    Enabled: {attrs.get('isEnabled', False)}")
+            print(f"    Workflow ID: {workflow['id']}")
+            print()
+        return data['data']
+    else:
+        print(f"❌ Error getting workflows: {response.status_code}")
+        print(response.text)
+        return None
+
+
+def get_scm_repositories(response=None):
+    """Get connected SCM repositories"""
+    if response is None:
+        response = get_client().get('scmRepositories', params=select(REPOSITORY_FIELDS))
+    if response.status_code == 200:
+        data = parse_json(response)
+        print(f"\n🔗 Connected Repositories: {len(data['data'])}")
+        for repo in data['data']:
+            attrs = repo['attributes']
+            print(f"  - URL: {attrs.get('httpCloneUrl', 'N/A')}")
+            print(f"    Owner: {attrs.get('ownerName', 'N/A')}")
+            print(f"    Repo ID: {repo['id']}")
+            print()
+        return data['data']
+    else:
+        print(f"❌ Error getting repositories: {response.status_code}")
+        return None
+
+
+async def inspect(api):
+    """Fetch apps, CI products and repositories concurrently, then the workflows"""
+    apps_response, products_response, repos_response = await asyncio.gather(
+        api.get('apps', select(APP_FIELDS)),
+        api.get('ciProducts', select(PRODUCT_FIELDS)),
+        api.get('scmRepositories', select(REPOSITORY_FIELDS)),
+    )
+
+    apps = list_apps(apps_response)
+    if not apps:
+        return
+
+    print("\n🔍 Checking Xcode Cloud configuration...")
+    ci_products = get_ci_products(products_response)
+
+    print("\n🔗 Checking connected repositories...")
+    get_scm_repositories(repos_response)
+
+    if ci_products:
+        product_id = ci_products[0]['id']
+        workflows = get_workflows(product_id, await api.get(f'ciProducts/{product_id}/workflows', select(WORKFLOW_FIELDS)))
+
+        if not workflows or len(workflows) == 0:
+            print("\n⚠️  No workflows found. You need to:")
+            print("   1. Connect your GitHub repository in App Store Connect")
+            print("   2. Create a workflow in Xcode or App Store Connect")
+        else:
+            print("\n✅ Workflows are configured!")
+
+
+def run(args):
+    print("🔐 Connecting to App Store Connect API...")
+    api = AsyncClient()
+    try:
+        asyncio.run(inspect(api))
+    finally:
+        api.close()
+    return 0
@@ -0,0 +1,96 @@
+"""
+asc artifacts: download build logs, xcresult bundles and archives
+
+    python3 -m asc artifacts                      # the latest run
+    python3 -m asc artifacts --runs 120-140 --type LOG_BUNDLE --dest ~/ci-logs
+    python3 -m asc artifacts --runs 130 --list
+
+Files land in DEST/<run>/<action>/<file>. One line per file as it finishes,
+then a summary. Interrupted downloads resume where they stopped, and files
+already downloaded are skipped (see asc.artifacts).
+"""
+import sys
+
+from ..aio import DEFAULT_CONCURRENCY
+from ..artifacts import DEFAULT_WORKERS, FAILED, SKIPPED, Downloader, list_artifacts
+from ..history import BuildHistory
+from ..resolve import Resolver
+from .timeline import parse_range
+
+ICONS = {FAILED: '❌', SKIPPED: '⏭️ '}
+
+
+def add_arguments(parser):
+    parser.add_argument('--workflow', metavar='NAME', help="workflow other than the first")
+    parser.add_argument('--runs', metavar='FIRST-LAST', help="run numbers, e.g. 120-140, 120- or 130 "
+                                                              "(default: the latest run)")
+    parser.add_argument('--type', action='append', dest='file_types', metavar='FILE_TYPE',
+                        help="only this fileType (LOG_BUNDLE, RESULT_BUNDLE, ARCHIVE, ...), repeatable")
+    parser.add_argument('--dest', default='artifacts', metavar='DIR', help="download here (default: %(default)s)")
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS,
+                        help="files downloading at once (default: %(default)s)")
+    parser.add_argument('--list', action='store_true', help="list the artifacts without downloading them")
+    parser.add_argument('--concurrency', type=int, default=DEFAULT_CONCURRENCY,
+                        help="API requests in flight while listing (default: %(default)s)")
+
+
+def size(n):
+    if n is None:
+        return '?'
+    for unit in ('B', 'KB', 'MB'):
+        if n < 1024:
+            return f"{n:.0f} {unit}" if unit == 'B' else f"{n:.1f} {unit}"
+        n /= 1024
+    return f"{n:.1f} GB"
+
+
+def run(args):
+    resolver = Resolver(refresh=args.refresh, workflow_name=args.workflow)
+    workflow = resolver.workflow()
+    history = BuildHistory()
+    history.sync(workflow['id'], with_actions=False)
+
+    if args.runs:
+        try:
+            first, last = parse_range(args.runs)
+        except ValueError:
+            print(f"❌ --runs {args.runs}: expected FIRST-LAST, e.g. 120-140", file=sys.stderr)
+            return 2
+    else:
+        first = last = history.highest_number(workflow['id'])
+    runs = [dict(id=row['id'], number=row['number']) for row in history.runs_numbered(workflow['id'], first, last)]
+    if not runs:
+        print(f"⏳ {workflow['name']}: 没有构建")
+        return 0
+
+    artifacts = list_artifacts(runs, concurrency=args.concurrency, file_types=args.file_types)
+    label = f"#{runs[0]['number']}" if len(runs) == 1 else f"#{runs[0]['number']}–#{runs[-1]['number']}"
+    if not artifacts:
+        print(f"📭 {workflow['name']} {label}: 没有构建产物")
+        return 0
+    if args.list:
+        print(f"📦 {workflow['name']} {label}: {len(artifacts)} 个构建产物\n")
+        for a in artifacts:
+            print(f"  #{a.run_number:<5} {a.action or '':<20} {a.file_type or '':<16} {size(a.file_size):>9}  "
+                  f"{a.file_name}")
+        return 0
+
+    print(f"⬇️  {workflow['name']} {label}: {len(artifacts)} 个构建产物 → {args.dest}")
+    downloader = Downloader(args.dest, workers=args.workers)
+    counts = {}
+    transferred = 0
+    results = downloader.download_all(artifacts)
+    try:
+        for result in results:
+            counts[result.status] = counts.get(result.status, 0) + 1
+            transferred += result.bytes
+            detail = f"  {result.detail}" if result.detail else ''
+            print(f"{ICONS.get(result.status, '✅')} {result.status:<10} {size(result.artifact.file_size):>9}  "
+                  f"{result.path}{detail}")
+    finally:
+        # Ctrl+C between results: drop the queued downloads now, not when the generator is collected
+        results.close()
+        downloader.close()
+    summary = ', '.join(f'{count} {status}' for status, count in sorted(counts.items()))
+    print(f"\n📦 {summary}; 传输 {size(transferred)}")
+    return 1 if counts.get(FAILED) else 0
@@ -0,0 +1,58 @@
+"""
+asc batch: trigger a matrix of workflows × branches/tags at once
+
+    python3 -m asc batch --workflow Default --workflow Release --branch main --branch release/2.0
+    python3 -m asc batch --matrix release.json --journal release.jsonl
+
+One JSON line per item on stdout as it completes; the summary goes to
+stderr. Run the same command with the same --journal again to retry only
+the items that did not go through (see asc.batch).
+"""
+import sys
+
+from .. import config
+from ..aio import DEFAULT_CONCURRENCY
+from ..batch import DONE, BatchTrigger, expand, load_matrix
+from ..resolve import Resolver
+from ..scheduler import DEFERRED, TriggerScheduler
+
+
+def add_arguments(parser):
+    parser.add_argument('--matrix', metavar='FILE', help="JSON matrix of workflows and branches/tags")
+    parser.add_argument('--workflow', action='append', default=[], metavar='NAME',
+                        help="workflow to trigger, repeatable; '*' for all of them")
+    parser.add_argument('--branch', action='append', default=[], metavar='REF',
+                        help="branch or tag to build, repeatable")
+    parser.add_argument('--journal', metavar='FILE',
+                        help="append results here and skip items it records as done")
+    parser.add_argument('--concurrency', type=int, default=DEFAULT_CONCURRENCY,
+                        help="POSTs in flight (default: %(default)s)")
+    parser.add_argument('--budget', type=float, default=config.TRIGGER_BUDGET_MINUTES, metavar='MINUTES',
+                        help="compute minutes the month may reach (default: %(default)s, env ASC_TRIGGER_BUDGET)")
+    parser.add_argument('--max-concurrent', type=int, default=config.TRIGGER_MAX_CONCURRENT, metavar='N',
+                        help="unfinished runs allowed per workflow; more are queued (default: %(default)s)")
+
+
+def run(args):
+    try:
+        pairs = load_matrix(args.matrix) if args.matrix else []
+    except (OSError, ValueError) as e:
+        print(f"❌ Matrix {args.matrix}: {e}", file=sys.stderr)
+        return 2
+    pairs += expand(args.workflow, args.branch)
+    if not pairs:
+        print("❌ Nothing to trigger: give --matrix FILE, or --workflow NAME and --branch REF", file=sys.stderr)
+        return 2
+
+    scheduler = TriggerScheduler(Resolver(refresh=args.refresh), budget=args.budget,
+                                 max_concurrent=args.max_concurrent)
+    batch = BatchTrigger(scheduler, concurrency=args.concurrency, journal=args.journal)
+    results = batch.run(list(dict.fromkeys(pairs)))
+
+    counts = {}
+    for result in results:
+        counts[result['status']] = counts.get(result['status'], 0) + 1
+    summary = ', '.join(f'{count} {status}' for status, count in sorted(counts.items()))
+    print(f"\n🚀 {len(results)} items in {batch.seconds:.1f}s: {summary}", file=sys.stderr)
+    # Deferred items wait in the trigger queue, as with `asc trigger`
+    return 0 if all(result['status'] in DONE or result['status'] == DEFERRED for result in results) else 1
@@ -0,0 +1,76 @@
+"""
+asc builds: latest Xcode Cloud build runs of a workflow
+"""
+from ..client import check, get_client, parse_json
+from ..query import select
+from ..resolve import Resolver
+
+BUILD_FIELDS = {'ciBuildRuns': ['number', 'executionProgress', 'completionStatus', 'startedDate']}
+BUILD_PARAMS = select(BUILD_FIELDS, limit=5, sort='-number')
+
+
+def add_arguments(parser):
+    parser.add_argument('--workflow', metavar='NAME',
+                        help="workflow other than the first; see `asc dashboard` for all of them")
+
+
+def build_runs_endpoint(workflow_id):
+    return f'ciWorkflows/{workflow_id}/buildRuns'
+
+
+def get_build_status(resolver):
+    # Workflow ID comes from the local cache; only the build runs hit the API
+    response = resolver.with_workflow(
+        lambda workflow_id: get_client().get(build_runs_endpoint(workflow_id), params=BUILD_PARAMS)
+    )
+    builds = parse_json(check(response))['data']
+
+    return builds
+
+
+def format_status(status):
+    status_map = {
+        'RUNNING': '🏃 运行中',
+        'COMPLETE': '✅ 完成',
+        'PENDING': '⏳ 等待中',
+        'SCHEDULED': '📅 已安排'
+    }
+    return status_map.get(status, status)
+
+
+def format_result(result):
+    result_map = {
+        'SUCCEEDED': '✅ 成功',
+        'FAILED': '❌ 失败',
+        'CANCELED': '🚫 已取消',
+        'SKIPPED': '⏭️  已跳过'
+    }
+    return result_map.get(result, result or '进行中...')
+
+
+def print_build(build):
+    attrs = build['attributes']
+    num = attrs.get('number', 'N/A')
+    status = format_status(attrs.get('executionProgress', 'N/A'))
+    result = format_result(attrs.get('completionStatus'))
+    started = attrs.get('startedDate')
+    started = started[:19].replace('T', ' ') if started else 'N/A'
+
+    print(f"  Build #{num}")
+    print(f"    状态: {status}")
+    print(f"    结果: {result}")
+    print(f"    开始: {started}")
+    print()
+
+
+def run(args):
+    print("📊 Xcode Cloud Build Status\n")
+    for build in get_build_status(Resolver(refresh=args.refresh, workflow_name=args.workflow)):
+        print_build(build)
+
+    print("\n💡 提示：")
+    print("   查看一次: python3 -m asc builds")
+    print("   持续监视: python3 -m asc watch")
+    print("   Webhook:  ASC_WEBHOOK_SECRET=... python3 -m asc watch --webhook [port] [--notify]")
+    print("   详细日志: https://appstoreconnect.apple.com/")
+    return 0
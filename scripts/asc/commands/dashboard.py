@@ -0,0 +1,51 @@
+"""
+asc dashboard: the latest build of every workflow of every product
+"""
+import asyncio
+import time
+
+from ..aio import DEFAULT_CONCURRENCY
+from ..client import get_client
+from ..dashboard import Dashboard, IncrementalRenderer
+from ..resolve import Resolver
+from ..watch import PollSchedule
+
+
+def add_arguments(parser):
+    parser.add_argument('--watch', action='store_true', help="keep redrawing as builds change")
+    parser.add_argument('--concurrency', type=int, default=DEFAULT_CONCURRENCY,
+                        help="requests in flight (default: %(default)s)")
+    parser.add_argument('--runs', type=int, default=1, help="runs shown per workflow (default: %(default)s)")
+
+
+def run(args):
+    workflows = Resolver(refresh=args.refresh).workflows()
+    if not workflows:
+        print("❌ No workflows found")
+        return 1
+
+    if args.watch:
+        get_client().run_as_poller()
+
+    dashboard = Dashboard(workflows, concurrency=args.concurrency, runs_per_workflow=args.runs)
+    renderer = IncrementalRenderer()
+    schedule = PollSchedule()
+
+    print(f"📊 Xcode Cloud Dashboard ({len(workflows)} workflows)\n")
+    try:
+        while True:
+            changed = asyncio.run(dashboard.poll())
+            footer = (f"\n🔄 {time.strftime('%H:%M:%S')}  cycle {dashboard.cycle_seconds * 1000:.0f} ms  "
+                      f"📡 {dashboard.fetcher.requests_last_hour()} 次请求/小时")
+            renderer.draw(dashboard.table() + footer.split('\n'))
+            if not args.watch:
+                break
+            time.sleep(schedule.next(dashboard.active(), changed))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        dashboard.close()
+
+    if not args.watch:
+        print("\n💡 持续监视: python3 -m asc dashboard --watch [--concurrency N] [--runs N]")
+    return 0
@@ -0,0 +1,71 @@
+"""
+asc repo: point the workflow at a connected repository
+"""
+from ..client import get_client, make_request, parse_json
+from ..query import select
+from ..resolve import Resolver
+
+REPOSITORY_NAME = 'HeadshotAirBattle-iOS'
+
+
+def add_arguments(parser):
+    parser.add_argument('--name', default=REPOSITORY_NAME, help="repository name (default: %(default)s)")
+
+
+def find_repository(name):
+    """ID of the connected repository called `name`, printing what was found"""
+    response = get_client().get('scmRepositories',
+                                params=select({'scmRepositories': ['ownerName', 'repositoryName']}))
+    for repo in parse_json(response)['data']:
+        attrs = repo['attributes']
+        if attrs.get('repositoryName') == name:
+            print(f"\n✅ Found new repository!")
+            print(f"   Repository: {attrs.get('ownerName')}/{attrs.get('repositoryName')}")
+            print(f"   ID: {repo['id']}")
+            return repo['id']
+    return None
+
+
+def run(args):
+    # Check if new repo exists
+    print(f"🔍 Checking for {args.name} repository...")
+    new_repo_id = find_repository(args.name)
+
+    if not new_repo_id:
+        print("\n❌ New repository not connected to Xcode Cloud yet.")
+        print("\n📝 You need to connect it first:")
+        print("   1. Visit: https://appstoreconnect.apple.com/")
+        print("   2. Go to your app → Xcode Cloud")
+        print("   3. Click 'Manage' or 'Settings'")
+        print(f"   4. Connect the {args.name} repository")
+        print("\nOr I can try to connect it via API (experimental)...")
+        return 0
+
+    print("\n🔧 Updating workflow to use new repository...")
+
+    # Get workflow
+    workflow_id = Resolver(refresh=args.refresh).workflow_id()
+
+    # Update workflow repository
+    data = {
+        'data': {
+            'type': 'ciWorkflows',
+            'id': workflow_id,
+            'relationships': {
+                'repository': {
+                    'data': {
+                        'type': 'scmRepositories',
+                        'id': new_repo_id
+                    }
+                }
+            }
+        }
+    }
+
+    response = make_request(f'ciWorkflows/{workflow_id}', method='PATCH', data=data)
+    if response.status_code == 200:
+        print("✅ Workflow updated successfully!")
+        return 0
+    print(f"❌ Error: {response.status_code}")
+    print(response.text)
+    return 1
@@ -0,0 +1,27 @@
+"""
+asc status: one line per workflow with its latest build
+
+Build states come from the process-wide dashboard, so in the agent repeated
+calls answer from memory until the last cycle is due for a refresh.
+"""
+from ..dashboard import shared_dashboard
+from ..resolve import Resolver
+
+
+def add_arguments(parser):
+    parser.add_argument('--max-age', type=float, metavar='SECONDS',
+                        help="oldest cached state to answer from (default: 10 while a build runs, 60 when idle)")
+
+
+def run(args):
+    workflows = Resolver(refresh=args.refresh).workflows()
+    if not workflows:
+        print("❌ No workflows found")
+        return 1
+
+    dashboard = shared_dashboard(workflows)
+    polled = dashboard.refresh(args.max_age)
+    for line in dashboard.table():
+        print(line)
+    print(f"\n🔄 {'刚刚更新' if polled else f'{dashboard.age():.0f} 秒前的状态'}")
+    return 0
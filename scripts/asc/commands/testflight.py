@@ -0,0 +1,324 @@
+"""
+asc testflight: recent TestFlight builds, optionally followed by webhook,
+--wait for builds to finish processing, and --configure to set up the
+workflow's Archive and TestFlight actions
+
+    python3 -m asc testflight --wait 51 --wait 52 --run 123 --timeout 60
+
+--wait exits 0 when every build is VALID, 1 if one FAILED/INVALID (or its
+run uploaded none), 3 on --timeout while processing, 4 if a build never
+appeared (see asc.testflight).
+"""
+import json
+import time
+
+from ..client import APIError, get_client, parse_json
+from ..pager import Pager, paginate
+from ..query import select
+from ..resolve import Resolver
+from ..webhook import (BUILD_RUN_EVENT, RECONCILE_INTERVAL, EventBus, WebhookEvent, WebhookReceiver, describe,
+                       desktop_notifier, wait_for_events)
+
+BUILD_FIELDS = {'builds': ['version', 'processingState', 'uploadedDate']}
+
+LATEST = 'latest'
+WAIT_TIMEOUT = 90
+STATE_ICONS = {'PROCESSING': '⚙️ ', 'VALID': '✅', 'FAILED': '❌', 'INVALID': '❌', 'NO_BUILD': '❌'}
+
+
+def add_arguments(parser):
+    parser.add_argument('--limit', type=int, default=5, help="builds to show (default: %(default)s)")
+    parser.add_argument('--webhook', nargs='?', type=int, const=0, metavar='PORT',
+                        help="follow processing state changes by webhook (needs ASC_WEBHOOK_SECRET)")
+    parser.add_argument('--notify', action='store_true', help="desktop notification per change (--webhook)")
+    parser.add_argument('--configure', action='store_true',
+                        help="create the Archive action and TestFlight distribution on the workflow")
+    parser.add_argument('--wait', action='append', nargs='?', const=LATEST, metavar='BUILD',
+                        help="wait until the build (number; default the latest) is processed, repeatable")
+    parser.add_argument('--run', action='append', dest='runs', metavar='RUN',
+                        help="wait for the build a ciBuildRuns (ID, or number in --workflow) uploads, repeatable")
+    parser.add_argument('--workflow', metavar='NAME', help="workflow --run numbers belong to (default the first)")
+    parser.add_argument('--timeout', type=float, default=WAIT_TIMEOUT, metavar='MINUTES',
+                        help="give up waiting after this long (default: %(default)s)")
+
+
+def recent_builds(limit, app_id=None):
+    filters = {'app': app_id} if app_id else {}
+    return list(paginate('builds', select(BUILD_FIELDS, sort='-uploadedDate', **filters), max_items=limit))
+
+
+def print_builds(builds):
+    if builds:
+        print(f"📦 Recent Builds ({len(builds)}):\n")
+        for build in builds:
+            attrs = build.attributes
+            print(f"  Version: {attrs.get('version', 'N/A')}")
+            print(f"  Processing State: {attrs.get('processingState', 'N/A')}")
+            print(f"  Uploaded: {attrs.get('uploadedDate', 'N/A')[:19].replace('T', ' ')}")
+            print()
+    else:
+        print("⏳ No builds in TestFlight yet. Please wait a few minutes...")
+
+
+def follow(builds, limit, port=None, notify=False):
+    """Print processing state changes as webhook deliveries arrive, reconciling by poll"""
+    states = {build.id: build.get('processingState') for build in builds}
+    bus = EventBus()
+
+    def print_event(event):
+        if event.kind != BUILD_RUN_EVENT:
+            print(f"[{time.strftime('%H:%M:%S')}] 📦 {describe(event)}")
+        if event.resource_type == 'builds':
+            states[event.resource_id] = event.attributes['newState']
+
+    def reconcile():
+        try:
+            latest = recent_builds(limit)
+        except (APIError, OSError) as e:
+            print(f"⚠️  {e}")
+            return
+        for build in latest:
+            state = build.get('processingState')
+            if states.get(build.id) != state:
+                bus.publish(WebhookEvent(
+                    id=None, kind='buildProcessingStateUpdated', resource_type='builds', resource_id=build.id,
+                    attributes={'oldState': states.get(build.id), 'newState': state}, related={}, source='poll',
+                ))
+
+    bus.subscribe(print_event)
+    if notify:
+        bus.subscribe(desktop_notifier('TestFlight'))
+    with WebhookReceiver(bus, port=port) as receiver:
+        print(f"📡 等待 webhook: {receiver.url} (每 {RECONCILE_INTERVAL // 60} 分钟轮询对账, 按 Ctrl+C 停止)\n")
+        try:
+            wait_for_events(bus, reconcile, RECONCILE_INTERVAL)
+        except KeyboardInterrupt:
+            pass
+
+
+def minutes(seconds):
+    return f"{seconds / 60:.0f} min"
+
+
+def find_run_id(resolver, run):
+    """ciBuildRuns ID for a run ID or a run number of the resolver's workflow; None if there is no such number"""
+    if not run.isdigit():
+        return run
+    number = int(run)
+    runs = Pager(f'ciWorkflows/{resolver.workflow_id()}/buildRuns',
+                 select({'ciBuildRuns': ['number']}, sort='-number'), until=lambda r: r['number'] < number)
+    return next((r.id for r in runs if r['number'] == number), None)
+
+
+def wait_targets(args, resolver):
+    """Targets for --wait and --run; None after printing why one cannot be found"""
+    from ..testflight import Target
+
+    versions = []
+    for version in args.wait or []:
+        if version == LATEST:
+            latest = recent_builds(1, resolver.app_id())
+            if not latest:
+                print("❌ No TestFlight builds yet")
+                return None
+            version = latest[0].get('version')
+        versions.append(version)
+    targets = [Target(f"build {version}", version=version) for version in dict.fromkeys(versions)]
+    for run in dict.fromkeys(args.runs or []):
+        run_id = find_run_id(resolver, run)
+        if run_id is None:
+            print(f"❌ No build run #{run} in {resolver.workflow()['name']}")
+            return None
+        targets.append(Target(f"run #{run}" if run.isdigit() else f"run {run}", run_id=run_id))
+    return targets
+
+
+def wait(targets, timeout, app_id=None):
+    """Follow the targets until processed; the exit status"""
+    from ..testflight import PERCENTILES, ProcessingWaiter
+
+    def print_change(target, previous):
+        now = time.time()
+        line = f"[{time.strftime('%H:%M:%S')}] {STATE_ICONS.get(target.state, '📦')} {target.label} {target.state}"
+        elapsed = target.elapsed(now)
+        if target.finished is not None and target.last_processing is not None:
+            line += f" after {minutes(elapsed)}"
+        elif target.state == 'PROCESSING':
+            line += f" · {minutes(elapsed)} since upload"
+        eta = waiter.eta(target, now)
+        if eta is not None:
+            line += " · ETA " + ", ".join(f"p{p} {minutes(eta[p])}" for p in PERCENTILES)
+        elif target.state == 'PROCESSING':
+            line += f" · no ETA yet ({len(waiter.durations)} builds timed)"
+        print(line, flush=True)
+
+    waiter = ProcessingWaiter(targets, timeout=timeout * 60, app_id=app_id, on_change=print_change,
+                              on_error=lambda e: print(f"⚠️  {e}", flush=True))
+    print(f"⏳ Waiting for {len(targets)} build(s) to finish processing (按 Ctrl+C 停止)\n", flush=True)
+    try:
+        status = waiter.run()
+    except KeyboardInterrupt:
+        status = waiter.exit_status()
+    pending = [target.label for target in targets if not target.done]
+    if pending:
+        print(f"\n⌛ Still waiting after {waiter.polls} polls: {', '.join(pending)}")
+    return status
+
+
+def verbose_request(endpoint, method='GET', data=None, params=None):
+    """Request that prints what it sends and what came back"""
+    print(f"\n🔧 {method} {endpoint}")
+    if data:
+        print(f"📤 Data: {json.dumps(data, indent=2)}")
+
+    response = get_client().request(method, endpoint, params=params, json=data)
+
+    print(f"📥 Status: {response.status_code}")
+    if response.status_code >= 400:
+        print(f"❌ Error: {response.text}")
+
+    return response
+
+
+def configure(resolver):
+    """Create the Archive build action and TestFlight distribution on the workflow"""
+    print("🚀 Configuring Xcode Cloud Workflow for TestFlight\n")
+
+    # Step 1: Get workflow
+    print("1️⃣ Getting workflow information...")
+    workflow = resolver.workflow()
+    workflow_id = workflow['id']
+
+    print(f"✅ Found workflow: {workflow['name']} ({workflow_id})")
+
+    # Step 2: Get the app
+    print("\n2️⃣ Getting app information...")
+    response = verbose_request('apps', params=select({'apps': ['name']}, bundleId='com.headshotairbattle'))
+    apps = parse_json(response)['data'] if response.status_code == 200 else []
+    if apps:
+        app = apps[0]
+        app_id = app['id']
+        print(f"✅ Found app: {app['attributes']['name']} ({app_id})")
+    else:
+        print("❌ App not found")
+        return 1
+
+    # Step 3: Create Archive build action
+    print("\n3️⃣ Creating Archive build action...")
+    build_action_data = {
+        'data': {
+            'type': 'ciBuildActions',
+            'attributes': {
+                'name': 'Archive - iOS',
+                'actionType': 'ARCHIVE',
+                'platform': 'IOS',
+                'buildDistributionAudience': 'APP_STORE_ELIGIBLE'
+            },
+            'relationships': {
+                'workflow': {
+                    'data': {
+                        'type': 'ciWorkflows',
+                        'id': workflow_id
+                    }
+                }
+            }
+        }
+    }
+
+    response = verbose_request('ciBuildActions', method='POST', data=build_action_data)
+    if response.status_code == 201:
+        build_action = parse_json(response)['data']
+        build_action_id = build_action['id']
+        print(f"✅ Created build action: {build_action_id}")
+    else:
+        print(f"⚠️  Build action creation failed. It may already exist.")
+        # Try to get existing build actions
+        response = verbose_request(f'ciWorkflows/{workflow_id}/buildActions',
+                                   params=select({'ciBuildActions': ['name']}))
+        if response.status_code == 200:
+            actions = parse_json(response)['data']
+            if actions:
+                build_action_id = actions[0]['id']
+                print(f"✅ Using existing build action: {build_action_id}")
+            else:
+                print("❌ No build actions found")
+                return 1
+
+    # Step 4: Create TestFlight post-action
+    print("\n4️⃣ Creating TestFlight distribution post-action...")
+
+    # First, try to create a TestFlight group or use default
+    testflight_data = {
+        'data': {
+            'type': 'ciTestDestinations',
+            'attributes': {
+                'destination': 'TESTFLIGHT_INTERNAL_TESTERS'
+            },
+            'relationships': {
+                'workflow': {
+                    'data': {
+                        'type': 'ciWorkflows',
+                        'id': workflow_id
+                    }
+                }
+            }
+        }
+    }
+
+    response = verbose_request('ciTestDestinations', method='POST', data=testflight_data)
+    if response.status_code == 201:
+        print("✅ TestFlight distribution configured")
+    else:
+        print(f"⚠️  TestFlight configuration: {response.status_code}")
+        print("This might be configured through workflow settings")
+
+    print("\n" + "="*60)
+    print("🎉 Configuration Complete!")
+    print("="*60)
+    print("\n📋 Summary:")
+    print("   ✅ Archive action created/verified")
+    print("   ✅ TestFlight distribution configured")
+    print("\n🚀 Next steps:")
+    print("   1. Trigger a new build: python3 -m asc trigger --trigger main")
+    print("   2. Wait 15-20 minutes for build to complete")
+    print("   3. Check TestFlight: python3 -m asc testflight")
+    print("\n💡 The next build will:")
+    print("   - Compile the code")
+    print("   - Archive for iOS")
+    print("   - Upload to TestFlight automatically")
+    return 0
+
+
+def run(args):
+    if args.configure:
+        return configure(Resolver(refresh=args.refresh))
+    if args.wait or args.runs:
+        resolver = Resolver(refresh=args.refresh, workflow_name=args.workflow)
+        targets = wait_targets(args, resolver)
+        if targets is None:
+            from ..testflight import EXIT_NOT_FOUND
+
+            return EXIT_NOT_FOUND
+        # Build numbers are looked up within the workflow's app
+        return wait(targets, args.timeout, resolver.app_id() if args.wait else None)
+
+    # Get app builds
+    print("🔍 Checking TestFlight builds...\n")
+    try:
+        builds = recent_builds(args.limit)
+    except APIError as e:
+        builds = None
+        print(f"❌ Error: {e.status_code}")
+        print(e.response.text)
+
+    if builds is not None:
+        print_builds(builds)
+        if args.webhook is not None:
+            follow(builds, args.limit, args.webhook or None, notify=args.notify)
+
+    print("\n💡 Next steps:")
+    print("   1. Wait for processing: python3 -m asc testflight --wait")
+    print("   2. Download TestFlight app on your iPhone")
+    print("   3. Open TestFlight and find HeadshotAirBattle")
+    print("   4. Install and test!")
+    return 0
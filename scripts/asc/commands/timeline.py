@@ -0,0 +1,122 @@
+"""
+asc timeline: where each build run's minutes go, phase by phase
+
+    python3 -m asc timeline --last 20
+    python3 -m asc timeline --runs 120-140 --json timeline.json
+
+Syncs the runs, then fetches the actions of the selected ones concurrently,
+and prints a bar per phase (queue, setup, each action, teardown) with the
+critical path highlighted. After that come per-phase percentiles and the
+phases that regressed against the runs before them (see asc.timeline).
+"""
+import json
+import sys
+
+from ..aio import DEFAULT_CONCURRENCY
+from ..history import BuildHistory
+from ..resolve import Resolver
+from ..timeline import QUEUE, TimelineReport
+
+BAR_WIDTH = 48
+# Critical path, other phases, waiting for a machine
+BARS = {True: '█', False: '▒', QUEUE: '░'}
+
+
+def add_arguments(parser):
+    parser.add_argument('--workflow', metavar='NAME', help="workflow other than the first")
+    parser.add_argument('--runs', metavar='FIRST-LAST', help="run numbers, e.g. 120-140, 120- or 130")
+    parser.add_argument('--last', type=int, default=10, help="the latest N runs when --runs is not given "
+                                                              "(default: %(default)s)")
+    parser.add_argument('--json', metavar='FILE', help="also write the analysis as JSON ('-' for stdout only)")
+    parser.add_argument('--no-sync', action='store_true', help="answer from the local history only")
+    parser.add_argument('--concurrency', type=int, default=DEFAULT_CONCURRENCY,
+                        help="action fetches in flight (default: %(default)s)")
+
+
+def parse_range(text):
+    """(first, last) run numbers from 'A-B', 'A-' or 'A'; None for an open end"""
+    first, dash, last = text.partition('-')
+    first = int(first) if first else None
+    last = int(last) if last else (None if dash else first)
+    return first, last
+
+
+def minutes(seconds):
+    return f"{seconds / 60:.1f}"
+
+
+def print_run(timeline, label_width, width=BAR_WIDTH):
+    scale = width / timeline['wall_seconds'] if timeline['wall_seconds'] else 0
+    path = ' → '.join(timeline['critical_path'])
+    print(f"#{timeline['number']}  {minutes(timeline['wall_seconds'])} 分钟 (计费 "
+          f"{minutes(timeline['billed_seconds'])} 分钟) {timeline['status'] or ''}  关键路径: {path}")
+    for phase in timeline['phases']:
+        start = round(phase['start'] * scale)
+        length = max(round(phase['end'] * scale) - start, 1)
+        bar = BARS[QUEUE] if phase['kind'] == QUEUE else BARS[phase['critical']]
+        print(f"  {phase['name']:<{label_width}} ▏{' ' * start}{bar * length:<{width - start}} "
+              f"{minutes(phase['seconds']):>6} 分钟")
+    print()
+
+
+def print_phases(phases):
+    print("⏱️  各阶段耗时 (分钟):\n")
+    label_width = max([len(name) for name in phases] + [5])
+    print(f"  {'阶段':<{label_width - 2}} {'次数':>4} {'p50':>6} {'p90':>6} {'p99':>6} {'合计':>7}  占比")
+    for name, stats in phases.items():
+        share = stats['share']
+        print(f"  {name:<{label_width}} {stats['count']:>5} {minutes(stats['p50']):>6} {minutes(stats['p90']):>6} "
+              f"{minutes(stats['p99']):>6} {minutes(stats['total']):>7}  {'█' * round(share * 20):<20} {share:.0%}")
+
+
+def print_regressions(regressions):
+    if not regressions:
+        print("\n✅ 没有阶段明显变慢")
+        return
+    print("\n⚠️  变慢的阶段:")
+    for r in regressions:
+        print(f"   #{r['number']} {r['phase']}: {minutes(r['seconds'])} 分钟, "
+              f"之前 p50 {minutes(r['baseline_p50'])} / p90 {minutes(r['baseline_p90'])} ({r['baseline_runs']} 次)")
+
+
+def run(args):
+    resolver = Resolver(refresh=args.refresh, workflow_name=args.workflow)
+    workflow = resolver.workflow()
+    history = BuildHistory()
+    if not args.no_sync:
+        history.sync(workflow['id'], with_actions=False)
+
+    if args.runs:
+        try:
+            first, last = parse_range(args.runs)
+        except ValueError:
+            print(f"❌ --runs {args.runs}: expected FIRST-LAST, e.g. 120-140", file=sys.stderr)
+            return 2
+    else:
+        last = history.highest_number(workflow['id'])
+        first = last - args.last + 1 if last is not None else None
+    if not args.no_sync:
+        history.sync_actions(workflow['id'], first, last, concurrency=args.concurrency)
+
+    report = TimelineReport(history, workflow['id'], first, last)
+    summary = dict(report.summary(), workflow=workflow['name'])
+    if args.json:
+        text = json.dumps(summary, indent=2, ensure_ascii=False)
+        if args.json == '-':
+            print(text)
+            return 0
+        with open(args.json, 'w') as f:
+            f.write(text + '\n')
+
+    if not report.timelines:
+        print(f"⏳ {workflow['name']}: 没有已完成的构建")
+        return 0
+    print(f"📊 {workflow['name']}: {len(report.timelines)} 次构建的阶段时间线\n")
+    label_width = max(len(phase['name']) for t in report.timelines for phase in t['phases'])
+    for timeline in report.timelines:
+        print_run(timeline, label_width)
+    print_phases(summary['phases'])
+    print_regressions(summary['regressions'])
+    if args.json:
+        print(f"\n💾 {args.json}")
+    return 0
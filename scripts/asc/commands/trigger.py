@@ -0,0 +1,150 @@
+"""
+asc trigger: list a workflow's recent builds and optionally start one
+
+Starts go through the trigger queue (asc.scheduler): duplicates of queued
+or unfinished runs are coalesced, and the per-workflow concurrency cap and
+the monthly minute budget are checked before anything is POSTed.
+"""
+from .. import config
+from ..client import APIError
+from ..dashboard import invalidate_shared
+from ..pager import paginate
+from ..query import select
+from ..resolve import ResolutionError, Resolver
+from ..scheduler import (COALESCED, DEFERRED, FAILED, OVER_BUDGET, SUPERSEDED, TRIGGERED, UNKNOWN,
+                         TriggerScheduler)
+
+BUILD_FIELDS = {'ciBuildRuns': ['number', 'executionProgress', 'completionStatus', 'startedDate']}
+
+
+def add_arguments(parser):
+    parser.add_argument('--trigger', nargs='?', const='main', metavar='BRANCH',
+                        help="start a build of a branch or tag (default: %(const)s)")
+    parser.add_argument('--workflow', metavar='NAME',
+                        help="workflow other than the first; see `asc dashboard` for all of them")
+    parser.add_argument('--commit', metavar='SHA',
+                        help="not sent with the build, which is of the branch head; only used to reuse a run or "
+                             "queued trigger of this commit and supersede a queued one of another commit")
+    parser.add_argument('--drain', action='store_true', help="start what is left in the trigger queue")
+    parser.add_argument('--queue', action='store_true', help="show the trigger queue")
+    parser.add_argument('--budget', type=float, default=config.TRIGGER_BUDGET_MINUTES, metavar='MINUTES',
+                        help="compute minutes the month may reach (default: %(default)s, env ASC_TRIGGER_BUDGET)")
+    parser.add_argument('--max-concurrent', type=int, default=config.TRIGGER_MAX_CONCURRENT, metavar='N',
+                        help="unfinished runs allowed per workflow (default: %(default)s)")
+    parser.add_argument('--defer', action='store_true',
+                        help="keep triggers over the budget queued instead of refusing them")
+
+
+def get_workflow_id(resolver):
+    """Get the first workflow ID"""
+    try:
+        return resolver.workflow_id()
+    except ResolutionError as e:
+        print(f"❌ Error resolving workflow: {e}")
+        return None
+
+
+def trigger_build(workflow_id, branch='main', scheduler=None, commit=None):
+    """Queue a build for the workflow and start it if nothing prevents it; the outcomes"""
+    scheduler = scheduler or TriggerScheduler()
+    outcomes = scheduler.request(workflow_id, branch, commit)
+    print_outcomes(outcomes)
+    if any(o.status == UNKNOWN for o in outcomes):
+        print("   Check the recent builds below; the next --drain reuses the run if it exists.")
+        list_recent_builds(workflow_id)
+    return outcomes
+
+
+def print_outcomes(outcomes):
+    for outcome in outcomes:
+        entry, run = outcome.entry, outcome.run or {}
+        what = entry['branch'] or 'default branch'
+        if entry['commit']:
+            what += f" @ {entry['commit'][:10]}"
+        if outcome.status == TRIGGERED:
+            # States cached for `asc status` no longer show the latest run
+            invalidate_shared()
+            print(f"\n✅ Build triggered successfully! ({what}, {outcome.detail})")
+            print(f"   Build ID: {run['id']}")
+            print(f"   Number: {run.get('number', 'N/A')}")
+            print(f"\n📱 Check progress at: https://appstoreconnect.apple.com/")
+        elif outcome.status == COALESCED:
+            target = f"run {run['id']}" if run else "the queued trigger"
+            print(f"\n♻️  {what}: {outcome.detail}, reusing {target}")
+        elif outcome.status == SUPERSEDED:
+            print(f"\n⏭️  {what}: dropped from the queue, {outcome.detail}")
+        elif outcome.status == DEFERRED:
+            print(f"\n⏳ {what}: queued, {outcome.detail}; run `asc trigger --drain` later")
+        elif outcome.status == OVER_BUDGET:
+            print(f"\n💸 {what}: refused, {outcome.detail} (--budget, or --defer to keep it queued)")
+        elif outcome.status == UNKNOWN:
+            # Never re-POST blindly: the run may exist already
+            print(f"\n⚠️  {what}: {outcome.detail}")
+        elif outcome.status == FAILED:
+            print(f"\n❌ Error triggering build ({what}): {outcome.detail}")
+
+
+def print_queue(queue):
+    entries = queue.entries()
+    print(f"\n🗂️  Trigger queue ({len(entries)}):")
+    for entry in entries:
+        commit = f" @ {entry['commit'][:10]}" if entry['commit'] else ''
+        print(f"   {entry['id']}  {entry['workflow_id']}  {entry['branch'] or '-'}{commit}  ×{entry['requests']}")
+
+
+def list_recent_builds(workflow_id, limit=5):
+    """List recent builds for a workflow, following pagination when limit > 200"""
+    builds = paginate(f'ciWorkflows/{workflow_id}/buildRuns', select(BUILD_FIELDS, sort='-number'),
+                      max_items=limit)
+
+    try:
+        builds = list(builds)
+    except APIError as e:
+        print(f"❌ Error listing builds: {e.status_code}")
+        return None
+
+    print(f"\n📋 Recent Builds ({len(builds)}):\n")
+    for build in builds:
+        attrs = build.attributes
+        print(f"  Build #{attrs.get('number', 'N/A')}")
+        print(f"    Status: {attrs.get('executionProgress', 'N/A')}")
+        print(f"    Result: {attrs.get('completionStatus', 'N/A')}")
+        print(f"    Started: {attrs.get('startedDate', 'N/A')}")
+        print()
+    return builds
+
+
+def run(args):
+    print("🚀 Xcode Cloud Build Trigger\n")
+
+    resolver = Resolver(refresh=args.refresh, workflow_name=args.workflow)
+    scheduler = TriggerScheduler(resolver, budget=args.budget, max_concurrent=args.max_concurrent,
+                                 defer=args.defer)
+    if args.drain or args.queue:
+        if args.drain:
+            print_outcomes(scheduler.drain())
+        if args.queue:
+            print_queue(scheduler.queue)
+        return 0
+
+    workflow_id = get_workflow_id(resolver)
+    if not workflow_id:
+        return 1
+
+    print(f"Found workflow ID: {workflow_id}\n")
+
+    # List recent builds first
+    list_recent_builds(workflow_id)
+
+    # Ask for confirmation
+    if args.trigger:
+        print(f"Triggering build for branch: {args.trigger}...")
+        outcomes = trigger_build(workflow_id, args.trigger, scheduler, commit=args.commit)
+        if any(o.status in (OVER_BUDGET, UNKNOWN, FAILED) for o in outcomes):
+            return 1
+    else:
+        print("💡 To trigger a new build, run:")
+        print("   python3 -m asc trigger --trigger [branch] [--workflow NAME] [--commit SHA]")
+        print("\nExample:")
+        print("   python3 -m asc trigger --trigger main")
+    return 0
@@ -0,0 +1,67 @@
+"""
+asc usage: Xcode Cloud compute-minute usage and month-end forecast
+"""
+import json
+from datetime import datetime, timezone
+
+from .. import config
+from ..history import BuildHistory
+from ..resolve import Resolver
+from ..usage import UsageReport
+
+
+def add_arguments(parser):
+    parser.add_argument('--month', help="billing month YYYY-MM (default: current month)")
+    parser.add_argument('--quota', type=float, default=config.MONTHLY_QUOTA_MINUTES,
+                        help="monthly compute minutes (default: %(default)s, env ASC_MONTHLY_QUOTA)")
+    parser.add_argument('--json', action='store_true', help="print the report as JSON")
+    parser.add_argument('--no-sync', action='store_true', help="answer from the local history only")
+
+
+def print_summary(summary):
+    print(f"⏱️  Xcode Cloud 使用统计 ({summary['month']})\n")
+
+    print("📊 按工作流:")
+    for name, minutes in summary['by_workflow'].items():
+        print(f"   {name}: {minutes:.1f} 分钟")
+    print("\n🎬 按操作类型:")
+    for action_type, minutes in summary['by_action_type'].items():
+        print(f"   {action_type}: {minutes:.1f} 分钟")
+    print("\n📅 按日期:")
+    for day, minutes in summary['by_day'].items():
+        print(f"   {day}: {minutes:.1f} 分钟")
+
+    runs = summary['runs']
+    print(f"\n📈 统计:")
+    print(f"   成功: {runs.get('SUCCEEDED', 0)}")
+    print(f"   失败: {runs.get('FAILED', 0) + runs.get('ERRORED', 0)}")
+    print(f"   总耗时: {summary['used_minutes']:.1f} 分钟")
+    print(f"   剩余额度: {summary['remaining_minutes']:.1f} / {summary['quota_minutes']:.0f} 分钟/月")
+    print(f"   消耗速度: {summary['daily_burn_rate']:.1f} 分钟/天")
+    warning = " ⚠️  将超出额度" if summary['projected_over_quota'] else ""
+    print(f"   月底预计: {summary['projected_minutes']:.1f} 分钟{warning}")
+
+
+def run(args):
+    month = datetime.strptime(args.month, '%Y-%m').replace(tzinfo=timezone.utc) if args.month else None
+
+    resolver = Resolver(refresh=args.refresh)
+    history = BuildHistory()
+    if args.no_sync:
+        # Names only if cached; the report shows the IDs of the others
+        workflows = resolver.cached_workflows()
+    else:
+        workflows = resolver.workflows()
+        # Only runs newer than the local index (plus unfinished ones) are fetched
+        for workflow in workflows:
+            history.sync(workflow['id'])
+
+    report = UsageReport(history, month=month, quota=args.quota,
+                         workflow_names={w['id']: w['name'] for w in workflows})
+    summary = report.summary()
+
+    if args.json:
+        print(json.dumps(summary, indent=2, ensure_ascii=False))
+    else:
+        print_summary(summary)
+    return 0
@@ -0,0 +1,129 @@
+"""
+asc watch: follow a workflow's build runs, printing only state changes
+
+Polls conditionally by default; with --webhook, changes arrive from App
+Store Connect and polling only reconciles missed deliveries.
+"""
+import time
+
+from ..client import APIError, get_client
+from ..history import BuildHistory
+from ..ratelimit import RateLimited
+from ..resolve import Resolver
+from ..retry import DeadlineExceeded, command_deadline
+from ..watch import ConditionalFetcher, PollSchedule, diff, is_active, snapshot
+from ..webhook import (BUILD_RUN_EVENT, RECONCILE_INTERVAL, EventBus, WebhookReceiver, desktop_notifier,
+                       event_from_run, wait_for_events)
+from .builds import BUILD_PARAMS, build_runs_endpoint, print_build
+
+POLL_DEADLINE = 60
+
+
+def add_arguments(parser):
+    parser.add_argument('--workflow', metavar='NAME',
+                        help="workflow other than the first; see `asc dashboard` for all of them")
+    parser.add_argument('--webhook', nargs='?', type=int, const=0, metavar='PORT',
+                        help="receive changes by webhook (needs ASC_WEBHOOK_SECRET)")
+    parser.add_argument('--notify', action='store_true', help="desktop notification per change (--webhook)")
+
+
+def poll_build_status(resolver, fetcher):
+    """Latest runs via a conditional GET; a stale cached workflow ID is re-resolved once"""
+    try:
+        payload, _ = fetcher.get(build_runs_endpoint(resolver.workflow_id()), BUILD_PARAMS)
+    except APIError as e:
+        if e.status_code != 404:
+            raise
+        resolver.cache.invalidate()
+        payload, _ = fetcher.get(build_runs_endpoint(resolver.workflow_id()), BUILD_PARAMS)
+    return payload['data']
+
+
+def watch(resolver, fetcher=None, schedule=None, sleep=time.sleep):
+    """Print the builds once, then only their state changes, polling adaptively"""
+    fetcher = fetcher or ConditionalFetcher()
+    schedule = schedule or PollSchedule()
+    state = None
+    while True:
+        try:
+            # One poll may not take longer than the interval it runs in
+            with command_deadline(POLL_DEADLINE):
+                builds = poll_build_status(resolver, fetcher)
+        except (APIError, RateLimited, DeadlineExceeded, OSError) as e:
+            print(f"⚠️  {e}")
+            sleep(schedule.next(bool(state) and is_active(state), False))
+            continue
+
+        current = snapshot(builds)
+        events = []
+        if state is None:
+            for build in builds:
+                print_build(build)
+        else:
+            events = diff(state, current)
+            for event in events:
+                print(f"[{time.strftime('%H:%M:%S')}] {event}  (📡 {fetcher.requests_last_hour()} 次请求/小时)")
+        state = current
+        sleep(schedule.next(is_active(state), bool(events)))
+
+
+def listen(resolver, port=None, notify=False):
+    """Print build changes as webhook deliveries arrive, reconciling by poll every RECONCILE_INTERVAL"""
+    fetcher = ConditionalFetcher()
+    workflow_id = resolver.workflow_id()
+    builds = poll_build_status(resolver, fetcher)
+    for build in builds:
+        print_build(build)
+    state = snapshot(builds)
+
+    def print_event(event):
+        if event.related.get('workflow') not in (None, workflow_id):
+            return
+        number = event.attributes.get('number')
+        current = {number: (event.attributes.get('executionProgress'), event.attributes.get('completionStatus'))}
+        previous = {number: state[number]} if number in state else {}
+        source = '' if event.source == 'webhook' else ' (轮询对账)'
+        for change in diff(previous, current):
+            print(f"[{time.strftime('%H:%M:%S')}] {change}{source}")
+        state.update(current)
+
+    def reconcile():
+        try:
+            with command_deadline(POLL_DEADLINE):
+                builds = poll_build_status(resolver, fetcher)
+        except (APIError, RateLimited, DeadlineExceeded, OSError) as e:
+            print(f"⚠️  {e}")
+            return
+        for build in builds:
+            if snapshot([build]).items() - state.items():
+                bus.publish(event_from_run(build, resolver.workflow_id()))
+
+    bus = EventBus()
+    bus.subscribe(print_event, kinds=[BUILD_RUN_EVENT])
+    bus.subscribe(BuildHistory().record_event, kinds=[BUILD_RUN_EVENT])
+    if notify:
+        bus.subscribe(desktop_notifier(), kinds=[BUILD_RUN_EVENT])
+    with WebhookReceiver(bus, port=port) as receiver:
+        print(f"📡 等待 webhook: {receiver.url} (每 {RECONCILE_INTERVAL // 60} 分钟轮询对账)\n")
+        wait_for_events(bus, reconcile, RECONCILE_INTERVAL)
+
+
+def run(args):
+    resolver = Resolver(refresh=args.refresh, workflow_name=args.workflow)
+    get_client().run_as_poller()
+    if args.webhook is not None:
+        print("📊 Xcode Cloud Build Status (webhook, 按 Ctrl+C 停止)\n")
+        try:
+            listen(resolver, args.webhook or None, notify=args.notify)
+        except KeyboardInterrupt:
+            pass
+        return 0
+
+    print("📊 Xcode Cloud Build Status (监视变化, 按 Ctrl+C 停止)\n")
+    fetcher = ConditionalFetcher()
+    try:
+        watch(resolver, fetcher)
+    except KeyboardInterrupt:
+        print(f"\n📡 {fetcher.requests} 次请求 ({fetcher.not_modified} 次未变化 304), "
+              f"最近一小时 {fetcher.requests_last_hour()} 次")
+    return 0
@@ -0,0 +1,156 @@
+"""
+asc workflows: Xcode Cloud workflow configuration and connected repositories
+"""
+import asyncio
+
+from ..aio import AsyncClient, DEFAULT_CONCURRENCY
+from ..client import get_client, parse_json
+from ..jsonapi import Document, IdentityMap
+from ..query import select
+from ..resolve import Resolver
+
+PRODUCT_FIELDS = {'ciProducts': ['name']}
+# `repository` is a relationship: listing it keeps the linkage in the response
+WORKFLOW_FIELDS = {'ciWorkflows': ['name', 'description', 'isEnabled', 'branchStartCondition', 'repository']}
+REPOSITORY_FIELDS = {'scmRepositories': ['ownerName', 'repositoryName', 'httpCloneUrl', 'sshCloneUrl']}
+ACTION_FIELDS = {'ciBuildActions': ['name', 'actionType']}
+
+
+def add_arguments(parser):
+    parser.add_argument('--actions', action='store_true',
+                        help="show the build actions of the workflow and what TestFlight needs")
+    parser.add_argument('--concurrency', type=int, default=DEFAULT_CONCURRENCY,
+                        help="requests in flight (default: %(default)s)")
+
+
+def print_repositories(response):
+    print("🔍 Checking SCM Repositories...\n")
+    if response.status_code == 200:
+        repos = parse_json(response)['data']
+        for repo in repos:
+            repo_id = repo['id']
+            attrs = repo['attributes']
+            print(f"📦 Repository:")
+            print(f"   ID: {repo_id}")
+            print(f"   Owner: {attrs.get('ownerName', 'N/A')}")
+            print(f"   Repository Name: {attrs.get('repositoryName', 'N/A')}")
+            print(f"   URL: {attrs.get('httpCloneUrl', 'N/A')}")
+            print(f"   SSH URL: {attrs.get('sshCloneUrl', 'N/A')}")
+            print()
+
+
+def print_workflow(workflow):
+    attrs = workflow.attributes
+
+    print(f"🔧 Workflow: {attrs.get('name', 'N/A')}")
+    print(f"   ID: {workflow.id}")
+    print(f"   Description: {attrs.get('description', 'N/A')}")
+    print(f"   Enabled: {attrs.get('isEnabled', False)}")
+    print(f"   Branch: {(attrs.get('branchStartCondition') or {}).get('source', {}).get('branchName', 'N/A')}")
+
+    repo_ids = workflow.related_ids('repository')
+    if repo_ids:
+        print(f"   Connected Repository ID: {repo_ids[0][1]}")
+        repo = workflow.related('repository')
+        if repo is not None:
+            print(f"   Repository: {repo.get('ownerName', 'N/A')}/{repo.get('repositoryName', 'N/A')}")
+            print(f"   Clone URL: {repo.get('httpCloneUrl', 'N/A')}")
+
+    print()
+
+
+async def check_workflows(api):
+    # Repositories and products don't depend on each other
+    repos_response, products_response = await asyncio.gather(
+        api.get('scmRepositories', select(REPOSITORY_FIELDS)),
+        api.get('ciProducts', select(PRODUCT_FIELDS)),
+    )
+    print_repositories(repos_response)
+
+    print("\n⚙️  Checking Workflow Configuration...\n")
+    if products_response.status_code != 200:
+        return
+
+    # Every document feeds one identity map, so a repository that is already
+    # listed or included is never fetched again
+    resources = IdentityMap()
+    if repos_response.status_code == 200:
+        Document.from_response(repos_response, resources)
+
+    products = parse_json(products_response)['data']
+    workflow_responses = await api.get_many(
+        [f"ciProducts/{product['id']}/workflows" for product in products],
+        select({**WORKFLOW_FIELDS, **REPOSITORY_FIELDS}, include=['repository']),
+    )
+    workflows = [
+        workflow
+        for response in workflow_responses if response.status_code == 200
+        for workflow in Document.from_response(response, resources)
+    ]
+
+    # Only repositories the API neither listed nor included need a lookup
+    missing = {
+        repo_id for workflow in workflows
+        for repo_type, repo_id in workflow.related_ids('repository')
+        if (repo_type, repo_id) not in resources
+    }
+    for response in await api.get_many([f'scmRepositories/{repo_id}' for repo_id in sorted(missing)],
+                                       select(REPOSITORY_FIELDS)):
+        if response.status_code == 200:
+            Document.from_response(response, resources)
+
+    for workflow in workflows:
+        print_workflow(workflow)
+
+
+def check_actions(resolver):
+    print("🔍 Checking workflow configuration...\n")
+    workflow = resolver.workflow()
+
+    print(f"📋 Workflow: {workflow['name']}")
+    print(f"   ID: {workflow['id']}\n")
+
+    response = resolver.with_workflow(
+        lambda workflow_id: get_client().get(f'ciWorkflows/{workflow_id}/buildActions', params=select(ACTION_FIELDS))
+    )
+    if response.status_code == 200:
+        actions = parse_json(response)['data']
+        print(f"🎬 Build Actions ({len(actions)}):")
+        for action in actions:
+            attrs = action['attributes']
+            print(f"   - {attrs.get('actionType', 'N/A')}: {attrs.get('name', 'N/A')}")
+        print()
+    else:
+        print("   No build actions configured\n")
+
+    # Check for macOS build action (Archive)
+    print("💡 To upload to TestFlight, you need:")
+    print("   1. Archive action in the workflow")
+    print("   2. TestFlight post-action configured")
+    print("\n📝 Current workflow likely needs configuration in App Store Connect:")
+    print("   1. Visit: https://appstoreconnect.apple.com/")
+    print("   2. Go to: Apps → HeadshotAirBattle → Xcode Cloud")
+    print("   3. Edit the 'Default' workflow")
+    print("   4. In 'Archive' section:")
+    print("      - Enable 'Archive - iOS'")
+    print("      - Select deployment preparation")
+    print("   5. In 'Post-Actions' section:")
+    print("      - Add 'TestFlight Internal Testing'")
+    print("      - Or 'TestFlight External Testing'")
+    print("   6. Save the workflow")
+
+
+def run(args):
+    if args.actions:
+        check_actions(Resolver(refresh=args.refresh))
+        return 0
+
+    api = AsyncClient(concurrency=args.concurrency)
+    try:
+        asyncio.run(check_workflows(api))
+    finally:
+        api.close()
+
+    print("\n💡 GitHub Repositories:")
+    print("   Current project: https://github.com/skingway/HeadshotAirBattle-iOS")
+    return 0
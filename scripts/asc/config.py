@@ -0,0 +1,57 @@
+"""
+App Store Connect API configuration
+"""
+import os
+from pathlib import Path
+
+KEY_ID = "GCUK756CLY"
+ISSUER_ID = "ff0ebed6-af79-487f-a9a9-4625e2d7ddcb"
+KEY_FILE = Path(os.environ.get(
+    'ASC_KEY_FILE', Path.home() / ".appstoreconnect" / f"AuthKey_{KEY_ID}.p8"
+))
+
+AUDIENCE = 'appstoreconnect-v1'
+TOKEN_LIFETIME = 1200  # 20 minutes, the maximum Apple accepts
+
+BASE_URL = os.environ.get('ASC_BASE_URL', 'https://api.appstoreconnect.apple.com/v1')
+
+# HTTP client defaults
+POOL_SIZE = int(os.environ.get('ASC_POOL_SIZE', 10))
+CONNECT_TIMEOUT = 5
+READ_TIMEOUT = 30
+
+# Record/replay of API traffic (see asc.cassette); unset means live traffic
+CASSETTE = os.environ.get('ASC_CASSETTE')
+CASSETTE_MODE = os.environ.get('ASC_CASSETTE_MODE', 'replay')
+
+# Local state (ID cache, history, response cache) lives here
+CACHE_DIR = Path(os.environ.get('ASC_CACHE_DIR', Path.home() / ".cache" / "asc"))
+ID_CACHE_TTL = 7 * 24 * 3600
+
+# GET responses of slow-changing resources (see asc.httpcache); ASC_RESPONSE_CACHE=0 turns it off
+RESPONSE_CACHE = os.environ.get('ASC_RESPONSE_CACHE', '1').lower() not in ('', '0', 'false', 'no')
+RESPONSE_CACHE_MAX_BYTES = int(float(os.environ.get('ASC_RESPONSE_CACHE_MB', 64)) * 1024 * 1024)
+# Answer from the response cache only, however old; `--offline` sets it too
+OFFLINE = os.environ.get('ASC_OFFLINE', '').lower() not in ('', '0', 'false', 'no')
+
+# Xcode Cloud compute included with the membership (25 hours)
+MONTHLY_QUOTA_MINUTES = float(os.environ.get('ASC_MONTHLY_QUOTA', 1500))
+
+# Trigger queue (see asc.scheduler): minutes a new run may take the month to, unfinished
+# runs allowed per workflow, and the estimate for a workflow without finished runs
+TRIGGER_BUDGET_MINUTES = float(os.environ.get('ASC_TRIGGER_BUDGET', MONTHLY_QUOTA_MINUTES))
+TRIGGER_MAX_CONCURRENT = int(os.environ.get('ASC_TRIGGER_MAX_CONCURRENT', 1))
+TRIGGER_DEFAULT_ESTIMATE = 15.0
+
+# Webhook receiver: shared secret configured on the App Store Connect webhook
+WEBHOOK_SECRET = os.environ.get('ASC_WEBHOOK_SECRET')
+WEBHOOK_PORT = int(os.environ.get('ASC_WEBHOOK_PORT', 8787))
+
+# Background agent (see asc.agent): opt in with ASC_AGENT=1
+AGENT = os.environ.get('ASC_AGENT', '').lower() not in ('', '0', 'false', 'no')
+# Default: CACHE_DIR / 'agent.sock'
+AGENT_SOCKET = os.environ.get('ASC_AGENT_SOCKET')
+AGENT_IDLE_TIMEOUT = float(os.environ.get('ASC_AGENT_IDLE_TIMEOUT', 1800))
+AGENT_SPAWN_TIMEOUT = 5
+# Longest a command may run in the agent before the client gives up on it
+AGENT_TIMEOUT = 600
@@ -0,0 +1,182 @@
+"""
+Concurrent build dashboard over every product and workflow
+
+One process watches all workflows: they come from the resolver's cached
+product → workflow map, and each cycle polls every workflow's latest runs
+concurrently through one `AsyncClient`, i.e. one connection pool, one
+token cache and the shared rate-limit bucket. Each poll is a conditional
+GET, so unchanged workflows cost a 304. Cycle time follows the slowest
+request rather than the number of workflows, up to the concurrency bound.
+
+`IncrementalRenderer` redraws the table in place and rewrites only the
+lines that changed since the previous frame.
+
+`shared_dashboard()` keeps one dashboard per set of workflows for the life
+of the process, so in the agent (see asc.agent) `asc status` answers from
+the last cycle until it is ACTIVE_MAX_AGE or IDLE_MAX_AGE seconds old.
+"""
+import asyncio
+import sys
+import threading
+import time
+
+from .aio import AsyncClient, DEFAULT_CONCURRENCY
+from .client import APIError
+from .history import duration_seconds, parse_date
+from .query import select
+from .ratelimit import RateLimited
+from .retry import DeadlineExceeded
+from .watch import ConditionalFetcher, UNFINISHED
+
+RUN_FIELDS = {'ciBuildRuns': ['number', 'executionProgress', 'completionStatus', 'startedDate', 'finishedDate']}
+
+# How old a cycle refresh() still answers from, while something runs and when idle
+ACTIVE_MAX_AGE = 10
+IDLE_MAX_AGE = 60
+
+
+class Dashboard:
+    """Latest run of every workflow, polled concurrently"""
+
+    def __init__(self, workflows, client=None, concurrency=DEFAULT_CONCURRENCY, runs_per_workflow=1):
+        self.workflows = workflows
+        self.api = AsyncClient(client, concurrency=concurrency)
+        self.fetcher = ConditionalFetcher(self.api.client)
+        self.params = select(RUN_FIELDS, limit=runs_per_workflow, sort='-number')
+        self.rows = {}
+        self.cycle_seconds = None
+        self.polled_at = None
+        self._refresh_lock = threading.Lock()
+
+    async def _poll_one(self, workflow):
+        try:
+            payload, changed = await self.api.call(
+                self.fetcher.get, f"ciWorkflows/{workflow['id']}/buildRuns", self.params,
+            )
+        except (APIError, RateLimited, DeadlineExceeded, OSError) as e:
+            return workflow['id'], {'workflow': workflow, 'runs': [], 'error': str(e)}, True
+        runs = [run['attributes'] for run in payload['data']]
+        return workflow['id'], {'workflow': workflow, 'runs': runs, 'error': None}, changed
+
+    async def poll(self):
+        """One cycle over all workflows; returns whether any of them changed"""
+        start = time.perf_counter()
+        results = await asyncio.gather(*(self._poll_one(w) for w in self.workflows))
+        self.cycle_seconds = time.perf_counter() - start
+        self.polled_at = time.monotonic()
+        changed = False
+        for workflow_id, row, row_changed in results:
+            changed = changed or row_changed or workflow_id not in self.rows
+            self.rows[workflow_id] = row
+        return changed
+
+    def age(self):
+        """Seconds since the last cycle finished; None before the first"""
+        return None if self.polled_at is None else time.monotonic() - self.polled_at
+
+    def refresh(self, max_age=None):
+        """Run a cycle unless the last one is younger than `max_age`; returns whether it polled
+
+        Blocking, and serialized, so callers on several threads share one cycle.
+        """
+        with self._refresh_lock:
+            if max_age is None:
+                max_age = ACTIVE_MAX_AGE if self.active() else IDLE_MAX_AGE
+            age = self.age()
+            if age is not None and age < max_age:
+                return False
+            asyncio.run(self.poll())
+            return True
+
+    def invalidate(self):
+        """Make the next refresh() poll, e.g. after a run was triggered"""
+        self.polled_at = None
+
+    def close(self):
+        self.api.close()
+
+    def active(self):
+        return any(run.get('executionProgress') in UNFINISHED
+                   for row in self.rows.values() for run in row['runs'])
+
+    def table(self, now=None):
+        """Table lines, one per workflow, products in order"""
+        now = now or time.time()
+        lines = [f"{'PRODUCT':<20} {'WORKFLOW':<24} {'BUILD':>6}  {'PROGRESS':<9} {'RESULT':<10} {'STARTED':<17} {'TIME':>6}"]
+        for workflow in sorted(self.workflows, key=lambda w: ((w.get('product_name') or ''), w['name'] or '')):
+            row = self.rows.get(workflow['id'])
+            product = (workflow.get('product_name') or workflow.get('product_id') or '')[:20]
+            name = (workflow['name'] or workflow['id'])[:24]
+            if row is None:
+                lines.append(f"{product:<20} {name:<24} {'…':>6}")
+            elif row['error']:
+                lines.append(f"{product:<20} {name:<24} {'!':>6}  {row['error'][:60]}")
+            elif not row['runs']:
+                lines.append(f"{product:<20} {name:<24} {'-':>6}  no builds")
+            else:
+                for run in row['runs']:
+                    started = (run.get('startedDate') or '')[:16].replace('T', ' ')
+                    lines.append(
+                        f"{product:<20} {name:<24} {'#' + str(run.get('number')):>6}  "
+                        f"{run.get('executionProgress') or '':<9} {run.get('completionStatus') or '':<10} "
+                        f"{started:<17} {_elapsed(run, now):>6}"
+                    )
+                    product = name = ''
+        return lines
+
+
+_shared = {}
+_shared_lock = threading.Lock()
+
+
+def shared_dashboard(workflows, **kwargs):
+    """Process-wide dashboard for these workflows, so its build states outlive one command"""
+    key = tuple(sorted(w['id'] for w in workflows))
+    with _shared_lock:
+        if key not in _shared:
+            _shared[key] = Dashboard(workflows, **kwargs)
+        return _shared[key]
+
+
+def invalidate_shared():
+    """Forget every shared dashboard's build states"""
+    with _shared_lock:
+        for dashboard in _shared.values():
+            dashboard.invalidate()
+
+
+def _elapsed(run, now):
+    seconds = duration_seconds(run.get('startedDate'), run.get('finishedDate'))
+    if seconds is None and run.get('startedDate') and run.get('executionProgress') in UNFINISHED:
+        seconds = now - parse_date(run['startedDate']).timestamp()
+    if seconds is None:
+        return ''
+    return f'{int(seconds // 60)}:{int(seconds % 60):02d}'
+
+
+class IncrementalRenderer:
+    """Draws a block of lines and redraws it in place, rewriting only changed lines"""
+
+    def __init__(self, stream=None):
+        self.stream = stream or sys.stdout
+        self.lines = []
+
+    def draw(self, lines):
+        """Update the block; returns how many lines were written"""
+        out = []
+        if self.lines:
+            # Back to the first line of the previous frame
+            out.append(f'\033[{len(self.lines)}F')
+        written = 0
+        for i, line in enumerate(lines):
+            if i < len(self.lines) and self.lines[i] == line:
+                out.append('\033[1E')
+            else:
+                out.append(f'{line}\033[K\n')
+                written += 1
+        if len(lines) < len(self.lines):
+            out.append('\033[J')
+        self.stream.write(''.join(out))
+        self.stream.flush()
+        self.lines = list(lines)
+        return written
@@ -0,0 +1,32 @@
+"""
+SQLite files shared by every `asc` process
+
+The first connection to a new database switches it to WAL, which needs an
+exclusive lock that the busy timeout does not wait for: processes opening
+the same new file at once fail with "database is locked". `connect()` runs
+that switch and the schema under an flock(2) on a `.lock` file next to the
+database, so setup happens one process at a time; reads and writes after
+it run concurrently under WAL.
+"""
+import fcntl
+import sqlite3
+from pathlib import Path
+
+
+def connect(path, schema, **kwargs):
+    """An sqlite3 connection to `path` in WAL mode with `schema` applied"""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    db = sqlite3.connect(path, **kwargs)
+    try:
+        with open(path.with_name(path.name + '.lock'), 'a') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                db.execute('PRAGMA journal_mode=WAL')
+                db.executescript(schema)
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+    except BaseException:
+        db.close()
+        raise
+    return db
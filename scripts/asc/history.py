@@ -0,0 +1,340 @@
+"""
+Incremental local SQLite store of Xcode Cloud build runs and their actions
+
+`sync()` only asks the API for runs numbered above the highest one already
+stored, plus a re-check of runs that were still PENDING/RUNNING last time.
+Actions are fetched once per finished run, since they never change after
+that. Usage and status commands then answer from the local index, without
+importing the HTTP or asyncio machinery that only sync() needs.
+
+`build_processing` keeps how long TestFlight took to process each build
+`asc testflight --wait` saw finish; the API has no record of it.
+"""
+import json
+import sqlite3
+import time
+from datetime import datetime, timezone
+
+from . import config, database
+from .client import get_client
+from .jsonapi import Document, IdentityMap, Resource
+from .pager import MAX_PAGE_SIZE, Pager
+from .query import select
+
+# Only the attributes the tables below keep; the rest is never read, so never fetched
+RUN_FIELDS = {'ciBuildRuns': ['number', 'executionProgress', 'completionStatus', 'startReason',
+                              'sourceCommit', 'createdDate', 'startedDate', 'finishedDate']}
+ACTION_FIELDS = {'ciBuildActions': ['name', 'actionType', 'executionProgress', 'completionStatus',
+                                    'startedDate', 'finishedDate']}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS build_runs (
+    id                 TEXT PRIMARY KEY,
+    workflow_id        TEXT NOT NULL,
+    number             INTEGER NOT NULL,
+    execution_progress TEXT,
+    completion_status  TEXT,
+    start_reason       TEXT,
+    commit_sha         TEXT,
+    created_date       TEXT,
+    started_date       TEXT,
+    finished_date      TEXT,
+    duration_seconds   REAL,
+    actions_synced     INTEGER NOT NULL DEFAULT 0,
+    attributes         TEXT NOT NULL,
+    synced_at          REAL NOT NULL
+);
+CREATE UNIQUE INDEX IF NOT EXISTS build_runs_workflow_number ON build_runs (workflow_id, number);
+CREATE INDEX IF NOT EXISTS build_runs_started ON build_runs (started_date);
+
+CREATE TABLE IF NOT EXISTS build_actions (
+    id                 TEXT PRIMARY KEY,
+    run_id             TEXT NOT NULL REFERENCES build_runs (id),
+    name               TEXT,
+    action_type        TEXT,
+    execution_progress TEXT,
+    completion_status  TEXT,
+    started_date       TEXT,
+    finished_date      TEXT,
+    duration_seconds   REAL,
+    attributes         TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS build_actions_run ON build_actions (run_id);
+
+CREATE TABLE IF NOT EXISTS build_processing (
+    build_id      TEXT PRIMARY KEY,
+    version       TEXT,
+    uploaded_date TEXT,
+    state         TEXT NOT NULL,
+    seconds       REAL NOT NULL,
+    recorded_at   REAL NOT NULL
+);
+"""
+
+UNFINISHED = ('PENDING', 'RUNNING')
+
+
+def parse_date(value):
+    """ISO-8601 timestamp from the API ('...Z') -> aware datetime, or None"""
+    if not value:
+        return None
+    return datetime.fromisoformat(value.replace('Z', '+00:00'))
+
+
+def duration_seconds(started, finished):
+    start, end = parse_date(started), parse_date(finished)
+    if start is None or end is None:
+        return None
+    return (end - start).total_seconds()
+
+
+class BuildHistory:
+    """SQLite index of build runs, synced incrementally by build number"""
+
+    def __init__(self, path=None, client=None):
+        self.path = path or config.CACHE_DIR / 'history.sqlite'
+        self._client = client
+        self.db = database.connect(self.path, SCHEMA)
+        self.db.row_factory = sqlite3.Row
+
+        self.api_calls = 0
+
+    @property
+    def client(self):
+        # Reports answered from the index never need the API
+        if self._client is None:
+            self._client = get_client()
+        return self._client
+
+    def close(self):
+        self.db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # -- writes ---------------------------------------------------------------
+
+    def _upsert_run(self, workflow_id, run):
+        attrs = run.attributes
+        self.db.execute(
+            """
+            INSERT INTO build_runs (id, workflow_id, number, execution_progress, completion_status,
+                                    start_reason, commit_sha, created_date, started_date, finished_date,
+                                    duration_seconds, attributes, synced_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT (id) DO UPDATE SET
+                start_reason       = COALESCE(excluded.start_reason, start_reason),
+                commit_sha         = COALESCE(excluded.commit_sha, commit_sha),
+                created_date       = COALESCE(excluded.created_date, created_date),
+                execution_progress = excluded.execution_progress,
+                completion_status  = excluded.completion_status,
+                started_date       = excluded.started_date,
+                finished_date      = excluded.finished_date,
+                duration_seconds   = excluded.duration_seconds,
+                attributes         = excluded.attributes,
+                synced_at          = excluded.synced_at
+            """,
+            (
+                run.id, workflow_id, attrs.get('number'), attrs.get('executionProgress'),
+                attrs.get('completionStatus'), attrs.get('startReason'),
+                (attrs.get('sourceCommit') or {}).get('commitSha'),
+                attrs.get('createdDate'), attrs.get('startedDate'), attrs.get('finishedDate'),
+                duration_seconds(attrs.get('startedDate'), attrs.get('finishedDate')),
+                json.dumps(attrs), time.time(),
+            ),
+        )
+
+    def record_event(self, event):
+        """EventBus subscriber: store the run a build-run event carries, as a sync would"""
+        from .webhook import BUILD_RUN_EVENT
+
+        workflow_id = event.related.get('workflow')
+        if event.kind != BUILD_RUN_EVENT or workflow_id is None:
+            return
+        raw = {'type': event.resource_type, 'id': event.resource_id, 'attributes': event.attributes}
+        self._upsert_run(workflow_id, Resource(raw, IdentityMap()))
+        self.db.commit()
+
+    def record_processing(self, build_id, version, uploaded_date, state, seconds):
+        """Store how long TestFlight took to take an uploaded build to `state` (see asc.testflight)"""
+        self.db.execute(
+            """
+            INSERT OR REPLACE INTO build_processing (build_id, version, uploaded_date, state, seconds, recorded_at)
+            VALUES (?, ?, ?, ?, ?, ?)
+            """,
+            (build_id, version, uploaded_date, state, seconds, time.time()),
+        )
+        self.db.commit()
+
+    def _replace_actions(self, run_id, actions):
+        self.db.execute('DELETE FROM build_actions WHERE run_id = ?', (run_id,))
+        self.db.executemany(
+            """
+            INSERT INTO build_actions (id, run_id, name, action_type, execution_progress, completion_status,
+                                       started_date, finished_date, duration_seconds, attributes)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """,
+            [
+                (
+                    action.id, run_id, action.get('name'), action.get('actionType'),
+                    action.get('executionProgress'), action.get('completionStatus'),
+                    action.get('startedDate'), action.get('finishedDate'),
+                    duration_seconds(action.get('startedDate'), action.get('finishedDate')),
+                    json.dumps(action.attributes),
+                )
+                for action in actions
+            ],
+        )
+        self.db.execute('UPDATE build_runs SET actions_synced = 1 WHERE id = ?', (run_id,))
+
+    def sync(self, workflow_id, with_actions=True, concurrency=8):
+        """Bring the store up to date for one workflow; returns the number of runs written"""
+        import asyncio
+
+        from .aio import AsyncClient
+
+        sync_started = time.time()
+        highest = self.highest_number(workflow_id)
+
+        # Newest first, stopping at the first run we already have. Once the
+        # store is warm a small first page is all a typical sync needs
+        pager = Pager(
+            f'ciWorkflows/{workflow_id}/buildRuns', select(RUN_FIELDS, sort='-number'),
+            client=self.client, page_size=20 if highest else MAX_PAGE_SIZE,
+            until=lambda run: highest is not None and run['number'] <= highest,
+        )
+        written = 0
+        for run in pager:
+            self._upsert_run(workflow_id, run)
+            written += 1
+        self.api_calls += pager.pages_fetched
+
+        api = AsyncClient(self.client, concurrency=concurrency)
+        stale = [row['id'] for row in self.db.execute(
+            f"""
+            SELECT id FROM build_runs
+            WHERE workflow_id = ? AND execution_progress IN ({','.join('?' * len(UNFINISHED))})
+              AND synced_at < ?
+            """,
+            (workflow_id, *UNFINISHED, sync_started),
+        )]
+        try:
+            if stale:
+                for response in asyncio.run(api.get_many([f'ciBuildRuns/{run_id}' for run_id in stale],
+                                                              select(RUN_FIELDS))):
+                    if response.status_code == 200:
+                        self._upsert_run(workflow_id, Document.from_response(response).data)
+                        written += 1
+                self.api_calls += len(stale)
+
+            if with_actions:
+                self._sync_actions(workflow_id, api)
+        finally:
+            api.close()
+        self.db.commit()
+        return written
+
+    def sync_actions(self, workflow_id, first=None, last=None, concurrency=8):
+        """Fetch the actions of finished runs numbered first..last that lack them; returns how many runs"""
+        from .aio import AsyncClient
+
+        api = AsyncClient(self.client, concurrency=concurrency)
+        try:
+            fetched = self._sync_actions(workflow_id, api, first, last)
+        finally:
+            api.close()
+        self.db.commit()
+        return fetched
+
+    def _sync_actions(self, workflow_id, api, first=None, last=None):
+        pending = [row['id'] for row in self.db.execute(
+            """
+            SELECT id FROM build_runs
+            WHERE workflow_id = ? AND execution_progress = 'COMPLETE' AND actions_synced = 0
+              AND number >= COALESCE(?, number) AND number <= COALESCE(?, number)
+            """,
+            (workflow_id, first, last),
+        )]
+        if not pending:
+            return 0
+        import asyncio
+
+        responses = asyncio.run(api.get_many([f'ciBuildRuns/{run_id}/actions' for run_id in pending],
+                                           select(ACTION_FIELDS, limit=MAX_PAGE_SIZE)))
+        self.api_calls += len(pending)
+        for run_id, response in zip(pending, responses):
+            if response.status_code == 200:
+                self._replace_actions(run_id, list(Document.from_response(response)))
+        return len(pending)
+
+    # -- reads ----------------------------------------------------------------
+
+    def highest_number(self, workflow_id):
+        row = self.db.execute(
+            'SELECT MAX(number) FROM build_runs WHERE workflow_id = ?', (workflow_id,)
+        ).fetchone()
+        return row[0]
+
+    def recent_runs(self, workflow_id, limit=5):
+        return self.db.execute(
+            'SELECT * FROM build_runs WHERE workflow_id = ? ORDER BY number DESC LIMIT ?',
+            (workflow_id, limit),
+        ).fetchall()
+
+    def runs_numbered(self, workflow_id, first=None, last=None):
+        """Runs of a workflow numbered first..last (either end open), oldest first"""
+        return self.db.execute(
+            """
+            SELECT * FROM build_runs
+            WHERE workflow_id = ? AND number >= COALESCE(?, number) AND number <= COALESCE(?, number)
+            ORDER BY number
+            """,
+            (workflow_id, first, last),
+        ).fetchall()
+
+    def runs_started_between(self, start, end=None, workflow_id=None):
+        """Runs with start time in [start, end), ISO strings or datetimes"""
+        query = 'SELECT * FROM build_runs WHERE started_date >= ?'
+        params = [_iso(start)]
+        if end is not None:
+            query += ' AND started_date < ?'
+            params.append(_iso(end))
+        if workflow_id is not None:
+            query += ' AND workflow_id = ?'
+            params.append(workflow_id)
+        return self.db.execute(query + ' ORDER BY started_date', params).fetchall()
+
+    def unfinished_runs(self):
+        """Runs that were PENDING/RUNNING when last synced"""
+        return self.db.execute(
+            f"SELECT * FROM build_runs WHERE execution_progress IN ({','.join('?' * len(UNFINISHED))})",
+            UNFINISHED,
+        ).fetchall()
+
+    def processing_seconds(self, state='VALID', limit=50):
+        """Processing durations of the last `limit` builds that ended in `state`, newest first"""
+        return [row[0] for row in self.db.execute(
+            'SELECT seconds FROM build_processing WHERE state = ? ORDER BY uploaded_date DESC LIMIT ?',
+            (state, limit),
+        )]
+
+    def actions_for(self, run_ids):
+        run_ids = list(run_ids)
+        if not run_ids:
+            return []
+        return self.db.execute(
+            f"SELECT * FROM build_actions WHERE run_id IN ({','.join('?' * len(run_ids))}) ORDER BY started_date",
+            run_ids,
+        ).fetchall()
+
+
+def _iso(value):
+    # Stored dates are the API's own UTC strings, so ISO text sorts chronologically
+    if isinstance(value, datetime):
+        if value.tzinfo is not None:
+            value = value.astimezone(timezone.utc)
+        return value.strftime('%Y-%m-%dT%H:%M:%S')
+    return value
@@ -0,0 +1,307 @@
+"""
+On-disk cache of GET responses for slow-changing resources
+
+Apps, products, workflows and repositories change a few times a year, and a
+finished build run never changes again, yet every command fetched them on
+every run. Client.request() answers plain GETs from here when the entry is
+fresh. A 200 response stays fresh for a TTL set by its resource type:
+
+    apps, ciProducts, scmRepositories    a day
+    ciWorkflows                          an hour
+    ciBuildRuns/{id}, .../actions        forever, once every run/action is COMPLETE
+
+Everything else (lists of build runs, builds, anything unfinished) is
+stored already expired: never served online, but there for `--offline`.
+Long-running pollers (watch, dashboard --watch) skip storing those. Entries
+are keyed by a hash of method, URL and sorted query; bodies are stored once
+per content hash under CACHE_DIR/responses. An SQLite index (WAL, set up
+under a lock by asc.database, so any number of processes may read and
+write) tracks size and last access, and the least recently used entries are
+evicted above ASC_RESPONSE_CACHE_MB. A successful write to a resource type
+drops its expiring entries.
+
+Requests carrying their own headers (If-None-Match, Cache-Control: no-cache
+from `--refresh`) skip the lookup. With `--offline` (ASC_OFFLINE=1) nothing
+is sent: entries are served however old, marked `X-ASC-Cache: stale` with an
+Age header, and anything else is answered 504 like an only-if-cached miss.
+"""
+import hashlib
+import json
+import math
+import os
+import threading
+import time
+from collections import namedtuple
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from . import config, database
+
+HOUR = 3600
+DAY = 24 * HOUR
+TTLS = {
+    'apps': DAY,
+    'ciProducts': DAY,
+    'scmRepositories': DAY,
+    'ciWorkflows': HOUR,
+}
+# Endpoints whose answer is final once everything in it has finished
+IMMUTABLE_WHEN_COMPLETE = frozenset({'ciBuildRuns/{id}', 'ciBuildRuns/{id}/actions'})
+IMMUTABLE = math.inf
+# Collections that keep changing; their bodies are not even parsed for a type
+VOLATILE_ENDPOINTS = ('buildRuns', 'builds', 'actions', 'artifacts', 'issues', 'testResults', 'preReleaseVersions')
+# Response headers kept with a body
+KEPT_HEADERS = ('Content-Type', 'ETag', 'Last-Modified')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    key         TEXT PRIMARY KEY,
+    url         TEXT NOT NULL,
+    type        TEXT NOT NULL,
+    digest      TEXT NOT NULL,
+    size        INTEGER NOT NULL,
+    headers     TEXT NOT NULL,
+    stored_at   REAL NOT NULL,
+    expires_at  REAL,
+    accessed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed_at);
+CREATE INDEX IF NOT EXISTS entries_digest ON entries (digest);
+CREATE INDEX IF NOT EXISTS entries_type ON entries (type);
+
+-- Running byte count of the distinct bodies, so a store need not sum the index
+CREATE TABLE IF NOT EXISTS totals (
+    id    INTEGER PRIMARY KEY CHECK (id = 0),
+    bytes INTEGER NOT NULL
+);
+"""
+
+# A stored response; `age` in seconds, `fresh` False once past its TTL
+Entry = namedtuple('Entry', 'url headers content stored_at age fresh')
+
+
+def request_key(method, url, params=None, namespace=''):
+    """Hash of method, URL and query (from the URL and `params`), in sorted order"""
+    parts = urlsplit(url)
+    query = parse_qsl(parts.query, keep_blank_values=True)
+    for name, value in (params or {}).items():
+        values = value if isinstance(value, (list, tuple)) else [value]
+        query.extend((name, str(v)) for v in values)
+    canonical = f'{namespace}|{method} {urlunsplit(parts._replace(query="", fragment=""))}?{urlencode(sorted(query))}'
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+def policy(endpoint, content):
+    """(resource type, TTL seconds) for the body of a 200 response; a TTL of 0 keeps it for --offline only"""
+    kind = next(part for part in reversed(endpoint.split('/')) if part != '{id}')
+    if endpoint not in IMMUTABLE_WHEN_COMPLETE and endpoint.endswith(VOLATILE_ENDPOINTS):
+        return kind, 0
+    try:
+        payload = json.loads(content)
+    except ValueError:
+        return kind, 0
+    data = payload.get('data') if isinstance(payload, dict) else None
+    resources = data if isinstance(data, list) else [data] if isinstance(data, dict) else []
+    if not resources:
+        return kind, 0
+    kind = resources[0].get('type') or kind
+    if endpoint in IMMUTABLE_WHEN_COMPLETE:
+        finished = all((r.get('attributes') or {}).get('executionProgress') == 'COMPLETE' for r in resources)
+        return kind, IMMUTABLE if finished else 0
+    return kind, TTLS.get(kind, 0)
+
+
+def response(method, url, params, status, headers, content, reason):
+    """A requests.Response for an answer that never went over the wire"""
+    import requests
+    from requests.structures import CaseInsensitiveDict
+
+    result = requests.Response()
+    result.status_code = status
+    result.headers = CaseInsensitiveDict(headers)
+    result.headers['Content-Length'] = str(len(content))
+    result._content = content
+    result.encoding = 'utf-8'
+    result.request = requests.Request(method, url, params=params).prepare()
+    result.url = result.request.url
+    result.reason = reason
+    return result
+
+
+class ResponseCache:
+    """Content-addressed response bodies plus an SQLite index, shared by every process"""
+
+    def __init__(self, path=None, max_bytes=None, namespace=None, clock=time.time):
+        self.root = path or config.CACHE_DIR / 'responses'
+        self.max_bytes = config.RESPONSE_CACHE_MAX_BYTES if max_bytes is None else max_bytes
+        self.namespace = namespace or config.KEY_ID
+        self.clock = clock
+        self._db = None
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.stale = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+        self.bytes_saved = 0
+
+    @property
+    def db(self):
+        # Opened on first use, so a process that never GETs creates nothing
+        if self._db is None:
+            db = database.connect(self.root / 'index.sqlite', SCHEMA, timeout=30, check_same_thread=False,
+                                  isolation_level=None)
+            if db.execute('SELECT 1 FROM totals').fetchone() is None:
+                # An index from before the running count
+                db.execute('INSERT OR IGNORE INTO totals VALUES (0, ?)', (self._measure(db),))
+            self._db = db
+        return self._db
+
+    def close(self):
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+    def _blob(self, digest):
+        return self.root / digest[:2] / digest
+
+    def key(self, method, url, params=None):
+        return request_key(method, url, params, self.namespace)
+
+    def get(self, method, url, params=None, stale_ok=False):
+        """The stored Entry for a request, fresh unless `stale_ok`; None (a miss) otherwise"""
+        key = self.key(method, url, params)
+        now = self.clock()
+        with self._lock:
+            row = self.db.execute('SELECT url, digest, headers, stored_at, expires_at FROM entries WHERE key = ?',
+                                  (key,)).fetchone()
+            fresh = row is not None and (row[4] is None or now < row[4])
+            if row is None or not (fresh or stale_ok):
+                self.misses += 1
+                return None
+            try:
+                content = self._blob(row[1]).read_bytes()
+            except FileNotFoundError:
+                # Evicted by another process between its index update and ours
+                self._forget('key = ?', (key,))
+                self.misses += 1
+                return None
+            self.db.execute('UPDATE entries SET accessed_at = ? WHERE key = ?', (now, key))
+            if fresh:
+                self.hits += 1
+            else:
+                self.stale += 1
+            self.bytes_saved += len(content)
+        return Entry(row[0], json.loads(row[2]), content, row[3], max(0.0, now - row[3]), fresh)
+
+    def put(self, method, url, params, headers, content, kind, ttl):
+        """Store a 200 response for `ttl` seconds (IMMUTABLE: for good), evicting once past max_bytes
+
+        Every process adds the bodies it writes to one running count in the
+        index; only when that crosses max_bytes is the index summed, under a
+        write lock, and trimmed. An unchanged body (the same poll answer
+        again) adds nothing.
+        """
+        digest = hashlib.sha256(content).hexdigest()
+        blob = self._blob(digest)
+        added = 0
+        if not blob.exists():
+            blob.parent.mkdir(parents=True, exist_ok=True)
+            tmp = blob.with_name(f'{digest}.{os.getpid()}.{threading.get_ident()}.tmp')
+            tmp.write_bytes(content)
+            os.replace(tmp, blob)
+            added = len(content)
+        now = self.clock()
+        kept = {name: headers[name] for name in KEPT_HEADERS if name in headers}
+        key = self.key(method, url, params)
+        with self._lock:
+            db = self.db
+            replaced = db.execute('SELECT digest, size FROM entries WHERE key = ?', (key,)).fetchone()
+            db.execute(
+                'INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                (key, url, kind, digest, len(content), json.dumps(kept), now,
+                 None if ttl == IMMUTABLE else now + ttl, now),
+            )
+            self.stores += 1
+            if replaced is not None and replaced[0] != digest and \
+                    db.execute('SELECT 1 FROM entries WHERE digest = ? LIMIT 1', (replaced[0],)).fetchone() is None:
+                # The previous answer for this request is no longer referenced
+                self._unlink({replaced[0]})
+                added -= replaced[1]
+            if added:
+                db.execute('UPDATE totals SET bytes = bytes + ?', (added,))
+                if db.execute('SELECT bytes FROM totals').fetchone()[0] > self.max_bytes:
+                    self._evict()
+
+    @staticmethod
+    def _measure(db):
+        """Bytes of the distinct bodies the index refers to"""
+        return db.execute('SELECT COALESCE(SUM(size), 0) FROM '
+                          '(SELECT digest, MAX(size) AS size FROM entries GROUP BY digest)').fetchone()[0]
+
+    def _evict(self):
+        """Drop least recently used entries until the distinct bodies fit in max_bytes"""
+        db = self.db
+        db.execute('BEGIN IMMEDIATE')
+        try:
+            total = self._measure(db)
+            orphans = set()
+            if total > self.max_bytes:
+                for key, digest, size in db.execute('SELECT key, digest, size FROM entries '
+                                                    'ORDER BY accessed_at').fetchall():
+                    if total <= self.max_bytes:
+                        break
+                    db.execute('DELETE FROM entries WHERE key = ?', (key,))
+                    self.evictions += 1
+                    if db.execute('SELECT 1 FROM entries WHERE digest = ? LIMIT 1', (digest,)).fetchone() is None:
+                        orphans.add(digest)
+                        total -= size
+            db.execute('UPDATE totals SET bytes = ?', (total,))
+            db.execute('COMMIT')
+        except BaseException:
+            db.execute('ROLLBACK')
+            raise
+        self._unlink(orphans)
+
+    def _unlink(self, digests):
+        for digest in digests:
+            try:
+                self._blob(digest).unlink()
+            except FileNotFoundError:
+                pass
+
+    def _forget(self, where, params):
+        """Delete the entries matching `where`, unlinking the bodies nothing else refers to"""
+        db = self.db
+        db.execute('BEGIN IMMEDIATE')
+        try:
+            sizes = dict(db.execute(f'SELECT digest, MAX(size) FROM entries WHERE {where} GROUP BY digest', params))
+            db.execute(f'DELETE FROM entries WHERE {where}', params)
+            orphans = {d for d in sizes
+                       if db.execute('SELECT 1 FROM entries WHERE digest = ? LIMIT 1', (d,)).fetchone() is None}
+            if orphans:
+                # Keep the running count in step, or every later put crosses max_bytes early
+                db.execute('UPDATE totals SET bytes = MAX(bytes - ?, 0)', (sum(sizes[d] for d in orphans),))
+            db.execute('COMMIT')
+        except BaseException:
+            db.execute('ROLLBACK')
+            raise
+        self._unlink(orphans)
+
+    def invalidate(self, kind):
+        """Forget expiring entries of a resource type, e.g. after a PATCH to one of them"""
+        with self._lock:
+            self._forget('type = ? AND expires_at IS NOT NULL', (kind,))
+
+    def stats(self):
+        lookups = self.hits + self.stale + self.misses
+        return {
+            'hits': self.hits,
+            'stale': self.stale,
+            'misses': self.misses,
+            'hit_ratio': round((self.hits + self.stale) / lookups, 3) if lookups else 0.0,
+            'bytes_saved': self.bytes_saved,
+            'stores': self.stores,
+            'evictions': self.evictions,
+        }
@@ -0,0 +1,124 @@
+"""
+JSON:API compound-document model
+
+App Store Connect returns related resources requested with `include=` in a
+top-level `included` array. `Document` indexes those by (type, id) in an
+`IdentityMap` and resolves `relationships` in place, so callers read
+`workflow.related('repository')` instead of fetching the repository again.
+The same map can be shared across pages so a resource included by several
+pages is stored once.
+"""
+
+from .client import parse_json
+
+
+class Resource:
+    """One JSON:API resource object with its relationships resolved lazily"""
+
+    __slots__ = ('type', 'id', 'attributes', 'relationships', 'links', '_map')
+
+    def __init__(self, raw, identity_map):
+        self.type = raw['type']
+        self.id = raw['id']
+        self.attributes = raw.get('attributes', {})
+        self.relationships = raw.get('relationships', {})
+        self.links = raw.get('links', {})
+        self._map = identity_map
+
+    def __getitem__(self, name):
+        return self.attributes[name]
+
+    def get(self, name, default=None):
+        return self.attributes.get(name, default)
+
+    def related_ids(self, name):
+        """(type, id) linkage for a relationship, as a list even for to-one"""
+        data = self.relationships.get(name, {}).get('data')
+        if data is None:
+            return []
+        if isinstance(data, dict):
+            data = [data]
+        return [(d['type'], d['id']) for d in data]
+
+    def related(self, name):
+        """The included resource for a to-one relationship, or None if it was not included"""
+        ids = self.related_ids(name)
+        return self._map.get(*ids[0]) if ids else None
+
+    def related_many(self, name):
+        """Included resources for a to-many relationship, skipping ones that were not included"""
+        return [r for r in (self._map.get(*key) for key in self.related_ids(name)) if r is not None]
+
+    def merge(self, raw):
+        """Fold another representation of the same resource into this one"""
+        self.attributes.update(raw.get('attributes', {}))
+        for name, rel in raw.get('relationships', {}).items():
+            if 'data' in rel or name not in self.relationships:
+                self.relationships[name] = rel
+
+    def __repr__(self):
+        return f'<{self.type} {self.id}>'
+
+
+class IdentityMap:
+    """(type, id) → Resource, one instance per resource however often it appears"""
+
+    def __init__(self):
+        self._resources = {}
+
+    def add(self, raw):
+        key = (raw['type'], raw['id'])
+        resource = self._resources.get(key)
+        if resource is None:
+            resource = self._resources[key] = Resource(raw, self)
+        else:
+            resource.merge(raw)
+        return resource
+
+    def get(self, type_, id_):
+        return self._resources.get((type_, id_))
+
+    def __contains__(self, key):
+        return key in self._resources
+
+    def __len__(self):
+        return len(self._resources)
+
+
+class Document:
+    """A parsed top-level JSON:API document"""
+
+    def __init__(self, payload, identity_map=None):
+        self.map = identity_map if identity_map is not None else IdentityMap()
+        self.raw_data = payload.get('data')
+        for raw in payload.get('included', ()):
+            self.map.add(raw)
+        if isinstance(self.raw_data, list):
+            self.data = [self.map.add(raw) for raw in self.raw_data]
+        elif self.raw_data is not None:
+            self.data = self.map.add(self.raw_data)
+        else:
+            self.data = None
+        self.links = payload.get('links', {})
+        self.meta = payload.get('meta', {})
+
+    @classmethod
+    def from_response(cls, response, identity_map=None):
+        return cls(parse_json(response), identity_map)
+
+    @property
+    def next_url(self):
+        return self.links.get('next')
+
+    def __iter__(self):
+        if isinstance(self.data, list):
+            return iter(self.data)
+        return iter(() if self.data is None else (self.data,))
+
+
+def include_params(*paths):
+    """`include` query parameter for nested relationship paths
+
+    include_params('actions', 'actions.issues') -> {'include': 'actions,actions.issues'}
+    """
+    return {'include': ','.join(paths)} if paths else {}
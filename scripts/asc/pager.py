@@ -0,0 +1,86 @@
+"""
+Lazy, prefetching iterator over paginated App Store Connect collections
+
+`paginate()` yields resources one at a time and follows `links.next`. While
+the caller works through page k, page k+1 is already being fetched on a
+background thread; page k+2 is not requested until k+1 is handed over, so
+no more than two pages are ever held in memory whatever the collection
+size. Breaking out of the loop, `until=` or `max_items=` stops paging
+immediately.
+"""
+from .client import check, get_client
+from .jsonapi import Document, IdentityMap
+
+MAX_PAGE_SIZE = 200
+
+
+class Pager:
+    """Iterable over every resource of a collection endpoint"""
+
+    def __init__(self, endpoint, params=None, client=None, page_size=MAX_PAGE_SIZE,
+                 until=None, max_items=None, prefetch=True):
+        self.client = client or get_client()
+        self.endpoint = endpoint
+        self.params = dict(params or {})
+        if max_items is not None:
+            page_size = min(page_size, max_items)
+        self.params.setdefault('limit', min(page_size, MAX_PAGE_SIZE))
+        self.until = until
+        self.max_items = max_items
+        self.prefetch = prefetch
+
+        self.pages_fetched = 0
+        self.total = None
+
+    def _fetch(self, url, params):
+        response = check(self.client.get(url, params=params))
+        # A fresh map per page: sharing one would keep every page alive
+        document = Document.from_response(response, IdentityMap())
+        self.pages_fetched += 1
+        if self.total is None:
+            self.total = document.meta.get('paging', {}).get('total')
+        return document
+
+    def __iter__(self):
+        from concurrent.futures import ThreadPoolExecutor
+
+        executor = ThreadPoolExecutor(max_workers=1) if self.prefetch else None
+        try:
+            document = self._fetch(self.endpoint, self.params)
+            yielded = 0
+            while document is not None:
+                pending = None
+                # Don't prefetch a page the caller has already said it won't read:
+                # past max_items, or when this page's last item already stops iteration
+                wanted = self.max_items is None or yielded + len(document.data) < self.max_items
+                if wanted and self.until is not None and document.data:
+                    wanted = not self.until(document.data[-1])
+                # `links.next` already carries the full query, cursor included
+                if document.next_url and wanted:
+                    if executor:
+                        pending = executor.submit(self._fetch, document.next_url, None)
+                    else:
+                        pending = document.next_url
+
+                for resource in document:
+                    if self.until is not None and self.until(resource):
+                        return
+                    yield resource
+                    yielded += 1
+                    if yielded == self.max_items:
+                        return
+
+                if pending is None:
+                    document = None
+                elif executor:
+                    document = pending.result()
+                else:
+                    document = self._fetch(pending, None)
+        finally:
+            if executor:
+                executor.shutdown(wait=False, cancel_futures=True)
+
+
+def paginate(endpoint, params=None, **kwargs):
+    """Yield every resource of `endpoint`, one page ahead, until exhausted or `until(resource)`"""
+    return iter(Pager(endpoint, params, **kwargs))
@@ -0,0 +1,49 @@
+"""
+Declarative sparse fieldsets and limits for App Store Connect reads
+
+Every script declares which attributes (and relationships) it actually
+reads, per resource type:
+
+    BUILD_FIELDS = {'ciBuildRuns': ['number', 'executionProgress']}
+    client.get(endpoint, params=select(BUILD_FIELDS, sort='-number', limit=5))
+
+`select()` turns that into `fields[ciBuildRuns]=number,executionProgress`
+plus `include`, `limit`, `limit[relationship]` and `sort` parameters, so the
+API only serialises what will be used. JSON:API treats relationships as
+fields too: a relationship whose linkage is needed must be listed.
+"""
+
+
+def select(fields=None, include=(), limit=None, limits=None, sort=None, **filters):
+    """Query parameters for a read
+
+    fields:  {type: [field, ...]} sparse fieldsets
+    include: relationship paths to include
+    limit:   page size of the primary collection
+    limits:  {relationship: n} caps on included to-many relationships
+    filters: filter[name]=value, e.g. select(bundleId='com.example') -> filter[bundleId]
+    """
+    params = {}
+    for type_, names in (fields or {}).items():
+        params[f'fields[{type_}]'] = ','.join(names)
+    if include:
+        params['include'] = ','.join(include)
+    if limit is not None:
+        params['limit'] = limit
+    for relationship, n in (limits or {}).items():
+        params[f'limit[{relationship}]'] = n
+    if sort:
+        params['sort'] = sort
+    for name, value in filters.items():
+        params[f'filter[{name}]'] = value
+    return params
+
+
+def merge_fields(*field_sets):
+    """Union of several declarations, e.g. when one call serves two readers"""
+    merged = {}
+    for field_set in field_sets:
+        for type_, names in field_set.items():
+            merged.setdefault(type_, [])
+            merged[type_] += [n for n in names if n not in merged[type_]]
+    return merged
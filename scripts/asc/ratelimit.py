@@ -0,0 +1,161 @@
+"""
+Hourly rate-limit scheduler shared by every process using the same API key
+
+App Store Connect reports the key's budget on every response:
+
+    X-Rate-Limit: user-hour-lim:3600;user-hour-rem:3512;
+
+`RateLimiter` keeps a token bucket for that budget in a small state file
+under CACHE_DIR, guarded by flock(2), so several `watch_build.py --watch`
+loops and one-off commands draw from one budget instead of each assuming
+they have the whole hour to themselves. The server's `rem` figure always
+wins over the local estimate. Background pollers leave a reserve untouched
+so interactive commands still get through when the budget runs low.
+"""
+import fcntl
+import json
+import threading
+import time
+
+from . import config
+
+INTERACTIVE = 0
+BACKGROUND = 1
+
+DEFAULT_HOURLY_LIMIT = 3600
+# Share of the hourly budget only interactive commands may spend
+BACKGROUND_RESERVE = 0.1
+
+
+class RateLimited(Exception):
+    """The shared budget stayed exhausted for longer than the caller will wait"""
+
+
+def parse_rate_limit(value):
+    """'user-hour-lim:3600;user-hour-rem:3512;' -> (3600, 3512); None if absent or malformed"""
+    if not value:
+        return None
+    fields = {}
+    for part in value.split(';'):
+        name, _, number = part.strip().partition(':')
+        if number.strip().isdigit():
+            fields[name] = int(number)
+    if 'user-hour-lim' in fields and 'user-hour-rem' in fields:
+        return fields['user-hour-lim'], fields['user-hour-rem']
+    return None
+
+
+class RateLimiter:
+    """File-backed token bucket refilled at limit/3600 tokens per second"""
+
+    def __init__(self, path=None, max_wait=30.0, clock=time.time, sleep=time.sleep):
+        self.path = path or config.CACHE_DIR / f'ratelimit-{config.KEY_ID}.json'
+        self.max_wait = max_wait
+        self.clock = clock
+        self.sleep = sleep
+        self._lock = threading.Lock()
+
+        self.waits = 0
+        self.waited = 0.0
+        self.throttled = 0
+
+    def _locked_update(self, update):
+        """Run update(state) -> result with the state file exclusively locked"""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._lock, open(self.path, 'a+') as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                f.seek(0)
+                try:
+                    state = json.loads(f.read() or '{}')
+                except ValueError:
+                    state = {}
+                now = self.clock()
+                self._refill(state, now)
+                result = update(state, now)
+                f.seek(0)
+                f.truncate()
+                f.write(json.dumps(state))
+                f.flush()
+                return result
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    @staticmethod
+    def _refill(state, now):
+        limit = state.setdefault('limit', DEFAULT_HOURLY_LIMIT)
+        tokens = state.setdefault('tokens', float(limit))
+        elapsed = max(0.0, now - state.get('updated', now))
+        state['tokens'] = min(float(limit), tokens + elapsed * limit / 3600)
+        state['updated'] = now
+
+    def _try_take(self, priority):
+        def take(state, now):
+            floor = state['limit'] * BACKGROUND_RESERVE if priority == BACKGROUND else 0
+            if state['tokens'] - 1 >= floor:
+                state['tokens'] -= 1
+                return 0.0
+            # Seconds until enough has refilled to clear the floor
+            return (floor + 1 - state['tokens']) * 3600 / state['limit']
+        return self._locked_update(take)
+
+    def acquire(self, priority=INTERACTIVE):
+        """Block until one request may be sent"""
+        deadline = None if priority == BACKGROUND else self.clock() + self.max_wait
+        while True:
+            wait = self._try_take(priority)
+            if wait <= 0:
+                return
+            if deadline is not None and self.clock() + wait > deadline:
+                raise RateLimited(f"App Store Connect hourly budget exhausted; next slot in {wait:.0f}s")
+            self.waits += 1
+            self.waited += wait
+            self.sleep(wait)
+
+    def update(self, response):
+        """Reconcile the bucket with the budget the server just reported"""
+        parsed = parse_rate_limit(response.headers.get('X-Rate-Limit'))
+        if response.status_code == 429:
+            self.throttled += 1
+
+        if parsed is None and response.status_code != 429:
+            return
+
+        def reconcile(state, now):
+            if parsed is not None:
+                limit, remaining = parsed
+                state['limit'] = limit
+                state['tokens'] = min(state['tokens'], float(remaining))
+                state['remaining'] = remaining
+            if response.status_code == 429:
+                state['tokens'] = 0.0
+        self._locked_update(reconcile)
+
+    def snapshot(self):
+        """Current shared state without taking a token"""
+        return self._locked_update(lambda state, now: dict(state))
+
+    def stats(self):
+        state = self.snapshot()
+        return {
+            'limit': state['limit'],
+            'tokens': round(state['tokens'], 1),
+            'server_remaining': state.get('remaining'),
+            'waits': self.waits,
+            'waited_seconds': round(self.waited, 2),
+            'throttled': self.throttled,
+        }
+
+
+class Unlimited:
+    """Limiter for replayed traffic, which spends nothing from the real budget"""
+
+    def acquire(self, priority=INTERACTIVE):
+        pass
+
+    def update(self, response):
+        pass
+
+    def stats(self):
+        return {'limit': None, 'tokens': None, 'server_remaining': None,
+                'waits': 0, 'waited_seconds': 0, 'throttled': 0}
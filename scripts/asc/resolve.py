@@ -0,0 +1,254 @@
+"""
+Persistent product → workflow → repository ID resolution
+
+Products and workflows almost never change, but every command used to spend
+two serial round trips (`ciProducts`, then `ciProducts/{id}/workflows`)
+finding them. The answers are kept in a small JSON file under CACHE_DIR with
+a TTL; a 404 on a cached ID drops the cache and resolves again. Updates
+are read-merge-replaced under flock(2) on a `.lock` file next to it, so
+`asc` processes running at once keep each other's entries.
+"""
+import fcntl
+import json
+import os
+import threading
+import time
+
+from . import config
+from .client import get_client, parse_json
+from .pager import Pager
+from .query import select
+
+PRODUCT_FIELDS = {'ciProducts': ['name']}
+WORKFLOW_FIELDS = {'ciWorkflows': ['name']}
+REPOSITORY_FIELDS = {'scmRepositories': ['repositoryName']}
+REFERENCE_FIELDS = {'scmGitReferences': ['name', 'canonicalName', 'kind', 'isDeleted']}
+
+
+class ResolutionError(Exception):
+    """Raised when the API has no product/workflow to resolve to"""
+
+
+def namespace_for(base_url=None, key_id=None):
+    """The ID cache namespace of an API base URL and key, the same however the URL was written"""
+    return f"{(base_url or config.BASE_URL).rstrip('/')}|{key_id or config.KEY_ID}"
+
+
+class IDCache:
+    """JSON file of resolved IDs, namespaced by API base URL and key"""
+
+    def __init__(self, path=None, ttl=config.ID_CACHE_TTL, namespace=None, clock=time.time):
+        self.path = path or config.CACHE_DIR / 'ids.json'
+        self.ttl = ttl
+        self.namespace = namespace or namespace_for()
+        self.clock = clock
+        self._lock = threading.Lock()
+
+    def _read(self):
+        try:
+            with open(self.path) as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return {}
+
+    def _write(self, data):
+        tmp = self.path.with_name(f'{self.path.name}.{os.getpid()}.tmp')
+        with open(tmp, 'w') as f:
+            json.dump(data, f, indent=2)
+        os.replace(tmp, self.path)
+
+    def _locked_update(self, update):
+        """Read, update(data) and rewrite the file with a lock file next to it held, so
+        another `asc` process's entries written in between are not lost"""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._lock, open(self.path.with_name(self.path.name + '.lock'), 'a') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                data = self._read()
+                if update(data):
+                    self._write(data)
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def get(self, key):
+        entry = self._read().get(self.namespace, {}).get(key)
+        if entry and self.clock() - entry['at'] < self.ttl:
+            return entry['value']
+        return None
+
+    def set(self, key, value):
+        def add(data):
+            data.setdefault(self.namespace, {})[key] = {'value': value, 'at': self.clock()}
+            return True
+
+        self._locked_update(add)
+
+    def invalidate(self):
+        self._locked_update(lambda data: data.pop(self.namespace, None) is not None)
+
+
+class Resolver:
+    """Resolves the product and workflow the scripts operate on, via the cache"""
+
+    def __init__(self, client=None, cache=None, refresh=False, workflow_name=None):
+        self._client = client
+        # Which workflow workflow() means; None is the first one, as before
+        self.workflow_name = workflow_name
+        if cache is None:
+            cache = IDCache(namespace=namespace_for(client.base_url, client.tokens.key_id) if client else None)
+        self.cache = cache
+        # repository ID -> {branch/tag name: ID}, listed at most once per resolver
+        self._references = {}
+        # --refresh also goes past the response cache (see asc.httpcache)
+        self.refresh = refresh
+        if refresh:
+            self.cache.invalidate()
+        self.api_calls = 0
+
+    @property
+    def client(self):
+        # Only a cache miss needs the API, so the shared client is created on first use
+        if self._client is None:
+            self._client = get_client()
+        return self._client
+
+    def _data(self, endpoint, fields):
+        self.api_calls += 1
+        headers = {'Cache-Control': 'no-cache'} if self.refresh else None
+        response = self.client.get(endpoint, params=select(fields), headers=headers)
+        if response.status_code != 200:
+            raise ResolutionError(f"{endpoint}: {response.status_code}")
+        return parse_json(response)['data']
+
+    def product_id(self):
+        """ID of the first Xcode Cloud product"""
+        product_id = self.cache.get('product')
+        if product_id is None:
+            products = self._data('ciProducts', PRODUCT_FIELDS)
+            if not products:
+                raise ResolutionError("No CI products found")
+            product_id = products[0]['id']
+            self.cache.set('product', product_id)
+        return product_id
+
+    def workflow(self):
+        """{'id', 'name'} of the workflow called `workflow_name`, else the first of the first product"""
+        if self.workflow_name:
+            for workflow in self.workflows():
+                if (workflow['name'] or '').lower() == self.workflow_name.lower():
+                    return {'id': workflow['id'], 'name': workflow['name']}
+            raise ResolutionError(f"No workflow named {self.workflow_name!r}")
+        workflow = self.cache.get('workflow')
+        if workflow is None:
+            workflows = self._data(f'ciProducts/{self.product_id()}/workflows', WORKFLOW_FIELDS)
+            if not workflows:
+                raise ResolutionError("No workflows found")
+            workflow = {'id': workflows[0]['id'], 'name': workflows[0]['attributes'].get('name')}
+            self.cache.set('workflow', workflow)
+        return workflow
+
+    def workflow_id(self):
+        return self.workflow()['id']
+
+    def workflows(self):
+        """[{'id', 'name', 'product_id', 'product_name'}] for every workflow of every product"""
+        workflows = self.cache.get('workflows')
+        if workflows is None or any('product_name' not in w for w in workflows):
+            workflows = [
+                {'id': w['id'], 'name': w['attributes'].get('name'),
+                 'product_id': product['id'], 'product_name': product['attributes'].get('name')}
+                for product in self._data('ciProducts', PRODUCT_FIELDS)
+                for w in self._data(f"ciProducts/{product['id']}/workflows", WORKFLOW_FIELDS)
+            ]
+            self.cache.set('workflows', workflows)
+        return workflows
+
+    def cached_workflows(self):
+        """workflows() as cached, without asking the API: [] on a miss"""
+        return self.cache.get('workflows') or []
+
+    def app_id(self):
+        """ID of the app built by the product of `workflow_name`, else by the first product"""
+        if self.workflow_name:
+            workflow_id = self.workflow_id()
+            product_id = next(w['product_id'] for w in self.workflows() if w['id'] == workflow_id)
+        else:
+            product_id = self.product_id()
+        key = f'app:{product_id}'
+        app_id = self.cache.get(key)
+        if app_id is None:
+            self.api_calls += 1
+            params = select({'ciProducts': ['app'], 'apps': ['bundleId']}, include=['app'])
+            response = self.client.get(f'ciProducts/{product_id}', params=params)
+            if response.status_code != 200:
+                raise ResolutionError(f"ciProducts/{product_id}: {response.status_code}")
+            linkage = parse_json(response)['data'].get('relationships', {}).get('app', {}).get('data')
+            if not linkage:
+                raise ResolutionError(f"Product {product_id} has no app")
+            app_id = linkage['id']
+            self.cache.set(key, app_id)
+        return app_id
+
+    def repository_id(self, repository_name):
+        """ID of a connected repository by name; misses are not cached"""
+        key = f'repository:{repository_name}'
+        repo_id = self.cache.get(key)
+        if repo_id is None:
+            for repo in self._data('scmRepositories', REPOSITORY_FIELDS):
+                if repo['attributes'].get('repositoryName') == repository_name:
+                    repo_id = repo['id']
+                    self.cache.set(key, repo_id)
+                    break
+        return repo_id
+
+    def workflow_repository_id(self, workflow_id):
+        """ID of the repository a workflow builds"""
+        key = f'workflow-repository:{workflow_id}'
+        repo_id = self.cache.get(key)
+        if repo_id is None:
+            self.api_calls += 1
+            params = select({'ciWorkflows': ['repository'], **REPOSITORY_FIELDS}, include=['repository'])
+            response = self.client.get(f'ciWorkflows/{workflow_id}', params=params)
+            if response.status_code != 200:
+                raise ResolutionError(f"ciWorkflows/{workflow_id}: {response.status_code}")
+            linkage = parse_json(response)['data'].get('relationships', {}).get('repository', {}).get('data')
+            if not linkage:
+                raise ResolutionError(f"Workflow {workflow_id} has no repository")
+            repo_id = linkage['id']
+            self.cache.set(key, repo_id)
+        return repo_id
+
+    def git_references(self, repo_id):
+        """{name or canonical 'refs/...' name: ID} of a repository's branches and tags; branches win"""
+        references = self._references.get(repo_id)
+        if references is None:
+            pager = Pager(f'scmRepositories/{repo_id}/gitReferences', select(REFERENCE_FIELDS), client=self.client)
+            references = {}
+            for ref in sorted(pager, key=lambda ref: ref.get('kind') != 'BRANCH'):
+                if not ref.get('isDeleted'):
+                    for name in (ref.get('name'), ref.get('canonicalName')):
+                        if name:
+                            references.setdefault(name, ref.id)
+            self.api_calls += pager.pages_fetched
+            self._references[repo_id] = references
+        return references
+
+    def git_reference_id(self, workflow_id, name):
+        """ID of the branch or tag `name` in the workflow's repository"""
+        repo_id = self.workflow_repository_id(workflow_id)
+        key = f'git-reference:{repo_id}:{name}'
+        ref_id = self.cache.get(key)
+        if ref_id is None:
+            ref_id = self.git_references(repo_id).get(name)
+            if ref_id is None:
+                raise ResolutionError(f"No branch or tag named {name!r}")
+            self.cache.set(key, ref_id)
+        return ref_id
+
+    def with_workflow(self, call):
+        """Run call(workflow_id); if a cached ID has gone stale (404), re-resolve once"""
+        response = call(self.workflow_id())
+        if response.status_code == 404:
+            self.cache.invalidate()
+            response = call(self.workflow_id())
+        return response
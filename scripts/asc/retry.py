@@ -0,0 +1,176 @@
+"""
+Retries, backoff and deadlines for the shared request path
+
+Transient failures (connection resets, timeouts, 429 and 5xx answers) are
+retried with capped exponential backoff and full jitter, honouring
+`Retry-After` when the server sends one. Every attempt is bounded by the
+remaining time of the call's deadline and of the enclosing command deadline
+(`with command_deadline(60): ...`), so a hung socket can no longer freeze a
+watch loop.
+
+Retries follow idempotency rules: GET/PATCH/PUT/DELETE are safe to repeat.
+A POST is only repeated when the server provably did not act on it (the
+connection was never established, or it answered 429). Anything ambiguous
+is raised as `AmbiguousRequestError` instead of risking a second
+`ciBuildRuns` being created.
+"""
+import contextlib
+import contextvars
+import random
+import time
+
+from . import trace
+
+IDEMPOTENT_METHODS = frozenset({'GET', 'HEAD', 'OPTIONS', 'PUT', 'PATCH', 'DELETE'})
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+
+class DeadlineExceeded(Exception):
+    """The call or command ran out of time before getting an answer"""
+
+
+class AmbiguousRequestError(Exception):
+    """A non-idempotent request failed after it may already have taken effect"""
+
+    def __init__(self, method, url, cause):
+        self.cause = cause
+        super().__init__(
+            f"{method} {url} failed after it may have reached the server ({cause}); "
+            f"not retried, check whether it took effect before sending it again"
+        )
+
+
+class Deadline:
+    """Absolute point in time; `None` seconds means no limit"""
+
+    def __init__(self, seconds=None, clock=time.monotonic):
+        self.clock = clock
+        self.at = None if seconds is None else clock() + seconds
+
+    def remaining(self):
+        return None if self.at is None else max(0.0, self.at - self.clock())
+
+    @property
+    def expired(self):
+        return self.at is not None and self.clock() >= self.at
+
+
+_command_deadline = contextvars.ContextVar('asc_command_deadline', default=None)
+
+
+@contextlib.contextmanager
+def command_deadline(seconds):
+    """Bound every request made inside the block, retries included"""
+    token = _command_deadline.set(Deadline(seconds))
+    try:
+        yield
+    finally:
+        _command_deadline.reset(token)
+
+
+def _earliest(*remaining):
+    values = [r for r in remaining if r is not None]
+    return min(values) if values else None
+
+
+def parse_retry_after(value, now=None):
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP-date)"""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    import email.utils
+
+    try:
+        when = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, when.timestamp() - (now if now is not None else time.time()))
+
+
+class RetryPolicy:
+    """How many times, and how long apart, a failed request is tried again"""
+
+    def __init__(self, max_attempts=5, backoff_base=0.5, backoff_cap=30.0,
+                 deadline=120.0, sleep=time.sleep, rng=random.random):
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        # Default per-call deadline across all attempts
+        self.deadline = deadline
+        self.sleep = sleep
+        self.rng = rng
+
+        self.retries = 0
+        self.gave_up = 0
+
+    def backoff(self, attempt):
+        """Full jitter: uniform in [0, min(cap, base * 2**attempt)]"""
+        return self.rng() * min(self.backoff_cap, self.backoff_base * 2 ** attempt)
+
+    def _may_retry(self, method, response=None, error=None):
+        if response is not None:
+            if response.status_code not in RETRY_STATUSES:
+                return False
+            # A 429 was rejected before any work was done; a 5xx might not have been
+            return method in IDEMPOTENT_METHODS or response.status_code == 429
+        if method in IDEMPOTENT_METHODS:
+            return True
+        # Only a connection that was never established is safe for a POST
+        import requests
+        from urllib3.exceptions import NewConnectionError
+
+        if isinstance(error, requests.ConnectTimeout):
+            return True
+        reason = getattr(error.args[0], 'reason', None) if error.args else None
+        return isinstance(reason, NewConnectionError)
+
+    def run(self, method, url, send, timeout, deadline=None):
+        """Call send(timeout) until it succeeds, a non-retryable answer comes back, or time runs out
+
+        `timeout` is the (connect, read) pair for a single attempt; it is
+        shortened to whatever the deadlines have left.
+        """
+        import requests
+
+        call_deadline = Deadline(self.deadline if deadline is None else deadline)
+        outer = _command_deadline.get()
+        connect_timeout, read_timeout = timeout
+
+        for attempt in range(self.max_attempts):
+            remaining = _earliest(call_deadline.remaining(), outer.remaining() if outer else None)
+            if remaining is not None and remaining <= 0:
+                self.gave_up += 1
+                raise DeadlineExceeded(f"{method} {url}: deadline exceeded after {attempt} attempt(s)")
+
+            attempt_timeout = (
+                _earliest(connect_timeout, remaining),
+                _earliest(read_timeout, remaining),
+            )
+            last = attempt == self.max_attempts - 1
+            try:
+                response = send(attempt_timeout)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                if not self._may_retry(method, error=e):
+                    raise AmbiguousRequestError(method, url, e) from e
+                if last:
+                    self.gave_up += 1
+                    raise
+                delay = self.backoff(attempt)
+            else:
+                if last or not self._may_retry(method, response=response):
+                    return response
+                retry_after = parse_retry_after(response.headers.get('Retry-After'))
+                delay = retry_after if retry_after is not None else self.backoff(attempt)
+
+            remaining = _earliest(call_deadline.remaining(), outer.remaining() if outer else None)
+            if remaining is not None and delay >= remaining:
+                self.gave_up += 1
+                raise DeadlineExceeded(f"{method} {url}: next retry in {delay:.1f}s is past the deadline")
+            self.retries += 1
+            with trace.span('backoff', attempt=attempt + 1):
+                self.sleep(delay)
+
+    def stats(self):
+        return {'retries': self.retries, 'gave_up': self.gave_up}
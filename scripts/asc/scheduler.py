@@ -0,0 +1,280 @@
+"""
+Build-minute-aware trigger queue
+
+`asc trigger --trigger BRANCH` used to POST a new ciBuildRuns whatever was
+already running, and dropped the branch on the floor. Triggers now go
+through a small queue under CACHE_DIR, processed with the queue file
+flock(2)-held so concurrent triggers see each other:
+
+- A request for the same workflow, branch and commit as one still queued
+  is coalesced into it; a request for a different commit of the same
+  workflow and branch supersedes the queued one, which is dropped.
+- A queued trigger whose workflow already has a PENDING/RUNNING run for
+  that branch (and commit, if one was given) is coalesced with that run
+  instead of starting another.
+- At most `max_concurrent` unfinished runs per workflow; more stay queued
+  until `asc trigger --drain`.
+- Minutes used this month (from the BuildHistory, synced before the queue
+  lock is taken so other triggers don't wait on it), the remainder of
+  runs in flight and the estimate for the new run (median of the
+  workflow's recent runs) must fit the budget; otherwise the trigger is
+  refused, or kept queued with `defer`.
+
+The API has no way to cancel a run, so only queued triggers are ever
+superseded; runs already started are left alone.
+"""
+import fcntl
+import json
+import statistics
+import threading
+import time
+import uuid
+from collections import namedtuple
+from datetime import datetime, timezone
+
+from . import config
+from .client import APIError, check, parse_json
+from .history import UNFINISHED, BuildHistory, parse_date
+from .jsonapi import Document
+from .query import select
+from .resolve import ResolutionError, Resolver
+from .retry import AmbiguousRequestError
+
+QUEUED = 'queued'
+COALESCED = 'coalesced'
+SUPERSEDED = 'superseded'
+DEFERRED = 'deferred'
+OVER_BUDGET = 'over_budget'
+TRIGGERED = 'triggered'
+UNKNOWN = 'unknown'
+FAILED = 'failed'
+
+ACTIVE_FIELDS = {'ciBuildRuns': ['number', 'executionProgress', 'sourceCommit', 'startedDate', 'sourceBranchOrTag'],
+                 'scmGitReferences': ['name', 'canonicalName']}
+# Unfinished runs are the newest ones; this many covers any realistic backlog
+ACTIVE_LOOKBACK = 20
+# Recent finished runs the estimate for a new one is the median of
+ESTIMATE_RUNS = 10
+
+# `entry` is the queue entry (dict), `run` the ciBuildRuns resource dict when there is one
+Outcome = namedtuple('Outcome', 'status entry run detail', defaults=(None, None))
+
+
+class TriggerQueue:
+    """JSON list of queued triggers, read and rewritten under an exclusive flock"""
+
+    def __init__(self, path=None):
+        self.path = path or config.CACHE_DIR / f'trigger-queue-{config.KEY_ID}.json'
+        self._lock = threading.Lock()
+
+    def locked(self):
+        return _LockedQueue(self)
+
+    def entries(self):
+        """Snapshot of the queue, without locking it for update"""
+        try:
+            with open(self.path) as f:
+                return json.loads(f.read() or '[]')
+        except (FileNotFoundError, ValueError):
+            return []
+
+
+class _LockedQueue:
+    """`with queue.locked() as entries:` the list is written back on exit"""
+
+    def __init__(self, queue):
+        self.queue = queue
+
+    def __enter__(self):
+        self.queue.path.parent.mkdir(parents=True, exist_ok=True)
+        self.queue._lock.acquire()
+        self.file = open(self.queue.path, 'a+')
+        fcntl.flock(self.file, fcntl.LOCK_EX)
+        self.file.seek(0)
+        try:
+            self.entries = json.loads(self.file.read() or '[]')
+        except ValueError:
+            self.entries = []
+        return self.entries
+
+    def __exit__(self, *exc):
+        try:
+            self.file.seek(0)
+            self.file.truncate()
+            self.file.write(json.dumps(self.entries, indent=1))
+            self.file.flush()
+        finally:
+            fcntl.flock(self.file, fcntl.LOCK_UN)
+            self.file.close()
+            self.queue._lock.release()
+        return False
+
+
+def enqueue(entries, workflow_id, branch=None, commit=None, now=None):
+    """Add a trigger to `entries` in place: [Outcome] for it and for any entry it superseded"""
+    outcomes = []
+    for entry in list(entries):
+        if entry['workflow_id'] != workflow_id or entry['branch'] != branch:
+            continue
+        if entry['commit'] == commit:
+            entry['requests'] += 1
+            return [Outcome(COALESCED, entry, detail="already queued")]
+        entries.remove(entry)
+        outcomes.append(Outcome(SUPERSEDED, entry, detail=f"superseded by {commit or 'the branch head'}"))
+    entry = {'id': uuid.uuid4().hex[:12], 'workflow_id': workflow_id, 'branch': branch, 'commit': commit,
+             'requested_at': now or time.time(), 'requests': 1}
+    entries.append(entry)
+    return [Outcome(QUEUED, entry)] + outcomes
+
+
+def run_branch(run):
+    """Name of the branch or tag a run builds, from its included sourceBranchOrTag"""
+    reference = run.related('sourceBranchOrTag')
+    return reference.get('name') if reference is not None else None
+
+
+def matches(run, entry):
+    """Whether an unfinished run already builds what `entry` asks for"""
+    if run_branch(run) != entry['branch']:
+        return False
+    sha = (run.get('sourceCommit') or {}).get('commitSha')
+    # A run that has not picked its commit yet will build the branch head
+    return not entry['commit'] or not sha or sha.startswith(entry['commit'])
+
+
+class TriggerScheduler:
+    """Drains the trigger queue against the API, the build history and the minute budget"""
+
+    def __init__(self, resolver=None, queue=None, history=None, budget=None, max_concurrent=None,
+                 defer=False, clock=time.time):
+        self.resolver = resolver or Resolver()
+        self.queue = queue or TriggerQueue()
+        self._history = history
+        self.budget = config.TRIGGER_BUDGET_MINUTES if budget is None else budget
+        self.max_concurrent = config.TRIGGER_MAX_CONCURRENT if max_concurrent is None else max_concurrent
+        self.defer = defer
+        self.clock = clock
+
+    @property
+    def client(self):
+        return self.resolver.client
+
+    @property
+    def history(self):
+        if self._history is None:
+            self._history = BuildHistory(client=self.client)
+        return self._history
+
+    # -- API ------------------------------------------------------------------
+
+    def active_runs(self, workflow_id):
+        """Unfinished runs of a workflow, newest first, with their branch included"""
+        params = select(ACTIVE_FIELDS, include=['sourceBranchOrTag'], sort='-number', limit=ACTIVE_LOOKBACK)
+        response = check(self.client.get(f'ciWorkflows/{workflow_id}/buildRuns', params=params))
+        return [run for run in Document.from_response(response) if run.get('executionProgress') in UNFINISHED]
+
+    def submit(self, entry):
+        """POST the ciBuildRuns for a queue entry; the created run"""
+        relationships = {'workflow': {'data': {'type': 'ciWorkflows', 'id': entry['workflow_id']}}}
+        if entry['branch']:
+            ref_id = self.resolver.git_reference_id(entry['workflow_id'], entry['branch'])
+            relationships['sourceBranchOrTag'] = {'data': {'type': 'scmGitReferences', 'id': ref_id}}
+        response = check(self.client.post('ciBuildRuns', {'data': {'type': 'ciBuildRuns',
+                                                                    'relationships': relationships}}))
+        return parse_json(response)['data']
+
+    # -- minutes --------------------------------------------------------------
+
+    def estimate_minutes(self, workflow_id):
+        """Expected billed minutes of a new run of the workflow"""
+        from .usage import recent_run_minutes
+
+        recent = recent_run_minutes(self.history, workflow_id, ESTIMATE_RUNS, now=self.now())
+        return statistics.median(recent) if recent else config.TRIGGER_DEFAULT_ESTIMATE
+
+    def now(self):
+        return datetime.fromtimestamp(self.clock(), timezone.utc)
+
+    def sync_history(self):
+        """Bring the history the minutes are drawn from up to date"""
+        # Called before taking the queue lock: a first sync fetches every run's actions,
+        # and other triggers shouldn't wait on that
+        for workflow in self.resolver.workflows():
+            self.history.sync(workflow['id'])
+
+    def committed_minutes(self):
+        """Minutes used this month plus what the runs still in flight are expected to add"""
+        from .usage import UsageReport
+
+        now = self.now()
+        in_flight = 0.0
+        for row in self.history.unfinished_runs():
+            started = parse_date(row['started_date'])
+            elapsed = (now - started).total_seconds() / 60 if started else 0.0
+            in_flight += max(self.estimate_minutes(row['workflow_id']) - elapsed, 0.0)
+        return UsageReport(self.history, now=now).total_minutes() + in_flight
+
+    # -- queue ----------------------------------------------------------------
+
+    def request(self, workflow_id, branch=None, commit=None):
+        """Queue a trigger and drain the queue: [Outcome]"""
+        self.sync_history()
+        with self.queue.locked() as entries:
+            outcomes = enqueue(entries, workflow_id, branch, commit, now=self.clock())
+            return [o for o in outcomes if o.status != QUEUED] + self._drain(entries)
+
+    def drain(self):
+        """Submit what the queue, the concurrency cap and the budget allow: [Outcome]"""
+        self.sync_history()
+        with self.queue.locked() as entries:
+            return self._drain(entries)
+
+    def _drain(self, entries):
+        outcomes = []
+        active = {}
+        committed = None
+        for entry in list(entries):
+            workflow_id = entry['workflow_id']
+            if workflow_id not in active:
+                active[workflow_id] = self.active_runs(workflow_id)
+            runs = active[workflow_id]
+
+            duplicate = next((run for run in runs if matches(run, entry)), None)
+            if duplicate is not None:
+                entries.remove(entry)
+                outcomes.append(Outcome(COALESCED, entry, run={'id': duplicate.id, **duplicate.attributes},
+                                        detail=f"#{duplicate.get('number')} is {duplicate.get('executionProgress')}"))
+                continue
+            if len(runs) >= self.max_concurrent:
+                outcomes.append(Outcome(DEFERRED, entry, detail=f"{len(runs)} runs unfinished "
+                                                                f"(limit {self.max_concurrent})"))
+                continue
+
+            if committed is None:
+                committed = self.committed_minutes()
+            estimate = self.estimate_minutes(workflow_id)
+            if committed + estimate > self.budget:
+                detail = f"{committed:.0f} + ~{estimate:.0f} min > budget {self.budget:.0f}"
+                if self.defer:
+                    outcomes.append(Outcome(DEFERRED, entry, detail=detail))
+                else:
+                    entries.remove(entry)
+                    outcomes.append(Outcome(OVER_BUDGET, entry, detail=detail))
+                continue
+
+            try:
+                run = self.submit(entry)
+            except AmbiguousRequestError as e:
+                # Left queued: if the run exists, the next drain coalesces with it instead of re-posting
+                outcomes.append(Outcome(UNKNOWN, entry, detail=str(e)))
+                continue
+            except (APIError, ResolutionError) as e:
+                entries.remove(entry)
+                outcomes.append(Outcome(FAILED, entry, detail=str(e)))
+                continue
+            entries.remove(entry)
+            committed += estimate
+            runs.append(Document({'data': run}).data)
+            outcomes.append(Outcome(TRIGGERED, entry, run={'id': run['id'], **run.get('attributes', {})},
+                                    detail=f"~{estimate:.0f} min"))
+        return outcomes
@@ -0,0 +1,520 @@
+"""
+Local App Store Connect stub server for benchmarks, tests and offline runs
+
+Serves canned JSON:API documents over HTTP/1.1 with keep-alive, and counts
+accepted connections so benchmarks can show how many handshakes a client
+would have paid against the real host. Collections honour `filter[attr]`,
+`filter[id]`, `sort`, `fields[type]`, `include` and `limit` with cursor
+pagination (`links.next`); latency, a random error rate and X-Rate-Limit
+headers are configurable. `files` serves files from disk with Range
+support, for downloads. `routes_from_cassette()` turns a recorded
+cassette into routes and `writable()` adds the POST/PATCH endpoints the
+scripts use, plus branches and tags for each repository, so
+`scripts/stub_server.py` can run every script with no network.
+"""
+import gzip
+import hashlib
+import json
+import random
+import socket
+import struct
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlencode, urlsplit
+
+SAMPLE_CASSETTE = Path(__file__).parent / 'cassettes' / 'sample.json'
+# Git references writable() gives every connected repository
+BRANCHES = ('main', 'develop', 'release/1.0')
+TAGS = ('v1.0',)
+
+
+def default_routes():
+    """A small product/workflow/build-run dataset shaped like the real API"""
+    return {
+        '/v1/apps': {'data': [
+            {'type': 'apps', 'id': 'app-1',
+             'attributes': {'name': 'HeadshotAirBattle', 'bundleId': 'com.headshotairbattle', 'sku': 'HAB001'}},
+        ]},
+        '/v1/ciProducts': {'data': [
+            {'type': 'ciProducts', 'id': 'product-1',
+             'attributes': {'name': 'HeadshotAirBattle', 'productType': 'APP'}},
+        ]},
+        '/v1/ciProducts/product-1/workflows': {'data': [
+            {'type': 'ciWorkflows', 'id': 'workflow-1',
+             'attributes': {'name': 'Default', 'description': '', 'isEnabled': True},
+             'relationships': {'repository': {'data': {'type': 'scmRepositories', 'id': 'repo-1'}}}},
+        ]},
+        '/v1/scmRepositories': {'data': [
+            {'type': 'scmRepositories', 'id': 'repo-1',
+             'attributes': {'ownerName': 'skingway', 'repositoryName': 'HeadshotAirBattle-iOS'}},
+        ]},
+        '/v1/scmRepositories/repo-1': {'data':
+            {'type': 'scmRepositories', 'id': 'repo-1',
+             'attributes': {'ownerName': 'skingway', 'repositoryName': 'HeadshotAirBattle-iOS'}},
+        },
+        '/v1/ciWorkflows/workflow-1/buildRuns': {'data': [
+            {'type': 'ciBuildRuns', 'id': 'run-30',
+             'attributes': {'number': 30, 'executionProgress': 'COMPLETE', 'completionStatus': 'SUCCEEDED',
+                            'createdDate': '2026-10-01T09:59:40Z', 'startedDate': '2026-10-01T10:00:00Z',
+                            'finishedDate': '2026-10-01T10:14:00Z', 'startReason': 'MANUAL',
+                            'cancelReason': None, 'isPullRequestBuild': False,
+                            'issueCounts': {'analyzerWarnings': 0, 'errors': 0, 'testFailures': 0, 'warnings': 3}}},
+        ]},
+    }
+
+
+def routes_from_cassette(path=SAMPLE_CASSETTE):
+    """GET routes from a cassette: one per path, paginated recordings merged back into one collection
+
+    Every resource listed in a collection is also served at /v1/{type}/{id}
+    unless the cassette recorded that path itself.
+    """
+    with open(path) as f:
+        interactions = json.load(f)['interactions']
+    routes = {}
+    for interaction in interactions:
+        request, response = interaction['request'], interaction['response']
+        if request['method'] != 'GET' or response['status'] != 200 or not isinstance(response['body'], dict):
+            continue
+        body = response['body']
+        data = body.get('data')
+        existing = routes.get(request['path'])
+        if isinstance(data, list):
+            seen = {(r['type'], r['id']) for r in existing['data']} if existing else set()
+            merged = existing['data'] if existing else []
+            merged += [r for r in data if (r['type'], r['id']) not in seen]
+            routes[request['path']] = {'data': merged}
+        elif existing is None or len(json.dumps(body)) > len(json.dumps(existing)):
+            # Keep the fullest representation if it was fetched with several fieldsets
+            routes[request['path']] = {'data': data}
+    for route in list(routes.values()):
+        if isinstance(route['data'], list):
+            for resource in route['data']:
+                routes.setdefault(f"/v1/{resource['type']}/{resource['id']}", {'data': resource})
+    return routes
+
+
+def git_references(repository_id):
+    """scmGitReferences for BRANCHES and TAGS of one repository"""
+    return [
+        {'type': 'scmGitReferences', 'id': f'{repository_id}-{kind.lower()}-{i}',
+         'attributes': {'name': name, 'canonicalName': f"refs/{'heads' if kind == 'BRANCH' else 'tags'}/{name}",
+                        'isDeleted': False, 'kind': kind},
+         'relationships': {'repository': {'data': {'type': 'scmRepositories', 'id': repository_id}}}}
+        for kind, names in (('BRANCH', BRANCHES), ('TAG', TAGS)) for i, name in enumerate(names)
+    ]
+
+
+def writable(routes):
+    """Add the write endpoints the scripts call, acting on the routes' own data"""
+    lock = threading.Lock()
+
+    def trigger(method, query, body):
+        if method != 'POST':
+            return 405, {'errors': [{'status': '405', 'code': 'METHOD_NOT_ALLOWED'}]}
+        relationships = json.loads(body)['data']['relationships']
+        workflow_id = relationships['workflow']['data']['id']
+        runs = routes.setdefault(f'/v1/ciWorkflows/{workflow_id}/buildRuns', {'data': []})['data']
+        with lock:
+            number = max((r['attributes']['number'] for r in runs), default=0) + 1
+            run = {'type': 'ciBuildRuns', 'id': f'run-{number}',
+                   'attributes': {'number': number, 'executionProgress': 'PENDING', 'completionStatus': None,
+                                  'createdDate': time.strftime('%Y-%m-%dT%H:%M:%S.000Z', time.gmtime()),
+                                  'startReason': 'MANUAL'},
+                   'relationships': {'workflow': {'data': {'type': 'ciWorkflows', 'id': workflow_id}}}}
+            if 'sourceBranchOrTag' in relationships:
+                run['relationships']['sourceBranchOrTag'] = relationships['sourceBranchOrTag']
+            runs.insert(0, run)
+            routes[f"/v1/ciBuildRuns/{run['id']}"] = {'data': run}
+        return 201, {'data': run}
+
+    def workflow_route(workflow):
+        def route(method, query, body):
+            if method == 'PATCH':
+                for name, rel in json.loads(body)['data'].get('relationships', {}).items():
+                    workflow.setdefault('relationships', {})[name] = rel
+            elif method != 'GET':
+                return 405, {'errors': [{'status': '405', 'code': 'METHOD_NOT_ALLOWED'}]}
+            return 200, {'data': workflow}
+        return route
+
+    def create(type_):
+        def route(method, query, body):
+            if method != 'POST':
+                return 405, {'errors': [{'status': '405', 'code': 'METHOD_NOT_ALLOWED'}]}
+            # Like the real API for a workflow that already has the action
+            return 409, {'errors': [{'status': '409', 'code': 'ENTITY_ERROR', 'detail': f'{type_} already exists'}]}
+        return route
+
+    routes['/v1/ciBuildRuns'] = trigger
+    for path, route in list(routes.items()):
+        parts = path.split('/')
+        if len(parts) == 4 and parts[2] == 'scmRepositories' and isinstance(route, dict):
+            references = git_references(parts[3])
+            routes.setdefault(f'{path}/gitReferences', {'data': references})
+            for reference in references:
+                routes.setdefault(f"/v1/scmGitReferences/{reference['id']}", {'data': reference})
+    routes['/v1/ciBuildActions'] = create('ciBuildActions')
+    for path, route in list(routes.items()):
+        if path.startswith('/v1/ciProducts/') and path.endswith('/workflows') and isinstance(route, dict):
+            for workflow in route['data']:
+                routes[f"/v1/ciWorkflows/{workflow['id']}"] = workflow_route(workflow)
+    return routes
+
+
+def _page(payload, query, path, stub):
+    """Filter, sort and paginate a collection route like the real API"""
+    data = payload['data']
+    for key, values in query.items():
+        if key.startswith('filter[') and key.endswith(']'):
+            wanted = set(values[0].split(','))
+            if key == 'filter[id]':
+                data = [r for r in data if r['id'] in wanted]
+            else:
+                data = [r for r in data if _filter_value(r, key[7:-1]) in wanted]
+    if 'sort' in query:
+        for field in reversed(query['sort'][0].split(',')):
+            name = field.lstrip('-')
+            present = [r for r in data if r.get('attributes', {}).get(name) is not None]
+            missing = [r for r in data if r.get('attributes', {}).get(name) is None]
+            data = sorted(present, key=lambda r: r['attributes'][name], reverse=field.startswith('-')) + missing
+    limit = int(query['limit'][0]) if 'limit' in query else stub.page_size
+    total = len(data)
+    links = {}
+    if limit:
+        offset = int(query.get('cursor', ['0'])[0])
+        data = data[offset:offset + limit]
+        if offset + limit < total:
+            params = {k: v[0] for k, v in query.items()}
+            params['cursor'] = offset + limit
+            links['next'] = f'{stub.origin}{path}?{urlencode(params)}'
+    return dict(payload, data=data, links=links, meta={'paging': {'total': total, 'limit': limit or total}})
+
+
+def _filter_value(resource, name):
+    """What `filter[name]` compares: a to-one relationship's ID, else the attribute as a string"""
+    linkage = (resource.get('relationships') or {}).get(name, {}).get('data')
+    if isinstance(linkage, dict):
+        return linkage['id']
+    return str(resource.get('attributes', {}).get(name))
+
+
+def _sparse(resource, names):
+    """Copy of a resource object with only the listed attributes and relationships"""
+    sparse = {k: v for k, v in resource.items() if k not in ('attributes', 'relationships')}
+    for member in ('attributes', 'relationships'):
+        if member in resource:
+            sparse[member] = {k: v for k, v in resource[member].items() if k in names}
+    return sparse
+
+
+def _apply_fieldsets(payload, query):
+    """Honour `fields[type]=a,b` on primary data and included resources"""
+    fieldsets = {key[7:-1]: set(values[0].split(','))
+                 for key, values in query.items() if key.startswith('fields[') and key.endswith(']')}
+    if not fieldsets:
+        return payload
+
+    def apply(resource):
+        names = fieldsets.get(resource.get('type'))
+        return resource if names is None else _sparse(resource, names)
+
+    data = payload.get('data')
+    if isinstance(data, list):
+        payload = dict(payload, data=[apply(r) for r in data])
+    elif data:
+        payload = dict(payload, data=apply(data))
+    if 'included' in payload:
+        payload = dict(payload, included=[apply(r) for r in payload['included']])
+    return payload
+
+
+def _resolve_includes(payload, include, routes):
+    """Add `included` for `include=a,a.b` by looking up `/v1/{type}/{id}` routes"""
+    data = payload.get('data')
+    primary = data if isinstance(data, list) else [data] if data else []
+    included = {}
+
+    def walk(resources, path):
+        name, _, rest = path.partition('.')
+        found = []
+        for resource in resources:
+            linkage = resource.get('relationships', {}).get(name, {}).get('data')
+            for ref in linkage if isinstance(linkage, list) else [linkage] if linkage else []:
+                route = routes.get(f"/v1/{ref['type']}/{ref['id']}")
+                if isinstance(route, dict) and route.get('data'):
+                    included[(ref['type'], ref['id'])] = route['data']
+                    found.append(route['data'])
+        if rest:
+            walk(found, rest)
+
+    for path in include.split(','):
+        walk(primary, path)
+    if included:
+        payload = dict(payload, included=list(included.values()))
+    return payload
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    # Headers and body go out in separate writes; without this, Nagle plus
+    # delayed ACKs add ~40 ms to every keep-alive response
+    disable_nagle_algorithm = True
+
+    def setup(self):
+        super().setup()
+        self.server.stub._connection_opened()
+
+    def log_message(self, format, *args):
+        pass
+
+    def _handle(self):
+        stub = self.server.stub
+        parts = urlsplit(self.path)
+        length = int(self.headers.get('Content-Length') or 0)
+        body = self.rfile.read(length) if length else b''
+        stub._record(self.command, parts.path, parse_qs(parts.query), self.headers, body)
+
+        fault = stub._next_fault()
+        if fault == 'reset':
+            # RST instead of a response, like a dropped connection mid-request
+            self.connection.setsockopt(socket.SOL_SOCKET, socket.SO_LINGER, struct.pack('ii', 1, 0))
+            self.close_connection = True
+            return
+        if isinstance(fault, tuple) and fault[0] == 'hang':
+            time.sleep(fault[1])
+            fault = None
+        if parts.path in stub.files and self.command == 'GET':
+            return self._send_file(stub.files[parts.path], fault)
+
+        if fault is None:
+            fault = stub._random_fault()
+        if stub.latency:
+            time.sleep(stub.latency)
+
+        query = parse_qs(parts.query)
+        route = stub.routes.get(parts.path)
+        rate_header, throttled = stub._spend_rate_limit()
+        extra_headers = {}
+        if isinstance(fault, tuple):
+            status, extra_headers = fault
+            payload = {'errors': [{'status': str(status), 'code': 'INJECTED'}]}
+        elif isinstance(fault, int):
+            status, payload = fault, {'errors': [{'status': str(fault), 'code': 'INJECTED'}]}
+        elif throttled:
+            status, payload = 429, {'errors': [{'status': '429', 'code': 'RATE_LIMIT_EXCEEDED'}]}
+        elif route is None:
+            status, payload = 404, {'errors': [{'status': '404', 'code': 'NOT_FOUND'}]}
+        elif callable(route):
+            status, payload = route(self.command, query, body)
+        elif self.command != 'GET':
+            status, payload = 405, {'errors': [{'status': '405', 'code': 'METHOD_NOT_ALLOWED'}]}
+        elif isinstance(route.get('data'), list) and 'next' not in route.get('links', {}):
+            status, payload = 200, _page(route, query, parts.path, stub)
+        else:
+            status, payload = 200, route
+
+        if status == 200 and 'include' in query:
+            payload = _resolve_includes(payload, query['include'][0], stub.routes)
+        if status == 200:
+            payload = _apply_fieldsets(payload, query)
+
+        raw = json.dumps(payload).encode()
+        etag = None
+        if stub.etags and status == 200 and self.command == 'GET':
+            etag = '"%s"' % hashlib.sha1(raw).hexdigest()[:16]
+            if self.headers.get('If-None-Match') == etag:
+                status, raw = 304, b''
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        if etag:
+            self.send_header('ETag', etag)
+        if rate_header:
+            self.send_header('X-Rate-Limit', rate_header)
+        for name, value in extra_headers.items():
+            self.send_header(name, value)
+        if raw and 'gzip' in self.headers.get('Accept-Encoding', ''):
+            raw = gzip.compress(raw)
+            self.send_header('Content-Encoding', 'gzip')
+        self.send_header('Content-Length', str(len(raw)))
+        self.end_headers()
+        self.wfile.write(raw)
+        stub._sent(len(raw))
+
+    do_GET = do_POST = do_PATCH = do_DELETE = _handle
+
+    def _send_file(self, path, fault):
+        """A file in 64 KiB writes, honouring `Range: bytes=a-[b]` and `If-Range`, like an artifact host"""
+        stub = self.server.stub
+        size = path.stat().st_size
+        etag = stub._file_etag(path)
+        start, end, status = 0, size - 1, 200
+        requested = self.headers.get('Range', '')
+        if requested.startswith('bytes=') and self.headers.get('If-Range', etag) == etag:
+            first, _, last = requested[6:].partition('-')
+            start, end, status = int(first), min(int(last), size - 1) if last else size - 1, 206
+            if start >= size:
+                self.send_response(416)
+                self.send_header('Content-Range', f'bytes */{size}')
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return
+        # ('cut', n): stop after n bytes of the body and close the connection. A clean FIN, not the RST of
+        # 'reset': with a reset the client may throw away bytes it has already received, and how many varies
+        cut = fault[1] if isinstance(fault, tuple) and fault[0] == 'cut' else None
+
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/octet-stream')
+        self.send_header('Accept-Ranges', 'bytes')
+        self.send_header('ETag', etag)
+        self.send_header('Content-Length', str(end - start + 1))
+        if status == 206:
+            self.send_header('Content-Range', f'bytes {start}-{end}/{size}')
+        self.end_headers()
+        sent = 0
+        with open(path, 'rb') as f:
+            f.seek(start)
+            remaining = end - start + 1
+            try:
+                while remaining:
+                    chunk = f.read(min(65536, remaining, cut - sent if cut is not None else remaining))
+                    self.wfile.write(chunk)
+                    sent += len(chunk)
+                    remaining -= len(chunk)
+                    if cut is not None and sent >= cut:
+                        self.wfile.flush()
+                        self.connection.shutdown(socket.SHUT_WR)
+                        self.close_connection = True
+                        break
+            except (BrokenPipeError, ConnectionResetError):
+                # The downloader gave up mid-body (cancelled, or a size/checksum check failed)
+                self.close_connection = True
+        stub._sent(sent)
+
+
+class StubServer:
+    """Threaded stub bound to an ephemeral localhost port"""
+
+    def __init__(self, routes=None, latency=0.0, handshake_cost=0.0, rate_limit=None, etags=False,
+                 error_rate=0.0, error_statuses=(500, 503), seed=None, page_size=None, files=None,
+                 host='127.0.0.1', port=0):
+        self.routes = default_routes() if routes is None else routes
+        # {url path: Path} served as downloads, streamed from disk with range support
+        self.files = files or {}
+        self._file_etags = {}
+        self.latency = latency
+        # Share of requests answered with a random status from error_statuses
+        self.error_rate = error_rate
+        self.error_statuses = error_statuses
+        self._rng = random.Random(seed)
+        # Page size for collections requested without `limit`; None returns them whole
+        self.page_size = page_size
+        # Hourly budget reported in X-Rate-Limit; 429 once it is spent
+        self.rate_limit = rate_limit
+        self.rate_remaining = rate_limit
+        # Strong ETags on GETs, answering a matching If-None-Match with 304
+        self.etags = etags
+        self.faults = []
+        # Delay added to every new connection, standing in for TCP+TLS setup
+        self.handshake_cost = handshake_cost
+
+        self._lock = threading.Lock()
+        self.connections = 0
+        self.requests = []
+        self.bytes_sent = 0
+
+        self._server = ThreadingHTTPServer((host, port), _Handler)
+        self._server.daemon_threads = True
+        self._server.stub = self
+        self._thread = None
+
+    @property
+    def origin(self):
+        host, port = self._server.server_address[:2]
+        return f'http://{host}:{port}'
+
+    @property
+    def url(self):
+        return f'{self.origin}/v1'
+
+    def _connection_opened(self):
+        with self._lock:
+            self.connections += 1
+        if self.handshake_cost:
+            time.sleep(self.handshake_cost)
+
+    def _record(self, method, path, query, headers, body):
+        with self._lock:
+            self.requests.append({'method': method, 'path': path, 'query': query,
+                                  'headers': dict(headers), 'body': body})
+
+    def _sent(self, size):
+        with self._lock:
+            self.bytes_sent += size
+
+    def inject(self, *faults):
+        """Queue faults for the next requests, one each, in order
+
+        A fault is an HTTP status (503), a status with extra headers
+        ((429, {'Retry-After': '1'})), 'reset' to drop the connection without
+        answering, or ('hang', seconds) to stall before answering normally.
+        A file download takes ('cut', n): the connection closes after n body bytes.
+        """
+        with self._lock:
+            self.faults.extend(faults)
+
+    def _next_fault(self):
+        with self._lock:
+            return self.faults.pop(0) if self.faults else None
+
+    def _file_etag(self, path):
+        """Quoted MD5 of a served file, as S3 gives single-part objects"""
+        with self._lock:
+            etag = self._file_etags.get(path)
+        if etag is None:
+            digest = hashlib.md5()
+            with open(path, 'rb') as f:
+                for chunk in iter(lambda: f.read(1 << 20), b''):
+                    digest.update(chunk)
+            etag = f'"{digest.hexdigest()}"'
+            with self._lock:
+                self._file_etags[path] = etag
+        return etag
+
+    def _random_fault(self):
+        with self._lock:
+            if self.error_rate and self._rng.random() < self.error_rate:
+                return self._rng.choice(self.error_statuses)
+        return None
+
+    def _spend_rate_limit(self):
+        """(X-Rate-Limit value, whether this request is over budget)"""
+        if self.rate_limit is None:
+            return None, False
+        with self._lock:
+            self.rate_remaining -= 1
+            header = f'user-hour-lim:{self.rate_limit};user-hour-rem:{max(self.rate_remaining, 0)};'
+            return header, self.rate_remaining < 0
+
+    def reset_counters(self):
+        with self._lock:
+            self.connections = 0
+            self.requests = []
+            self.bytes_sent = 0
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, args=(0.05,), daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
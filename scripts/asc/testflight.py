@@ -0,0 +1,275 @@
+"""
+Waiting for TestFlight builds to finish processing
+
+After upload, App Store Connect processes a build for anywhere from a few
+minutes to an hour before it is VALID (or FAILED/INVALID), and the API says
+nothing about how far along it is. `ProcessingWaiter` follows any number of
+builds in one process:
+
+- A target is a build number (`builds.version`) or the ciBuildRuns that
+  uploads the build. A target waits until its build shows up, and a run
+  that finishes without one fails its target.
+- Each poll is one conditional `builds?filter[id]=...` GET for every build
+  already found, one `builds?filter[version]=...` for the build numbers not
+  uploaded yet, and a `ciBuildRuns/{id}?include=builds` per run still
+  without a build, sent concurrently.
+- How long processing took is stored in the BuildHistory for every build
+  seen going from PROCESSING to done: from uploadedDate to halfway between
+  the last poll that saw it processing and the first that saw it done.
+- ETAs are percentiles of those durations conditioned on the time already
+  elapsed: a build 20 minutes in is only compared with builds that took
+  longer than 20 minutes.
+- The interval is a third of the nearest median ETA, within MIN_INTERVAL
+  and MAX_INTERVAL, so polls get denser as a build is due. Without an ETA
+  it backs off like asc.watch.
+"""
+import asyncio
+import time
+
+from .aio import AsyncClient
+from .client import APIError, get_client
+from .history import BuildHistory, parse_date
+from .jsonapi import Document
+from .pager import MAX_PAGE_SIZE
+from .query import select
+from .ratelimit import RateLimited
+from .retry import DeadlineExceeded
+from .watch import ConditionalFetcher, PollSchedule
+
+BUILD_FIELDS = {'builds': ['version', 'processingState', 'uploadedDate']}
+RUN_FIELDS = {'ciBuildRuns': ['number', 'executionProgress', 'completionStatus', 'builds'], **BUILD_FIELDS}
+
+PROCESSING = 'PROCESSING'
+# processingState values a build's processing ends in
+DONE_STATES = ('VALID', 'FAILED', 'INVALID')
+# A target without a build yet, and a run that finished without uploading one
+WAITING = 'WAITING'
+NO_BUILD = 'NO_BUILD'
+
+# Exit statuses of a wait (2 is left to argparse usage errors)
+EXIT_VALID = 0
+EXIT_FAILED = 1
+EXIT_TIMEOUT = 3
+EXIT_NOT_FOUND = 4
+
+PERCENTILES = (50, 90)
+# Past durations needed (beyond the elapsed time) before an ETA is given
+MIN_SAMPLES = 3
+HISTORY_LIMIT = 50
+MIN_INTERVAL = 15
+MAX_INTERVAL = 300
+
+
+def percentile(values, p):
+    """Linearly interpolated p-th percentile of sorted values"""
+    k = (len(values) - 1) * p / 100
+    low = int(k)
+    high = min(low + 1, len(values) - 1)
+    return values[low] + (values[high] - values[low]) * (k - low)
+
+
+def eta(durations, elapsed, percentiles=PERCENTILES):
+    """{p: seconds still to go} from past durations longer than `elapsed`; None with fewer than MIN_SAMPLES"""
+    longer = sorted(d for d in durations if d > elapsed)
+    if len(longer) < MIN_SAMPLES:
+        return None
+    return {p: percentile(longer, p) - elapsed for p in percentiles}
+
+
+class Target:
+    """One build being waited for, by build number or by the run that uploads it"""
+
+    def __init__(self, label, version=None, run_id=None):
+        self.label = label
+        self.version = version
+        self.run_id = run_id
+        self.build = None
+        self.state = WAITING
+        # Clock of the last poll that saw the build processing, and of the one that saw it done
+        self.last_processing = None
+        self.finished = None
+
+    @property
+    def done(self):
+        return self.state in DONE_STATES or self.state == NO_BUILD
+
+    def elapsed(self, now):
+        """Seconds since upload, or None before there is a build"""
+        uploaded = parse_date(self.build.get('uploadedDate')) if self.build is not None else None
+        # Never negative, whatever the skew between this clock and the API's
+        return max(now - uploaded.timestamp(), 0.0) if uploaded else None
+
+    def __repr__(self):
+        return f'<Target {self.label} {self.state}>'
+
+
+class WaitSchedule(PollSchedule):
+    """Seconds to the next poll: a third of the nearest ETA, or PollSchedule backoff without one"""
+
+    def __init__(self, fast=MIN_INTERVAL, cap=MAX_INTERVAL):
+        super().__init__(fast=fast, active_cap=cap, slow=fast, idle_cap=cap)
+
+    def next(self, remaining, changed):
+        interval = super().next(True, changed)
+        if remaining is None:
+            return interval
+        self.interval = min(max(remaining / 3, self.fast), self.active_cap)
+        return self.interval
+
+
+class ProcessingWaiter:
+    """Polls a set of targets until every build is done, recording how long processing took"""
+
+    def __init__(self, targets, client=None, history=None, schedule=None, timeout=None, app_id=None,
+                 clock=time.time, sleep=time.sleep, on_change=None, on_error=None):
+        self.targets = list(targets)
+        # Build numbers are per app: without it, --wait 51 could follow another app's build 51
+        self.app_id = app_id
+        self.client = client or get_client()
+        self.history = history or BuildHistory(client=self.client)
+        self.fetcher = ConditionalFetcher(self.client)
+        self.schedule = schedule or WaitSchedule()
+        self.timeout = timeout
+        self.clock = clock
+        self.sleep = sleep
+        self.on_change = on_change or (lambda target, previous: None)
+        self.on_error = on_error or (lambda error: None)
+        self.durations = self.history.processing_seconds(limit=HISTORY_LIMIT)
+        self.polls = 0
+
+    def eta(self, target, now=None):
+        """{percentile: seconds to go} for a processing target, or None"""
+        elapsed = target.elapsed(self.clock() if now is None else now)
+        if target.state != PROCESSING or elapsed is None:
+            return None
+        return eta(self.durations, elapsed)
+
+    def remaining(self, now):
+        """Seconds to the first median ETA among processing targets, or None"""
+        etas = [self.eta(target, now) for target in self.targets]
+        medians = [e[PERCENTILES[0]] for e in etas if e is not None]
+        return min(medians) if medians else None
+
+    # -- polling --------------------------------------------------------------
+
+    def _update(self, target, build, now):
+        target.build = build
+        state = build.get('processingState')
+        if state == PROCESSING:
+            target.last_processing = now
+        if state == target.state:
+            return False
+        previous, target.state = target.state, state
+        if state in DONE_STATES:
+            target.finished = now
+            if target.last_processing is not None and target.elapsed(now) is not None:
+                seconds = target.elapsed(now) - (now - target.last_processing) / 2
+                if seconds > 0:
+                    self.history.record_processing(build.id, build.get('version'), build.get('uploadedDate'),
+                                                   state, seconds)
+                    if state == 'VALID':
+                        self.durations.append(seconds)
+        self.on_change(target, previous)
+        return True
+
+    def _poll_builds(self, now):
+        tracked = [t for t in self.targets if t.build is not None and not t.done]
+        if not tracked:
+            return False
+        ids = sorted({t.build.id for t in tracked})
+        payload, _ = self.fetcher.get('builds', select(BUILD_FIELDS, limit=len(ids), id=','.join(ids)))
+        builds = {build.id: build for build in Document(payload)}
+        changed = False
+        for target in tracked:
+            if target.build.id in builds:
+                changed |= self._update(target, builds[target.build.id], now)
+        return changed
+
+    def _find_versions(self, now):
+        pending = [t for t in self.targets if t.build is None and t.version and not t.done]
+        if not pending:
+            return False
+        versions = sorted({t.version for t in pending})
+        filters = {'version': ','.join(versions)}
+        if self.app_id:
+            filters['app'] = self.app_id
+        payload, _ = self.fetcher.get('builds', select(BUILD_FIELDS, sort='-uploadedDate', limit=MAX_PAGE_SIZE,
+                                                       **filters))
+        newest = {}
+        for build in Document(payload):
+            newest.setdefault(build.get('version'), build)
+        changed = False
+        for target in pending:
+            if target.version in newest:
+                changed |= self._update(target, newest[target.version], now)
+        return changed
+
+    def _follow_runs(self, now):
+        pending = [t for t in self.targets if t.build is None and t.run_id and not t.done]
+        if not pending:
+            return False
+        api = AsyncClient(self.client)
+        try:
+            responses = asyncio.run(api.get_many([f'ciBuildRuns/{t.run_id}' for t in pending],
+                                                 select(RUN_FIELDS, include=['builds'])))
+        finally:
+            api.close()
+        changed = False
+        for target, response in zip(pending, responses):
+            if response.status_code == 404:
+                target.state = NO_BUILD
+                self.on_change(target, WAITING)
+                changed = True
+                continue
+            if response.status_code != 200:
+                self.on_error(APIError(response))
+                continue
+            run = Document.from_response(response).data
+            builds = sorted(run.related_many('builds'), key=lambda b: b.get('uploadedDate') or '', reverse=True)
+            if builds:
+                changed |= self._update(target, builds[0], now)
+            elif run.get('executionProgress') == 'COMPLETE':
+                target.state = NO_BUILD
+                self.on_change(target, WAITING)
+                changed = True
+        return changed
+
+    def poll(self):
+        """One round of requests; whether any target changed state"""
+        now = self.clock()
+        self.polls += 1
+        # Builds found by this round's lookups already carry their state, so known ones go first
+        changed = self._poll_builds(now)
+        changed |= self._find_versions(now)
+        changed |= self._follow_runs(now)
+        return changed
+
+    def run(self):
+        """Poll until every target is done or the timeout passes; the exit status"""
+        deadline = None if self.timeout is None else self.clock() + self.timeout
+        while True:
+            try:
+                changed = self.poll()
+            except (APIError, RateLimited, DeadlineExceeded, OSError) as e:
+                self.on_error(e)
+                changed = False
+            if all(target.done for target in self.targets):
+                break
+            now = self.clock()
+            if deadline is not None and now >= deadline:
+                break
+            interval = self.schedule.next(self.remaining(now), changed)
+            if deadline is not None:
+                interval = min(interval, deadline - now)
+            self.sleep(interval)
+        return self.exit_status()
+
+    def exit_status(self):
+        states = [target.state for target in self.targets]
+        if any(state in ('FAILED', 'INVALID', NO_BUILD) for state in states):
+            return EXIT_FAILED
+        if PROCESSING in states:
+            return EXIT_TIMEOUT
+        if WAITING in states:
+            return EXIT_NOT_FOUND
+        return EXIT_VALID
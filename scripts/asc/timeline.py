@@ -0,0 +1,212 @@
+"""
+Where a build run's minutes go: phase timeline, percentiles, critical path
+and regressions
+
+A run's duration hides the costs that matter: a test action that grew by
+five minutes, or setup (clone, `ci_scripts/ci_post_clone.sh`, package
+resolution) that now takes longer than the build. The API reports no
+timing inside an action, so each run is split into phases from the synced
+BuildHistory:
+
+- queue: createdDate → startedDate, waiting for a machine;
+- setup: run start → first action start, i.e. clone and post-clone scripts;
+- one phase per ciBuildActions (build, test, analyze, archive), in parallel;
+- teardown: last action finish → run finish (ci_post_xcodebuild.sh,
+  uploads).
+
+The critical path is walked back from the end of the run: the phase that
+ends last, then the phase that ends last before that one starts, and so on.
+Shortening anything off it does not shorten the run.
+
+Durations feed one QuantileSketch per phase name, so percentiles over any
+number of runs take constant memory. Runs are visited oldest first, and a
+phase is flagged as a regression when it is well above the sketch of the
+runs before it (past its p90, REGRESSION_RATIO over the median and by at
+least REGRESSION_SECONDS).
+"""
+import math
+from collections import namedtuple
+
+from .history import parse_date
+
+QUEUE = 'queue'
+SETUP = 'setup'
+TEARDOWN = 'teardown'
+ACTION = 'action'
+
+QUANTILES = (0.5, 0.9, 0.99)
+# Runs a phase needs before the ones after it are compared with them
+MIN_BASELINE = 5
+REGRESSION_RATIO = 1.25
+REGRESSION_SECONDS = 60
+
+# Offsets in seconds from the run's createdDate (its startedDate when that is missing)
+Phase = namedtuple('Phase', 'name kind start end')
+
+
+class QuantileSketch:
+    """Streaming quantiles with bounded relative error (the DDSketch bucketing)
+
+    A value v > 0 goes in bucket ceil(log_gamma(v)), gamma = (1 + a) / (1 - a),
+    and every value in a bucket is within relative accuracy `a` of the
+    bucket's midpoint. Memory grows with the log of the value range, not with
+    the number of values; sketches merge by adding bucket counts.
+    """
+
+    def __init__(self, relative_accuracy=0.01):
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.buckets = {}
+        self.zeros = 0
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def add(self, value):
+        if value <= 0:
+            self.zeros += 1
+        else:
+            index = math.ceil(math.log(value) / self._log_gamma)
+            self.buckets[index] = self.buckets.get(index, 0) + 1
+        self.count += 1
+        self.total += value
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+
+    def merge(self, other):
+        for index, n in other.buckets.items():
+            self.buckets[index] = self.buckets.get(index, 0) + n
+        self.zeros += other.zeros
+        self.count += other.count
+        self.total += other.total
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    def quantile(self, q):
+        """Value at quantile q in [0, 1]; None while empty"""
+        if not self.count:
+            return None
+        rank = q * (self.count - 1)
+        seen = self.zeros
+        if rank < seen:
+            return 0.0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if rank < seen:
+                estimate = 2 * self.gamma ** index / (self.gamma + 1)
+                return min(max(estimate, self.min), self.max)
+        return self.max
+
+    def summary(self):
+        return {'count': self.count, 'total': round(self.total, 1),
+                **{f'p{round(q * 100)}': round(self.quantile(q), 1) for q in QUANTILES}}
+
+
+def _offset(value, origin):
+    moment = parse_date(value)
+    return (moment - origin).total_seconds() if moment is not None else None
+
+
+def run_phases(run, actions):
+    """[Phase] of one finished run (a build_runs row) and its build_actions rows, in start order"""
+    started = parse_date(run['started_date'])
+    if started is None:
+        return []
+    origin = parse_date(run['created_date']) or started
+    begin = _offset(run['started_date'], origin)
+    end = _offset(run['finished_date'], origin)
+
+    phases = []
+    if begin > 0:
+        phases.append(Phase(QUEUE, QUEUE, 0.0, begin))
+    spans = [(action['name'] or action['action_type'] or 'action',
+              _offset(action['started_date'], origin), _offset(action['finished_date'], origin))
+             for action in actions]
+    spans = [(name, start, finish) for name, start, finish in spans if start is not None and finish is not None]
+    if spans:
+        first = min(start for _, start, _ in spans)
+        last = max(finish for _, _, finish in spans)
+        if first > begin:
+            phases.append(Phase(SETUP, SETUP, begin, first))
+        phases += [Phase(name, ACTION, start, finish) for name, start, finish in sorted(spans, key=lambda s: s[1])]
+        if end is not None and end > last:
+            phases.append(Phase(TEARDOWN, TEARDOWN, last, end))
+    elif end is not None:
+        # Actions not synced: the run as a whole
+        phases.append(Phase('run', ACTION, begin, end))
+    return phases
+
+
+def critical_path(phases):
+    """The chain of phases, first to last, that sets the run's wall-clock time"""
+    path = []
+    remaining = list(phases)
+    limit = math.inf
+    while True:
+        candidates = [p for p in remaining if p.end <= limit + 1e-6]
+        if not candidates:
+            break
+        # Latest to finish; of those, the one that started earliest covers the most
+        phase = max(candidates, key=lambda p: (p.end, p.end - p.start))
+        path.append(phase)
+        remaining = [p for p in remaining if p.end <= phase.start + 1e-6]
+        limit = phase.start
+    return path[::-1]
+
+
+class TimelineReport:
+    """Phases, percentiles, critical paths and regressions of a range of runs of one workflow"""
+
+    def __init__(self, history, workflow_id, first=None, last=None):
+        self.history = history
+        self.workflow_id = workflow_id
+        rows = history.runs_numbered(workflow_id, first, last)
+        self.runs = [row for row in rows if row['execution_progress'] == 'COMPLETE' and row['started_date']]
+        actions = {}
+        for action in history.actions_for(row['id'] for row in self.runs):
+            actions.setdefault(action['run_id'], []).append(action)
+        self.sketches = {}
+        self.regressions = []
+        self.timelines = [self._timeline(run, actions.get(run['id'], [])) for run in self.runs]
+
+    def _timeline(self, run, actions):
+        phases = run_phases(run, actions)
+        critical = set(critical_path(phases))
+        for phase in phases:
+            seconds = phase.end - phase.start
+            sketch = self.sketches.setdefault(phase.name, QuantileSketch())
+            if sketch.count >= MIN_BASELINE:
+                median, p90 = sketch.quantile(0.5), sketch.quantile(0.9)
+                if seconds > p90 and seconds > median * REGRESSION_RATIO and seconds - median >= REGRESSION_SECONDS:
+                    self.regressions.append({'number': run['number'], 'phase': phase.name,
+                                             'seconds': round(seconds, 1), 'baseline_p50': round(median, 1),
+                                             'baseline_p90': round(p90, 1), 'baseline_runs': sketch.count})
+            sketch.add(seconds)
+        wall = max((phase.end for phase in phases), default=0.0)
+        return {
+            'number': run['number'],
+            'id': run['id'],
+            'status': run['completion_status'],
+            'created': run['created_date'],
+            'wall_seconds': round(wall, 1),
+            # Billed like asc.usage: every action, with the run itself standing in when there are none
+            'billed_seconds': round(sum(p.end - p.start for p in phases if p.kind == ACTION), 1),
+            'phases': [{'name': p.name, 'kind': p.kind, 'start': round(p.start, 1), 'end': round(p.end, 1),
+                        'seconds': round(p.end - p.start, 1), 'critical': p in critical} for p in phases],
+            'critical_path': [p.name for p in sorted(critical, key=lambda p: p.start)],
+        }
+
+    def phase_summary(self):
+        """{phase: count, total and percentiles in seconds, share of all phase time}, costliest first"""
+        grand_total = sum(sketch.total for sketch in self.sketches.values()) or 1.0
+        ordered = sorted(self.sketches.items(), key=lambda item: -item[1].total)
+        return {name: {**sketch.summary(), 'share': round(sketch.total / grand_total, 3)} for name, sketch in ordered}
+
+    def summary(self):
+        return {
+            'workflow_id': self.workflow_id,
+            'runs': self.timelines,
+            'phases': self.phase_summary(),
+            'regressions': self.regressions,
+        }
@@ -0,0 +1,286 @@
+"""
+Per-request tracing and metrics for the API client
+
+The request path is wrapped in timed spans:
+
+    request      one Client.request, all attempts (method, endpoint, status)
+    rate_limit   waiting for the shared hourly budget
+    attempt      one HTTP exchange (status)
+      key_load   reading and parsing the .p8 key
+      jwt_sign   signing a token
+      connect    TCP + TLS handshake of a new pooled connection
+      server     time to response headers, minus any connect
+      download   reading the body
+    backoff      sleeping before a retry
+    parse        JSON decoding
+
+Spans nest through a context variable, so they follow asyncio tasks and
+to_thread() workers. Finished spans feed phase totals, counters by
+endpoint and status code, and optionally a JSON-lines trace file. At exit
+they can be written as a Prometheus text file (for node_exporter's
+textfile collector) and/or printed to stderr as a `--profile` summary.
+
+Tracing is off unless enabled (`--profile`, `--trace FILE`,
+`--metrics-file FILE`, or ASC_TRACE_FILE / ASC_METRICS_FILE). When off,
+span() returns a shared no-op object after a single global check.
+"""
+import atexit
+import contextvars
+import itertools
+import json
+import os
+import sys
+import threading
+import time
+from collections import defaultdict
+
+_tracer = None
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def set(self, **attrs):
+        pass
+
+
+NULL_SPAN = _NullSpan()
+
+
+def span(name, **attrs):
+    """Context manager timing one phase; a no-op when tracing is disabled"""
+    if _tracer is None:
+        return NULL_SPAN
+    return _Span(_tracer, name, attrs)
+
+
+def enabled():
+    return _tracer is not None
+
+
+def tracer():
+    return _tracer
+
+
+class _Span:
+    __slots__ = ('tracer', 'name', 'attrs', 'id', 'parent', 'start', 'wall_start', 'duration',
+                 'child_seconds', '_token')
+
+    def __init__(self, tracer, name, attrs):
+        self.tracer = tracer
+        self.name = name
+        self.attrs = attrs
+        self.child_seconds = defaultdict(float)
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+    def __enter__(self):
+        self.parent = self.tracer.current.get()
+        self.id = next(self.tracer.ids)
+        self._token = self.tracer.current.set(self)
+        self.wall_start = time.time()
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.duration = time.perf_counter() - self.start
+        self.tracer.current.reset(self._token)
+        if exc_type is not None:
+            self.attrs.setdefault('error', exc_type.__name__)
+        if self.parent is not None:
+            self.parent.child_seconds[self.name] += self.duration
+        self.tracer.finish(self)
+        return False
+
+
+class Tracer:
+    """Collects finished spans into phase totals, counters and an optional JSONL trace"""
+
+    def __init__(self, trace_file=None, metrics_file=None, profile=False, command=None):
+        import uuid
+
+        self.current = contextvars.ContextVar('asc_span', default=None)
+        self.trace_id = uuid.uuid4().hex[:16]
+        # Span ids only need to be unique within the trace
+        self.ids = itertools.count(1)
+        self.command = command or os.path.basename(sys.argv[0] or 'python')
+        self.metrics_file = metrics_file
+        self.profile = profile
+        self.started = time.perf_counter()
+        self._lock = threading.Lock()
+        self._trace = open(trace_file, 'a') if trace_file else None
+        # phase -> [count, seconds]
+        self.phases = defaultdict(lambda: [0, 0.0])
+        # (endpoint, method, status) -> [count, seconds, bytes]
+        self.requests = defaultdict(lambda: [0, 0.0, 0])
+
+    def finish(self, s):
+        with self._lock:
+            phase = self.phases[s.name]
+            phase[0] += 1
+            phase[1] += s.duration
+            if s.name == 'request':
+                entry = self.requests[(s.attrs.get('endpoint'), s.attrs.get('method'), s.attrs.get('status', 'error'))]
+                entry[0] += 1
+                entry[1] += s.duration
+                entry[2] += s.attrs.get('bytes', 0)
+            if self._trace is not None:
+                self._trace.write(json.dumps({
+                    'trace': self.trace_id, 'span': s.id, 'parent': s.parent.id if s.parent else None,
+                    'name': s.name, 'start': round(s.wall_start, 6), 'duration_ms': round(s.duration * 1000, 3),
+                    **({'attrs': s.attrs} if s.attrs else {}),
+                }) + '\n')
+
+    def record(self, name, seconds, **attrs):
+        """A phase measured by other means (e.g. server wait from response.elapsed), as a finished child span"""
+        s = _Span(self, name, attrs)
+        s.parent = self.current.get()
+        s.id = next(self.ids)
+        s.wall_start = time.time() - seconds
+        s.duration = seconds
+        if s.parent is not None:
+            s.parent.child_seconds[name] += seconds
+        self.finish(s)
+
+    # -- export ---------------------------------------------------------------
+
+    def prometheus(self):
+        """Prometheus text exposition format"""
+        lines = [
+            '# HELP asc_requests_total App Store Connect API requests by endpoint, method and status.',
+            '# TYPE asc_requests_total counter',
+        ]
+        for (endpoint, method, status), (count, _, _) in sorted(self.requests.items(), key=str):
+            lines.append(f'asc_requests_total{{{_labels(endpoint=endpoint, method=method, status=status)}}} {count}')
+        lines += ['# HELP asc_request_duration_seconds Time spent in API requests, all attempts included.',
+                  '# TYPE asc_request_duration_seconds summary']
+        durations = defaultdict(lambda: [0, 0.0])
+        sizes = defaultdict(int)
+        for (endpoint, method, _), (count, seconds, size) in self.requests.items():
+            durations[(endpoint, method)][0] += count
+            durations[(endpoint, method)][1] += seconds
+            sizes[endpoint] += size
+        for (endpoint, method), (count, seconds) in sorted(durations.items(), key=str):
+            labels = _labels(endpoint=endpoint, method=method)
+            lines.append(f'asc_request_duration_seconds_sum{{{labels}}} {seconds:.6f}')
+            lines.append(f'asc_request_duration_seconds_count{{{labels}}} {count}')
+        lines += ['# HELP asc_response_bytes_total Decoded response body bytes.',
+                  '# TYPE asc_response_bytes_total counter']
+        for endpoint, size in sorted(sizes.items(), key=str):
+            lines.append(f'asc_response_bytes_total{{{_labels(endpoint=endpoint)}}} {size}')
+        lines += ['# HELP asc_phase_seconds Time spent per request phase.',
+                  '# TYPE asc_phase_seconds summary']
+        for name, (count, seconds) in sorted(self.phases.items()):
+            lines.append(f'asc_phase_seconds_sum{{{_labels(phase=name)}}} {seconds:.6f}')
+            lines.append(f'asc_phase_seconds_count{{{_labels(phase=name)}}} {count}')
+        lines += ['# HELP asc_last_run_timestamp_seconds When the command last finished.',
+                  '# TYPE asc_last_run_timestamp_seconds gauge',
+                  f'asc_last_run_timestamp_seconds{{{_labels(command=self.command)}}} {time.time():.3f}']
+        return '\n'.join(lines) + '\n'
+
+    def write_prometheus(self, path):
+        # node_exporter may read at any moment: write aside, then rename into place
+        tmp = f'{path}.{os.getpid()}.tmp'
+        with open(tmp, 'w') as f:
+            f.write(self.prometheus())
+        os.replace(tmp, path)
+
+    def summary(self):
+        """--profile: where the time went, per phase and per endpoint"""
+        wall = time.perf_counter() - self.started
+        lines = [f"\n⏱️  Profile ({wall * 1000:.0f} ms wall)",
+                 f"   {'phase':<12} {'count':>6} {'total ms':>10} {'mean ms':>9} {'of wall':>8}"]
+        for name, (count, seconds) in sorted(self.phases.items(), key=lambda item: -item[1][1]):
+            lines.append(f"   {name:<12} {count:>6} {seconds * 1000:>10.1f} {seconds * 1000 / count:>9.2f} "
+                         f"{seconds / wall:>8.0%}")
+        lines.append(f"\n   {'endpoint':<40} {'status':>6} {'count':>6} {'total ms':>10}")
+        for (endpoint, method, status), (count, seconds, _) in sorted(self.requests.items(), key=lambda i: -i[1][1]):
+            lines.append(f"   {f'{method} {endpoint}':<40} {status:>6} {count:>6} {seconds * 1000:>10.1f}")
+        return '\n'.join(lines)
+
+    def close(self):
+        if self.metrics_file:
+            self.write_prometheus(self.metrics_file)
+        if self.profile:
+            # Not on stdout, where it would corrupt --json output
+            print(self.summary(), file=sys.stderr)
+        if self._trace is not None:
+            self._trace.close()
+            self._trace = None
+
+
+def _labels(**labels):
+    return ','.join(f'{k}="{str(v).replace(chr(92), chr(92) * 2).replace(chr(34), chr(92) + chr(34))}"'
+                    for k, v in labels.items())
+
+
+def enable(trace_file=None, metrics_file=None, profile=False, command=None):
+    """Turn tracing on for this process; outputs are written at exit"""
+    global _tracer
+    if _tracer is None:
+        _tracer = Tracer(trace_file, metrics_file, profile, command)
+        atexit.register(_tracer.close)
+    return _tracer
+
+
+def disable():
+    global _tracer
+    if _tracer is not None:
+        atexit.unregister(_tracer.close)
+        _tracer.close()
+    _tracer = None
+
+
+def configure_from_args(argv=None, environ=None, command=None):
+    """Enable tracing if --profile, --trace FILE, --metrics-file FILE or the env vars ask for it"""
+    argv = sys.argv if argv is None else argv
+    environ = os.environ if environ is None else environ
+
+    def value(flag, env):
+        if flag in argv and argv.index(flag) + 1 < len(argv):
+            return argv[argv.index(flag) + 1]
+        return environ.get(env)
+
+    trace_file = value('--trace', 'ASC_TRACE_FILE')
+    metrics_file = value('--metrics-file', 'ASC_METRICS_FILE')
+    profile = '--profile' in argv
+    if trace_file or metrics_file or profile:
+        return enable(trace_file, metrics_file, profile, command)
+    return None
+
+
+_pool_classes = None
+
+
+def pool_classes():
+    """urllib3 pool classes whose connections time their TCP + TLS handshake as a 'connect' span"""
+    global _pool_classes
+    if _pool_classes is None:
+        from urllib3.connection import HTTPConnection, HTTPSConnection
+        from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+        class TracedHTTPConnection(HTTPConnection):
+            def connect(self):
+                with span('connect', host=self.host):
+                    super().connect()
+
+        class TracedHTTPSConnection(HTTPSConnection):
+            def connect(self):
+                with span('connect', host=self.host, tls=True):
+                    super().connect()
+
+        class TracedHTTPConnectionPool(HTTPConnectionPool):
+            ConnectionCls = TracedHTTPConnection
+
+        class TracedHTTPSConnectionPool(HTTPSConnectionPool):
+            ConnectionCls = TracedHTTPSConnection
+
+        _pool_classes = {'http': TracedHTTPConnectionPool, 'https': TracedHTTPSConnectionPool}
+    return _pool_classes
@@ -0,0 +1,137 @@
+"""
+Xcode Cloud compute-minute accounting over the local build history
+
+Xcode Cloud bills the compute time of each build action, and actions of one
+run execute in parallel, so minutes are summed per action (falling back to
+the run's own duration when its actions are not known). Aggregation runs as
+GROUP BY queries inside SQLite over the whole synced history, bucketed by
+billing month (UTC calendar month), day, workflow and action type, instead
+of parsing and summing dates one build at a time in Python.
+"""
+import calendar
+from datetime import datetime, timezone
+
+from . import config
+
+# One row per billable unit: each action of a run, or the run itself when its
+# actions have not been synced. Unfinished units count the time elapsed so far;
+# an action that never started (skipped, or cancelled while queued) costs nothing.
+_UNITS = """
+WITH units AS (
+    SELECT r.workflow_id,
+           COALESCE(a.action_type, 'RUN')      AS action_type,
+           COALESCE(a.started_date, r.started_date) AS started_date,
+           CASE
+               WHEN a.id IS NULL THEN COALESCE(r.duration_seconds,
+                    (julianday(:now) - julianday(r.started_date)) * 86400)
+               WHEN a.duration_seconds IS NOT NULL THEN a.duration_seconds
+               WHEN a.started_date IS NOT NULL THEN
+                    (julianday(COALESCE(a.finished_date, r.finished_date, :now)) - julianday(a.started_date)) * 86400
+               ELSE 0
+           END / 60.0                           AS minutes,
+           r.id                                 AS run_id,
+           r.completion_status                  AS completion_status
+    FROM build_runs r
+    LEFT JOIN build_actions a ON a.run_id = r.id
+    WHERE r.started_date IS NOT NULL
+)
+"""
+
+
+def billing_month(moment):
+    """(first instant, first instant of next month) of the UTC month containing `moment`"""
+    start = moment.astimezone(timezone.utc).replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    if start.month == 12:
+        end = start.replace(year=start.year + 1, month=1)
+    else:
+        end = start.replace(month=start.month + 1)
+    return start, end
+
+
+def _iso(moment):
+    return moment.strftime('%Y-%m-%dT%H:%M:%S')
+
+
+def recent_run_minutes(history, workflow_id, limit=10, now=None):
+    """Billed minutes of the workflow's last `limit` finished runs, newest first"""
+    sql = f"""{_UNITS}
+        SELECT run_id, SUM(minutes) AS minutes FROM units
+        WHERE workflow_id = :workflow AND completion_status IS NOT NULL
+        GROUP BY run_id ORDER BY MAX(started_date) DESC LIMIT :limit
+    """
+    params = {'now': _iso(now or datetime.now(timezone.utc)), 'workflow': workflow_id, 'limit': limit}
+    return [row['minutes'] for row in history.db.execute(sql, params)]
+
+
+class UsageReport:
+    """Minutes for one billing month, broken down and projected to month end"""
+
+    def __init__(self, history, month=None, quota=None, workflow_names=None, now=None):
+        self.db = history.db
+        self.now = now or datetime.now(timezone.utc)
+        self.start, self.end = billing_month(month or self.now)
+        self.quota = config.MONTHLY_QUOTA_MINUTES if quota is None else quota
+        self.workflow_names = workflow_names or {}
+
+    def _query(self, select, group_by):
+        sql = f"""{_UNITS}
+            SELECT {select}, SUM(minutes) AS minutes, COUNT(DISTINCT run_id) AS runs
+            FROM units
+            WHERE started_date >= :start AND started_date < :end
+            GROUP BY {group_by} ORDER BY {group_by}
+        """
+        params = {'now': _iso(self.now), 'start': _iso(self.start), 'end': _iso(self.end)}
+        return self.db.execute(sql, params).fetchall()
+
+    def total_minutes(self):
+        rows = self._query("'all' AS bucket", 'bucket')
+        return rows[0]['minutes'] if rows else 0.0
+
+    def by_day(self):
+        return {row['day']: round(row['minutes'], 2)
+                for row in self._query('substr(started_date, 1, 10) AS day', 'day')}
+
+    def by_workflow(self):
+        return {self.workflow_names.get(row['workflow_id'], row['workflow_id']): round(row['minutes'], 2)
+                for row in self._query('workflow_id', 'workflow_id')}
+
+    def by_action_type(self):
+        return {row['action_type']: round(row['minutes'], 2)
+                for row in self._query('action_type', 'action_type')}
+
+    def run_counts(self):
+        sql = """
+            SELECT completion_status, COUNT(*) AS runs FROM build_runs
+            WHERE started_date >= :start AND started_date < :end
+            GROUP BY completion_status
+        """
+        rows = self.db.execute(sql, {'start': _iso(self.start), 'end': _iso(self.end)}).fetchall()
+        return {row['completion_status'] or 'IN_PROGRESS': row['runs'] for row in rows}
+
+    def projection(self, used):
+        """Month-end minutes if the month-to-date burn rate holds"""
+        month_seconds = (self.end - self.start).total_seconds()
+        if self.now >= self.end:
+            return used, used / (month_seconds / 86400)
+        elapsed = max((self.now - self.start).total_seconds(), 3600)
+        daily_rate = used / (elapsed / 86400)
+        return used + daily_rate * (self.end - self.now).total_seconds() / 86400, daily_rate
+
+    def summary(self):
+        used = self.total_minutes()
+        projected, daily_rate = self.projection(used)
+        days_in_month = calendar.monthrange(self.start.year, self.start.month)[1]
+        return {
+            'month': self.start.strftime('%Y-%m'),
+            'days_in_month': days_in_month,
+            'quota_minutes': self.quota,
+            'used_minutes': round(used, 2),
+            'remaining_minutes': round(self.quota - used, 2),
+            'daily_burn_rate': round(daily_rate, 2),
+            'projected_minutes': round(projected, 2),
+            'projected_over_quota': projected > self.quota,
+            'runs': self.run_counts(),
+            'by_workflow': self.by_workflow(),
+            'by_action_type': self.by_action_type(),
+            'by_day': self.by_day(),
+        }
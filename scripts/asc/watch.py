@@ -0,0 +1,141 @@
+"""
+Change-driven polling for build runs
+
+The old watch loop refetched the last five runs every 10 seconds and
+reprinted all of them, although a 15-minute build changes state a handful
+of times. Here each poll is a conditional GET (If-None-Match/If-Modified-
+Since, answered with 304 where the API supports validators), the runs are
+reduced to a snapshot of (executionProgress, completionStatus) per build
+number, and only differences between snapshots are reported. The interval
+adapts: short while something is pending or running, long when idle, and
+growing while nothing changes.
+"""
+import threading
+import time
+from collections import deque, namedtuple
+
+from .client import check, get_client, parse_json
+
+UNFINISHED = ('PENDING', 'RUNNING')
+
+
+class ConditionalFetcher:
+    """GETs that send back the validators of the previous answer and reuse its body on 304"""
+
+    def __init__(self, client=None, clock=time.monotonic):
+        self.client = client or get_client()
+        self.clock = clock
+        self._entries = {}
+        self._lock = threading.Lock()
+        self._sent = deque()
+        self.requests = 0
+        self.not_modified = 0
+
+    def get(self, endpoint, params=None, **kwargs):
+        """(payload, changed) — changed is False for a 304 or an identical body"""
+        key = (endpoint, tuple(sorted((params or {}).items())))
+        entry = self._entries.get(key)
+        headers = {}
+        if entry and entry['etag']:
+            headers['If-None-Match'] = entry['etag']
+        if entry and entry['last_modified']:
+            headers['If-Modified-Since'] = entry['last_modified']
+
+        response = self.client.get(endpoint, params=params, headers=headers, **kwargs)
+        with self._lock:
+            self.requests += 1
+            self._sent.append(self.clock())
+            if response.status_code == 304 and entry:
+                self.not_modified += 1
+                return entry['payload'], False
+        if response.status_code == 304:
+            # Nothing stored to reuse (a proxy answering on its own): ask again, unconditionally
+            response = self.client.get(endpoint, params=params, headers={'Cache-Control': 'no-cache'}, **kwargs)
+            with self._lock:
+                self.requests += 1
+                self._sent.append(self.clock())
+
+        payload = parse_json(check(response))
+        changed = entry is None or payload != entry['payload']
+        self._entries[key] = {
+            'payload': payload,
+            'etag': response.headers.get('ETag'),
+            'last_modified': response.headers.get('Last-Modified'),
+        }
+        return payload, changed
+
+    def requests_last_hour(self):
+        cutoff = self.clock() - 3600
+        with self._lock:
+            while self._sent and self._sent[0] < cutoff:
+                self._sent.popleft()
+            return len(self._sent)
+
+
+class BuildEvent(namedtuple('BuildEvent', 'number kind before after')):
+    """One observed change of a build run: kind is 'new', 'moved' or 'finished'"""
+
+    __slots__ = ()
+
+    def __str__(self):
+        if self.kind == 'new':
+            return f'build #{self.number} appeared {self.after}'
+        if self.kind == 'finished':
+            return f'build #{self.number} finished {self.after}'
+        return f'build #{self.number} moved {self.before}→{self.after}'
+
+
+def snapshot(runs):
+    """{number: (executionProgress, completionStatus)} for raw ciBuildRuns resources"""
+    return {
+        run['attributes']['number']: (run['attributes'].get('executionProgress'),
+                                      run['attributes'].get('completionStatus'))
+        for run in runs
+    }
+
+
+def diff(previous, current):
+    """Events that turn one snapshot into the next, oldest build first"""
+    events = []
+    for number in sorted(current):
+        progress, status = current[number]
+        if number not in previous:
+            events.append(BuildEvent(number, 'new', None, progress))
+            continue
+        old_progress, old_status = previous[number]
+        if progress != old_progress:
+            events.append(BuildEvent(number, 'moved', old_progress, progress))
+        if status and status != old_status:
+            events.append(BuildEvent(number, 'finished', old_status, status))
+    return events
+
+
+def is_active(state):
+    return any(progress in UNFINISHED for progress, _ in state.values())
+
+
+class PollSchedule:
+    """Seconds until the next poll, from whether builds are active and whether anything changed
+
+    A change resets the interval to `fast` (something is running) or `slow`
+    (idle); each unchanged poll multiplies it by `backoff`, up to
+    `active_cap` or `idle_cap`.
+    """
+
+    def __init__(self, fast=5, active_cap=30, slow=60, idle_cap=300, backoff=1.5):
+        self.fast = fast
+        self.active_cap = active_cap
+        self.slow = slow
+        self.idle_cap = idle_cap
+        self.backoff = backoff
+        self.interval = None
+        self._was_active = None
+
+    def next(self, active, changed):
+        if changed or self.interval is None or active != self._was_active:
+            self.interval = self.fast if active else self.slow
+        else:
+            cap = self.active_cap if active else self.idle_cap
+            self.interval = min(self.interval * self.backoff, cap)
+        self._was_active = active
+        return self.interval
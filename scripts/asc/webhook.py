@@ -0,0 +1,259 @@
+"""
+Local webhook receiver and in-process event bus
+
+App Store Connect can push build-run and TestFlight state changes to an
+HTTPS endpoint instead of being polled. `WebhookReceiver` is a small HTTP
+server (put it behind a tunnel or reverse proxy) that checks the
+`X-Apple-SIGNATURE: hmacsha256=<hex>` header against the shared secret,
+normalises the payload into a `WebhookEvent` and publishes it on an
+`EventBus`. The bus queues events from the server threads and delivers
+them on the caller's thread in `dispatch()`, so subscribers such as the
+SQLite history store never see a second thread. Redeliveries of an event
+already seen are dropped.
+
+Polling stays as a slow reconciliation pass: `event_from_run()` turns a
+polled ciBuildRuns resource into the same event type.
+
+    python3 scripts/send_webhook.py http://127.0.0.1:8787/webhook payload.json
+replays recorded payloads against a running receiver.
+"""
+import hashlib
+import hmac
+import json
+import shutil
+import subprocess
+import sys
+import threading
+import time
+from collections import OrderedDict, deque, namedtuple
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from . import config
+
+SIGNATURE_HEADER = 'X-Apple-SIGNATURE'
+MAX_BODY = 1 << 20
+BUILD_RUN_EVENT = 'ciBuildRunUpdated'
+# With webhooks delivering changes, polling only catches missed deliveries
+RECONCILE_INTERVAL = 600
+
+
+class InvalidSignature(Exception):
+    """Body does not match the X-Apple-SIGNATURE header"""
+
+
+def sign(secret, body):
+    """Header value App Store Connect sends for `body`"""
+    return 'hmacsha256=' + hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+
+
+def verify(secret, body, header):
+    if not header or not hmac.compare_digest(sign(secret, body), header.strip()):
+        raise InvalidSignature(header)
+
+
+class WebhookEvent(namedtuple('WebhookEvent', 'id kind resource_type resource_id attributes related source')):
+    """A state change, from a webhook delivery (source 'webhook') or a reconciliation poll ('poll')
+
+    For build runs, kind is BUILD_RUN_EVENT and attributes are the run's
+    attributes; related maps relationship names to IDs (e.g. 'workflow').
+    Other App Store Connect notifications keep their own type as kind,
+    e.g. 'buildUploadStateUpdated' with attributes oldState/newState.
+    """
+
+    __slots__ = ()
+
+
+def parse_event(payload):
+    """WebhookEvent for an Xcode Cloud or App Store Connect notification payload"""
+    if 'ciBuildRun' in payload:
+        # Xcode Cloud: the run, its workflow and product side by side
+        run = payload['ciBuildRun']
+        metadata = payload.get('metadata', {}).get('attributes', {})
+        related = {name: payload[key]['id'] for name, key in
+                   (('workflow', 'ciWorkflow'), ('product', 'ciProduct'), ('app', 'app')) if payload.get(key)}
+        return WebhookEvent(
+            id=f"{run['id']}:{metadata.get('eventType') or run['attributes'].get('executionProgress')}",
+            kind=BUILD_RUN_EVENT, resource_type='ciBuildRuns', resource_id=run['id'],
+            attributes=run['attributes'], related=related, source='webhook',
+        )
+    data = payload['data']
+    instance = data.get('relationships', {}).get('instance', {}).get('data') or {}
+    return WebhookEvent(
+        id=data.get('id'), kind=data['type'],
+        resource_type=instance.get('type'), resource_id=instance.get('id'),
+        attributes=data.get('attributes', {}), related={}, source='webhook',
+    )
+
+
+def event_from_run(run, workflow_id):
+    """Build-run event for a ciBuildRuns resource seen by polling"""
+    attrs = run['attributes']
+    return WebhookEvent(
+        id=None, kind=BUILD_RUN_EVENT, resource_type='ciBuildRuns', resource_id=run['id'],
+        attributes=attrs, related={'workflow': workflow_id}, source='poll',
+    )
+
+
+class EventBus:
+    """Fan-out of events to subscribers, delivered on the thread that calls dispatch()"""
+
+    def __init__(self, seen_limit=1000):
+        self._subscribers = []
+        self._queue = deque()
+        self._ready = threading.Condition()
+        self._seen = OrderedDict()
+        self._seen_limit = seen_limit
+        self.published = 0
+        self.duplicates = 0
+
+    def subscribe(self, callback, kinds=None):
+        """callback(event) for every event, or only those whose kind is in `kinds`"""
+        entry = (callback, frozenset(kinds) if kinds else None)
+        self._subscribers.append(entry)
+        return lambda: self._subscribers.remove(entry)
+
+    def publish(self, event):
+        """Queue an event; False if its id was already published (a redelivery)"""
+        with self._ready:
+            if event.id is not None:
+                if event.id in self._seen:
+                    self.duplicates += 1
+                    return False
+                self._seen[event.id] = True
+                if len(self._seen) > self._seen_limit:
+                    self._seen.popitem(last=False)
+            self._queue.append(event)
+            self.published += 1
+            self._ready.notify()
+        return True
+
+    def dispatch(self, timeout=None):
+        """Deliver queued events, waiting up to `timeout` for the first; returns how many"""
+        with self._ready:
+            if not self._queue:
+                self._ready.wait(timeout)
+            events = list(self._queue)
+            self._queue.clear()
+        for event in events:
+            for callback, kinds in list(self._subscribers):
+                if kinds is None or event.kind in kinds:
+                    try:
+                        callback(event)
+                    except Exception as e:
+                        # One broken subscriber must not starve the others
+                        print(f"⚠️  subscriber {getattr(callback, '__name__', callback)}: {e}", file=sys.stderr)
+        return len(events)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+    def _reply(self, status):
+        self.send_response(status)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def do_POST(self):
+        receiver = self.server.receiver
+        if self.path.split('?')[0] != receiver.path:
+            return self._reply(404)
+        length = int(self.headers.get('Content-Length') or 0)
+        if length > MAX_BODY:
+            return self._reply(413)
+        body = self.rfile.read(length)
+        try:
+            verify(receiver.secret, body, self.headers.get(SIGNATURE_HEADER))
+        except InvalidSignature:
+            receiver.rejected += 1
+            return self._reply(401)
+        try:
+            event = parse_event(json.loads(body))
+        except (ValueError, KeyError, TypeError):
+            receiver.rejected += 1
+            return self._reply(400)
+        receiver.received += 1
+        receiver.bus.publish(event)
+        self._reply(200)
+
+
+class WebhookReceiver:
+    """HTTP endpoint that verifies deliveries and publishes them on a bus, served from a thread"""
+
+    def __init__(self, bus, secret=None, host='127.0.0.1', port=None, path='/webhook'):
+        self.bus = bus
+        self.secret = secret or config.WEBHOOK_SECRET
+        if not self.secret:
+            raise ValueError("webhook secret required (ASC_WEBHOOK_SECRET)")
+        self.path = path
+        self.received = 0
+        self.rejected = 0
+        self._server = ThreadingHTTPServer((host, config.WEBHOOK_PORT if port is None else port), _Handler)
+        self._server.daemon_threads = True
+        self._server.receiver = self
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f'http://{host}:{port}{self.path}'
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, args=(0.05,), daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def send(url, payload, secret=None, session=None):
+    """POST a payload the way App Store Connect does, signed with `secret`; returns the status"""
+    body = payload if isinstance(payload, bytes) else json.dumps(payload).encode()
+    headers = {'Content-Type': 'application/json', SIGNATURE_HEADER: sign(secret or config.WEBHOOK_SECRET, body)}
+    if session is None:
+        import requests as session
+    return session.post(url, data=body, headers=headers, timeout=10).status_code
+
+
+def desktop_notifier(title='Xcode Cloud'):
+    """Subscriber posting a macOS notification per event, or ringing the terminal bell elsewhere"""
+    osascript = shutil.which('osascript')
+
+    def notify(event):
+        message = describe(event)
+        if osascript:
+            script = f'display notification {json.dumps(message)} with title {json.dumps(title)}'
+            subprocess.run([osascript, '-e', script], check=False)
+        else:
+            print('\a', end='', flush=True)
+
+    return notify
+
+
+def describe(event):
+    attrs = event.attributes
+    if event.kind == BUILD_RUN_EVENT:
+        return (f"build #{attrs.get('number')} {attrs.get('executionProgress')}"
+                + (f" {attrs['completionStatus']}" if attrs.get('completionStatus') else ''))
+    if 'newState' in attrs:
+        return f"{event.resource_type} {event.resource_id}: {attrs.get('oldState')}→{attrs['newState']}"
+    return f'{event.kind} {event.resource_id}'
+
+
+def wait_for_events(bus, reconcile, interval, clock=time.monotonic):
+    """Dispatch events as they arrive and call reconcile() every `interval` seconds, forever"""
+    next_reconcile = clock() + interval
+    while True:
+        bus.dispatch(timeout=max(next_reconcile - clock(), 0))
+        if clock() >= next_reconcile:
+            reconcile()
+            bus.dispatch(timeout=0)
+            next_reconcile = clock() + interval
@@ -0,0 +1,38 @@
+"""
+Helpers shared by the benchmark scripts
+"""
+import statistics
+import sys
+import tempfile
+from pathlib import Path
+
+# Benchmarks are run as `python3 scripts/benchmarks/<name>.py`
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ec
+
+from asc.auth import TokenProvider
+
+
+def temp_token_provider():
+    """Token provider signing with a throwaway key, so no real credentials are needed"""
+    key = ec.generate_private_key(ec.SECP256R1())
+    path = Path(tempfile.mkdtemp()) / 'AuthKey_BENCH.p8'
+    path.write_bytes(key.private_bytes(
+        serialization.Encoding.PEM,
+        serialization.PrivateFormat.PKCS8,
+        serialization.NoEncryption(),
+    ))
+    return TokenProvider(key_file=path)
+
+
+def percentile(samples, pct):
+    if len(samples) < 2:
+        return samples[0] if samples else 0.0
+    return statistics.quantiles(samples, n=100, method='inclusive')[pct - 1]
+
+
+def summarize(label, samples, extra=''):
+    ms = [s * 1000 for s in samples]
+    print(f"  {label:<10} p50 {percentile(ms, 50):7.2f} ms   p95 {percentile(ms, 95):7.2f} ms   {extra}")
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Benchmark: `asc status` run directly vs. through the background agent
+
+The stub serves the sample cassette with a fixed latency. Each mode runs
+`python -m asc status` --runs times as separate processes; agent mode
+starts the agent with its first call. The agent's own answer time is also
+measured from this process with asc.agent.call(), i.e. the socket round
+trip without interpreter start-up.
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import _common
+
+from asc.stub import StubServer, routes_from_cassette, writable
+
+SCRIPTS = Path(__file__).resolve().parent.parent
+
+
+def timed_process(argv, env):
+    start = time.perf_counter()
+    subprocess.run([sys.executable, *argv], cwd=SCRIPTS, env=env, stdout=subprocess.DEVNULL, check=True)
+    return time.perf_counter() - start
+
+
+def measure(runs=10, latency=0.05):
+    """{mode: [seconds]} plus the stub's request count per mode"""
+    samples, requests = {}, {}
+    with tempfile.TemporaryDirectory(prefix='asc-agent-') as tmp, \
+            StubServer(writable(routes_from_cassette()), latency=latency) as stub:
+        env = {**os.environ, 'ASC_BASE_URL': stub.url, 'ASC_CACHE_DIR': f'{tmp}/cache',
+               'ASC_KEY_FILE': str(_common.temp_token_provider().key_file)}
+        env.pop('ASC_AGENT', None)
+        # Resolve the workflows once, so both modes start from the same ID cache
+        timed_process(['-m', 'asc', 'status'], env)
+
+        stub.reset_counters()
+        samples['direct'] = [timed_process(['-m', 'asc', 'status'], env) for _ in range(runs)]
+        requests['direct'] = len(stub.requests)
+
+        agent_env = {**env, 'ASC_AGENT': '1'}
+        stub.reset_counters()
+        samples['spawn'] = [timed_process(['-m', 'asc', 'status'], agent_env)]
+        samples['agent'] = [timed_process(['-m', 'asc', 'status'], agent_env) for _ in range(runs)]
+        requests['agent'] = len(stub.requests)
+
+        # The same calls from this process, with its environment matching the agent's
+        os.environ.update(agent_env)
+        from asc import agent, config
+
+        config.CACHE_DIR = Path(env['ASC_CACHE_DIR'])
+        answers = []
+        for _ in range(runs):
+            start = time.perf_counter()
+            agent.call(['status'], autostart=False)
+            answers.append(time.perf_counter() - start)
+        samples['socket'] = answers
+        agent.request({'op': agent.STOP})
+    return samples, requests
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--runs', type=int, default=10)
+    parser.add_argument('--latency-ms', type=float, default=50.0)
+    args = parser.parse_args()
+
+    print(f"🤖 asc status, {args.runs} runs, stub latency {args.latency_ms} ms\n")
+    samples, requests = measure(args.runs, args.latency_ms / 1000)
+    notes = {'direct': 'python -m asc status', 'spawn': 'first agent call, starts the agent',
+             'agent': 'python -m asc status with ASC_AGENT=1', 'socket': 'agent.call() from a warm process'}
+    for label, values in samples.items():
+        _common.summarize(label, values, extra=notes[label])
+    print(f"\n  API requests: direct {requests['direct']}, agent {requests['agent']} (first call included)")
@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+Benchmark: cost of each command against the stub, compared to a stored baseline
+
+Every command runs as its own process against a StubServer serving the
+sample cassette with a fixed latency, once with an empty cache directory
+(cold) and once more with the cache it left behind (warm). Per run:
+
+    requests        HTTP requests the stub answered
+    bytes           response bytes on the wire
+    jwt_signatures  distinct bearer tokens the stub saw, i.e. JWTs signed
+    wall_ms         wall time of the process
+    cpu_ms          user + system CPU time of the process
+    peak_rss_mb     peak resident set size of the process
+
+Results are compared with baseline.json (next to this script); the run
+fails if a count grows at all or a size/time grows by more than
+--threshold plus a small absolute slack. `--update-baseline` rewrites the
+file; regenerate it on the machine that runs the comparison, since times
+are machine-specific.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import _common
+
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ec
+
+from asc.stub import StubServer, routes_from_cassette, writable
+
+SCRIPTS = Path(__file__).resolve().parent.parent
+BASELINE = Path(__file__).resolve().parent / 'baseline.json'
+
+# Labels keep the names of the scripts the commands replaced, so baselines stay comparable
+COMMANDS = {
+    'appstore_api': ['-m', 'asc', 'apps'],
+    'check_workflow': ['-m', 'asc', 'workflows'],
+    'watch_build': ['-m', 'asc', 'builds'],
+    'trigger_build': ['-m', 'asc', 'trigger'],
+    'check_testflight': ['-m', 'asc', 'testflight'],
+    'check_usage': ['-m', 'asc', 'usage', '--month', '2026-09', '--json'],
+    'dashboard': ['-m', 'asc', 'dashboard'],
+}
+
+# Counts must not grow; other metrics may grow by the threshold plus this much
+COUNTS = ('requests', 'jwt_signatures')
+SLACK = {'bytes': 0, 'wall_ms': 50, 'cpu_ms': 50, 'peak_rss_mb': 5}
+
+
+def key_file(directory):
+    path = Path(directory) / 'AuthKey_BENCH.p8'
+    path.write_bytes(ec.generate_private_key(ec.SECP256R1()).private_bytes(
+        serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption(),
+    ))
+    return path
+
+
+def run_once(stub, argv, env):
+    """Metrics of one process run; CPU and RSS come from wait4() for that child alone"""
+    stub.reset_counters()
+    start = time.perf_counter()
+    process = subprocess.Popen([sys.executable, *argv], cwd=SCRIPTS, env=env,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    _, status, usage = os.wait4(process.pid, 0)
+    wall = time.perf_counter() - start
+    process.returncode = os.waitstatus_to_exitcode(status)
+    stderr = process.stderr.read().decode(errors='replace')
+    process.stderr.close()
+    if process.returncode != 0:
+        raise RuntimeError(f"{' '.join(argv)} exited {process.returncode}:\n{stderr}")
+
+    tokens = {r['headers'].get('Authorization') for r in stub.requests}
+    # ru_maxrss is KiB on Linux and bytes on macOS
+    rss = usage.ru_maxrss / (1 << 20 if sys.platform == 'darwin' else 1 << 10)
+    return {
+        'requests': len(stub.requests),
+        'bytes': stub.bytes_sent,
+        'jwt_signatures': len(tokens - {None}),
+        'wall_ms': round(wall * 1000, 1),
+        'cpu_ms': round((usage.ru_utime + usage.ru_stime) * 1000, 1),
+        'peak_rss_mb': round(rss, 1),
+    }
+
+
+def measure(names=None, latency=0.05, repeat=3):
+    """{'<command> (cold|warm)': metrics}, medians over `repeat` fresh cache directories"""
+    samples = {}
+    with tempfile.TemporaryDirectory(prefix='asc-bench-') as tmp:
+        env = {**os.environ, 'ASC_KEY_FILE': str(key_file(tmp))}
+        env.pop('ASC_CASSETTE', None)
+        for name in names or COMMANDS:
+            for i in range(repeat):
+                # Fresh data per round, so a trigger or a sync never leaks into the next round
+                with StubServer(writable(routes_from_cassette()), latency=latency) as stub:
+                    run_env = {**env, 'ASC_BASE_URL': stub.url, 'ASC_CACHE_DIR': f'{tmp}/{name}-{i}'}
+                    for phase in ('cold', 'warm'):
+                        samples.setdefault(f'{name} ({phase})', []).append(run_once(stub, COMMANDS[name], run_env))
+    return {label: {metric: statistics.median(run[metric] for run in runs) for metric in runs[0]}
+            for label, runs in samples.items()}
+
+
+def compare(current, baseline, threshold=0.25):
+    """Regressions of `current` against `baseline`, as printable lines"""
+    regressions = []
+    for label, metrics in current.items():
+        reference = baseline.get(label)
+        if reference is None:
+            continue
+        for metric, value in metrics.items():
+            base = reference.get(metric)
+            if base is None:
+                continue
+            limit = base if metric in COUNTS else base * (1 + threshold) + SLACK.get(metric, 0)
+            if value > limit:
+                regressions.append(f"{label}: {metric} {value} > {base} (limit {limit:g})")
+    return regressions
+
+
+def print_table(results, baseline):
+    columns = ('requests', 'bytes', 'jwt_signatures', 'wall_ms', 'cpu_ms', 'peak_rss_mb')
+    print(f"  {'command':<26}" + ''.join(f'{c:>16}' for c in columns))
+    for label, metrics in results.items():
+        reference = baseline.get(label, {})
+        cells = []
+        for c in columns:
+            value = metrics[c]
+            if c in reference and reference[c]:
+                cells.append(f'{value:g} ({(value - reference[c]) / reference[c]:+.0%})')
+            else:
+                cells.append(f'{value:g}')
+        print(f"  {label:<26}" + ''.join(f'{cell:>16}' for cell in cells))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--latency-ms', type=float, default=50.0)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--threshold', type=float, default=0.25, help='allowed relative growth (default 0.25)')
+    parser.add_argument('--only', action='append', choices=sorted(COMMANDS), help='benchmark only these commands')
+    parser.add_argument('--baseline', type=Path, default=BASELINE)
+    parser.add_argument('--update-baseline', action='store_true')
+    args = parser.parse_args()
+
+    stored = json.loads(args.baseline.read_text()) if args.baseline.exists() else {}
+    baseline = stored.get('results', {})
+    if stored and stored.get('latency_ms') != args.latency_ms:
+        print(f"⚠️  baseline was taken at {stored.get('latency_ms')} ms latency; times are not comparable\n")
+
+    print(f"📊 commands against the stub, latency {args.latency_ms} ms, median of {args.repeat}\n")
+    results = measure(args.only, args.latency_ms / 1000, args.repeat)
+    print_table(results, baseline)
+
+    if args.update_baseline:
+        merged = {**baseline, **results}
+        args.baseline.write_text(json.dumps({'latency_ms': args.latency_ms, 'results': merged}, indent=2) + '\n')
+        print(f"\n💾 baseline written to {args.baseline}")
+        sys.exit(0)
+
+    regressions = compare(results, baseline, args.threshold)
+    if regressions:
+        print("\n❌ regressions:")
+        for line in regressions:
+            print(f"   {line}")
+        sys.exit(1)
+    print("\n✅ no regressions" if baseline else "\n(no baseline yet: run with --update-baseline)")
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Benchmark: serial vs. concurrent check_workflow.py request pattern
+
+The stub serves P products with W workflows each, every workflow linked to
+its own repository, and answers each request after a fixed latency.
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import time
+
+import _common
+
+from asc.aio import AsyncClient
+from asc.client import Client
+from asc.commands import workflows as check_workflow
+from asc.stub import StubServer
+
+
+def fanout_routes(products, workflows):
+    routes = {'/v1/ciProducts': {'data': [
+        {'type': 'ciProducts', 'id': f'product-{p}', 'attributes': {'name': f'Product {p}'}}
+        for p in range(products)
+    ]}, '/v1/scmRepositories': {'data': []}}
+    for p in range(products):
+        routes[f'/v1/ciProducts/product-{p}/workflows'] = {'data': [
+            {'type': 'ciWorkflows', 'id': f'workflow-{p}-{w}', 'attributes': {'name': f'Workflow {w}'},
+             'relationships': {'repository': {'data': {'type': 'scmRepositories', 'id': f'repo-{p}-{w}'}}}}
+            for w in range(workflows)
+        ]}
+        for w in range(workflows):
+            routes[f'/v1/scmRepositories/repo-{p}-{w}'] = {'data': {
+                'type': 'scmRepositories', 'id': f'repo-{p}-{w}',
+                'attributes': {'ownerName': 'skingway', 'repositoryName': f'repo-{w}'},
+            }}
+    return routes
+
+
+def serial(client):
+    """The request pattern check_workflow.py had before the asyncio port"""
+    client.get('scmRepositories')
+    for product in client.get('ciProducts').json()['data']:
+        workflows = client.get(f"ciProducts/{product['id']}/workflows?include=repository").json()['data']
+        for workflow in workflows:
+            client.get(f"scmRepositories/{workflow['relationships']['repository']['data']['id']}")
+
+
+def concurrent(client, concurrency):
+    with contextlib.redirect_stdout(io.StringIO()):
+        asyncio.run(check_workflow.check_workflows(AsyncClient(client, concurrency=concurrency)))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--products', type=int, default=2)
+    parser.add_argument('--workflows', type=int, default=10, help='workflows per product')
+    parser.add_argument('--latency-ms', type=float, default=50.0)
+    parser.add_argument('--concurrency', type=int, default=8)
+    args = parser.parse_args()
+
+    tokens = _common.temp_token_provider()
+    routes = fanout_routes(args.products, args.workflows)
+    with StubServer(routes=routes, latency=args.latency_ms / 1000) as stub:
+        client = Client(base_url=stub.url, token_provider=tokens, pool_size=args.concurrency)
+        print(f"📊 {args.products} products × {args.workflows} workflows, "
+              f"latency {args.latency_ms} ms, concurrency {args.concurrency}\n")
+        for label, run in (('serial', lambda: serial(client)),
+                           ('async', lambda: concurrent(client, args.concurrency))):
+            stub.reset_counters()
+            start = time.perf_counter()
+            run()
+            elapsed = time.perf_counter() - start
+            print(f"  {label:<8} {elapsed * 1000:8.1f} ms   requests {len(stub.requests)}")
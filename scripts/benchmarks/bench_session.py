@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+Benchmark: bare requests.get per call vs. the pooled asc.client.Client
+
+Runs against the local stub, which adds a fixed delay to every new connection
+to stand in for the TCP+TLS handshake to api.appstoreconnect.apple.com.
+"""
+import argparse
+import time
+
+import _common
+import requests
+
+from asc.client import Client
+from asc.stub import StubServer
+
+
+def bench_bare(stub, tokens, n):
+    samples = []
+    for _ in range(n):
+        start = time.perf_counter()
+        headers = {'Authorization': f'Bearer {tokens.token()}', 'Content-Type': 'application/json'}
+        requests.get(f'{stub.url}/ciProducts', headers=headers).json()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def bench_pooled(stub, tokens, n):
+    client = Client(base_url=stub.url, token_provider=tokens)
+    samples = []
+    for _ in range(n):
+        start = time.perf_counter()
+        client.get('ciProducts').json()
+        samples.append(time.perf_counter() - start)
+    client.close()
+    return samples
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('-n', type=int, default=200, help='requests per run')
+    parser.add_argument('--handshake-ms', type=float, default=20.0, help='simulated handshake cost')
+    parser.add_argument('--latency-ms', type=float, default=2.0, help='simulated server latency')
+    args = parser.parse_args()
+
+    tokens = _common.temp_token_provider()
+    with StubServer(latency=args.latency_ms / 1000, handshake_cost=args.handshake_ms / 1000) as stub:
+        print(f"📊 {args.n} GET /ciProducts, handshake {args.handshake_ms} ms, latency {args.latency_ms} ms\n")
+        for label, bench in (('bare', bench_bare), ('pooled', bench_pooled)):
+            stub.reset_counters()
+            samples = bench(stub, tokens, args.n)
+            _common.summarize(label, samples, f"handshakes {stub.connections}")
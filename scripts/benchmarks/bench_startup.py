@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Benchmark: start-up cost of the `asc` CLI
+
+Every case runs `python -X importtime -m asc ...` as a fresh process.
+Per case, as medians over --repeat runs:
+
+    wall_ms     wall time of the process
+    import_ms   summed -X importtime self times of the modules that a bare
+                `python -c pass` does not load, i.e. what asc costs
+    modules     number of those modules
+    heavy       which of requests, jwt and cryptography were imported
+
+`python -c pass` is measured the same way: it is the floor every process
+pays (site-packages .pth files included) and is subtracted before the
+budget applies. `usage --no-sync` answers from the ID cache and history
+left by one synced run against the stub, which is stopped before the
+measured runs, so any request would fail the case. The run exits 1 if a
+case imports a heavy module or needs more than --budget-ms over the floor.
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import _common
+
+from asc.stub import StubServer, routes_from_cassette, writable
+
+SCRIPTS = Path(__file__).resolve().parent.parent
+
+HEAVY = ('requests', 'jwt', 'cryptography')
+CASES = {
+    'asc --help': ['-m', 'asc', '--help'],
+    'asc usage --help': ['-m', 'asc', 'usage', '--help'],
+    'asc usage --no-sync': ['-m', 'asc', 'usage', '--month', '2026-09', '--no-sync'],
+}
+
+
+def parse_importtime(stderr):
+    """{module: self microseconds} from `-X importtime` output"""
+    modules = {}
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'imported package' in line:
+            continue
+        self_us, _, name = line[len('import time:'):].split('|')
+        modules[name.strip()] = int(self_us)
+    return modules
+
+
+def run_once(argv, env, floor_modules=frozenset()):
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable, '-X', 'importtime', *argv], cwd=SCRIPTS, env=env,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+    wall = time.perf_counter() - start
+    if result.returncode != 0:
+        errors = [line for line in result.stderr.splitlines() if not line.startswith('import time:')]
+        raise RuntimeError(f"{' '.join(argv)} exited {result.returncode}:\n" + '\n'.join(errors))
+
+    modules = {name: us for name, us in parse_importtime(result.stderr).items() if name not in floor_modules}
+    return {
+        'wall_ms': wall * 1000,
+        'import_ms': sum(modules.values()) / 1000,
+        'modules': len(modules),
+        'heavy': sorted(name for name in modules if name.split('.')[0] in HEAVY and '.' not in name),
+    }
+
+
+def warm_cache(env):
+    """Sync once against the stub, leaving the ID cache and history that --no-sync reads"""
+    with StubServer(writable(routes_from_cassette())) as stub:
+        env['ASC_BASE_URL'] = stub.url
+        subprocess.run([sys.executable, '-m', 'asc', 'usage', '--month', '2026-09', '--json'],
+                       cwd=SCRIPTS, env=env, stdout=subprocess.DEVNULL, check=True)
+
+
+def measure(repeat=5):
+    """{'<case>': metrics}, plus 'python -c pass' as the floor"""
+    with tempfile.TemporaryDirectory(prefix='asc-startup-') as tmp:
+        env = {**os.environ, 'ASC_KEY_FILE': str(_common.temp_token_provider().key_file),
+               'ASC_CACHE_DIR': f'{tmp}/cache'}
+        for name in ('ASC_CASSETTE', 'ASC_TRACE_FILE', 'ASC_METRICS_FILE'):
+            env.pop(name, None)
+        warm_cache(env)
+
+        floor_runs = [run_once(['-c', 'pass'], env) for _ in range(repeat)]
+        floor_modules = frozenset(parse_importtime(subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', 'pass'], env=env, capture_output=True, text=True,
+        ).stderr))
+        samples = {'python -c pass': floor_runs}
+        for label, argv in CASES.items():
+            samples[label] = [run_once(argv, env, floor_modules) for _ in range(repeat)]
+
+    return {
+        label: {
+            'wall_ms': round(statistics.median(run['wall_ms'] for run in runs), 1),
+            'import_ms': round(statistics.median(run['import_ms'] for run in runs), 1),
+            'modules': runs[-1]['modules'],
+            'heavy': sorted({name for run in runs for name in run['heavy']}),
+        }
+        for label, runs in samples.items()
+    }
+
+
+def over_budget(results, budget_ms):
+    """Cases that import a heavy module or start slower than the floor plus `budget_ms`"""
+    floor = results['python -c pass']['wall_ms']
+    failures = []
+    for label, metrics in results.items():
+        if metrics['heavy']:
+            failures.append(f"{label}: imports {', '.join(metrics['heavy'])}")
+        if metrics['wall_ms'] - floor > budget_ms:
+            failures.append(f"{label}: {metrics['wall_ms'] - floor:.1f} ms over the interpreter, budget {budget_ms:g}")
+    return failures
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--budget-ms', type=float, default=100.0,
+                        help='allowed wall time over `python -c pass` (default 100)')
+    args = parser.parse_args()
+
+    results = measure(args.repeat)
+    floor = results['python -c pass']['wall_ms']
+    print(f"🚀 asc start-up, median of {args.repeat}\n")
+    print(f"  {'case':<24}{'wall ms':>10}{'over floor':>12}{'import ms':>11}{'modules':>9}  heavy")
+    for label, metrics in results.items():
+        print(f"  {label:<24}{metrics['wall_ms']:>10.1f}{metrics['wall_ms'] - floor:>12.1f}"
+              f"{metrics['import_ms']:>11.1f}{metrics['modules']:>9}  {', '.join(metrics['heavy']) or '-'}")
+
+    failures = over_budget(results, args.budget_ms)
+    if failures:
+        print("\n❌ over budget:")
+        for line in failures:
+            print(f"   {line}")
+        sys.exit(1)
+    print(f"\n✅ every case within {args.budget_ms:g} ms of the interpreter, without {', '.join(HEAVY)}")
@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Benchmark: per-request cost of tracing, disabled vs. enabled
+
+Runs the same pooled GETs against the local stub with tracing off, then
+with spans written to a JSON-lines file, and reports the median cost per
+request plus the bare cost of entering a disabled span.
+"""
+import argparse
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+import _common
+
+from asc import trace
+from asc.client import Client, parse_json
+from asc.stub import StubServer
+
+
+def bench_requests(stub, tokens, n):
+    client = Client(base_url=stub.url, token_provider=tokens)
+    samples = []
+    for _ in range(n):
+        start = time.perf_counter()
+        parse_json(client.get('ciProducts'))
+        samples.append(time.perf_counter() - start)
+    client.close()
+    return samples
+
+
+def disabled_span_ns(n=200_000):
+    start = time.perf_counter()
+    for _ in range(n):
+        with trace.span('request', endpoint='ciProducts'):
+            pass
+    return (time.perf_counter() - start) / n * 1e9
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('-n', type=int, default=500, help='requests per run')
+    args = parser.parse_args()
+
+    tokens = _common.temp_token_provider()
+    with StubServer() as stub, tempfile.TemporaryDirectory() as tmp:
+        print(f"📊 {args.n} GET /ciProducts against the stub\n")
+        bench_requests(stub, tokens, 20)
+        off = bench_requests(stub, tokens, args.n)
+        _common.summarize('off', off)
+        trace.enable(trace_file=Path(tmp) / 'trace.jsonl')
+        on = bench_requests(stub, tokens, args.n)
+        trace.disable()
+        _common.summarize('on', on, f"{len((Path(tmp) / 'trace.jsonl').read_text().splitlines())} spans")
+        overhead = (statistics.median(on) - statistics.median(off)) * 1e6
+        print(f"\n  enabled: {overhead:+.0f} µs per request; disabled span: {disabled_span_ns():.0f} ns")
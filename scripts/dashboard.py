@@ -0,0 +1,8 @@
+#!/usr/bin/env python3
+"""
+Xcode Cloud dashboard: the latest build of every workflow of every product (same as `python3 -m asc dashboard`)
+"""
+import sys
+from asc.cli import main
+
+sys.exit(main(['dashboard', *sys.argv[1:]]))
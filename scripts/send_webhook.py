@@ -0,0 +1,24 @@
+#!/usr/bin/env python3
+"""
+Replay recorded webhook payloads against a local receiver, signed like App Store Connect does
+"""
+import json
+import sys
+from asc import config
+from asc.webhook import send
+
+if len(sys.argv) < 3:
+    print("Usage: ASC_WEBHOOK_SECRET=... python3 scripts/send_webhook.py URL payload.json [payload.json ...]")
+    sys.exit(1)
+
+if not config.WEBHOOK_SECRET:
+    print("❌ ASC_WEBHOOK_SECRET is not set")
+    sys.exit(1)
+
+url = sys.argv[1]
+for path in sys.argv[2:]:
+    with open(path, 'rb') as f:
+        body = f.read()
+    json.loads(body)  # refuse to send something that isn't JSON
+    status = send(url, body)
+    print(f"{'✅' if status == 200 else '❌'} {path}: {status}")
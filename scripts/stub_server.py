@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Local App Store Connect stub: run the scripts offline against recorded responses
+
+    python3 scripts/stub_server.py                       # serve, print the env to use
+    python3 scripts/stub_server.py -- python3 scripts/watch_build.py
+    python3 scripts/stub_server.py --latency 0.2 --error-rate 0.05 --rate-limit 3600 -- python3 scripts/check_usage.py
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ec
+from asc.stub import SAMPLE_CASSETTE, StubServer, routes_from_cassette, writable
+
+argv, command = sys.argv[1:], []
+if '--' in argv:
+    argv, command = argv[:argv.index('--')], argv[argv.index('--') + 1:]
+
+parser = argparse.ArgumentParser(description="Local App Store Connect stub server")
+parser.add_argument('--cassette', default=SAMPLE_CASSETTE, help="recorded responses to serve (default: %(default)s)")
+parser.add_argument('--port', type=int, default=0)
+parser.add_argument('--latency', type=float, default=0.0, help="seconds added to every response")
+parser.add_argument('--error-rate', type=float, default=0.0, help="share of requests answered 500/503")
+parser.add_argument('--seed', type=int, help="seed for --error-rate")
+parser.add_argument('--rate-limit', type=int, help="hourly budget reported in X-Rate-Limit, 429 once spent")
+parser.add_argument('--page-size', type=int, help="page size for collections requested without limit")
+parser.add_argument('--etags', action='store_true', help="send ETags and answer If-None-Match with 304")
+args = parser.parse_args(argv)
+
+# The stub never checks signatures, but the client still signs: use a throwaway key
+workdir = Path(tempfile.mkdtemp(prefix='asc-stub-'))
+key_file = workdir / 'AuthKey_STUB.p8'
+key_file.write_bytes(ec.generate_private_key(ec.SECP256R1()).private_bytes(
+    serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption(),
+))
+
+stub = StubServer(writable(routes_from_cassette(args.cassette)), latency=args.latency,
+                  rate_limit=args.rate_limit, etags=args.etags, error_rate=args.error_rate, seed=args.seed,
+                  page_size=args.page_size, port=args.port)
+env = {
+    'ASC_BASE_URL': stub.url,
+    'ASC_KEY_FILE': str(key_file),
+    # Keep ID caches, rate-limit state and history apart from the real ones
+    'ASC_CACHE_DIR': str(workdir / 'cache'),
+}
+
+with stub:
+    if command:
+        status = subprocess.run(command, env={**os.environ, **env}).returncode
+        print(f"\n🧪 stub: {len(stub.requests)} requests, {stub.connections} connections", file=sys.stderr)
+        sys.exit(status)
+
+    print(f"🧪 App Store Connect stub on {stub.url} ({args.cassette})\n")
+    for name, value in env.items():
+        print(f"export {name}={value}")
+    print("\n按 Ctrl+C 停止")
+    try:
+        stub._thread.join()
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,91 @@
+import sys
+from pathlib import Path
+
+import pytest
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ec
+
+# The scripts import the shared helpers as a top-level `asc` package
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+
+@pytest.fixture
+def key_file(tmp_path):
+    """A throwaway ES256 key in the same .p8 format App Store Connect issues"""
+    key = ec.generate_private_key(ec.SECP256R1())
+    path = tmp_path / 'AuthKey_TEST.p8'
+    path.write_bytes(key.private_bytes(
+        serialization.Encoding.PEM,
+        serialization.PrivateFormat.PKCS8,
+        serialization.NoEncryption(),
+    ))
+    return path
+
+
+@pytest.fixture
+def stub():
+    from asc.stub import StubServer
+
+    with StubServer() as server:
+        yield server
+
+
+@pytest.fixture
+def client(stub, key_file):
+    from asc.auth import TokenProvider
+    from asc.client import Client
+
+    c = Client(base_url=stub.url, token_provider=TokenProvider(key_file=key_file))
+    yield c
+    c.close()
+
+
+@pytest.fixture
+def connect(key_file):
+    """connect(server) -> a Client for that stub, closed after the test"""
+    from asc.auth import TokenProvider
+    from asc.client import Client
+
+    clients = []
+
+    def connect(server):
+        clients.append(Client(base_url=server.url, token_provider=TokenProvider(key_file=key_file)))
+        return clients[-1]
+
+    yield connect
+    for c in clients:
+        c.close()
+
+
+@pytest.fixture
+def writable_stub():
+    """The sample cassette plus the POST/PATCH endpoints and git references the scripts use"""
+    from asc.stub import StubServer, routes_from_cassette, writable
+
+    with StubServer(writable(routes_from_cassette())) as server:
+        yield server
+
+
+@pytest.fixture
+def make_scheduler(writable_stub, connect, tmp_path):
+    """make_scheduler(**kwargs) -> a TriggerScheduler on writable_stub; all share one ID cache and queue"""
+    from asc.resolve import IDCache, Resolver
+    from asc.scheduler import TriggerQueue, TriggerScheduler
+
+    client = connect(writable_stub)
+
+    def make(**kwargs):
+        resolver = Resolver(client, cache=IDCache(tmp_path / 'ids.json', namespace='test'))
+        return TriggerScheduler(resolver, queue=TriggerQueue(tmp_path / 'queue.json'), **kwargs)
+
+    return make
+
+
+@pytest.fixture(autouse=True)
+def cache_dir(tmp_path, monkeypatch):
+    """Keep ID caches, rate-limit state and stores out of the real ~/.cache"""
+    from asc import config
+
+    path = tmp_path / 'cache'
+    monkeypatch.setattr(config, 'CACHE_DIR', path)
+    return path
@@ -0,0 +1,122 @@
+import os
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+from asc import agent
+
+SCRIPTS = Path(__file__).resolve().parent.parent
+
+
+@pytest.fixture
+def running(tmp_path):
+    """An agent on a temporary socket, running a fake command runner in a thread"""
+    started = []
+
+    def start(run):
+        server = agent.Agent(tmp_path / 'agent.sock', run=run, idle_timeout=30)
+        ready = threading.Event()
+        thread = threading.Thread(target=server.serve, args=(ready,), daemon=True)
+        thread.start()
+        assert ready.wait(5)
+        started.append((server, thread))
+        return server
+
+    yield start
+    for server, thread in started:
+        server.stop()
+        thread.join(5)
+
+
+def test_commands_run_in_the_agent_with_their_own_output(running):
+    def run(argv):
+        time.sleep(0.05)
+        for _ in range(20):
+            print(f"{argv[0]} out")
+        print(f"{argv[0]} err", file=sys.stderr)
+        return len(argv[0])
+
+    server = running(run)
+    results = {}
+    threads = [threading.Thread(target=lambda name=name: results.update({name: agent.call([name], server.path)}))
+               for name in ('status', 'builds')]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    # Concurrent requests never see each other's output
+    assert results['status'] == (6, 'status out\n' * 20, 'status err\n')
+    assert results['builds'] == (6, 'builds out\n' * 20, 'builds err\n')
+    assert server.served == 2
+
+
+def test_failures_come_back_as_exit_status_and_stderr(running):
+    def run(argv):
+        if argv == ['bad-option']:
+            raise SystemExit(2)
+        raise RuntimeError('boom')
+
+    server = running(run)
+    assert agent.call(['bad-option'], server.path)[0] == 2
+    status, _, stderr = agent.call(['status'], server.path)
+    assert status == 1 and 'RuntimeError: boom' in stderr
+
+
+def test_a_different_environment_runs_directly(running, monkeypatch):
+    server = running(lambda argv: 0)
+    monkeypatch.setenv('ASC_BASE_URL', 'http://127.0.0.1:1/v1')
+    assert agent.call(['status'], server.path) is None
+    assert server.served == 0
+
+
+def test_no_agent_means_direct_and_one_agent_per_socket(running, tmp_path):
+    assert agent.call(['status'], tmp_path / 'none.sock', autostart=False) is None
+
+    server = running(lambda argv: 0)
+    assert agent.Agent(server.path, run=lambda argv: 0).serve() is False
+    assert agent.request({'op': agent.STATS}, server.path)['pid'] == os.getpid()
+
+
+@pytest.mark.parametrize('argv, expected', [
+    (['status'], True),
+    (['usage', '--no-sync'], True),
+    (['dashboard', '--watch'], False),
+    (['watch'], False),
+    (['builds', '--profile'], False),
+    (['testflight', '--webhook', '8787'], False),
+    (['testflight', '--wait', '51'], False),
+    (['--help'], False),
+    (['agent', '--stop'], False),
+])
+def test_streaming_and_self_reporting_commands_run_directly(argv, expected):
+    assert agent.eligible(argv, environ={}) is expected
+
+
+def test_status_is_answered_from_the_agent_after_the_first_call(tmp_path, key_file):
+    from asc.stub import StubServer, routes_from_cassette, writable
+
+    with StubServer(writable(routes_from_cassette())) as stub:
+        env = {**os.environ, 'ASC_BASE_URL': stub.url, 'ASC_KEY_FILE': str(key_file),
+               'ASC_CACHE_DIR': str(tmp_path / 'cache'), 'ASC_AGENT': '1'}
+        try:
+            first = subprocess.run([sys.executable, '-m', 'asc', 'status'], cwd=SCRIPTS, env=env,
+                                   capture_output=True, text=True, timeout=30)
+            assert first.returncode == 0, first.stderr
+            assert (tmp_path / 'cache' / 'agent.sock').exists()
+            requests = len(stub.requests)
+
+            second = subprocess.run([sys.executable, '-m', 'asc', 'status'], cwd=SCRIPTS, env=env,
+                                    capture_output=True, text=True, timeout=30)
+            assert second.returncode == 0, second.stderr
+            # Same rows, up to the elapsed time of running builds
+            rows = lambda output: [line.rsplit(None, 1)[0] for line in output.splitlines()[:4] if line.strip()]
+            assert rows(second.stdout) == rows(first.stdout)
+            assert len(stub.requests) == requests
+        finally:
+            subprocess.run([sys.executable, '-m', 'asc', 'agent', '--stop'], cwd=SCRIPTS, env=env,
+                           capture_output=True, timeout=30)
@@ -0,0 +1,47 @@
+import asyncio
+import threading
+import time
+
+from asc.aio import AsyncClient
+
+
+def test_fan_out_is_bounded_by_the_semaphore(stub, client):
+    lock = threading.Lock()
+    in_flight = [0, 0]  # current, peak
+
+    def slow(method, query, body):
+        with lock:
+            in_flight[0] += 1
+            in_flight[1] = max(in_flight[1], in_flight[0])
+        time.sleep(0.05)
+        with lock:
+            in_flight[0] -= 1
+        return 200, {'data': []}
+
+    for i in range(8):
+        stub.routes[f'/v1/scmRepositories/repo-{i}'] = slow
+
+    api = AsyncClient(client, concurrency=3)
+    responses = asyncio.run(api.get_many([f'scmRepositories/repo-{i}' for i in range(8)]))
+
+    assert [r.status_code for r in responses] == [200] * 8
+    assert in_flight[1] == 3
+    # Connections are reused from the pool rather than opened per request
+    assert stub.connections <= 3
+
+
+def test_a_wider_fan_out_is_closed_into_the_clients_stats(stub, client):
+    assert client.pool_size < 16
+
+    async def fan_out():
+        async with AsyncClient(client, concurrency=16) as api:
+            assert api.client is not client
+            await api.get_many([f'scmRepositories/repo-{i}' for i in range(4)])
+        return api
+
+    api = asyncio.run(fan_out())
+    assert client.stats()['requests'] == 4
+    assert client.endpoints['GET scmRepositories/{id}']['requests'] == 4
+    # Its own connections are gone; what it shared with the client still works
+    assert not api.client.session.adapters['http://'].poolmanager.pools
+    assert client.get('ciProducts').status_code == 200
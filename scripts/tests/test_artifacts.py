@@ -0,0 +1,173 @@
+import hashlib
+import json
+import os
+
+import pytest
+
+from asc.artifacts import DOWNLOADED, FAILED, MANIFEST, RESUMED, SKIPPED, Artifact, Downloader, list_artifacts
+from asc.auth import TokenProvider
+from asc.client import Client
+from asc.stub import StubServer
+
+MiB = 1 << 20
+
+
+@pytest.fixture
+def files(tmp_path):
+    served = tmp_path / 'served'
+    served.mkdir()
+    paths = {}
+    for name, size in (('build.log.zip', 3 * MiB + 17), ('Test.xcresult.zip', 5 * MiB), ('App.xcarchive.zip', MiB)):
+        path = served / name
+        path.write_bytes(os.urandom(size))
+        paths[f'/files/{name}'] = path
+    return paths
+
+
+@pytest.fixture
+def server(files):
+    with StubServer({}, files=files) as stub:
+        yield stub
+
+
+def artifacts_of(stub, files, run_number=30):
+    return [Artifact(f'artifact-{i}', run_number, 'Build', 'LOG_BUNDLE', path.name, path.stat().st_size,
+                     f'{stub.origin}{url}')
+            for i, (url, path) in enumerate(files.items())]
+
+
+def downloads(stub):
+    return [r for r in stub.requests if r['path'].startswith('/files/')]
+
+
+def test_files_download_concurrently_and_are_skipped_next_time(server, files, tmp_path):
+    dest = tmp_path / 'dest'
+    downloader = Downloader(dest, workers=3, chunk_size=256 * 1024)
+    results = list(downloader.download_all(artifacts_of(server, files)))
+    downloader.close()
+
+    assert sorted(r.status for r in results) == [DOWNLOADED] * 3
+    for result in results:
+        assert result.path == dest / '30' / 'Build' / result.artifact.file_name
+        assert result.path.read_bytes() == files[f'/files/{result.artifact.file_name}'].read_bytes()
+        assert result.bytes == result.artifact.file_size
+    manifest = json.loads((dest / MANIFEST).read_text())
+    log = files['/files/build.log.zip']
+    assert manifest['30/Build/build.log.zip']['sha256'] == hashlib.sha256(log.read_bytes()).hexdigest()
+    assert not list(dest.rglob('*.part*'))
+
+    again = Downloader(dest, workers=3)
+    assert sorted(r.status for r in again.download_all(artifacts_of(server, files))) == [SKIPPED] * 3
+    again.close()
+    assert len(downloads(server)) == 3
+
+
+def test_a_dropped_connection_resumes_with_a_range_request(server, files, tmp_path):
+    artifact = artifacts_of(server, files)[1]
+    server.inject(('cut', 2 * MiB))
+    downloader = Downloader(tmp_path / 'dest')
+    result = downloader.download(artifact)
+    downloader.close()
+
+    assert result.status == RESUMED
+    assert result.path.read_bytes() == files['/files/Test.xcresult.zip'].read_bytes()
+    first, second = downloads(server)
+    assert 'Range' not in first['headers']
+    assert second['headers']['Range'] == f'bytes={2 * MiB}-'
+    assert second['headers']['If-Range'] == server._file_etag(files['/files/Test.xcresult.zip'])
+    # The second request fetched only the missing tail: nothing came over twice
+    assert result.bytes == artifact.file_size
+
+
+def test_a_part_left_by_an_earlier_run_is_resumed(server, files, tmp_path):
+    artifact = artifacts_of(server, files)[0]
+    dest = tmp_path / 'dest'
+    downloader = Downloader(dest, attempts=1)
+    server.inject(('cut', MiB))
+    assert downloader.download(artifact).status == FAILED
+    part = downloader.path_for(artifact).with_name('build.log.zip.part')
+    # Everything sent before the connection closed is kept
+    assert part.stat().st_size == MiB
+
+    result = downloader.download(artifact)
+    downloader.close()
+    assert (result.status, result.bytes) == (RESUMED, artifact.file_size - MiB)
+    assert downloads(server)[-1]['headers']['Range'] == f'bytes={MiB}-'
+    assert result.path.read_bytes() == files['/files/build.log.zip'].read_bytes()
+
+
+def test_closing_the_results_stops_the_queue(server, files, tmp_path):
+    log, xcresult, archive = artifacts_of(server, files)
+    downloader = Downloader(tmp_path / 'dest', workers=1)
+    # The second file stalls long enough for the caller to give up while it is in flight
+    server.inject(None, ('hang', 0.3))
+    results = downloader.download_all([log, xcresult, archive])
+    assert next(results).status == DOWNLOADED
+    results.close()
+    downloader.close()
+
+    assert [r['path'] for r in downloads(server)] == ['/files/build.log.zip', '/files/Test.xcresult.zip']
+    assert not downloader.path_for(xcresult).exists() and not downloader.path_for(archive).exists()
+    assert downloader.path_for(xcresult).with_name('Test.xcresult.zip.part').stat().st_size < xcresult.file_size
+
+
+def test_size_and_checksum_mismatches_fail(server, files, tmp_path):
+    log, xcresult = artifacts_of(server, files)[:2]
+    downloader = Downloader(tmp_path / 'dest')
+
+    result = downloader.download(log._replace(file_size=log.file_size + 1))
+    assert result.status == FAILED and 'size' in result.detail
+    assert not result.path.exists() and not list(result.path.parent.glob('*.part*'))
+
+    # The ETag names other content than what arrives: corrupted in transit or at rest
+    server._file_etags[files['/files/Test.xcresult.zip']] = '"' + '0' * 32 + '"'
+    result = downloader.download(xcresult)
+    assert result.status == FAILED and 'MD5' in result.detail
+    assert not result.path.exists() and not list(result.path.parent.glob('*.part*'))
+
+    result = downloader.download(log._replace(url=f'{server.origin}/files/missing'))
+    assert result.status == FAILED and '404' in result.detail
+    downloader.close()
+
+
+def test_artifacts_are_listed_for_every_action_of_every_run(tmp_path, key_file):
+    with StubServer({}) as stub:
+        for number in (41, 42):
+            stub.routes[f'/v1/ciBuildRuns/run-{number}/actions'] = {'data': [
+                {'type': 'ciBuildActions', 'id': f'{number}-{name}', 'attributes': {'name': name}}
+                for name in ('Build', 'Test')]}
+            for name in ('Build', 'Test'):
+                stub.routes[f'/v1/ciBuildActions/{number}-{name}/artifacts'] = {'data': [
+                    {'type': 'ciArtifacts', 'id': f'{number}-{name}-{file_type}',
+                     'attributes': {'fileType': file_type, 'fileName': f'{name} {number} {file_type}.zip',
+                                    'fileSize': 1024, 'downloadUrl': f'https://example.com/{number}/{file_type}'}}
+                    for file_type in ('LOG_BUNDLE', 'RESULT_BUNDLE')]}
+        client = Client(base_url=stub.url, token_provider=TokenProvider(key_file=key_file))
+        runs = [{'id': 'run-41', 'number': 41}, {'id': 'run-42', 'number': 42}]
+
+        artifacts = list_artifacts(runs, client=client, file_types={'LOG_BUNDLE'})
+        client.close()
+
+    assert [(a.run_number, a.action, a.file_name) for a in artifacts] == [
+        (41, 'Build', 'Build 41 LOG_BUNDLE.zip'), (41, 'Test', 'Test 41 LOG_BUNDLE.zip'),
+        (42, 'Build', 'Build 42 LOG_BUNDLE.zip'), (42, 'Test', 'Test 42 LOG_BUNDLE.zip')]
+    assert artifacts[0].url == 'https://example.com/41/LOG_BUNDLE'
+    listed = [r for r in stub.requests if r['path'].endswith('/artifacts')]
+    assert len(listed) == 4 and listed[0]['query']['fields[ciArtifacts]'] == [
+        'fileType,fileName,fileSize,downloadUrl']
+
+
+def test_long_artifact_listings_are_followed_to_the_last_page(key_file):
+    with StubServer({}) as stub:
+        stub.routes['/v1/ciBuildRuns/run-50/actions'] = {'data': [
+            {'type': 'ciBuildActions', 'id': 'test', 'attributes': {'name': 'Test'}}]}
+        stub.routes['/v1/ciBuildActions/test/artifacts'] = {'data': [
+            {'type': 'ciArtifacts', 'id': f'shard-{i}', 'attributes': {'fileType': 'LOG_BUNDLE',
+                                                                        'fileName': f'shard {i}.zip'}}
+            for i in range(250)]}
+        client = Client(base_url=stub.url, token_provider=TokenProvider(key_file=key_file))
+        artifacts = list_artifacts([{'id': 'run-50', 'number': 50}], client=client)
+        client.close()
+
+    assert [a.file_name for a in artifacts] == [f'shard {i}.zip' for i in range(250)]
+    assert len([r for r in stub.requests if r['path'].endswith('/artifacts')]) == 2
@@ -0,0 +1,70 @@
+import asyncio
+import threading
+
+import jwt
+
+from asc.auth import TokenProvider
+
+
+class FakeClock:
+    def __init__(self, now=1_700_000_000):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def test_token_is_signed_once_and_reused(key_file):
+    provider = TokenProvider(key_file=key_file, clock=FakeClock())
+
+    first = provider.token()
+    for _ in range(10):
+        assert provider.token() == first
+
+    assert provider.stats()['misses'] == 1
+    assert provider.stats()['hits'] == 10
+    assert provider.key_loads == 1
+
+    claims = jwt.decode(first, options={'verify_signature': False})
+    assert claims['aud'] == 'appstoreconnect-v1'
+    assert jwt.get_unverified_header(first)['kid'] == provider.key_id
+
+
+def test_token_is_resigned_shortly_before_expiry(key_file):
+    clock = FakeClock()
+    provider = TokenProvider(key_file=key_file, lifetime=1200, refresh_margin=60, clock=clock)
+
+    first = provider.token()
+    clock.now += 1200 - 61
+    assert provider.token() == first
+
+    clock.now += 2
+    second = provider.token()
+    assert second != first
+    assert provider.resigns == 1
+    assert provider.key_loads == 1
+
+
+def test_concurrent_callers_share_one_signature(key_file):
+    provider = TokenProvider(key_file=key_file)
+    tokens = []
+    threads = [threading.Thread(target=lambda: tokens.append(provider.token())) for _ in range(16)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(set(tokens)) == 1
+    assert provider.misses == 1
+
+
+def test_async_token_matches_sync_token(key_file):
+    provider = TokenProvider(key_file=key_file)
+
+    async def main():
+        return await asyncio.gather(*(provider.async_token() for _ in range(8)))
+
+    tokens = asyncio.run(main())
+    assert len(set(tokens)) == 1
+    assert provider.token() == tokens[0]
+    assert provider.misses == 1
@@ -0,0 +1,99 @@
+import json
+
+import pytest
+
+from asc import batch
+from asc.batch import BatchTrigger, MatrixError
+from asc.scheduler import COALESCED, DEFERRED, FAILED, TRIGGERED, TriggerQueue
+
+NO_LIMIT = 1e9
+
+
+@pytest.fixture
+def make(make_scheduler):
+    # Room for every pair a test triggers, unless the test is about the cap
+    def make(max_concurrent=10, **kwargs):
+        scheduler = make_scheduler(budget=NO_LIMIT, max_concurrent=max_concurrent)
+        return BatchTrigger(scheduler, emit=lambda result: None, **kwargs)
+
+    return make
+
+
+def requests(stub, method, suffix):
+    return [r for r in stub.requests if r['method'] == method and r['path'].endswith(suffix)]
+
+
+def test_matrix_forms():
+    assert batch.parse_matrix({'workflows': ['A', 'B'], 'branches': ['main'], 'tags': ['v1']}) == [
+        ('A', 'main'), ('A', 'v1'), ('B', 'main'), ('B', 'v1')]
+    assert batch.parse_matrix([{'workflow': 'A', 'branch': 'main'}, {'workflow': 'A', 'tag': 'v1'},
+                               {'workflow': 'A', 'branch': 'main'}]) == [('A', 'main'), ('A', 'v1')]
+    for bad in ({'workflows': ['A']}, [{'branch': 'main'}], 'main'):
+        with pytest.raises(MatrixError):
+            batch.parse_matrix(bad)
+
+
+def test_every_pair_is_triggered_with_ids_resolved_once(writable_stub, make):
+    trigger = make(concurrency=4)
+    results = trigger.run(batch.expand(['*'], ['main', 'develop', 'v1.0']))
+
+    assert [r['status'] for r in results] == [TRIGGERED] * 9
+    assert len({r['run_id'] for r in results}) == 9
+    assert len(requests(writable_stub, 'POST', '/ciBuildRuns')) == 9
+    # One product list, one repository per workflow, one reference list per repository
+    assert len(requests(writable_stub, 'GET', '/ciProducts')) == 1
+    assert len(requests(writable_stub, 'GET', '/gitReferences')) == 1
+    refs = {(json.loads(r['body'])['data']['relationships']['workflow']['data']['id'],
+             json.loads(r['body'])['data']['relationships']['sourceBranchOrTag']['data']['id'])
+            for r in requests(writable_stub, 'POST', '/ciBuildRuns')}
+    assert len(refs) == 9
+
+
+def test_unfinished_runs_are_reused(writable_stub, make):
+    first = make().run([('Default', 'main')])
+    again = make().run([('Default', 'main'), ('Default', 'develop')])
+
+    assert [r['status'] for r in again] == [COALESCED, TRIGGERED]
+    assert again[0]['run_id'] == first[0]['run_id']
+    assert len(requests(writable_stub, 'POST', '/ciBuildRuns')) == 2
+
+
+def test_the_per_workflow_cap_defers_to_the_trigger_queue(writable_stub, make, tmp_path):
+    first = make(max_concurrent=1).run([('Default', 'main'), ('Default', 'develop'), ('Default', 'v1.0')])
+    assert [r['status'] for r in first] == [DEFERRED, DEFERRED, TRIGGERED]
+    assert [r['ref'] for r in first if r['status'] == DEFERRED] == ['develop', 'v1.0']
+    queue = TriggerQueue(tmp_path / 'queue.json')
+    assert [e['branch'] for e in queue.entries()] == ['develop', 'v1.0']
+
+    # Queued triggers hold their slots: a second batch neither starts them again nor jumps ahead of them
+    again = make(max_concurrent=2).run([('Default', 'develop'), ('Default', 'release/1.0')])
+    assert [(r['ref'], r['status']) for r in again] == [('develop', COALESCED), ('release/1.0', DEFERRED)]
+    assert [(e['branch'], e['requests']) for e in queue.entries()] == [('develop', 2), ('v1.0', 1), ('release/1.0', 1)]
+    assert len(requests(writable_stub, 'POST', '/ciBuildRuns')) == 1
+
+
+def test_a_rerun_with_the_journal_retries_only_the_failures(writable_stub, make, tmp_path):
+    trigger_route = writable_stub.routes['/v1/ciBuildRuns']
+    failed_once = set()
+
+    def flaky(method, query, body):
+        ref = json.loads(body)['data']['relationships']['sourceBranchOrTag']['data']['id']
+        if ref.endswith('branch-1') and ref not in failed_once:
+            failed_once.add(ref)
+            return 409, {'errors': [{'status': '409', 'code': 'ENTITY_ERROR'}]}
+        return trigger_route(method, query, body)
+
+    writable_stub.routes['/v1/ciBuildRuns'] = flaky
+    journal = tmp_path / 'journal.jsonl'
+    pairs = [('Default', 'main'), ('Default', 'develop'), ('Default', 'nope')]
+
+    first = {r['ref']: r['status'] for r in make(journal=journal).run(pairs)}
+    assert first == {'main': TRIGGERED, 'develop': FAILED, 'nope': FAILED}
+
+    # The pending main run finishes, so only the journal keeps it from running again
+    for run in writable_stub.routes[f"/v1/ciWorkflows/{make().resolver.workflow_id()}/buildRuns"]['data']:
+        run['attributes']['executionProgress'] = 'COMPLETE'
+    second = {r['ref']: r['status'] for r in make(journal=journal).run(pairs)}
+    assert second == {'main': batch.SKIPPED, 'develop': TRIGGERED, 'nope': FAILED}
+    assert len(requests(writable_stub, 'POST', '/ciBuildRuns')) == 3
+    assert len(journal.read_text().splitlines()) == 6
@@ -0,0 +1,56 @@
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'benchmarks'))
+
+import bench_commands
+
+
+def test_counts_regress_on_any_growth_times_only_past_the_threshold():
+    baseline = {'watch_build (warm)': {'requests': 1, 'jwt_signatures': 1, 'bytes': 500,
+                                       'wall_ms': 400, 'cpu_ms': 300, 'peak_rss_mb': 40}}
+    noisy = {'watch_build (warm)': {'requests': 1, 'jwt_signatures': 1, 'bytes': 500,
+                                    'wall_ms': 520, 'cpu_ms': 250, 'peak_rss_mb': 44}}
+    assert bench_commands.compare(noisy, baseline, threshold=0.25) == []
+
+    worse = {'watch_build (warm)': dict(noisy['watch_build (warm)'], requests=2, wall_ms=700)}
+    regressions = bench_commands.compare(worse, baseline, threshold=0.25)
+    assert len(regressions) == 2
+    assert regressions[0].startswith('watch_build (warm): requests 2 > 1')
+
+
+def test_measure_reports_per_process_costs():
+    results = bench_commands.measure(['watch_build'], latency=0, repeat=1)
+
+    cold, warm = results['watch_build (cold)'], results['watch_build (warm)']
+    # Cold resolves product and workflow first; warm reads them from the ID cache
+    assert (cold['requests'], warm['requests']) == (3, 1)
+    assert cold['jwt_signatures'] == warm['jwt_signatures'] == 1
+    assert 0 < warm['bytes'] < cold['bytes']
+    assert cold['cpu_ms'] > 0 and cold['peak_rss_mb'] > 1
+
+
+def test_stored_baseline_covers_every_command():
+    import json
+
+    stored = json.loads(bench_commands.BASELINE.read_text())
+    assert {label.split(' ')[0] for label in stored['results']} == set(bench_commands.COMMANDS)
+
+
+def test_importtime_output_is_parsed_per_module():
+    import bench_startup
+
+    stderr = ('import time: self [us] | cumulative | imported package\n'
+              'import time:       120 |        120 |   asc.config\n'
+              'import time:      3000 |       3120 | asc.cli\n')
+    assert bench_startup.parse_importtime(stderr) == {'asc.config': 120, 'asc.cli': 3000}
+
+
+def test_help_and_cached_answers_start_without_http_or_crypto():
+    import bench_startup
+
+    results = bench_startup.measure(repeat=1)
+
+    assert set(results) == {'python -c pass', *bench_startup.CASES}
+    assert all(metrics['heavy'] == [] for metrics in results.values())
+    assert results['asc --help']['modules'] < results['asc usage --no-sync']['modules']
@@ -0,0 +1,119 @@
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from asc.cassette import RECORD, REPLAY, Cassette, CassetteMiss
+from asc.client import Client
+from asc.pager import paginate
+from asc.stub import SAMPLE_CASSETTE, StubServer, routes_from_cassette, writable
+
+SCRIPTS = Path(__file__).resolve().parent.parent
+
+
+def test_record_then_replay_without_network(stub, key_file, tmp_path):
+    from asc.auth import TokenProvider
+
+    path = tmp_path / 'run.json'
+    recorder = Client(base_url=stub.url, token_provider=TokenProvider(key_file=key_file),
+                      cassette=Cassette(path, RECORD))
+    live = [recorder.get('ciProducts').json(), recorder.get('apps', params={'limit': 1}).json()]
+    assert recorder.get('nothing-here').status_code == 404
+
+    saved = path.read_text()
+    assert 'Bearer' not in saved and 'Authorization' not in saved
+    stub.stop()
+
+    # No key, no server: replay signs nothing and spends no budget
+    player = Client(base_url='https://api.appstoreconnect.apple.com/v1', cassette=Cassette(path, REPLAY))
+    assert [player.get('ciProducts').json(), player.get('apps', params={'limit': 1}).json()] == live
+    assert player.get('nothing-here').status_code == 404
+    with pytest.raises(CassetteMiss):
+        player.get('apps', params={'limit': 2})
+    assert player.cassette.hits == 3
+
+
+def test_identical_requests_replay_in_order(stub, key_file, tmp_path):
+    from asc.auth import TokenProvider
+
+    path = tmp_path / 'poll.json'
+    recorder = Client(base_url=stub.url, token_provider=TokenProvider(key_file=key_file),
+                      cassette=Cassette(path, RECORD))
+    recorder.get('ciWorkflows/workflow-1/buildRuns')
+    stub.routes['/v1/ciWorkflows/workflow-1/buildRuns']['data'][0]['attributes']['executionProgress'] = 'RUNNING'
+    recorder.get('ciWorkflows/workflow-1/buildRuns')
+
+    player = Client(cassette=Cassette(path, REPLAY))
+    progress = [player.get('ciWorkflows/workflow-1/buildRuns').json()['data'][0]['attributes']['executionProgress']
+                for _ in range(3)]
+    assert progress == ['COMPLETE', 'RUNNING', 'RUNNING']
+
+
+def test_stub_paginates_filters_and_sorts_collections(key_file):
+    from asc.auth import TokenProvider
+
+    routes = routes_from_cassette()
+    with StubServer(routes, page_size=5) as server:
+        client = Client(base_url=server.url, token_provider=TokenProvider(key_file=key_file))
+        builds = list(paginate('builds', {'sort': 'version'}, client=client, page_size=5))
+        assert [b['version'] for b in builds] == sorted(b['version'] for b in builds)
+        assert len(builds) == len(routes['/v1/builds']['data'])
+        assert len(server.requests) == -(-len(builds) // 5)
+
+        found = client.get('apps', params={'filter[bundleId]': 'com.headshotairbattle'}).json()['data']
+        assert [a['attributes']['sku'] for a in found] == ['HAB001']
+        assert client.get('apps', params={'filter[bundleId]': 'com.other'}).json()['data'] == []
+
+
+def test_stub_error_rate_and_rate_limit_headers(key_file):
+    import requests
+
+    with StubServer(routes_from_cassette(), error_rate=0.3, seed=7, rate_limit=100) as server:
+        statuses = [requests.get(f'{server.url}/apps', timeout=5) for _ in range(50)]
+    errors = sum(r.status_code in (500, 503) for r in statuses)
+    assert 5 < errors < 25
+    assert statuses[-1].headers['X-Rate-Limit'] == 'user-hour-lim:100;user-hour-rem:50;'
+
+
+def test_sample_cassette_covers_every_resource_type():
+    routes = routes_from_cassette(SAMPLE_CASSETTE)
+    types = {r['type'] for route in routes.values() for r in
+             (route['data'] if isinstance(route['data'], list) else [route['data']])}
+    assert {'apps', 'ciProducts', 'ciWorkflows', 'ciBuildRuns', 'ciBuildActions', 'builds',
+            'scmRepositories'} <= types
+    assert json.loads(SAMPLE_CASSETTE.read_text())['version'] == 1
+
+
+def test_trigger_route_appends_a_pending_run():
+    routes = writable(routes_from_cassette())
+    workflow_id = routes[next(p for p in routes if p.endswith('/workflows'))]['data'][0]['id']
+    body = json.dumps({'data': {'type': 'ciBuildRuns', 'relationships': {
+        'workflow': {'data': {'type': 'ciWorkflows', 'id': workflow_id}}}}}).encode()
+
+    status, payload = routes['/v1/ciBuildRuns']('POST', {}, body)
+    assert status == 201 and payload['data']['attributes']['executionProgress'] == 'PENDING'
+    assert routes[f'/v1/ciWorkflows/{workflow_id}/buildRuns']['data'][0] is payload['data']
+
+
+@pytest.mark.parametrize('script', [
+    ['appstore_api.py'],
+    ['check_workflow.py'],
+    ['check_workflow_actions.py'],
+    ['check_testflight.py', '--limit', '3'],
+    ['check_usage.py', '--month', '2026-09', '--json'],
+    ['watch_build.py'],
+    # The sample month is far over the default 1500-minute budget
+    ['trigger_build.py', '--trigger', 'main', '--budget', '100000'],
+    ['dashboard.py'],
+    ['connect_new_repo.py'],
+    ['configure_testflight.py'],
+])
+def test_every_script_runs_offline_against_the_stub(script):
+    result = subprocess.run(
+        [sys.executable, 'stub_server.py', '--', sys.executable, *script],
+        cwd=SCRIPTS, capture_output=True, text=True, timeout=60,
+    )
+    assert result.returncode == 0, result.stdout + result.stderr
+    assert 'Traceback' not in result.stderr
@@ -0,0 +1,74 @@
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from asc import cli
+
+SCRIPTS = Path(__file__).resolve().parent.parent
+
+
+def test_help_lists_every_command(capsys):
+    with pytest.raises(SystemExit) as exit_info:
+        cli.main(['--help'])
+    assert exit_info.value.code == 0
+    out = capsys.readouterr().out
+    assert all(name in out for name in cli.COMMANDS)
+
+
+def test_importing_every_command_has_no_side_effects():
+    code = ("import importlib, sys\n"
+            "from asc import cli\n"
+            "for name in cli.COMMANDS: importlib.import_module(f'asc.commands.{name}')\n"
+            "print(sorted(m for m in ('requests', 'jwt', 'cryptography', 'asyncio') if m in sys.modules))\n")
+    # An unreachable API: any request at import time would fail the run
+    result = subprocess.run([sys.executable, '-c', code], cwd=SCRIPTS, capture_output=True, text=True,
+                            env={'ASC_BASE_URL': 'http://127.0.0.1:9/v1', 'PATH': ''}, timeout=30)
+    assert result.returncode == 0, result.stderr
+    # asyncio comes with the commands that fan out; the HTTP and signing stack does not
+    assert result.stdout.strip() == "['asyncio']"
+
+
+def test_common_options_are_accepted_by_every_command():
+    for name in cli.COMMANDS:
+        args = cli.build_parser(name).parse_args([name, '--refresh', '--stats', '--trace', 'spans.jsonl'])
+        assert args.command == name and args.refresh and args.trace == 'spans.jsonl'
+
+
+def test_trigger_and_webhook_options_take_optional_values():
+    parser = cli.build_parser('trigger')
+    assert parser.parse_args(['trigger', '--trigger']).trigger == 'main'
+    assert parser.parse_args(['trigger', '--trigger', 'release']).trigger == 'release'
+    assert parser.parse_args(['trigger']).trigger is None
+
+    parser = cli.build_parser('watch')
+    assert parser.parse_args(['watch', '--webhook']).webhook == 0
+    assert parser.parse_args(['watch', '--webhook', '8787', '--notify']).webhook == 8787
+
+
+@pytest.mark.parametrize('command', [
+    ['apps'],
+    ['workflows'],
+    ['workflows', '--actions'],
+    ['builds', '--stats'],
+    ['trigger', '--trigger', 'main', '--budget', '100000'],
+    ['batch', '--workflow', '*', '--branch', 'main', '--budget', '100000'],
+    ['usage', '--month', '2026-09'],
+    ['timeline', '--last', '5', '--json', '-'],
+    ['artifacts', '--list'],
+    ['artifacts', '--runs', '25-30', '--type', 'LOG_BUNDLE'],
+    ['testflight', '--limit', '3'],
+    ['testflight', '--configure'],
+    ['testflight', '--wait', '50', '--timeout', '1'],
+    ['repo'],
+    ['dashboard', '--profile'],
+    ['status'],
+])
+def test_every_command_runs_offline_against_the_stub(command):
+    result = subprocess.run(
+        [sys.executable, 'stub_server.py', '--', sys.executable, '-m', 'asc', *command],
+        cwd=SCRIPTS, capture_output=True, text=True, timeout=60,
+    )
+    assert result.returncode == 0, result.stdout + result.stderr
+    assert 'Traceback' not in result.stderr
@@ -0,0 +1,70 @@
+import asyncio
+import io
+
+from asc.dashboard import Dashboard, IncrementalRenderer
+from asc.stub import StubServer
+
+
+def many_workflows(count):
+    """Two products with `count` workflows between them, one recent run each"""
+    routes = {'/v1/ciProducts': {'data': [
+        {'type': 'ciProducts', 'id': f'product-{p}', 'attributes': {'name': f'App {p}'}} for p in (1, 2)
+    ]}}
+    workflows = []
+    for i in range(count):
+        product = 1 + i % 2
+        workflows.append({'id': f'wf-{i}', 'name': f'Workflow {i:02d}',
+                          'product_id': f'product-{product}', 'product_name': f'App {product}'})
+        routes[f'/v1/ciWorkflows/wf-{i}/buildRuns'] = {'data': [
+            {'type': 'ciBuildRuns', 'id': f'run-{i}',
+             'attributes': {'number': 100 + i, 'executionProgress': 'COMPLETE', 'completionStatus': 'SUCCEEDED',
+                            'startedDate': '2026-10-01T10:00:00Z', 'finishedDate': '2026-10-01T10:05:30Z'}},
+        ]}
+    return routes, workflows
+
+
+def client_for(server, key_file):
+    from asc.auth import TokenProvider
+    from asc.client import Client
+
+    return Client(base_url=server.url, token_provider=TokenProvider(key_file=key_file))
+
+
+def test_cycle_time_does_not_grow_with_workflow_count(key_file):
+    routes, workflows = many_workflows(32)
+    with StubServer(routes, latency=0.05, etags=True) as server:
+        dashboard = Dashboard(workflows, client=client_for(server, key_file), concurrency=16)
+        assert asyncio.run(dashboard.poll())
+        # 32 × 50 ms one after another would take 1.6 s
+        assert dashboard.cycle_seconds < 0.6
+        assert len(server.requests) == 32
+
+        assert not asyncio.run(dashboard.poll())
+        assert dashboard.fetcher.not_modified == 32
+
+    lines = dashboard.table()
+    assert len(lines) == 33
+    assert any('Workflow 07' in line and '#107' in line and '5:30' in line for line in lines)
+
+
+def test_one_failing_workflow_does_not_blank_the_table(key_file):
+    routes, workflows = many_workflows(3)
+    del routes['/v1/ciWorkflows/wf-1/buildRuns']
+    with StubServer(routes) as server:
+        dashboard = Dashboard(workflows, client=client_for(server, key_file))
+        asyncio.run(dashboard.poll())
+
+    assert dashboard.rows['wf-1']['error'] and '404' in dashboard.rows['wf-1']['error']
+    assert dashboard.rows['wf-2']['runs'][0]['number'] == 102
+
+
+def test_renderer_rewrites_only_changed_lines():
+    out = io.StringIO()
+    renderer = IncrementalRenderer(out)
+
+    assert renderer.draw(['header', 'a COMPLETE', 'b RUNNING']) == 3
+    out.truncate(0)
+    out.seek(0)
+    assert renderer.draw(['header', 'a COMPLETE', 'b COMPLETE']) == 1
+    frame = out.getvalue()
+    assert frame.startswith('\033[3F') and 'b COMPLETE' in frame and 'header' not in frame
@@ -0,0 +1,84 @@
+from asc.history import BuildHistory
+
+
+def run(n, progress='COMPLETE', status='SUCCEEDED'):
+    return {'type': 'ciBuildRuns', 'id': f'run-{n}', 'attributes': {
+        'number': n, 'executionProgress': progress, 'completionStatus': status if progress == 'COMPLETE' else None,
+        'startedDate': f'2026-10-{n:02d}T10:00:00.000Z',
+        'finishedDate': f'2026-10-{n:02d}T10:12:30.000Z' if progress == 'COMPLETE' else None,
+    }}
+
+
+def serve_runs(stub, runs):
+    """buildRuns collection (newest first, cursor pagination), single runs and their actions"""
+    def collection(method, query, body):
+        limit, cursor = int(query['limit'][0]), int(query.get('cursor', ['0'])[0])
+        ordered = sorted(runs.values(), key=lambda r: -r['attributes']['number'])
+        payload = {'data': ordered[cursor:cursor + limit], 'links': {}}
+        if cursor + limit < len(ordered):
+            payload['links']['next'] = f'{stub.url}/ciWorkflows/w/buildRuns?limit={limit}&cursor={cursor + limit}'
+        return 200, payload
+
+    def single(method, query, body, run_id):
+        return 200, {'data': runs[run_id]}
+
+    def actions(method, query, body, run_id):
+        attrs = runs[run_id]['attributes']
+        return 200, {'data': [{'type': 'ciBuildActions', 'id': f'{run_id}-build', 'attributes': {
+            'name': 'Build - iOS', 'actionType': 'BUILD', 'executionProgress': 'COMPLETE',
+            'startedDate': attrs['startedDate'], 'finishedDate': attrs['finishedDate'],
+        }}]}
+
+    stub.routes['/v1/ciWorkflows/w/buildRuns'] = collection
+    # Routes for runs the test adds later, too
+    for n in range(1, 40):
+        run_id = f'run-{n}'
+        stub.routes[f'/v1/ciBuildRuns/{run_id}'] = lambda m, q, b, run_id=run_id: single(m, q, b, run_id)
+        stub.routes[f'/v1/ciBuildRuns/{run_id}/actions'] = lambda m, q, b, run_id=run_id: actions(m, q, b, run_id)
+
+
+def paths(stub):
+    return sorted(r['path'] for r in stub.requests)
+
+
+def test_incremental_sync_fetches_only_new_and_unfinished_runs(stub, client, tmp_path):
+    runs = {f'run-{n}': run(n) for n in range(1, 26)}
+    runs['run-26'] = run(26, progress='RUNNING')
+    serve_runs(stub, runs)
+
+    with BuildHistory(path=tmp_path / 'h.sqlite', client=client) as history:
+        assert history.sync('w') == 26
+        assert history.highest_number('w') == 26
+        # Actions were fetched once for each of the 25 finished runs
+        assert len(history.actions_for(f'run-{n}' for n in range(1, 27))) == 25
+
+        stub.reset_counters()
+        runs['run-26'] = run(26)
+        runs['run-27'] = run(27, progress='PENDING')
+        assert history.sync('w') == 2
+
+        assert paths(stub) == [
+            '/v1/ciBuildRuns/run-26',
+            '/v1/ciBuildRuns/run-26/actions',
+            '/v1/ciWorkflows/w/buildRuns',
+        ]
+        assert [r['number'] for r in history.recent_runs('w', 3)] == [27, 26, 25]
+        assert history.recent_runs('w', 1)[0]['execution_progress'] == 'PENDING'
+
+
+def test_queries_answer_from_the_index(stub, client, tmp_path):
+    serve_runs(stub, {f'run-{n}': run(n) for n in range(1, 6)})
+
+    with BuildHistory(path=tmp_path / 'h.sqlite', client=client) as history:
+        history.sync('w', with_actions=False)
+        stub.reset_counters()
+
+        october_3_on = history.runs_started_between('2026-10-03', workflow_id='w')
+        assert [r['number'] for r in october_3_on] == [3, 4, 5]
+        assert october_3_on[0]['duration_seconds'] == 750
+        assert stub.requests == []
+
+        plan = history.db.execute(
+            "EXPLAIN QUERY PLAN SELECT * FROM build_runs WHERE started_date >= '2026-10-03'"
+        ).fetchall()
+        assert 'build_runs_started' in str([tuple(row) for row in plan])
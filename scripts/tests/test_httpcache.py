@@ -0,0 +1,213 @@
+import json
+import multiprocessing
+import time
+
+import pytest
+
+from asc import config, httpcache
+from asc.auth import TokenProvider
+from asc.client import Client
+from asc.history import BuildHistory
+from asc.httpcache import DAY, HOUR, IMMUTABLE, ResponseCache
+from asc.ratelimit import BACKGROUND
+from asc.stub import StubServer, default_routes, writable
+
+
+def run(number, progress):
+    return {'type': 'ciBuildRuns', 'id': f'run-{number}',
+            'attributes': {'number': number, 'executionProgress': progress}}
+
+
+@pytest.fixture
+def server():
+    routes = writable(default_routes())
+    routes['/v1/ciBuildRuns/run-30'] = {'data': run(30, 'COMPLETE')}
+    routes['/v1/ciBuildRuns/run-31'] = {'data': run(31, 'RUNNING')}
+    with StubServer(routes) as stub:
+        yield stub
+
+
+@pytest.fixture
+def api(server, key_file):
+    c = Client(base_url=server.url, token_provider=TokenProvider(key_file=key_file))
+    yield c
+    c.close()
+
+
+def gets(stub):
+    return [r['path'] for r in stub.requests if r['method'] == 'GET']
+
+
+def test_slow_changing_resources_and_finished_runs_are_served_locally(server, api):
+    sizes = {}
+    for _ in range(3):
+        for endpoint in ('ciProducts', 'ciBuildRuns/run-30', 'ciBuildRuns/run-31', 'ciWorkflows/workflow-1/buildRuns'):
+            sizes[endpoint] = len(api.get(endpoint, params={'limit': 5}).content)
+
+    assert gets(server).count('/v1/ciProducts') == 1
+    assert gets(server).count('/v1/ciBuildRuns/run-30') == 1
+    # A running build and a list of runs still change
+    assert gets(server).count('/v1/ciBuildRuns/run-31') == 3
+    assert gets(server).count('/v1/ciWorkflows/workflow-1/buildRuns') == 3
+
+    response = api.get('ciProducts', params={'limit': 5})
+    assert response.headers['X-ASC-Cache'] == 'hit'
+    assert response.json()['data'][0]['id'] == 'product-1'
+    cache = api.stats()['cache']
+    assert (cache['hits'], cache['misses'], cache['stores']) == (5, 8, 8)
+    assert cache['hit_ratio'] == round(5 / 13, 3)
+    assert cache['bytes_saved'] == 3 * sizes['ciProducts'] + 2 * sizes['ciBuildRuns/run-30']
+
+
+def test_params_are_part_of_the_key_in_any_order(server, api):
+    api.get('ciProducts', params={'limit': 5, 'fields[ciProducts]': 'name'})
+    api.get('ciProducts', params={'fields[ciProducts]': 'name', 'limit': 5})
+    api.get('ciProducts', params={'limit': 6})
+    assert gets(server).count('/v1/ciProducts') == 2
+
+
+def test_own_headers_skip_the_lookup_and_writes_invalidate(server, api):
+    api.get('ciWorkflows/workflow-1')
+    api.get('ciWorkflows/workflow-1', headers={'Cache-Control': 'no-cache'})
+    assert gets(server).count('/v1/ciWorkflows/workflow-1') == 2
+
+    api.patch('ciWorkflows/workflow-1', {'data': {'type': 'ciWorkflows', 'id': 'workflow-1'}})
+    api.get('ciWorkflows/workflow-1')
+    assert gets(server).count('/v1/ciWorkflows/workflow-1') == 3
+
+
+def test_ttls_by_resource_type():
+    def body(*resources):
+        return json.dumps({'data': list(resources)}).encode()
+
+    assert httpcache.policy('apps', body({'type': 'apps', 'id': '1'})) == ('apps', DAY)
+    assert httpcache.policy('ciProducts/{id}/workflows', body({'type': 'ciWorkflows', 'id': '1'})) == \
+        ('ciWorkflows', HOUR)
+    assert httpcache.policy('ciBuildRuns/{id}/actions', body(
+        {'type': 'ciBuildActions', 'id': '1', 'attributes': {'executionProgress': 'COMPLETE'}},
+    )) == ('ciBuildActions', IMMUTABLE)
+    assert httpcache.policy('ciBuildRuns/{id}/actions', body(
+        {'type': 'ciBuildActions', 'id': '1', 'attributes': {'executionProgress': 'COMPLETE'}},
+        {'type': 'ciBuildActions', 'id': '2', 'attributes': {'executionProgress': 'RUNNING'}},
+    )) == ('ciBuildActions', 0)
+    # Kept for --offline only
+    assert httpcache.policy('ciWorkflows/{id}/buildRuns', body(run(30, 'COMPLETE'))) == ('buildRuns', 0)
+    assert httpcache.policy('ciBuildRuns/{id}', body(run(31, 'RUNNING'))) == ('ciBuildRuns', 0)
+    assert httpcache.policy('ciProducts', body()) == ('ciProducts', 0)
+
+
+def test_entries_expire_and_the_least_recently_used_are_evicted(tmp_path):
+    now = [1000.0]
+    cache = ResponseCache(tmp_path / 'responses', max_bytes=250, clock=lambda: now[0])
+    for name in ('a', 'b', 'c'):
+        cache.put('GET', f'https://api/v1/{name}', None, {}, name.encode() * 100, 'apps', HOUR)
+        now[0] += 1
+    # 300 bytes do not fit in 250: 'a' went first
+    assert cache.get('GET', 'https://api/v1/a') is None
+    assert cache.get('GET', 'https://api/v1/b').content == b'b' * 100
+
+    # 'b' was just read, so 'c' is now the least recently used
+    cache.put('GET', 'https://api/v1/d', None, {}, b'd' * 100, 'apps', IMMUTABLE)
+    assert cache.get('GET', 'https://api/v1/c') is None
+    assert cache.stats()['evictions'] == 2
+
+    now[0] += HOUR
+    assert cache.get('GET', 'https://api/v1/b') is None
+    stale = cache.get('GET', 'https://api/v1/b', stale_ok=True)
+    assert not stale.fresh and stale.age >= HOUR
+    assert cache.get('GET', 'https://api/v1/d').fresh
+    assert len(list((tmp_path / 'responses').glob('??/*'))) == 2
+
+
+def test_offline_serves_stale_entries_and_sends_nothing(server, api, monkeypatch):
+    api.get('ciProducts')
+    api.get('ciBuildRuns/run-31')
+    api.response_cache.clock = lambda: time.time() + 2 * DAY
+    sent = len(server.requests)
+    monkeypatch.setattr(config, 'OFFLINE', True)
+
+    response = api.get('ciProducts')
+    assert response.status_code == 200
+    assert response.headers['X-ASC-Cache'] == 'stale' and int(response.headers['Age']) >= 2 * DAY
+    assert response.json()['data'][0]['id'] == 'product-1'
+    assert api.get('apps').status_code == 504
+    # Never served online, but still there offline
+    assert api.get('ciBuildRuns/run-31').json()['data']['id'] == 'run-31'
+    assert api.post('ciBuildRuns', {'data': {}}).status_code == 504
+    assert len(server.requests) == sent
+    assert len(api.offline_served) == 2
+
+
+def test_the_index_is_summed_only_past_the_limit(tmp_path):
+    cache = ResponseCache(tmp_path / 'responses', max_bytes=1000)
+    statements = []
+    cache.db.set_trace_callback(statements.append)
+    for i in range(5):
+        cache.put('GET', f'https://api/v1/apps/{i}', None, {}, str(i).encode() * 100, 'apps', DAY)
+    # The same answer to a poll again: no new body
+    for _ in range(20):
+        cache.put('GET', 'https://api/v1/apps/0', None, {}, b'0' * 100, 'apps', DAY)
+    assert not any('GROUP BY' in s for s in statements)
+    assert not any(s.startswith('BEGIN') for s in statements)
+
+    # A new answer replaces the old body instead of adding to it
+    cache.put('GET', 'https://api/v1/apps/0', None, {}, b'x' * 100, 'apps', DAY)
+    assert len(list((tmp_path / 'responses').glob('??/*'))) == 5
+    cache.put('GET', 'https://api/v1/apps/5', None, {}, b'5' * 600, 'apps', DAY)
+    assert cache.stats()['evictions'] == 1 and cache.get('GET', 'https://api/v1/apps/1') is None
+    assert cache.db.execute('SELECT bytes FROM totals').fetchone()[0] == 1000
+
+
+def test_forgotten_bodies_leave_the_running_count(tmp_path):
+    cache = ResponseCache(tmp_path / 'responses', max_bytes=1000)
+    for i in range(3):
+        cache.put('GET', f'https://api/v1/apps/{i}', None, {}, str(i).encode() * 100, 'apps', DAY)
+    # Shares its body with apps/0, which stays counted until both are gone
+    cache.put('GET', 'https://api/v1/apps/0?again', None, {}, b'0' * 100, 'ciProducts', DAY)
+    cache.put('GET', 'https://api/v1/builds', None, {}, b'b' * 300, 'builds', DAY)
+
+    cache.invalidate('apps')
+    assert cache.db.execute('SELECT bytes FROM totals').fetchone()[0] == 400
+
+    # Removed behind the index's back, e.g. by another process
+    cache._blob(cache.db.execute("SELECT digest FROM entries WHERE type = 'builds'").fetchone()[0]).unlink()
+    assert cache.get('GET', 'https://api/v1/builds') is None
+    assert cache.db.execute('SELECT bytes FROM totals').fetchone()[0] == 100
+    assert cache.db.execute('SELECT bytes FROM totals').fetchone()[0] == cache._measure(cache.db)
+
+
+def test_pollers_do_not_store_what_only_offline_reads(server, api):
+    api.run_as_poller()
+    api.get('ciWorkflows/workflow-1/buildRuns')
+    api.get('ciProducts')
+    assert api.stats()['cache']['stores'] == 1
+    assert api.priority == BACKGROUND
+
+
+PROCESSES = 8
+
+
+def _store(root, worker):
+    # Every process opens the new index and history at once: only one may switch each to WAL
+    BuildHistory(path=root.parent / 'history.sqlite', client=object()).close()
+    cache = ResponseCache(root, max_bytes=4000)
+    for i in range(40):
+        cache.put('GET', f'https://api/v1/apps/{worker}-{i}', None, {}, f'{worker}-{i}'.encode() * 20, 'apps', DAY)
+        cache.get('GET', f'https://api/v1/apps/{(worker + 1) % PROCESSES}-{i}')
+    cache.close()
+
+
+def test_processes_share_one_cache(tmp_path):
+    root = tmp_path / 'responses'
+    workers = [multiprocessing.Process(target=_store, args=(root, w)) for w in range(PROCESSES)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join(30)
+    assert [w.exitcode for w in workers] == [0] * PROCESSES
+
+    cache = ResponseCache(root, max_bytes=4000)
+    kept = cache.db.execute('SELECT url, size FROM entries').fetchall()
+    assert kept and sum(size for _, size in kept) <= 4000
+    # Every indexed entry still has its body
+    assert all(cache.get('GET', url) is not None for url, _ in kept)
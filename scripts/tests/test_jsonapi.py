@@ -0,0 +1,66 @@
+import asyncio
+import contextlib
+import io
+
+from asc.aio import AsyncClient
+from asc.commands import workflows as check_workflow
+from asc.jsonapi import Document, IdentityMap
+
+
+def build_run_page(run_id, action_ids, issue_ids):
+    return {
+        'data': [{
+            'type': 'ciBuildRuns', 'id': run_id, 'attributes': {'number': 1},
+            'relationships': {'actions': {'data': [{'type': 'ciBuildActions', 'id': a} for a in action_ids]}},
+        }],
+        'included': [
+            {'type': 'ciBuildActions', 'id': a, 'attributes': {'actionType': 'BUILD'},
+             'relationships': {'issues': {'data': [{'type': 'ciIssues', 'id': i} for i in issue_ids]}}}
+            for a in action_ids
+        ] + [
+            {'type': 'ciIssues', 'id': i, 'attributes': {'issueType': 'WARNING'}} for i in issue_ids
+        ],
+    }
+
+
+def test_nested_relationships_resolve_from_included():
+    doc = Document(build_run_page('run-1', ['a1', 'a2'], ['i1']))
+
+    [run] = doc
+    actions = run.related_many('actions')
+    assert [a.id for a in actions] == ['a1', 'a2']
+    assert actions[0].related_many('issues')[0]['issueType'] == 'WARNING'
+
+
+def test_shared_resources_are_stored_once_across_pages():
+    resources = IdentityMap()
+    page1 = Document(build_run_page('run-1', ['a1'], ['shared']), resources)
+    page2 = Document(build_run_page('run-2', ['a2'], ['shared']), resources)
+
+    issue1 = page1.data[0].related_many('actions')[0].related_many('issues')[0]
+    issue2 = page2.data[0].related_many('actions')[0].related_many('issues')[0]
+    assert issue1 is issue2
+    assert len(resources) == 5
+
+
+def test_missing_include_is_none_not_an_error():
+    doc = Document({'data': {'type': 'ciWorkflows', 'id': 'w', 'relationships': {
+        'repository': {'data': {'type': 'scmRepositories', 'id': 'r'}}}}})
+
+    assert doc.data.related('repository') is None
+    assert doc.data.related_ids('repository') == [('scmRepositories', 'r')]
+
+
+def test_check_workflow_uses_included_repositories(stub, client):
+    # Drop the repository listing so the workflow's repo can only come from `included`
+    stub.routes['/v1/scmRepositories'] = {'data': []}
+    out = io.StringIO()
+    with contextlib.redirect_stdout(out):
+        asyncio.run(check_workflow.check_workflows(AsyncClient(client)))
+
+    assert 'Repository: skingway/HeadshotAirBattle-iOS' in out.getvalue()
+    assert sorted(r['path'] for r in stub.requests) == [
+        '/v1/ciProducts',
+        '/v1/ciProducts/product-1/workflows',
+        '/v1/scmRepositories',
+    ]
@@ -0,0 +1,64 @@
+import time
+
+from asc.pager import Pager, paginate
+
+
+def paged_route(stub, total, delay=0.0):
+    """buildRuns route serving `total` runs newest-first, with cursor links"""
+    def route(method, query, body):
+        limit = int(query['limit'][0])
+        cursor = int(query.get('cursor', ['0'])[0])
+        time.sleep(delay)
+        numbers = range(total - cursor, max(total - cursor - limit, 0), -1)
+        payload = {
+            'data': [{'type': 'ciBuildRuns', 'id': f'run-{n}', 'attributes': {'number': n}} for n in numbers],
+            'links': {},
+            'meta': {'paging': {'total': total, 'limit': limit}},
+        }
+        if cursor + limit < total:
+            payload['links']['next'] = f'{stub.url}/ciWorkflows/w/buildRuns?limit={limit}&cursor={cursor + limit}'
+        return 200, payload
+    stub.routes['/v1/ciWorkflows/w/buildRuns'] = route
+
+
+def test_yields_every_resource_across_pages(stub, client):
+    paged_route(stub, total=45)
+    pager = Pager('ciWorkflows/w/buildRuns', client=client, page_size=10)
+
+    numbers = [run['number'] for run in pager]
+
+    assert numbers == list(range(45, 0, -1))
+    assert pager.pages_fetched == 5
+    assert pager.total == 45
+
+
+def test_never_more_than_one_page_ahead(stub, client):
+    paged_route(stub, total=100)
+    pager = Pager('ciWorkflows/w/buildRuns', client=client, page_size=10)
+
+    for i, run in enumerate(pager):
+        if i % 10 == 9:
+            time.sleep(0.02)  # let the prefetch land
+        # Consuming page k (0-based i // 10) may only have triggered page k+1
+        assert len(stub.requests) <= i // 10 + 2
+
+
+def test_until_stops_paging_early(stub, client):
+    paged_route(stub, total=1000)
+
+    runs = list(paginate('ciWorkflows/w/buildRuns', client=client, page_size=50,
+                         until=lambda run: run['number'] <= 930))
+
+    assert len(runs) == 70
+    # Pages 1 and 2 were read; page 3 may have been prefetched, nothing beyond
+    assert len(stub.requests) <= 3
+
+
+def test_max_items_does_not_prefetch_unneeded_pages(stub, client):
+    paged_route(stub, total=100)
+
+    runs = list(paginate('ciWorkflows/w/buildRuns', client=client, max_items=5))
+
+    assert [r['number'] for r in runs] == [100, 99, 98, 97, 96]
+    assert len(stub.requests) == 1
+    assert stub.requests[0]['query']['limit'] == ['5']
@@ -0,0 +1,87 @@
+import asyncio
+import contextlib
+import io
+
+from asc.aio import AsyncClient
+from asc.client import endpoint_key
+from asc.commands import workflows as check_workflow
+from asc.history import ACTION_FIELDS, RUN_FIELDS, BuildHistory
+from asc.query import merge_fields, select
+
+
+def declared(fields):
+    return {f'fields[{type_}]': set(names) for type_, names in fields.items()}
+
+
+def requested(stub):
+    """{path: {fields[type]: set}} for every recorded request"""
+    return {r['path']: {k: set(v[0].split(',')) for k, v in r['query'].items() if k.startswith('fields[')}
+            for r in stub.requests}
+
+
+def test_select_builds_json_api_parameters():
+    params = select({'ciBuildRuns': ['number', 'startedDate']}, include=['actions'],
+                    limit=5, limits={'actions': 10}, sort='-number', bundleId='com.example')
+
+    assert params == {
+        'fields[ciBuildRuns]': 'number,startedDate',
+        'include': 'actions',
+        'limit': 5,
+        'limit[actions]': 10,
+        'sort': '-number',
+        'filter[bundleId]': 'com.example',
+    }
+    assert select() == {}
+
+
+def test_merge_fields_keeps_order_and_drops_duplicates():
+    merged = merge_fields({'apps': ['name', 'sku']}, {'apps': ['sku', 'bundleId'], 'builds': ['version']})
+    assert merged == {'apps': ['name', 'sku', 'bundleId'], 'builds': ['version']}
+
+
+def test_endpoint_key_collapses_ids():
+    assert endpoint_key('https://x/v1/ciWorkflows/abc/buildRuns?limit=5') == 'ciWorkflows/{id}/buildRuns'
+    assert endpoint_key('https://x/v1/apps') == 'apps'
+
+
+def test_history_sync_requests_only_stored_fields(stub, client, tmp_path):
+    stub.routes['/v1/ciBuildRuns/run-30/actions'] = {'data': [
+        {'type': 'ciBuildActions', 'id': 'action-1',
+         'attributes': {'name': 'Archive', 'actionType': 'ARCHIVE', 'executionProgress': 'COMPLETE',
+                        'completionStatus': 'SUCCEEDED', 'startedDate': '2026-10-01T10:00:00Z',
+                        'finishedDate': '2026-10-01T10:10:00Z', 'isRequiredToPass': True,
+                        'issueCounts': {'errors': 0}}},
+    ]}
+    with BuildHistory(tmp_path / 'history.sqlite', client=client) as history:
+        history.sync('workflow-1')
+        [run] = history.recent_runs('workflow-1')
+
+    fields = requested(stub)
+    assert fields['/v1/ciWorkflows/workflow-1/buildRuns'] == declared(RUN_FIELDS)
+    assert fields['/v1/ciBuildRuns/run-30/actions'] == declared(ACTION_FIELDS)
+    # The stub honours fieldsets, so nothing unrequested was stored
+    assert 'issueCounts' not in run['attributes'] and run['number'] == 30
+
+
+def test_fieldsets_shrink_responses(stub, client):
+    full = client.get('ciWorkflows/workflow-1/buildRuns')
+    sparse = client.get('ciWorkflows/workflow-1/buildRuns', params=select({'ciBuildRuns': ['number']}))
+
+    assert sparse.json()['data'][0]['attributes'] == {'number': 30}
+    assert len(sparse.content) < len(full.content) / 3
+    entry = client.stats()['endpoints']['GET ciWorkflows/{id}/buildRuns']
+    assert entry['requests'] == 2
+    assert entry['bytes'] == len(full.content) + len(sparse.content)
+
+
+def test_check_workflow_declares_fields_for_every_read(stub, client):
+    with contextlib.redirect_stdout(io.StringIO()) as out:
+        asyncio.run(check_workflow.check_workflows(AsyncClient(client)))
+
+    fields = requested(stub)
+    assert fields['/v1/ciProducts'] == declared(check_workflow.PRODUCT_FIELDS)
+    assert fields['/v1/scmRepositories'] == declared(check_workflow.REPOSITORY_FIELDS)
+    assert fields['/v1/ciProducts/product-1/workflows'] == declared(
+        {**check_workflow.WORKFLOW_FIELDS, **check_workflow.REPOSITORY_FIELDS})
+    # Included repository still resolves through the kept `repository` relationship
+    assert 'Repository: skingway/HeadshotAirBattle-iOS' in out.getvalue()
@@ -0,0 +1,81 @@
+import pytest
+import requests
+
+from asc.ratelimit import BACKGROUND, INTERACTIVE, RateLimited, RateLimiter, parse_rate_limit
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1_700_000_000.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+def fake_response(status=200, header=None):
+    response = requests.Response()
+    response.status_code = status
+    if header:
+        response.headers['X-Rate-Limit'] = header
+    return response
+
+
+def test_parse_rate_limit_header():
+    assert parse_rate_limit('user-hour-lim:3600;user-hour-rem:3512;') == (3600, 3512)
+    assert parse_rate_limit('garbage') is None
+    assert parse_rate_limit(None) is None
+
+
+def test_server_remaining_caps_the_local_bucket(tmp_path):
+    limiter = RateLimiter(path=tmp_path / 'rl.json')
+    limiter.update(fake_response(header='user-hour-lim:3600;user-hour-rem:12;'))
+
+    stats = limiter.stats()
+    assert stats['server_remaining'] == 12
+    assert stats['tokens'] <= 12
+
+
+def test_processes_share_one_budget_through_the_state_file(tmp_path):
+    clock = FakeClock()
+    a = RateLimiter(path=tmp_path / 'rl.json', clock=clock, sleep=clock.sleep)
+    b = RateLimiter(path=tmp_path / 'rl.json', clock=clock, sleep=clock.sleep)
+    a.update(fake_response(header='user-hour-lim:3600;user-hour-rem:2;'))
+
+    a.acquire()
+    b.acquire()
+    # Budget is spent: the next caller has to wait for a refill (1 token/s at 3600/h)
+    a.acquire()
+    assert a.waits == 1
+    assert 0.9 < a.waited <= 1.0
+
+
+def test_background_leaves_a_reserve_for_interactive(tmp_path):
+    clock = FakeClock()
+    limiter = RateLimiter(path=tmp_path / 'rl.json', max_wait=0, clock=clock, sleep=clock.sleep)
+    limiter.update(fake_response(header='user-hour-lim:100;user-hour-rem:10;'))
+
+    # 10 left of 100 is exactly the 10% reserve: pollers wait, commands go through
+    limiter.acquire(BACKGROUND)
+    assert limiter.waits == 1
+    for _ in range(9):
+        limiter.acquire(INTERACTIVE)
+
+
+def test_interactive_gives_up_after_max_wait(tmp_path):
+    clock = FakeClock()
+    limiter = RateLimiter(path=tmp_path / 'rl.json', max_wait=5, clock=clock, sleep=clock.sleep)
+    limiter.update(fake_response(status=429, header='user-hour-lim:60;user-hour-rem:0;'))
+
+    with pytest.raises(RateLimited):
+        limiter.acquire(INTERACTIVE)
+
+
+def test_client_tracks_stub_budget(stub, client):
+    stub.rate_limit = stub.rate_remaining = 50
+    for _ in range(3):
+        client.get('ciProducts', headers={'Cache-Control': 'no-cache'})
+
+    assert client.stats()['rate_limit']['server_remaining'] == 47
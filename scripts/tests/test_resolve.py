@@ -0,0 +1,105 @@
+import multiprocessing
+
+from asc import config
+from asc.resolve import IDCache, Resolver, namespace_for
+
+
+def paths(stub):
+    return [r['path'] for r in stub.requests]
+
+
+def test_second_resolution_is_served_from_disk(stub, client, tmp_path):
+    cache_path = tmp_path / 'ids.json'
+
+    first = Resolver(client=client, cache=IDCache(path=cache_path))
+    assert first.workflow() == {'id': 'workflow-1', 'name': 'Default'}
+    assert paths(stub) == ['/v1/ciProducts', '/v1/ciProducts/product-1/workflows']
+
+    stub.reset_counters()
+    second = Resolver(client=client, cache=IDCache(path=cache_path))
+    assert second.workflow_id() == 'workflow-1'
+    assert second.api_calls == 0
+    assert stub.requests == []
+
+
+def test_expired_entries_are_resolved_again(stub, client, tmp_path):
+    now = [1000.0]
+    cache = IDCache(path=tmp_path / 'ids.json', ttl=60, clock=lambda: now[0])
+    Resolver(client=client, cache=cache).workflow_id()
+
+    now[0] += 61
+    resolver = Resolver(client=client, cache=cache)
+    resolver.workflow_id()
+    assert resolver.api_calls == 2
+
+
+def test_refresh_drops_cached_ids(client, tmp_path):
+    cache = IDCache(path=tmp_path / 'ids.json')
+    cache.set('workflow', {'id': 'old', 'name': 'Old'})
+
+    assert Resolver(client=client, cache=cache, refresh=True).workflow_id() == 'workflow-1'
+
+
+def test_stale_id_is_re_resolved_on_404(stub, client, tmp_path):
+    cache = IDCache(path=tmp_path / 'ids.json')
+    cache.set('product', 'product-1')
+    cache.set('workflow', {'id': 'deleted-workflow', 'name': 'Gone'})
+    resolver = Resolver(client=client, cache=cache)
+
+    response = resolver.with_workflow(lambda wid: client.get(f'ciWorkflows/{wid}/buildRuns'))
+
+    assert response.status_code == 200
+    assert paths(stub) == [
+        '/v1/ciWorkflows/deleted-workflow/buildRuns',
+        '/v1/ciProducts',
+        '/v1/ciProducts/product-1/workflows',
+        '/v1/ciWorkflows/workflow-1/buildRuns',
+    ]
+    assert cache.get('workflow')['id'] == 'workflow-1'
+
+
+def test_workflow_can_be_picked_by_name(stub, client, tmp_path):
+    stub.routes['/v1/ciProducts/product-1/workflows']['data'].append(
+        {'type': 'ciWorkflows', 'id': 'workflow-2', 'attributes': {'name': 'Nightly'}})
+    resolver = Resolver(client=client, cache=IDCache(path=tmp_path / 'ids.json'), workflow_name='nightly')
+
+    assert resolver.workflow() == {'id': 'workflow-2', 'name': 'Nightly'}
+    assert resolver.workflows()[0]['product_name'] == 'HeadshotAirBattle'
+
+
+def test_app_of_the_product_is_resolved_once(stub, client, tmp_path):
+    product = {'type': 'ciProducts', 'id': 'product-1', 'attributes': {'name': 'HeadshotAirBattle'},
+               'relationships': {'app': {'data': {'type': 'apps', 'id': 'app-1'}}}}
+    stub.routes['/v1/ciProducts/product-1'] = {'data': product}
+    cache = IDCache(path=tmp_path / 'ids.json')
+
+    assert Resolver(client=client, cache=cache).app_id() == 'app-1'
+    assert paths(stub) == ['/v1/ciProducts', '/v1/ciProducts/product-1']
+    assert stub.requests[-1]['query']['include'] == ['app']
+    again = Resolver(client=client, cache=cache)
+    assert again.app_id() == 'app-1' and again.api_calls == 0
+
+
+def _set_many(path, worker):
+    cache = IDCache(path=path, namespace='test')
+    for i in range(20):
+        cache.set(f'{worker}-{i}', i)
+
+
+def test_processes_keep_each_others_entries(tmp_path):
+    path = tmp_path / 'ids.json'
+    workers = [multiprocessing.Process(target=_set_many, args=(path, w)) for w in range(4)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join(30)
+    assert [w.exitcode for w in workers] == [0] * 4
+
+    cache = IDCache(path=path, namespace='test')
+    assert all(cache.get(f'{w}-{i}') == i for w in range(4) for i in range(20))
+
+
+def test_the_namespace_ignores_a_trailing_slash(client, monkeypatch):
+    monkeypatch.setattr(config, 'BASE_URL', client.base_url + '/')
+    monkeypatch.setattr(config, 'KEY_ID', client.tokens.key_id)
+    assert IDCache().namespace == Resolver(client=client).cache.namespace == namespace_for(client.base_url)
@@ -0,0 +1,107 @@
+import pytest
+import requests
+
+from asc.auth import TokenProvider
+from asc.client import Client
+from asc.retry import AmbiguousRequestError, DeadlineExceeded, RetryPolicy, command_deadline, parse_retry_after
+
+
+@pytest.fixture
+def sleeps():
+    return []
+
+
+@pytest.fixture
+def client(stub, key_file, sleeps):
+    policy = RetryPolicy(max_attempts=4, sleep=sleeps.append, rng=lambda: 1.0)
+    c = Client(base_url=stub.url, token_provider=TokenProvider(key_file=key_file),
+               retry=policy, read_timeout=0.5)
+    yield c
+    c.close()
+
+
+def test_get_is_retried_through_5xx_and_resets(stub, client, sleeps):
+    stub.inject(503, 'reset', 502)
+
+    response = client.get('ciProducts')
+
+    assert response.status_code == 200
+    assert len(stub.requests) == 4
+    # Capped exponential backoff (jitter pinned to its maximum here)
+    assert sleeps == [0.5, 1.0, 2.0]
+
+
+def test_retry_after_is_honoured(stub, client, sleeps):
+    stub.inject((429, {'Retry-After': '3'}))
+
+    assert client.get('ciProducts').status_code == 200
+    assert sleeps == [3.0]
+
+
+def test_gives_up_after_max_attempts(stub, client):
+    stub.inject(500, 500, 500, 500)
+
+    assert client.get('ciProducts').status_code == 500
+    assert len(stub.requests) == 4
+
+
+def test_a_rejected_token_is_resigned_once(stub, client):
+    stub.inject(401)
+    assert client.get('ciProducts').status_code == 200
+    assert client.tokens.misses == 2
+    assert len(stub.requests) == 2
+
+    # Still refused with a new token: the key itself is wrong, so no loop
+    stub.inject(401, 401)
+    assert client.get('ciProducts', params={'limit': 1}).status_code == 401
+    assert len(stub.requests) == 4
+
+
+def test_post_is_not_repeated_after_a_5xx(stub, client):
+    stub.routes['/v1/ciBuildRuns'] = lambda method, query, body: (201, {'data': {'type': 'ciBuildRuns', 'id': 'r'}})
+    stub.inject(503)
+
+    response = client.post('ciBuildRuns', {'data': {'type': 'ciBuildRuns'}})
+
+    assert response.status_code == 503
+    assert len(stub.requests) == 1
+
+
+def test_post_reset_is_reported_as_ambiguous(stub, client):
+    stub.inject('reset')
+
+    with pytest.raises(AmbiguousRequestError):
+        client.post('ciBuildRuns', {'data': {'type': 'ciBuildRuns'}})
+    assert len(stub.requests) == 1
+
+
+def test_post_is_retried_on_429(stub, client):
+    stub.routes['/v1/ciBuildRuns'] = lambda method, query, body: (201, {'data': {'type': 'ciBuildRuns', 'id': 'r'}})
+    stub.inject((429, {'Retry-After': '0'}))
+
+    assert client.post('ciBuildRuns', {'data': {}}).status_code == 201
+    assert len(stub.requests) == 2
+
+
+def test_hung_socket_is_cut_off_by_the_read_timeout(stub, client):
+    stub.inject(('hang', 2.0))
+
+    assert client.get('ciProducts').status_code == 200
+    assert len(stub.requests) == 2
+
+
+def test_command_deadline_bounds_all_retries(stub, key_file):
+    policy = RetryPolicy(max_attempts=10, rng=lambda: 1.0, backoff_base=0.2)
+    c = Client(base_url=stub.url, token_provider=TokenProvider(key_file=key_file), retry=policy)
+    stub.inject(*[503] * 10)
+
+    with pytest.raises(DeadlineExceeded):
+        with command_deadline(0.5):
+            c.get('ciProducts')
+    assert len(stub.requests) < 10
+
+
+def test_parse_retry_after_http_date():
+    assert parse_retry_after('Wed, 21 Oct 2015 07:28:05 GMT', now=1445412480) == 5.0
+    assert parse_retry_after('12') == 12.0
+    assert parse_retry_after('soon') is None
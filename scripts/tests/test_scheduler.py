@@ -0,0 +1,94 @@
+import json
+import threading
+from datetime import datetime, timezone
+
+from asc import scheduler
+from asc.scheduler import COALESCED, DEFERRED, OVER_BUDGET, QUEUED, SUPERSEDED, TRIGGERED
+
+# The sample cassette's month is far over any real budget
+NO_LIMIT = 1e9
+OCTOBER = datetime(2026, 10, 20, tzinfo=timezone.utc).timestamp
+DECEMBER = datetime(2026, 12, 1, tzinfo=timezone.utc).timestamp
+
+
+def workflow_id(make_scheduler, name='Default'):
+    return next(w['id'] for w in make_scheduler().resolver.workflows() if w['name'] == name)
+
+
+def posts(stub):
+    return [json.loads(r['body']) for r in stub.requests if r['method'] == 'POST']
+
+
+def test_queued_duplicates_coalesce_and_newer_commits_supersede():
+    entries = []
+    assert [o.status for o in scheduler.enqueue(entries, 'wf', 'main', 'abc')] == [QUEUED]
+    assert [o.status for o in scheduler.enqueue(entries, 'wf', 'main', 'abc')] == [COALESCED]
+    assert entries[0]['requests'] == 2
+
+    outcomes = scheduler.enqueue(entries, 'wf', 'main', 'def')
+    assert [o.status for o in outcomes] == [QUEUED, SUPERSEDED]
+    assert outcomes[1].entry['commit'] == 'abc'
+    scheduler.enqueue(entries, 'wf', 'develop')
+    assert [(e['branch'], e['commit']) for e in entries] == [('main', 'def'), ('develop', None)]
+
+
+def test_a_run_already_building_the_branch_is_reused(writable_stub, make_scheduler):
+    workflow = workflow_id(make_scheduler)
+    first = make_scheduler(budget=NO_LIMIT).request(workflow, 'main')
+    assert [o.status for o in first] == [TRIGGERED]
+    # The branch goes out as the run's sourceBranchOrTag
+    relationship = posts(writable_stub)[0]['data']['relationships']['sourceBranchOrTag']['data']
+    assert relationship['type'] == 'scmGitReferences' and relationship['id'].endswith('branch-0')
+
+    second = make_scheduler(budget=NO_LIMIT, max_concurrent=5).request(workflow, 'main')
+    assert [o.status for o in second] == [COALESCED]
+    assert second[0].run['id'] == first[0].run['id']
+    assert len(posts(writable_stub)) == 1
+
+
+def test_the_concurrency_cap_keeps_triggers_queued_until_drained(writable_stub, make_scheduler):
+    workflow = workflow_id(make_scheduler)
+    make_scheduler(budget=NO_LIMIT).request(workflow, 'main')
+    deferred = make_scheduler(budget=NO_LIMIT).request(workflow, 'develop')
+    assert [o.status for o in deferred] == [DEFERRED]
+    assert [e['branch'] for e in make_scheduler().queue.entries()] == ['develop']
+
+    # The pending run finishes
+    runs = writable_stub.routes[f'/v1/ciWorkflows/{workflow}/buildRuns']['data']
+    runs[0]['attributes'].update(executionProgress='COMPLETE', completionStatus='SUCCEEDED')
+    drained = make_scheduler(budget=NO_LIMIT).drain()
+    assert [o.status for o in drained] == [TRIGGERED]
+    assert make_scheduler().queue.entries() == []
+    assert len(posts(writable_stub)) == 2
+
+
+def test_triggers_over_the_budget_are_refused_or_deferred(writable_stub, make_scheduler):
+    workflow = workflow_id(make_scheduler)
+    refused = make_scheduler(budget=1500, clock=OCTOBER).request(workflow, 'main')
+    assert [o.status for o in refused] == [OVER_BUDGET]
+    assert '> budget 1500' in refused[0].detail
+    assert make_scheduler().queue.entries() == []
+
+    deferred = make_scheduler(budget=1500, defer=True, clock=OCTOBER).request(workflow, 'main')
+    assert [o.status for o in deferred] == [DEFERRED]
+    assert len(make_scheduler().queue.entries()) == 1
+    assert posts(writable_stub) == []
+
+    # The budget is for the scheduler's month: a new month starts from nothing
+    assert make_scheduler(budget=1500, clock=DECEMBER).committed_minutes() == 0
+    assert [o.status for o in make_scheduler(budget=1500, clock=DECEMBER).drain()] == [TRIGGERED]
+
+
+def test_concurrent_triggers_start_one_run(writable_stub, make_scheduler):
+    workflow = workflow_id(make_scheduler)
+    make_scheduler().resolver.git_reference_id(workflow, 'main')
+    results = []
+    threads = [threading.Thread(
+        target=lambda: results.extend(make_scheduler(budget=NO_LIMIT).request(workflow, 'main'))) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sorted(o.status for o in results) == [COALESCED] * 3 + [TRIGGERED]
+    assert len(posts(writable_stub)) == 1
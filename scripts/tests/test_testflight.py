@@ -0,0 +1,143 @@
+from datetime import datetime, timezone
+
+import pytest
+
+from asc import testflight
+from asc.history import BuildHistory
+from asc.stub import StubServer
+from asc.testflight import (EXIT_FAILED, EXIT_NOT_FOUND, EXIT_TIMEOUT, EXIT_VALID, NO_BUILD, ProcessingWaiter,
+                            Target, WaitSchedule)
+
+UPLOADED = datetime(2026, 10, 1, 10, 0, tzinfo=timezone.utc).timestamp()
+
+
+def build(id_, version, state, uploaded='2026-10-01T10:00:00Z', app='app-1'):
+    return {'type': 'builds', 'id': id_,
+            'attributes': {'version': version, 'processingState': state, 'uploadedDate': uploaded},
+            'relationships': {'app': {'data': {'type': 'apps', 'id': app}}}}
+
+
+def build_run(id_, progress, builds=()):
+    return {'type': 'ciBuildRuns', 'id': id_,
+            'attributes': {'number': 7, 'executionProgress': progress, 'completionStatus': None},
+            'relationships': {'builds': {'data': [{'type': 'builds', 'id': b['id']} for b in builds]}}}
+
+
+@pytest.fixture
+def routes():
+    first = build('build-60', '60', 'PROCESSING')
+    return {
+        '/v1/builds': {'data': [first]},
+        '/v1/builds/build-60': {'data': first},
+        '/v1/ciBuildRuns/run-7': {'data': build_run('run-7', 'RUNNING')},
+    }
+
+
+@pytest.fixture
+def server(routes):
+    with StubServer(routes) as stub:
+        yield stub
+
+
+@pytest.fixture
+def make(server, connect, tmp_path):
+    client = connect(server)
+    history = BuildHistory(tmp_path / 'history.sqlite', client=client)
+
+    def make(targets, steps=(), **kwargs):
+        """A waiter whose clock starts 5 minutes after upload; each sleep applies the next step"""
+        now = [UPLOADED + 300]
+        steps = list(steps)
+
+        def sleep(seconds):
+            now[0] += seconds
+            if steps:
+                steps.pop(0)()
+
+        return ProcessingWaiter(targets, client=client, history=history, clock=lambda: now[0], sleep=sleep,
+                                **kwargs)
+
+    yield make
+    history.close()
+
+
+def test_eta_is_conditioned_on_the_time_already_elapsed():
+    durations = [300, 600, 900, 1200, 1500]
+    assert testflight.eta(durations, 0) == {50: 900, 90: pytest.approx(1380)}
+    # Only the builds that took longer than 10 minutes are comparable
+    assert testflight.eta(durations, 700) == {50: 500, 90: pytest.approx(740)}
+    assert testflight.eta(durations, 1000) is None
+
+
+def test_polls_get_denser_as_the_eta_approaches():
+    schedule = WaitSchedule(fast=15, cap=300)
+    assert schedule.next(None, True) == 15
+    assert schedule.next(None, False) == 22.5
+    assert schedule.next(3000, False) == 300
+    assert schedule.next(300, False) == 100
+    assert schedule.next(20, False) == 15
+
+
+def test_builds_by_number_and_by_run_are_waited_for_together(server, routes, make):
+    second = build('build-61', '61', 'PROCESSING', uploaded='2026-10-01T10:04:00Z')
+
+    def upload():
+        routes['/v1/builds']['data'].insert(0, second)
+        routes['/v1/builds/build-61'] = {'data': second}
+        routes['/v1/ciBuildRuns/run-7']['data'] = build_run('run-7', 'RUNNING', [second])
+
+    def first_done():
+        routes['/v1/builds']['data'][1]['attributes']['processingState'] = 'VALID'
+
+    def second_done():
+        second['attributes']['processingState'] = 'VALID'
+
+    changes = []
+    waiter = make([Target('build 60', version='60'), Target('run #7', run_id='run-7')],
+                  steps=[upload, first_done, lambda: None, second_done],
+                  on_change=lambda target, previous: changes.append((target.label, previous, target.state)))
+    assert waiter.run() == EXIT_VALID
+    assert changes == [('build 60', 'WAITING', 'PROCESSING'), ('run #7', 'WAITING', 'PROCESSING'),
+                       ('build 60', 'PROCESSING', 'VALID'), ('run #7', 'PROCESSING', 'VALID')]
+
+    # Once found, builds are polled together in one request
+    polled = [r['query']['filter[id]'] for r in server.requests if 'filter[id]' in r['query']]
+    assert polled == [['build-60'], ['build-60,build-61'], ['build-61'], ['build-61']]
+    # Halfway between the last poll that saw processing and the first that saw it done
+    durations = waiter.history.processing_seconds()
+    assert len(durations) == 2 and waiter.durations == durations[::-1]
+    assert 300 < durations[1] < 300 + 15 + 22.5
+
+
+def test_the_eta_comes_from_the_recorded_durations(make):
+    for i, seconds in enumerate((600, 900, 1200, 1500)):
+        make([]).history.record_processing(f'old-{i}', str(i), f'2026-09-0{i + 1}T10:00:00Z', 'VALID', seconds)
+    waiter = make([Target('build 60', version='60')], timeout=60)
+    waiter.poll()
+    # Five minutes in: the median of 600..1500 is 1050, so 750 s to go
+    assert waiter.eta(waiter.targets[0]) == {50: 750, 90: pytest.approx(1110)}
+    assert waiter.schedule.next(waiter.remaining(waiter.clock()), False) == 250
+
+
+def test_build_numbers_are_looked_up_in_the_app(server, routes, make):
+    # Another app's build 60, uploaded later
+    routes['/v1/builds']['data'].insert(0, build('other-60', '60', 'VALID', '2026-10-01T10:02:00Z', app='app-2'))
+    waiter = make([Target('build 60', version='60')], app_id='app-1', timeout=60)
+    waiter.poll()
+
+    assert waiter.targets[0].build.id == 'build-60'
+    lookup = next(r['query'] for r in server.requests if 'filter[version]' in r['query'])
+    assert lookup['filter[app]'] == ['app-1']
+
+
+def test_exit_statuses(routes, make):
+    assert make([Target('build 60', version='60')], timeout=120).run() == EXIT_TIMEOUT
+    assert make([Target('build 99', version='99')], timeout=120).run() == EXIT_NOT_FOUND
+
+    routes['/v1/ciBuildRuns/run-7']['data']['attributes']['executionProgress'] = 'COMPLETE'
+    target = Target('run #7', run_id='run-7')
+    assert make([target, Target('build 60', version='60')], timeout=120).run() == EXIT_FAILED
+    assert target.state == NO_BUILD
+
+    routes['/v1/builds']['data'][0]['attributes']['processingState'] = 'INVALID'
+    assert make([Target('build 60', version='60')]).run() == EXIT_FAILED
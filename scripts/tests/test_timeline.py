@@ -0,0 +1,99 @@
+import json
+import random
+
+from asc.auth import TokenProvider
+from asc.client import Client
+from asc.history import BuildHistory
+from asc.jsonapi import Document
+from asc.stub import StubServer, routes_from_cassette
+from asc.timeline import ACTION, QUEUE, SETUP, TEARDOWN, Phase, QuantileSketch, TimelineReport, critical_path
+
+
+def add_run(history, number, actions, test_minutes=5):
+    """A run created at hh:00, started at hh:01, with build, test and archive actions"""
+    hour = f'2026-10-{number:02d}T09'
+    run = Document({'data': {'type': 'ciBuildRuns', 'id': f'run-{number}', 'attributes': {
+        'number': number, 'executionProgress': 'COMPLETE', 'completionStatus': 'SUCCEEDED',
+        'createdDate': f'{hour}:00:00.000Z', 'startedDate': f'{hour}:01:00.000Z',
+        'finishedDate': f'{hour}:{4 + test_minutes + 2:02d}:00.000Z',
+    }}}).data
+    history._upsert_run('wf', run)
+    if actions:
+        history._replace_actions(run.id, list(Document({'data': [
+            {'type': 'ciBuildActions', 'id': f'{run.id}-{name}', 'attributes': {
+                'name': name, 'startedDate': f'{hour}:{start:02d}:00.000Z',
+                'finishedDate': f'{hour}:{end:02d}:00.000Z'}}
+            for name, start, end in (('Build', 3, 6), ('Test', 4, 4 + test_minutes), ('Archive', 6, 8))
+        ]})))
+
+
+def test_the_sketch_stays_within_its_relative_accuracy():
+    rng = random.Random(7)
+    values = [rng.lognormvariate(5, 1) for _ in range(20000)]
+    halves = QuantileSketch(), QuantileSketch()
+    for i, value in enumerate(values):
+        halves[i % 2].add(value)
+    sketch = halves[0]
+    sketch.merge(halves[1])
+
+    exact = sorted(values)
+    for q in (0.5, 0.9, 0.99):
+        true = exact[int(q * (len(exact) - 1))]
+        assert abs(sketch.quantile(q) - true) / true < 0.02
+    assert sketch.count == 20000 and len(sketch.buckets) < 1000
+    assert QuantileSketch().quantile(0.5) is None
+
+
+def test_the_critical_path_follows_what_finishes_last():
+    phases = [Phase(QUEUE, QUEUE, 0, 60), Phase(SETUP, SETUP, 60, 180), Phase('Build', ACTION, 180, 360),
+              Phase('Test', ACTION, 180, 600), Phase('Archive', ACTION, 360, 480),
+              Phase(TEARDOWN, TEARDOWN, 600, 660)]
+    assert [p.name for p in critical_path(phases)] == [QUEUE, SETUP, 'Test', TEARDOWN]
+    # Archive waits for Build: when it is the one finishing last, both are on the path
+    phases[3] = Phase('Test', ACTION, 180, 420)
+    assert [p.name for p in critical_path(phases)] == [QUEUE, SETUP, 'Build', 'Archive', TEARDOWN]
+
+
+def test_phases_percentiles_and_regressions(tmp_path):
+    history = BuildHistory(path=tmp_path / 'h.sqlite', client=object())
+    for number in range(1, 8):
+        add_run(history, number, actions=True)
+    add_run(history, 8, actions=True, test_minutes=12)
+    add_run(history, 9, actions=False)
+
+    report = TimelineReport(history, 'wf', first=2)
+    summary = json.loads(json.dumps(report.summary()))
+
+    assert [t['number'] for t in summary['runs']] == list(range(2, 10))
+    first = summary['runs'][0]
+    assert [(p['name'], p['seconds']) for p in first['phases']] == [
+        (QUEUE, 60), (SETUP, 120), ('Build', 180), ('Test', 300), ('Archive', 120), (TEARDOWN, 120)]
+    assert first['critical_path'] == [QUEUE, SETUP, 'Test', TEARDOWN]
+    assert (first['wall_seconds'], first['billed_seconds']) == (660, 600)
+    # Without actions the run is one phase
+    assert [p['name'] for p in summary['runs'][-1]['phases']] == [QUEUE, 'run']
+
+    assert summary['phases']['Test']['count'] == 7
+    assert abs(summary['phases']['Test']['p50'] - 300) <= 3
+    assert list(summary['phases'])[0] == 'Test'
+    assert [(r['number'], r['phase']) for r in summary['regressions']] == [(8, 'Test')]
+    assert summary['regressions'][0]['baseline_runs'] == 6
+
+
+def test_actions_are_fetched_for_the_requested_runs_only(tmp_path, key_file):
+    with StubServer(routes_from_cassette()) as stub:
+        client = Client(base_url=stub.url, token_provider=TokenProvider(key_file=key_file))
+        history = BuildHistory(path=tmp_path / 'h.sqlite', client=client)
+        workflow_id = next(path.split('/')[3] for path in stub.routes if path.endswith('/buildRuns'))
+        history.sync(workflow_id, with_actions=False)
+        highest = history.highest_number(workflow_id)
+
+        assert history.sync_actions(workflow_id, highest - 4, highest) == 5
+        fetched = [r['path'] for r in stub.requests if r['path'].endswith('/actions')]
+        assert len(fetched) == 5
+        # Already there: nothing to fetch the second time
+        assert history.sync_actions(workflow_id, highest - 4, highest) == 0
+        report = TimelineReport(history, workflow_id, highest - 4, highest)
+        assert all(len(t['phases']) > 2 for t in report.timelines)
+        history.close()
+        client.close()
@@ -0,0 +1,112 @@
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from asc import trace
+from asc.auth import TokenProvider
+from asc.client import Client, parse_json
+from asc.retry import RetryPolicy
+from asc.stub import StubServer
+
+SCRIPTS = Path(__file__).resolve().parent.parent
+
+
+@pytest.fixture
+def tracer(tmp_path):
+    t = trace.enable(trace_file=tmp_path / 'trace.jsonl', metrics_file=tmp_path / 'asc.prom')
+    yield t
+    trace.disable()
+
+
+def spans(path):
+    return [json.loads(line) for line in Path(path).read_text().splitlines()]
+
+
+def test_disabled_tracing_hands_out_one_shared_no_op():
+    assert not trace.enabled()
+    with trace.span('request', endpoint='apps') as s:
+        s.set(status=200)
+    assert s is trace.NULL_SPAN
+
+
+def test_request_phases_nest_under_the_request_span(tracer, stub, key_file, tmp_path):
+    client = Client(base_url=stub.url, token_provider=TokenProvider(key_file=key_file), response_cache=False)
+    parse_json(client.get('ciProducts'))
+    client.get('ciProducts')
+    trace.disable()
+
+    recorded = spans(tmp_path / 'trace.jsonl')
+    by_id = {s['span']: s for s in recorded}
+    names = [s['name'] for s in recorded]
+    # One key load, one signature and one handshake, however many requests follow
+    assert names.count('key_load') == names.count('jwt_sign') == names.count('connect') == 1
+    assert names.count('request') == names.count('server') == 2
+
+    def ancestors(s):
+        while s['parent']:
+            s = by_id[s['parent']]
+            yield s['name']
+
+    connect = next(s for s in recorded if s['name'] == 'connect')
+    assert list(ancestors(connect)) == ['attempt', 'request']
+    assert list(ancestors(next(s for s in recorded if s['name'] == 'jwt_sign'))) == ['attempt', 'request']
+    request = next(s for s in recorded if s['name'] == 'request')
+    assert request['attrs'] == {'method': 'GET', 'endpoint': 'ciProducts', 'status': 200,
+                                'bytes': request['attrs']['bytes']}
+    assert {s['trace'] for s in recorded} == {tracer.trace_id}
+
+
+def test_metrics_count_by_endpoint_and_status_including_retries(tracer, key_file, tmp_path):
+    with StubServer() as server:
+        server.inject(503)
+        client = Client(base_url=server.url, token_provider=TokenProvider(key_file=key_file),
+                        retry=RetryPolicy(sleep=lambda s: None))
+        client.get('apps')
+        client.get('ciWorkflows/workflow-1/buildRuns')
+        client.get('nothing-here')
+    trace.disable()
+
+    text = (tmp_path / 'asc.prom').read_text()
+    assert 'asc_requests_total{endpoint="apps",method="GET",status="200"} 1' in text
+    assert 'asc_requests_total{endpoint="ciWorkflows/{id}/buildRuns",method="GET",status="200"} 1' in text
+    assert 'asc_requests_total{endpoint="nothing-here",method="GET",status="404"} 1' in text
+    assert 'asc_phase_seconds_count{phase="attempt"} 4' in text
+    assert 'asc_phase_seconds_count{phase="backoff"} 1' in text
+    assert '# TYPE asc_requests_total counter' in text
+    assert not list(tmp_path.glob('*.tmp'))
+
+
+def test_profile_flag_prints_a_summary_at_exit():
+    result = subprocess.run(
+        [sys.executable, 'stub_server.py', '--', sys.executable, 'check_workflow.py', '--profile'],
+        cwd=SCRIPTS, capture_output=True, text=True, timeout=60,
+    )
+    assert result.returncode == 0, result.stderr
+    assert 'Profile' in result.stderr and 'Profile' not in result.stdout
+    for phase in ('request', 'attempt', 'server', 'jwt_sign', 'connect', 'parse'):
+        assert f'   {phase} ' in result.stderr
+
+
+def test_the_profile_leaves_json_output_alone():
+    result = subprocess.run(
+        [sys.executable, 'stub_server.py', '--', sys.executable, '-m', 'asc', 'usage', '--json', '--profile'],
+        cwd=SCRIPTS, capture_output=True, text=True, timeout=60,
+    )
+    assert result.returncode == 0, result.stderr
+    assert 'used_minutes' in json.loads(result.stdout)
+    assert 'Profile' in result.stderr
+
+
+@pytest.mark.parametrize('command', [['apps'], ['workflows']])
+def test_every_response_a_command_reads_is_profiled_as_parse(command):
+    result = subprocess.run(
+        [sys.executable, 'stub_server.py', '--', sys.executable, '-m', 'asc', *command, '--profile'],
+        cwd=SCRIPTS, capture_output=True, text=True, timeout=60,
+    )
+    assert result.returncode == 0, result.stderr
+    counts = {line.split()[0]: int(line.split()[1]) for line in result.stderr.splitlines()
+              if line.startswith('   ') and len(line.split()) > 1 and line.split()[1].isdigit()}
+    assert counts['parse'] >= counts['request']
@@ -0,0 +1,111 @@
+import argparse
+import json
+from datetime import datetime, timezone
+
+from asc import client
+from asc.commands import usage
+from asc.history import BuildHistory
+from asc.jsonapi import Document
+from asc.usage import UsageReport, billing_month
+
+
+def add_run(history, workflow_id, number, started, finished, actions=()):
+    run = Document({'data': {'type': 'ciBuildRuns', 'id': f'{workflow_id}-{number}', 'attributes': {
+        'number': number, 'executionProgress': 'COMPLETE' if finished else 'RUNNING',
+        'completionStatus': 'SUCCEEDED' if finished else None,
+        'startedDate': started, 'finishedDate': finished,
+    }}}).data
+    history._upsert_run(workflow_id, run)
+    if actions:
+        history._replace_actions(run.id, list(Document({'data': [
+            {'type': 'ciBuildActions', 'id': f'{run.id}-{i}', 'attributes': {
+                'actionType': action_type, 'startedDate': a_start, 'finishedDate': a_end}}
+            for i, (action_type, a_start, a_end) in enumerate(actions)
+        ]})))
+
+
+def test_minutes_are_bucketed_and_billed_per_action(tmp_path):
+    history = BuildHistory(path=tmp_path / 'h.sqlite', client=object())
+    # Build and test ran in parallel: 10 + 8 billable minutes in a 10 minute run
+    add_run(history, 'pr', 1, '2026-10-02T09:00:00.000Z', '2026-10-02T09:10:00.000Z', actions=[
+        ('BUILD', '2026-10-02T09:00:00.000Z', '2026-10-02T09:10:00.000Z'),
+        ('TEST', '2026-10-02T09:01:00.000Z', '2026-10-02T09:09:00.000Z'),
+    ])
+    # No actions synced: the run's own duration is billed
+    add_run(history, 'nightly', 1, '2026-10-03T01:00:00.000Z', '2026-10-03T01:30:00.000Z')
+    # Previous month, must not count
+    add_run(history, 'nightly', 0, '2026-09-30T23:00:00.000Z', '2026-09-30T23:45:00.000Z')
+
+    report = UsageReport(history, quota=100, workflow_names={'pr': 'PR checks'},
+                         now=datetime(2026, 10, 11, tzinfo=timezone.utc))
+    summary = report.summary()
+
+    assert summary['used_minutes'] == 48.0
+    assert summary['by_workflow'] == {'nightly': 30.0, 'PR checks': 18.0}
+    assert summary['by_action_type'] == {'BUILD': 10.0, 'RUN': 30.0, 'TEST': 8.0}
+    assert summary['by_day'] == {'2026-10-02': 18.0, '2026-10-03': 30.0}
+    # 48 minutes over 10 days -> 4.8/day for the remaining 21 days
+    assert summary['daily_burn_rate'] == 4.8
+    assert summary['projected_minutes'] == 148.8
+    assert summary['projected_over_quota'] is True
+
+
+def test_running_builds_count_elapsed_time(tmp_path):
+    history = BuildHistory(path=tmp_path / 'h.sqlite', client=object())
+    add_run(history, 'pr', 1, '2026-10-05T12:00:00.000Z', None)
+
+    report = UsageReport(history, now=datetime(2026, 10, 5, 12, 6, tzinfo=timezone.utc))
+    assert round(report.total_minutes(), 3) == 6.0
+
+
+def test_an_action_that_never_started_bills_nothing(tmp_path):
+    history = BuildHistory(path=tmp_path / 'h.sqlite', client=object())
+    # A 30 minute run whose TEST action was skipped: only the BUILD action is billed
+    add_run(history, 'pr', 1, '2026-10-02T09:00:00.000Z', '2026-10-02T09:30:00.000Z', actions=[
+        ('BUILD', '2026-10-02T09:00:00.000Z', '2026-10-02T09:10:00.000Z'),
+        ('TEST', None, None),
+    ])
+
+    report = UsageReport(history, now=datetime(2026, 10, 11, tzinfo=timezone.utc))
+    assert report.total_minutes() == 10.0
+    assert report.by_action_type() == {'BUILD': 10.0, 'TEST': 0.0}
+
+
+def test_a_started_action_bills_until_now_or_the_end_of_its_run(tmp_path):
+    history = BuildHistory(path=tmp_path / 'h.sqlite', client=object())
+    add_run(history, 'pr', 1, '2026-10-05T12:00:00.000Z', None, actions=[
+        ('BUILD', '2026-10-05T12:00:00.000Z', '2026-10-05T12:04:00.000Z'),
+        ('TEST', '2026-10-05T12:02:00.000Z', None),
+    ])
+    # The run was cancelled while TEST ran: it stopped when the run did
+    add_run(history, 'pr', 2, '2026-10-05T11:00:00.000Z', '2026-10-05T11:20:00.000Z', actions=[
+        ('TEST', '2026-10-05T11:15:00.000Z', None),
+    ])
+
+    report = UsageReport(history, now=datetime(2026, 10, 5, 12, 6, tzinfo=timezone.utc))
+    assert round(report.total_minutes(), 3) == 4.0 + 4.0 + 5.0
+
+
+def test_billing_month_wraps_the_year():
+    start, end = billing_month(datetime(2026, 12, 31, 23, 59, tzinfo=timezone.utc))
+    assert (start.month, end.year, end.month) == (12, 2027, 1)
+
+
+def test_no_sync_never_asks_the_api(monkeypatch, capsys):
+    history = BuildHistory()
+    add_run(history, 'workflow-1', 1, '2026-10-02T09:00:00.000Z', '2026-10-02T09:10:00.000Z')
+    history.db.commit()
+    history.close()
+
+    def offline():
+        raise AssertionError("--no-sync sent a request")
+
+    monkeypatch.setattr(client, 'get_client', offline)
+    parser = argparse.ArgumentParser()
+    usage.add_arguments(parser)
+    args = parser.parse_args(['--month', '2026-10', '--json', '--no-sync'])
+    args.refresh = False
+
+    assert usage.run(args) == 0
+    # No workflow names cached: the report falls back to the IDs
+    assert json.loads(capsys.readouterr().out)['by_workflow'] == {'workflow-1': 10.0}
@@ -0,0 +1,106 @@
+import pytest
+
+from asc.stub import StubServer
+from asc.watch import BuildEvent, ConditionalFetcher, PollSchedule, diff, is_active, snapshot
+
+
+def run(number, progress, status=None):
+    return {'type': 'ciBuildRuns', 'id': f'run-{number}',
+            'attributes': {'number': number, 'executionProgress': progress, 'completionStatus': status}}
+
+
+def test_diff_reports_only_transitions():
+    before = snapshot([run(30, 'COMPLETE', 'SUCCEEDED'), run(31, 'PENDING')])
+    after = snapshot([run(30, 'COMPLETE', 'SUCCEEDED'), run(31, 'RUNNING'), run(32, 'PENDING')])
+
+    events = diff(before, after)
+    assert events == [BuildEvent(31, 'moved', 'PENDING', 'RUNNING'), BuildEvent(32, 'new', None, 'PENDING')]
+    assert str(events[0]) == 'build #31 moved PENDING→RUNNING'
+    assert diff(after, after) == []
+
+
+def test_schedule_is_fast_while_running_and_backs_off_when_unchanged():
+    schedule = PollSchedule(fast=5, active_cap=30, slow=60, idle_cap=300, backoff=2)
+
+    assert schedule.next(active=True, changed=True) == 5
+    assert [schedule.next(True, False) for _ in range(4)] == [10, 20, 30, 30]
+    assert schedule.next(True, True) == 5
+    # The build finishing is a change into the idle state
+    assert schedule.next(False, True) == 60
+    assert [schedule.next(False, False) for _ in range(3)] == [120, 240, 300]
+
+
+@pytest.fixture
+def etag_stub():
+    with StubServer(etags=True) as server:
+        yield server
+
+
+@pytest.fixture
+def etag_client(etag_stub, key_file):
+    from asc.auth import TokenProvider
+    from asc.client import Client
+
+    c = Client(base_url=etag_stub.url, token_provider=TokenProvider(key_file=key_file))
+    yield c
+    c.close()
+
+
+def test_unchanged_resource_is_answered_with_304(etag_stub, etag_client):
+    fetcher = ConditionalFetcher(etag_client)
+    endpoint = 'ciWorkflows/workflow-1/buildRuns'
+
+    first, changed = fetcher.get(endpoint, {'limit': 5})
+    assert changed
+    again, changed = fetcher.get(endpoint, {'limit': 5})
+    assert not changed and again == first
+    assert fetcher.not_modified == 1
+    assert etag_stub.requests[1]['headers']['If-None-Match']
+
+    etag_stub.routes['/v1/' + endpoint] = {'data': [run(31, 'PENDING')]}
+    payload, changed = fetcher.get(endpoint, {'limit': 5})
+    assert changed and payload['data'][0]['attributes']['number'] == 31
+
+
+def test_a_304_with_nothing_stored_is_fetched_again(etag_stub, etag_client):
+    fetcher = ConditionalFetcher(etag_client)
+    # A proxy in between answers 304 to a request that sent no validators
+    etag_stub.inject(304)
+    payload, changed = fetcher.get('ciWorkflows/workflow-1/buildRuns', {'limit': 5})
+    assert changed and payload['data'][0]['id'] == 'run-30'
+    assert len(etag_stub.requests) == 2 and 'If-None-Match' not in etag_stub.requests[1]['headers']
+
+
+def test_watching_a_build_costs_a_fraction_of_fixed_polling(etag_stub, etag_client):
+    # Build #31 queues for 30 s, runs for 15 minutes, then the workflow sits idle
+    now = [0.0]
+
+    def build_runs(method, query, body):
+        t = now[0]
+        if t < 30:
+            latest = run(31, 'PENDING')
+        elif t < 930:
+            latest = run(31, 'RUNNING')
+        else:
+            latest = run(31, 'COMPLETE', 'SUCCEEDED')
+        return 200, {'data': [latest, run(30, 'COMPLETE', 'SUCCEEDED')]}
+
+    etag_stub.routes['/v1/ciWorkflows/workflow-1/buildRuns'] = build_runs
+    fetcher = ConditionalFetcher(etag_client, clock=lambda: now[0])
+    schedule = PollSchedule()
+
+    state, events = None, []
+    while now[0] < 3600:
+        payload, _ = fetcher.get('ciWorkflows/workflow-1/buildRuns', {'limit': 5})
+        current = snapshot(payload['data'])
+        new_events = diff(state, current) if state is not None else []
+        events += [str(e) for e in new_events]
+        state = current
+        now[0] += schedule.next(is_active(state), bool(new_events))
+
+    assert events == ['build #31 moved PENDING→RUNNING', 'build #31 moved RUNNING→COMPLETE',
+                      'build #31 finished SUCCEEDED']
+    # A fixed 10 s loop makes 360 requests in this hour
+    assert fetcher.requests < 360 / 4
+    assert fetcher.requests_last_hour() < fetcher.requests
+    assert fetcher.not_modified >= fetcher.requests - 4
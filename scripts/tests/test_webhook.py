@@ -0,0 +1,106 @@
+import json
+from pathlib import Path
+
+import pytest
+import requests
+
+from asc.history import BuildHistory
+from asc.webhook import (BUILD_RUN_EVENT, EventBus, WebhookReceiver, event_from_run, parse_event, send,
+                         sign, wait_for_events)
+
+PAYLOADS = Path(__file__).parent / 'data' / 'webhooks'
+SECRET = 'test-secret'
+
+
+def recorded(name):
+    return (PAYLOADS / name).read_bytes()
+
+
+@pytest.fixture
+def bus():
+    return EventBus()
+
+
+@pytest.fixture
+def receiver(bus):
+    with WebhookReceiver(bus, secret=SECRET, port=0) as r:
+        yield r
+
+
+def test_signed_replays_reach_every_subscriber(bus, receiver, tmp_path):
+    terminal, notifications = [], []
+    bus.subscribe(lambda e: terminal.append(e.attributes['executionProgress']), kinds=[BUILD_RUN_EVENT])
+    bus.subscribe(notifications.append)
+
+    with BuildHistory(tmp_path / 'history.sqlite') as history:
+        bus.subscribe(history.record_event, kinds=[BUILD_RUN_EVENT])
+        for name in ('build_created.json', 'build_started.json', 'build_completed.json', 'build_upload_state.json'):
+            assert send(receiver.url, recorded(name), SECRET) == 200
+        assert bus.dispatch(timeout=1) == 4
+
+        [run] = history.recent_runs('workflow-1')
+        assert (run['number'], run['execution_progress'], run['completion_status']) == (31, 'COMPLETE', 'SUCCEEDED')
+        assert run['duration_seconds'] == 930
+        assert run['commit_sha'] == '4b1c0de'
+
+    assert terminal == ['PENDING', 'RUNNING', 'COMPLETE']
+    upload = notifications[-1]
+    assert (upload.kind, upload.resource_id, upload.attributes['newState']) == \
+        ('buildUploadStateUpdated', 'upload-31', 'COMPLETE')
+
+
+def test_bad_signatures_and_bodies_are_rejected(bus, receiver):
+    body = recorded('build_started.json')
+    assert send(receiver.url, body, 'wrong-secret') == 401
+    assert requests.post(receiver.url, data=body, timeout=5).status_code == 401
+    assert send(receiver.url, b'not json', SECRET) == 400
+    assert send(receiver.url.replace('/webhook', '/other'), body, SECRET) == 404
+
+    assert receiver.rejected == 3 and receiver.received == 0
+    assert bus.dispatch(timeout=0) == 0
+
+
+def test_redeliveries_are_published_once(bus, receiver):
+    seen = []
+    bus.subscribe(seen.append)
+    for _ in range(3):
+        assert send(receiver.url, recorded('build_completed.json'), SECRET) == 200
+
+    bus.dispatch(timeout=1)
+    assert len(seen) == 1 and bus.duplicates == 2
+
+
+def test_failing_subscriber_does_not_starve_the_others(bus, capsys):
+    def broken(event):
+        raise RuntimeError('boom')
+
+    seen = []
+    bus.subscribe(broken)
+    bus.subscribe(seen.append)
+    bus.publish(parse_event(json.loads(recorded('build_started.json'))))
+
+    assert bus.dispatch() == 1 and len(seen) == 1
+    assert 'boom' in capsys.readouterr().err
+
+
+def test_reconciliation_runs_between_events():
+    bus, now, calls = EventBus(), [0.0], []
+
+    def reconcile():
+        calls.append(now[0])
+        bus.publish(event_from_run({'id': 'run-32', 'attributes': {'number': 32}}, 'workflow-1'))
+        if len(calls) == 3:
+            raise KeyboardInterrupt
+
+    def fake_dispatch(timeout=None):
+        now[0] += timeout
+        return 0
+
+    bus.dispatch = fake_dispatch
+    with pytest.raises(KeyboardInterrupt):
+        wait_for_events(bus, reconcile, 600, clock=lambda: now[0])
+    assert calls == [600, 1200, 1800]
+
+
+def test_signature_format():
+    assert sign('k', b'{}').startswith('hmacsha256=')